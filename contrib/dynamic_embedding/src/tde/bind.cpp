@@ -46,6 +46,10 @@ TORCH_LIBRARY(tde, m) {
            std::string,
            int64_t>())
       .def("fetch", &PS::Fetch)
-      .def("evict", &PS::Evict);
+      .def("evict", &PS::Evict)
+      .def("write", &PS::Write)
+      .def("sync_fetch", [](const c10::intrusive_ptr<PS>& self) {
+        self->SyncFetch();
+      });
 }
 } // namespace tde
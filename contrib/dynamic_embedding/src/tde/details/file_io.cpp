@@ -0,0 +1,363 @@
+#include "tde/details/file_io.h"
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#include <chrono>
+#include <cstdio>
+#include <cstring>
+#include <filesystem>
+#include "torch/torch.h"
+
+namespace tde::details {
+
+void RegisterFileIO() {
+  auto& reg = IORegistry::Instance();
+
+  IOProvider provider{};
+  provider.type_ = "file";
+  provider.Initialize = +[](const char* cfg) -> void* {
+    auto opt = file_v1::Option::Parse(cfg);
+    return new file_v1::FileIO(std::move(opt));
+  };
+  provider.Finalize =
+      +[](void* inst) { delete reinterpret_cast<file_v1::FileIO*>(inst); };
+  provider.Pull = +[](void* inst, IOPullParameter param) {
+    reinterpret_cast<file_v1::FileIO*>(inst)->Pull(param);
+  };
+  provider.Push = +[](void* inst, IOPushParameter param) {
+    reinterpret_cast<file_v1::FileIO*>(inst)->Push(param);
+  };
+  reg.Register(provider);
+}
+
+namespace file_v1 {
+
+static constexpr std::string_view k_option_separator = "&&";
+static constexpr uint32_t k_record_magic = 0x46454454; // "TDEF"
+
+/**
+ * Header of a record in a data file. It is written after the data, so a
+ * record is only visible when it is complete. The bytes after the last
+ * record are zeros (the data file is created by ftruncate).
+ */
+struct RecordHeader {
+  uint32_t magic_;
+  uint32_t len_;
+  int64_t global_id_;
+  int64_t col_id_;
+  uint32_t os_id_;
+  uint32_t reserved_;
+};
+static_assert(sizeof(RecordHeader) == 32);
+
+static uint64_t RecordSize(uint64_t len) {
+  // keep the headers 8 bytes aligned
+  return sizeof(RecordHeader) + ((len + 7) & ~static_cast<uint64_t>(7));
+}
+
+static uint32_t ParseDurationMs(std::string_view str) {
+  size_t unit_pos = str.find_first_not_of("0123456789.");
+  TORCH_CHECK(
+      unit_pos != 0 && unit_pos != std::string_view::npos,
+      "duration should be a number followed by ms, s or m, got ",
+      str);
+  double val = std::stod(std::string(str.substr(0, unit_pos)));
+  auto unit = str.substr(unit_pos);
+  if (unit == "s") {
+    val *= 1000;
+  } else if (unit == "m") {
+    val *= 1000 * 60;
+  } else {
+    TORCH_CHECK(unit == "ms", "unit should in [s, m, ms]");
+  }
+  return static_cast<uint32_t>(val);
+}
+
+Option::Option(std::string_view config_str) {
+  auto param_pos = config_str.find('?');
+  auto path = config_str.substr(0, param_pos);
+  while (path.size() > 1 && path.back() == '/') {
+    path.remove_suffix(1);
+  }
+  TORCH_CHECK(!path.empty(), "file io needs a directory, file:///path/to/dir");
+  path_ = std::string(path);
+
+  if (param_pos == std::string_view::npos) {
+    return;
+  }
+  auto params = config_str.substr(param_pos + 1);
+  while (!params.empty()) {
+    auto end = params.find(k_option_separator);
+    auto param = params.substr(0, end);
+    params = end == std::string_view::npos
+        ? std::string_view{}
+        : params.substr(end + k_option_separator.size());
+
+    auto eq = param.find('=');
+    TORCH_CHECK(eq != std::string_view::npos, "parse param error ", param);
+    auto key = param.substr(0, eq);
+    auto value = std::string(param.substr(eq + 1));
+    if (key == "chunk_size_mb") {
+      uint64_t chunk_size_mb = std::stoull(value);
+      TORCH_CHECK(chunk_size_mb != 0);
+      chunk_size_ = chunk_size_mb << 20;
+    } else if (key == "flush_interval") {
+      flush_interval_ms_ = ParseDurationMs(value);
+      TORCH_CHECK(flush_interval_ms_ != 0);
+    } else {
+      TORCH_CHECK(false, "unknown option ", key);
+    }
+  }
+}
+
+FileIO::FileIO(Option opt) : opt_(std::move(opt)) {
+  std::filesystem::create_directories(opt_.path_);
+  flush_thread_ = std::thread([this] {
+    std::chrono::milliseconds interval(opt_.flush_interval_ms_);
+    std::unique_lock<std::mutex> lock(flush_mu_);
+    while (!flush_cv_.wait_for(lock, interval, [this] { return stopped_; })) {
+      lock.unlock();
+      Flush(false);
+      lock.lock();
+    }
+  });
+}
+
+FileIO::~FileIO() {
+  {
+    std::lock_guard<std::mutex> guard(flush_mu_);
+    stopped_ = true;
+  }
+  flush_cv_.notify_all();
+  flush_thread_.join();
+  Flush(true);
+  for (auto& [_, table] : tables_) {
+    for (auto& chunk : table->chunks_) {
+      CloseChunk(chunk);
+    }
+  }
+}
+
+FileIO::Table& FileIO::GetTable(const std::string& table_name) {
+  {
+    std::shared_lock<std::shared_mutex> lock(tables_mu_);
+    auto it = tables_.find(table_name);
+    if (it != tables_.end()) {
+      return *it->second;
+    }
+  }
+  std::unique_lock<std::shared_mutex> lock(tables_mu_);
+  auto& table = tables_[table_name];
+  if (table == nullptr) {
+    TORCH_CHECK(
+        table_name.find('/') == std::string::npos,
+        "table name should not contain '/', got ",
+        table_name);
+    auto new_table = std::make_unique<Table>();
+    LoadTable(table_name, *new_table);
+    table = std::move(new_table);
+  }
+  return *table;
+}
+
+static std::filesystem::path ChunkPath(
+    const std::string& dir,
+    const std::string& table_name,
+    uint32_t chunk_idx) {
+  char suffix[32];
+  snprintf(suffix, sizeof(suffix), ".%06u.chunk", chunk_idx);
+  return std::filesystem::path(dir) / (table_name + suffix);
+}
+
+void FileIO::LoadTable(const std::string& table_name, Table& table) {
+  for (uint32_t chunk_idx = 0;
+       std::filesystem::exists(ChunkPath(opt_.path_, table_name, chunk_idx));
+       ++chunk_idx) {
+    Chunk chunk = OpenChunk(table_name, chunk_idx);
+    uint64_t offset = 0;
+    while (offset + sizeof(RecordHeader) <= chunk.size_) {
+      RecordHeader header{};
+      memcpy(&header, chunk.data_ + offset, sizeof(header));
+      if (header.magic_ != k_record_magic) {
+        break;
+      }
+      table.index_[Key{header.global_id_, header.col_id_, header.os_id_}] =
+          Location{
+              .chunk_ = chunk_idx,
+              .len_ = header.len_,
+              .offset_ = offset + sizeof(RecordHeader),
+          };
+      offset += RecordSize(header.len_);
+    }
+    table.chunks_.emplace_back(chunk);
+    table.tail_ = offset;
+  }
+}
+
+FileIO::Chunk FileIO::OpenChunk(
+    const std::string& table_name,
+    uint32_t chunk_idx) const {
+  auto path = ChunkPath(opt_.path_, table_name, chunk_idx);
+  Chunk chunk;
+  chunk.fd_ = open(path.c_str(), O_RDWR | O_CREAT, 0644);
+  TORCH_CHECK(chunk.fd_ >= 0, "cannot open ", path, ", errno ", errno);
+  struct stat st {};
+  TORCH_CHECK(fstat(chunk.fd_, &st) == 0, "cannot stat ", path);
+  chunk.size_ = st.st_size;
+  if (chunk.size_ == 0) {
+    chunk.size_ = opt_.chunk_size_;
+    TORCH_CHECK(
+        ftruncate(chunk.fd_, static_cast<off_t>(chunk.size_)) == 0,
+        "cannot allocate ",
+        path,
+        ", errno ",
+        errno);
+  }
+  void* data = mmap(
+      nullptr, chunk.size_, PROT_READ | PROT_WRITE, MAP_SHARED, chunk.fd_, 0);
+  TORCH_CHECK(data != MAP_FAILED, "cannot mmap ", path, ", errno ", errno);
+  chunk.data_ = reinterpret_cast<uint8_t*>(data);
+  return chunk;
+}
+
+void FileIO::CloseChunk(Chunk& chunk) const {
+  if (chunk.data_ != nullptr) {
+    munmap(chunk.data_, chunk.size_);
+    chunk.data_ = nullptr;
+  }
+  if (chunk.fd_ >= 0) {
+    close(chunk.fd_);
+    chunk.fd_ = -1;
+  }
+}
+
+FileIO::Location
+FileIO::Allocate(const std::string& table_name, Table& table, uint64_t size) {
+  TORCH_CHECK(
+      size <= opt_.chunk_size_,
+      "record of ",
+      size,
+      " bytes does not fit in a chunk of ",
+      opt_.chunk_size_,
+      " bytes");
+  if (table.chunks_.empty() ||
+      table.tail_ + size > table.chunks_.back().size_) {
+    table.chunks_.emplace_back(OpenChunk(
+        table_name, static_cast<uint32_t>(table.chunks_.size())));
+    table.tail_ = 0;
+  }
+  auto& chunk = table.chunks_.back();
+  chunk.dirty_ = true;
+  Location location{
+      .chunk_ = static_cast<uint32_t>(table.chunks_.size() - 1),
+      .len_ = 0,
+      .offset_ = table.tail_,
+  };
+  table.tail_ += size;
+  return location;
+}
+
+void FileIO::Flush(bool sync) {
+  std::shared_lock<std::shared_mutex> lock(tables_mu_);
+  for (auto& [_, table] : tables_) {
+    std::unique_lock<std::shared_mutex> table_lock(table->mu_);
+    for (auto& chunk : table->chunks_) {
+      if (!chunk.dirty_) {
+        continue;
+      }
+      // called from the flush thread, report and retry at the next flush
+      if (msync(chunk.data_, chunk.size_, sync ? MS_SYNC : MS_ASYNC) != 0) {
+        TORCH_WARN("msync error, errno ", errno);
+        continue;
+      }
+      chunk.dirty_ = false;
+    }
+  }
+}
+
+void FileIO::Pull(IOPullParameter param) {
+  std::vector<int64_t> col_ids;
+  if (param.num_cols_ == 0) {
+    col_ids.emplace_back(-1);
+  } else {
+    col_ids.assign(param.col_ids_, param.col_ids_ + param.num_cols_);
+  }
+
+  auto& table = GetTable(param.table_name_);
+  {
+    std::shared_lock<std::shared_mutex> lock(table.mu_);
+    for (uint32_t i = 0; i < param.num_global_ids_; ++i) {
+      int64_t gid = param.global_ids_[i];
+      for (uint32_t j = 0; j < col_ids.size(); ++j) {
+        uint32_t offset = j + i * col_ids.size();
+        for (uint32_t os_id = 0; os_id < param.num_optimizer_stats_; ++os_id) {
+          auto it = table.index_.find(Key{gid, col_ids[j], os_id});
+          if (it == table.index_.end()) {
+            param.on_global_id_fetched_(
+                param.on_complete_context_, offset, os_id, nullptr, 0);
+            continue;
+          }
+          const Location& location = it->second;
+          param.on_global_id_fetched_(
+              param.on_complete_context_,
+              offset,
+              os_id,
+              table.chunks_[location.chunk_].data_ + location.offset_,
+              location.len_);
+        }
+      }
+    }
+  }
+  param.on_all_fetched_(param.on_complete_context_);
+}
+
+void FileIO::Push(IOPushParameter param) {
+  std::vector<int64_t> col_ids;
+  if (param.num_cols_ == 0) {
+    col_ids.emplace_back(-1);
+  } else {
+    col_ids.assign(param.col_ids_, param.col_ids_ + param.num_cols_);
+  }
+  uint32_t num_os = param.num_optimizer_stats_;
+  auto* data = reinterpret_cast<const uint8_t*>(param.data_);
+
+  std::string table_name = param.table_name_;
+  auto& table = GetTable(table_name);
+  {
+    std::unique_lock<std::shared_mutex> lock(table.mu_);
+    for (uint32_t i = 0; i < param.num_global_ids_; ++i) {
+      int64_t gid = param.global_ids_[i];
+      for (uint32_t j = 0; j < col_ids.size(); ++j) {
+        for (uint32_t k = 0; k < num_os; ++k) {
+          uint32_t os_id = param.optimizer_stats_ids_[k];
+          uint32_t offset = k + j * num_os + i * col_ids.size() * num_os;
+          uint64_t beg = param.offsets_[offset];
+          auto len = static_cast<uint32_t>(param.offsets_[offset + 1] - beg);
+
+          Location location = Allocate(table_name, table, RecordSize(len));
+          uint8_t* record =
+              table.chunks_[location.chunk_].data_ + location.offset_;
+          memcpy(record + sizeof(RecordHeader), data + beg, len);
+          RecordHeader header{
+              .magic_ = k_record_magic,
+              .len_ = len,
+              .global_id_ = gid,
+              .col_id_ = col_ids[j],
+              .os_id_ = os_id,
+              .reserved_ = 0,
+          };
+          memcpy(record, &header, sizeof(header));
+
+          location.len_ = len;
+          location.offset_ += sizeof(RecordHeader);
+          table.index_[Key{gid, col_ids[j], os_id}] = location;
+        }
+      }
+    }
+  }
+  param.on_push_complete(param.on_complete_context_);
+}
+
+} // namespace file_v1
+} // namespace tde::details
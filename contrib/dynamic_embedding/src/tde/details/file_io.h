@@ -0,0 +1,135 @@
+#pragma once
+#include <condition_variable>
+#include <functional>
+#include <memory>
+#include <shared_mutex>
+#include <string>
+#include <string_view>
+#include <thread>
+#include <vector>
+#include "c10/util/flat_hash_map.h"
+#include "tde/details/io_registry.h"
+
+namespace tde::details {
+
+extern void RegisterFileIO();
+
+namespace file_v1 {
+
+/**
+ * Option of the local file IO, parsed from `/path/to/dir/?option&&option`.
+ *
+ * Options:
+ *  - chunk_size_mb=N: size of a data file, in MiB. Default 256.
+ *  - flush_interval=Duration: interval of the background flush of the
+ *    written data files, e.g. 500ms, 1s. Default 1s.
+ */
+struct Option {
+ public:
+  std::string path_;
+  uint64_t chunk_size_{256ULL << 20};
+  uint32_t flush_interval_ms_{1000};
+
+  Option() = default;
+
+  static Option Parse(std::string_view config_str) {
+    return Option(config_str);
+  }
+
+ private:
+  Option(std::string_view config_str);
+};
+
+/**
+ * A parameter server on the local file system.
+ *
+ * Each table is stored in memory-mapped data files of `chunk_size` bytes under
+ * `path`, named `<table>.<chunk index>.chunk`. Pushes append one record
+ * (a header with global id, column id and optimizer state id, followed by the
+ * data) per row and optimizer state, so a chunk is only written sequentially.
+ * An in-memory index from the ids to the latest record of each row serves the
+ * pulls, it is rebuilt by scanning the data files when a table is first used.
+ * Overwritten records are not reclaimed.
+ *
+ * Pulls and pushes are served synchronously from the mapped files, the dirty
+ * data files are written back by a background thread every
+ * `flush_interval_ms`, and on destruction.
+ */
+class FileIO {
+ public:
+  explicit FileIO(Option opt);
+
+  ~FileIO();
+
+  FileIO(const FileIO&) = delete;
+  FileIO& operator=(const FileIO&) = delete;
+
+  void Pull(IOPullParameter param);
+
+  void Push(IOPushParameter param);
+
+ private:
+  struct Key {
+    int64_t global_id_;
+    int64_t col_id_;
+    uint32_t os_id_;
+
+    bool operator==(const Key& other) const {
+      return global_id_ == other.global_id_ && col_id_ == other.col_id_ &&
+          os_id_ == other.os_id_;
+    }
+  };
+
+  struct KeyHash {
+    size_t operator()(const Key& key) const {
+      size_t h = std::hash<int64_t>()(key.global_id_);
+      h = h * 31 + std::hash<int64_t>()(key.col_id_);
+      return h * 31 + key.os_id_;
+    }
+  };
+
+  struct Location {
+    uint32_t chunk_;
+    uint32_t len_;
+    uint64_t offset_;
+  };
+
+  struct Chunk {
+    int fd_{-1};
+    uint8_t* data_{nullptr};
+    uint64_t size_{0};
+    bool dirty_{false};
+  };
+
+  struct Table {
+    std::shared_mutex mu_;
+    ska::flat_hash_map<Key, Location, KeyHash> index_;
+    std::vector<Chunk> chunks_;
+    // write position in the last chunk
+    uint64_t tail_{0};
+  };
+
+  Table& GetTable(const std::string& table_name);
+  void LoadTable(const std::string& table_name, Table& table);
+  Chunk OpenChunk(const std::string& table_name, uint32_t chunk_idx) const;
+  void CloseChunk(Chunk& chunk) const;
+  /**
+   * Reserves `size` bytes at the tail of the table, starting a new chunk if
+   * they do not fit in the last one.
+   * @return chunk index and offset of the reserved bytes.
+   */
+  Location Allocate(const std::string& table_name, Table& table, uint64_t size);
+  void Flush(bool sync);
+
+  Option opt_;
+  std::shared_mutex tables_mu_;
+  ska::flat_hash_map<std::string, std::unique_ptr<Table>> tables_;
+
+  std::thread flush_thread_;
+  std::mutex flush_mu_;
+  std::condition_variable flush_cv_;
+  bool stopped_{false};
+};
+
+} // namespace file_v1
+} // namespace tde::details
@@ -0,0 +1,113 @@
+#include <filesystem>
+#include "gtest/gtest.h"
+#include "tde/details/io.h"
+#include "tde/details/notification.h"
+
+namespace tde::details {
+static int _r = [] {
+  IORegistry::RegisterAllDefaultIOs();
+  return 0;
+}();
+
+static void Push(
+    IO& io,
+    const std::vector<int64_t>& global_ids,
+    const std::vector<float>& params,
+    uint32_t dim) {
+  constexpr static uint32_t os_ids[] = {0};
+  std::vector<uint64_t> offsets;
+  for (size_t i = 0; i <= global_ids.size(); ++i) {
+    offsets.emplace_back(i * dim * sizeof(float));
+  }
+  Notification notification;
+  io.Push(
+      "table",
+      global_ids,
+      {},
+      tcb::span<const uint32_t>(os_ids, 1),
+      tcb::span<const uint8_t>(
+          reinterpret_cast<const uint8_t*>(params.data()),
+          params.size() * sizeof(float)),
+      offsets,
+      [&notification] { notification.Done(); });
+  notification.Wait();
+}
+
+static std::vector<torch::Tensor> Pull(
+    IO& io,
+    const std::vector<int64_t>& global_ids) {
+  std::vector<torch::Tensor> result;
+  Notification notification;
+  io.Pull(
+      "table",
+      global_ids,
+      {},
+      1,
+      torch::kF32,
+      [&](std::vector<torch::Tensor> val) {
+        result = std::move(val);
+        notification.Done();
+      });
+  notification.Wait();
+  return result;
+}
+
+TEST(TDE, IO_file) {
+  auto dir = std::filesystem::temp_directory_path() / "tde_file_io_test";
+  std::filesystem::remove_all(dir);
+  std::string config = "file://" + dir.string() + "/?chunk_size_mb=1";
+
+  {
+    IO io(config);
+    Push(io, {1, 3, 4}, {1, 2, 3, 4, 5, 9}, 2);
+    // the latest push of an id wins
+    Push(io, {3}, {7, 8}, 2);
+    auto val = Pull(io, {1, 3, 4, 5});
+    ASSERT_EQ(val.size(), 4);
+    ASSERT_TRUE(val[0].allclose(torch::tensor({{1.0f, 2.0f}})));
+    ASSERT_TRUE(val[1].allclose(torch::tensor({{7.0f, 8.0f}})));
+    ASSERT_TRUE(val[2].allclose(torch::tensor({{5.0f, 9.0f}})));
+    ASSERT_FALSE(val[3].defined());
+  }
+
+  // the index is rebuilt from the data files
+  IO io(config);
+  auto val = Pull(io, {1, 3, 4});
+  ASSERT_TRUE(val[0].allclose(torch::tensor({{1.0f, 2.0f}})));
+  ASSERT_TRUE(val[1].allclose(torch::tensor({{7.0f, 8.0f}})));
+  ASSERT_TRUE(val[2].allclose(torch::tensor({{5.0f, 9.0f}})));
+}
+
+TEST(TDE, IO_file_multiple_chunks) {
+  auto dir = std::filesystem::temp_directory_path() / "tde_file_io_chunks_test";
+  std::filesystem::remove_all(dir);
+  std::string config = "file://" + dir.string() + "?chunk_size_mb=1";
+
+  // 32 bytes header + 64 bytes data per row, ~3 chunks
+  constexpr uint32_t dim = 16;
+  constexpr int64_t num_ids = 30000;
+  std::vector<int64_t> global_ids;
+  std::vector<float> params;
+  for (int64_t i = 0; i < num_ids; ++i) {
+    global_ids.emplace_back(i);
+    for (uint32_t j = 0; j < dim; ++j) {
+      params.emplace_back(static_cast<float>(i * dim + j));
+    }
+  }
+
+  {
+    IO io(config);
+    Push(io, global_ids, params, dim);
+  }
+  ASSERT_TRUE(std::filesystem::exists(dir / "table.000002.chunk"));
+
+  IO io(config);
+  auto val = Pull(io, global_ids);
+  ASSERT_EQ(val.size(), num_ids);
+  for (int64_t i = 0; i < num_ids; i += 997) {
+    ASSERT_TRUE(val[i].allclose(
+        torch::arange(i * dim, (i + 1) * dim, torch::kF32).view({1, dim})));
+  }
+}
+
+} // namespace tde::details
@@ -10,10 +10,24 @@ IDTransformer::IDTransformer(int64_t num_embeddings, nlohmann::json json)
               ? Variant(NaiveIDTransformer<uint32_t>(num_embeddings))
               : Variant(CachelineIDTransformer<uint32_t>(num_embeddings))) {}
 
-std::vector<int64_t> IDTransformer::Evict(int64_t num_to_evict) {
-  // Get the ids to evict from lxu strategy.
+std::vector<int64_t> IDTransformer::Evict(
+    int64_t num_to_evict,
+    int64_t keep_since_time) {
+  // Get the ids to evict from lxu strategy, skipping the ids used at or after
+  // keep_since_time.
   std::vector<int64_t> ids_to_evict = std::visit(
-      [&](auto&& s) { return strategy_.Evict(s.Iterator(), num_to_evict); },
+      [&](auto&& s) {
+        auto evictable = [&, iterator = s.Iterator()]() mutable {
+          while (true) {
+            auto val = iterator();
+            if (!val.has_value() ||
+                strategy_.Time(val->lxu_record_) < keep_since_time) {
+              return val;
+            }
+          }
+        };
+        return strategy_.Evict(std::move(evictable), num_to_evict);
+      },
       var_);
   // get the cache id of the ids to evict.
   std::vector<int64_t> cache_ids(ids_to_evict.size());
@@ -1,4 +1,5 @@
 #pragma once
+#include <limits>
 #include <type_traits>
 #include <variant>
 #include "nlohmann/json.hpp"
@@ -30,7 +31,17 @@ class IDTransformer {
       tcb::span<int64_t> cache_ids,
       Fetch fetch = transform_default::NoFetch);
 
-  std::vector<int64_t> Evict(int64_t num_to_evict);
+  /**
+   * Evict ids from the transformer.
+   *
+   * @param num_to_evict
+   * @param keep_since_time the ids used at or after this time are not
+   * evicted.
+   * @return the [global id, cache id] pairs of the evicted ids.
+   */
+  std::vector<int64_t> Evict(
+      int64_t num_to_evict,
+      int64_t keep_since_time = std::numeric_limits<int64_t>::max());
   std::vector<int64_t> Save(int64_t time);
 
   struct LXUStrategy {
@@ -1,5 +1,6 @@
 #include "tde/details/io_registry.h"
 #include "dlfcn.h"
+#include "tde/details/file_io.h"
 #include "tde/details/redis_io.h"
 #include "torch/torch.h"
 
@@ -67,6 +68,7 @@ IORegistry& IORegistry::Instance() {
 
 void IORegistry::RegisterAllDefaultIOs() {
   RegisterRedisIO();
+  RegisterFileIO();
 }
 
 } // namespace tde::details
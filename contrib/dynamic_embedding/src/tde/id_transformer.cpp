@@ -66,10 +66,13 @@ c10::intrusive_ptr<TransformResult> IDTransformer::Transform(
           torch::TensorOptions().dtype(c10::kLong).device(c10::kCPU)));
 }
 
-torch::Tensor IDTransformer::Evict(int64_t num_to_evict) {
+torch::Tensor IDTransformer::Evict(
+    int64_t num_to_evict,
+    int64_t keep_since_time) {
   std::lock_guard<std::mutex> lock(mu_);
   torch::NoGradGuard no_grad;
-  std::vector<int64_t> ids_to_evict = transformer_.Evict(num_to_evict);
+  std::vector<int64_t> ids_to_evict =
+      transformer_.Evict(num_to_evict, keep_since_time);
   int64_t num_ids_to_evict = ids_to_evict.size() / 2;
   return torch::tensor(ids_to_evict, torch::dtype(torch::kLong))
       .reshape({num_ids_to_evict, 2});
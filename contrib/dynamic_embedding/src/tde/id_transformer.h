@@ -21,7 +21,7 @@ class IDTransformer : public torch::CustomClassHolder {
       c10::intrusive_ptr<TensorList> cache_ids,
       int64_t time);
 
-  torch::Tensor Evict(int64_t num_to_evict);
+  torch::Tensor Evict(int64_t num_to_evict, int64_t keep_since_time);
   torch::Tensor Save();
 
  private:
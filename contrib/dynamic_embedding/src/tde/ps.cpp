@@ -94,15 +94,51 @@ void PS::Evict(torch::Tensor ids_to_evict) {
   // make sure all previous fetches are done.
   SyncFetch();
 
-  std::vector<int64_t> col_ids{0};
   // remove this copy!
   Filter(ids_to_evict);
   if (global_ids_to_fetch_or_evict_.empty()) {
     return;
   }
+  Push(global_ids_to_fetch_or_evict_, [this](uint32_t i) {
+    return GetTensorViews(cache_ids_to_fetch_or_evict_[i]);
+  });
+}
+
+void PS::Write(
+    torch::Tensor global_ids,
+    c10::intrusive_ptr<TensorList> rows) {
+  std::lock_guard<std::mutex> lock(mu_);
+  torch::NoGradGuard no_grad;
+  TORCH_CHECK(global_ids.dim() == 1);
+  TORCH_CHECK(rows->size() == static_cast<int64_t>(os_ids_.size()));
+  // make sure all previous fetches are done.
+  SyncFetch();
+
+  auto ids = global_ids.to(torch::kCPU, torch::kInt64).contiguous();
+  std::vector<int64_t> ids_to_write(
+      ids.data_ptr<int64_t>(), ids.data_ptr<int64_t>() + ids.numel());
+  if (ids_to_write.empty()) {
+    return;
+  }
+  for (auto& row : *rows) {
+    TORCH_CHECK(row.size(0) == ids.numel());
+  }
+  Push(ids_to_write, [&rows](uint32_t i) {
+    std::vector<torch::Tensor> result;
+    result.reserve(rows->size());
+    for (auto& row : *rows) {
+      result.emplace_back(row.slice(0, i, i + 1));
+    }
+    return result;
+  });
+}
 
+void PS::Push(
+    const std::vector<int64_t>& global_ids,
+    const std::function<std::vector<torch::Tensor>(uint32_t)>& get_rows) {
+  std::vector<int64_t> col_ids{0};
   uint32_t num_os_ids = os_ids_.size();
-  uint32_t num_ids_to_fetch = global_ids_to_fetch_or_evict_.size();
+  uint32_t num_ids_to_fetch = global_ids.size();
 
   details::Notification notification;
   // Done first so that the Wait after preparing the first chunk won't stuck.
@@ -119,8 +155,7 @@ void PS::Evict(torch::Tensor ids_to_evict) {
 
     std::vector<torch::Tensor> all_tensors;
     for (uint32_t j = i; j < i + num_ids_in_chunk; ++j) {
-      int64_t cache_id = cache_ids_to_fetch_or_evict_[j];
-      std::vector<torch::Tensor> tensors = GetTensorViews(cache_id);
+      std::vector<torch::Tensor> tensors = get_rows(j);
       all_tensors.insert(all_tensors.end(), tensors.begin(), tensors.end());
     }
     torch::Tensor data = torch::cat(all_tensors, 0).cpu();
@@ -139,7 +174,7 @@ void PS::Evict(torch::Tensor ids_to_evict) {
     notification.Clear();
     io_.Push(
         table_name_,
-        tcb::span{global_ids_to_fetch_or_evict_.data() + i, num_ids_in_chunk},
+        tcb::span{global_ids.data() + i, num_ids_in_chunk},
         col_ids,
         os_ids_,
         tcb::span{
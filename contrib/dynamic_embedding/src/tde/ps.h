@@ -11,6 +11,7 @@
 #include <torch/torch.h>
 
 #include <deque>
+#include <functional>
 #include <utility>
 #include "tde/details/io.h"
 #include "tde/notification.h"
@@ -97,6 +98,14 @@ class PS : public torch::CustomClassHolder {
       double weight_init_max);
   void Evict(torch::Tensor ids_to_evict);
 
+  /**
+   * Push `rows` of `global_ids` to the PS, instead of rows of the cache.
+   * @param global_ids 1-D global ids.
+   * @param rows one [global_ids.size(0), col_size] tensor per optimizer state,
+   * the first one being the parameter.
+   */
+  void Write(torch::Tensor global_ids, c10::intrusive_ptr<TensorList> rows);
+
   void SyncFetch(int64_t time = -1);
 
  private:
@@ -105,6 +114,9 @@ class PS : public torch::CustomClassHolder {
   std::vector<int64_t> cache_ids_to_fetch_or_evict_;
 
   void Filter(const torch::Tensor& tensor);
+  void Push(
+      const std::vector<int64_t>& global_ids,
+      const std::function<std::vector<torch::Tensor>(uint32_t)>& get_rows);
 
   std::mutex mu_;
   std::mutex fetch_notifications_mutex_;
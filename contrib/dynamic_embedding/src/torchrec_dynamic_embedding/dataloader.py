@@ -7,6 +7,7 @@
 
 import queue
 import threading
+import time
 from typing import Dict, List, Union
 
 import torch
@@ -75,6 +76,159 @@ class DataLoaderIter:
         return data
 
 
+class LookaheadDataLoaderIter:
+    def __init__(
+        self,
+        dataloader,
+        transform_fn,
+        id_transformer_group,
+        num_lookahead,
+        num_batches_in_training=1,
+    ):
+        """
+        Iterator transforming the batches up to `num_lookahead` batches ahead of
+        the one being trained, so that their PS fetches are issued early.
+
+        The fetch handles of each batch are waited for in order by a separate
+        thread, so getting the next batch only blocks if its fetches are not done
+        yet. Such batches are counted in `num_late_batches` and the time spent
+        waiting for them in `fetch_wait_seconds`.
+
+        A batch is considered trained once `num_batches_in_training` more batches
+        are requested, e.g. 1 for a loop training each batch before requesting the
+        next one, or 3 for `TrainPipelineSparseDist`, which requests batch i + 2
+        before training batch i. Before ids are evicted, the transform waits for
+        the batches transformed earlier to be trained, except the ones still held
+        by the training loop while it requests the next batch, and the ids of
+        these are not evicted.
+
+        The threads of the iterator reference it, call `close` to stop them if the
+        iterator is not exhausted.
+        """
+        self._num_lookahead = num_lookahead
+        self._num_batches_in_training = num_batches_in_training
+        self._id_transformer_group = id_transformer_group
+        self.num_late_batches = 0
+        self.fetch_wait_seconds = 0.0
+
+        # number of batches transformed (or being transformed) and not trained
+        self._num_in_flight = 0
+        # number of batches handed out and not trained
+        self._num_in_training = 0
+        self._in_flight_cond = threading.Condition()
+        self._done_event = threading.Event()
+        self._closed = False
+        self._error = None
+
+        self._data_queue = queue.Queue()
+        self._fetch_queue = queue.Queue()
+        id_transformer_group.set_before_evict(self._wait_for_in_flight_batches)
+        self._transform_thread = threading.Thread(
+            target=self._transform_loop, args=(dataloader, transform_fn), daemon=True
+        )
+        self._fetch_thread = threading.Thread(target=self._fetch_loop, daemon=True)
+        self._transform_thread.start()
+        self._fetch_thread.start()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with self._in_flight_cond:
+            if self._num_in_training == self._num_batches_in_training:
+                self._num_in_training -= 1
+                self._num_in_flight -= 1
+                self._in_flight_cond.notify_all()
+
+        if self._closed:
+            raise StopIteration
+        item = self._data_queue.get()
+        if item is None:
+            self.close()
+            if self._error is not None:
+                raise RuntimeError("Transform thread exited unexpectedly") from (
+                    self._error
+                )
+            raise StopIteration
+        data, fetched = item
+        self._num_in_training += 1
+        if not fetched.is_set():
+            self.num_late_batches += 1
+            start = time.perf_counter()
+            fetched.wait()
+            self.fetch_wait_seconds += time.perf_counter() - start
+        if self._error is not None:
+            raise RuntimeError("Fetch thread exited unexpectedly") from self._error
+        return data
+
+    def close(self):
+        """
+        Stop the threads of the iterator. Can be called several times.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._done_event.set()
+        with self._in_flight_cond:
+            self._in_flight_cond.notify_all()
+        self._transform_thread.join()
+        self._fetch_thread.join()
+        self._id_transformer_group.set_before_evict(None)
+
+    def _wait_for_in_flight_batches(self) -> int:
+        with self._in_flight_cond:
+            # the batch being transformed and the ones held by the training loop
+            # while it requests the next batch are in flight
+            while (
+                self._num_in_flight > self._num_batches_in_training
+                and not self._done_event.is_set()
+            ):
+                self._in_flight_cond.wait(MP_STATUS_CHECK_INTERVAL)
+            return self._num_in_flight - 1
+
+    def _transform_loop(self, dataloader, transform_fn):
+        # This setting is thread local, and prevents the copy in pin_memory from
+        # consuming all CPU cores.
+        torch.set_num_threads(1)
+        try:
+            # the batches in training and up to `num_lookahead` batches ahead
+            max_in_flight = self._num_batches_in_training + self._num_lookahead - 1
+            for data in dataloader:
+                with self._in_flight_cond:
+                    while (
+                        self._num_in_flight > max_in_flight
+                        and not self._done_event.is_set()
+                    ):
+                        self._in_flight_cond.wait(MP_STATUS_CHECK_INTERVAL)
+                    if self._done_event.is_set():
+                        break
+                    self._num_in_flight += 1
+                transformed_data, handles = transform_fn(data)
+                fetched = threading.Event()
+                self._fetch_queue.put((handles, fetched))
+                self._data_queue.put((transformed_data, fetched))
+                # save memory
+                del transformed_data
+        except Exception as e:
+            self._error = e
+        finally:
+            self._fetch_queue.put(None)
+            self._data_queue.put(None)
+
+    def _fetch_loop(self):
+        while True:
+            item = self._fetch_queue.get()
+            if item is None:
+                break
+            handles, fetched = item
+            try:
+                for handle in handles:
+                    handle.wait()
+            except Exception as e:
+                self._error = e
+            fetched.set()
+
+
 class DataLoader:
     def __init__(
         self,
@@ -84,6 +238,8 @@ class DataLoader:
         data_info: Dict[int, str] = None,
         paths: List[str] = None,
         num_prefetch=0,
+        num_lookahead=0,
+        num_batches_in_training=1,
     ):
         self._id_transformer_group = id_transformer_group
 
@@ -103,6 +259,8 @@ class DataLoader:
 
         self._dataloader = dataloader
         self._num_prefetch = num_prefetch
+        self._num_lookahead = num_lookahead
+        self._num_batches_in_training = num_batches_in_training
 
     def _transform_fn(self, data):
         """
@@ -130,6 +288,15 @@ class DataLoader:
         return tuple(data), fetch_handles
 
     def __iter__(self):
+        if self._num_lookahead > 0:
+            return LookaheadDataLoaderIter(
+                self._dataloader,
+                self._transform_fn,
+                self._id_transformer_group,
+                self._num_lookahead,
+                self._num_batches_in_training,
+            )
+        self._id_transformer_group.set_before_evict(None)
         return DataLoaderIter(
             self._dataloader, self._transform_fn, num_prefetch=self._num_prefetch
         )
@@ -150,6 +317,8 @@ def wrap(
     ps_config=None,
     parallel=True,
     num_prefetch=0,
+    num_lookahead=0,
+    num_batches_in_training=1,
 ):
     """
     DataLoader to transform data from global id to cache id.
@@ -170,6 +339,13 @@ def wrap(
         parallel: Whether the IDTransformerCollections will run paralell. When set to True,
             IDTransformerGroup will start a thread for each IDTransformerCollection.
         num_prefetch: number of samples to prefetch.
+        num_lookahead: if positive, transform up to `num_lookahead` batches ahead of
+            the one being trained and only wait for the PS fetches of a batch when
+            it is requested, see `LookaheadDataLoaderIter`. `num_prefetch` is then
+            ignored.
+        num_batches_in_training: with `num_lookahead`, the number of batches
+            requested after a batch once it is trained, e.g. 3 for
+            `TrainPipelineSparseDist`, see `LookaheadDataLoaderIter`.
 
     Return:
         DataLoader: the dataloader to transform data.
@@ -214,6 +390,8 @@ def wrap(
             data_info=data_info,
             paths=paths,
             num_prefetch=num_prefetch,
+            num_lookahead=num_lookahead,
+            num_batches_in_training=num_batches_in_training,
         ),
         module,
     )
@@ -7,6 +7,8 @@
 
 import json
 import os
+import sys
+from typing import Optional
 
 import torch
 
@@ -45,11 +47,14 @@ class IDTransformer:
         )
         return result.success, result.ids_to_fetch
 
-    def evict(self, num_to_evict):
+    def evict(self, num_to_evict, keep_since_time: Optional[int] = None):
         """
-        Evict `num_to_evict` ids from the transformer.
+        Evict `num_to_evict` ids from the transformer. If `keep_since_time` is
+        set, the ids transformed at or after that time are not evicted.
         """
-        return self._transformer.evict(num_to_evict)
+        if keep_since_time is None:
+            keep_since_time = sys.maxsize
+        return self._transformer.evict(num_to_evict, keep_since_time)
 
     def save(self):
         """
@@ -7,7 +7,7 @@
 
 #!/usr/bin/env python3
 
-from typing import List, Tuple, Union
+from typing import Callable, List, Optional, Tuple, Union
 
 import torch
 import torch.distributed as dist
@@ -78,11 +78,30 @@ class IDTransformerCollection:
         ]
         self._ever_evicted = False
         self._time = 0
+        self._before_evict: Optional[Callable[[], int]] = None
 
         if dist.get_world_size() > 1:
             self._pg = dist.new_group(backend="gloo")
         self._stream = torch.cuda.Stream()
 
+    def set_before_evict(self, before_evict: Optional[Callable[[], int]]):
+        """
+        Set a callback run before ids are evicted to PS, e.g. to wait until the
+        batches transformed earlier no longer use the cache. It returns the
+        number of batches transformed right before the current one which may
+        still use the cache, their ids are not evicted.
+        """
+        self._before_evict = before_evict
+
+    def _keep_since_time(self) -> Optional[int]:
+        """
+        Runs the before evict callback and returns the earliest transform time
+        whose ids must not be evicted.
+        """
+        if self._before_evict is None:
+            return None
+        return self._time - self._before_evict()
+
     def _transform(
         self, transformer, global_ids: List[torch.Tensor], cache_ids: List[torch.Tensor]
     ):
@@ -182,11 +201,12 @@ class IDTransformerCollection:
                         )
                         fetch_handles.append(handle)
                     if not success:
+                        keep_since_time = self._keep_since_time()
                         # TODO(zilinzhu): make this configurable
                         # broadcast ids_to_evict
                         if dist.get_rank() == 0:
                             ids_to_evict = transformer.evict(
-                                transformer._num_embedding // 2
+                                transformer._num_embedding // 2, keep_since_time
                             )
                         else:
                             ids_to_evict = None
@@ -243,9 +263,10 @@ class IDTransformerCollection:
                         )
                         fetch_handles.append(handle)
                     if not success:
+                        keep_since_time = self._keep_since_time()
                         # TODO(zilinzhu): make this configurable
                         ids_to_evict = transformer.evict(
-                            transformer._num_embedding // 2
+                            transformer._num_embedding // 2, keep_since_time
                         )
                         ps.evict(ids_to_evict)
                         self._ever_evicted = True
@@ -301,3 +322,4 @@ class IDTransformerCollection:
                 ids = transformer.save()
 
             self._ps_collection[table_name].evict(ids)
+        self._ps_collection.flush()
@@ -1,6 +1,6 @@
 import queue
 import threading
-from typing import Dict, List, Union
+from typing import Callable, Dict, List, Optional, Union
 
 from torchrec import EmbeddingBagConfig, EmbeddingConfig, KeyedJaggedTensor
 from torchrec.distributed.model_parallel import DistributedModelParallel
@@ -156,6 +156,14 @@ class IDTransformerGroup:
                 fetch_handles.extend(handles)
         return result, fetch_handles
 
+    def set_before_evict(self, before_evict: Optional[Callable[[], int]]):
+        """
+        Set a callback run before any of the IDTransformerCollections evicts
+        ids to PS, see `IDTransformerCollection.set_before_evict`.
+        """
+        for id_transformer_collection in self._id_transformer_collections.values():
+            id_transformer_collection.set_before_evict(before_evict)
+
     def save(self):
         for _, id_transformer_collection in self._id_transformer_collections.items():
             id_transformer_collection.save()
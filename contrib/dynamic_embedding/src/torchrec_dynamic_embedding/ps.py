@@ -6,7 +6,8 @@
 # LICENSE file in the root directory of this source tree.
 
 import os
-from typing import Callable, Dict, List, Tuple, Union
+import threading
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 import torch
 from torch.distributed._shard.sharded_tensor import ShardedTensor
@@ -20,12 +21,106 @@ except Exception as ex:
     print(f"File tde_cpp.so not found {ex}")
 
 
-__all__ = ["PS", "PSCollection"]
+__all__ = ["PS", "PSCollection", "EvictionWriteBuffer"]
 
 
 DEFAULT_PS_CHUNK_SIZE = 8 * 1024 * 1024
 
 
+def _num_bytes(global_ids: torch.Tensor, rows: List[torch.Tensor]) -> int:
+    return global_ids.numel() * global_ids.element_size() + sum(
+        row.numel() * row.element_size() for row in rows
+    )
+
+
+class EvictionWriteBuffer:
+    def __init__(self, max_bytes: int, flush_bytes: Optional[int] = None):
+        """
+        Write-behind buffer of the rows evicted to the PS tables of a
+        `PSCollection`.
+
+        `PS.evict` copies the evicted rows into the buffer instead of writing
+        them. A background thread writes the buffered rows of each table in one
+        batch once `flush_bytes` are buffered, keeping only the latest row of
+        the ids evicted several times. `PS.evict` blocks while `max_bytes` are
+        buffered, and `PS.fetch` reads the ids still buffered from the buffer.
+
+        Args:
+            max_bytes: bound of the buffered rows, in bytes.
+            flush_bytes: buffered bytes starting a flush, `max_bytes // 2` by
+                default.
+        """
+        self._max_bytes = max_bytes
+        self._flush_bytes = flush_bytes if flush_bytes is not None else max_bytes // 2
+        self._cond = threading.Condition()
+        self._buffered_bytes = 0
+        self._tables: List["PS"] = []
+        # flush generations requested and completed
+        self._num_requested = 0
+        self._num_completed = 0
+        self._error = None
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._thread.start()
+
+    def _register(self, ps: "PS"):
+        with self._cond:
+            self._tables.append(ps)
+
+    def _check_error(self):
+        if self._error is not None:
+            raise RuntimeError("Eviction write buffer flush failed") from self._error
+
+    def _add(self, ps: "PS", global_ids: torch.Tensor, rows: List[torch.Tensor]):
+        num_bytes = _num_bytes(global_ids, rows)
+        with self._cond:
+            while (
+                self._buffered_bytes > 0
+                and self._buffered_bytes + num_bytes > self._max_bytes
+            ):
+                self._check_error()
+                self._num_requested = max(self._num_requested, self._num_completed + 1)
+                self._cond.notify_all()
+                self._cond.wait()
+            self._check_error()
+            self._buffered_bytes += ps._buffer(global_ids, rows)
+            if self._buffered_bytes >= self._flush_bytes:
+                self._num_requested = max(self._num_requested, self._num_completed + 1)
+                self._cond.notify_all()
+
+    def flush(self):
+        """
+        Write all the buffered rows to PS.
+        """
+        with self._cond:
+            self._num_requested += 1
+            target = self._num_requested
+            self._cond.notify_all()
+            while self._num_completed < target and self._error is None:
+                self._cond.wait()
+            self._check_error()
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                while self._num_requested == self._num_completed:
+                    self._cond.wait()
+                generation = self._num_requested
+                for ps in self._tables:
+                    ps._start_flush()
+            try:
+                for ps in self._tables:
+                    ps._write_flushing()
+                written = True
+            except Exception as e:
+                written = False
+                self._error = e
+            with self._cond:
+                for ps in self._tables:
+                    self._buffered_bytes -= ps._finish_flush(written)
+                self._num_completed = generation
+                self._cond.notify_all()
+
+
 class PS:
     def __init__(
         self,
@@ -33,6 +128,7 @@ class PS:
         tensors: Union[List[torch.Tensor], List[ShardedTensor]],
         url: str,
         chunk_size: str,
+        eviction_buffer: Optional[EvictionWriteBuffer] = None,
     ):
         """
         PS table of an embedding table.
@@ -42,13 +138,24 @@ class PS:
             tensors: tensors of the table, the first one is the parameter tensor, others are
                 tenors of optimizers, e.g. for Adam, it will be [weight, m, v].
             url: url of the PS.
+            eviction_buffer: if set, the evicted rows are written to PS through this
+                write-behind buffer.
         """
         shards = torch.classes.tde.LocalShardList()
+        # (row_start, row_size, tensors) of the local shards
+        self._local_shards: List[Tuple[int, int, List[torch.Tensor]]] = []
         num_optimizer_stats = len(tensors)
         if isinstance(tensors[0], ShardedTensor):
             # Here we assume the shard metadata of optimizer state and weight are the same.
             for i, shard in enumerate(tensors[0].local_shards()):
                 local_tensors = [tensor.local_shards()[i].tensor for tensor in tensors]
+                self._local_shards.append(
+                    (
+                        shard.metadata.shard_offsets[0],
+                        shard.metadata.shard_sizes[0],
+                        local_tensors,
+                    )
+                )
                 shards.append(
                     shard.metadata.shard_offsets[0],
                     shard.metadata.shard_offsets[1],
@@ -59,6 +166,7 @@ class PS:
                 # This assumes all shard have the same column size.
                 col_size = shard.tensor.shape[1]
         elif isinstance(tensors[0], torch.Tensor):
+            self._local_shards.append((0, tensors[0].shape[0], tensors))
             shards.append(
                 0,
                 0,
@@ -71,11 +179,172 @@ class PS:
             table_name, shards, col_size, num_optimizer_stats, url, chunk_size
         )
 
+        self._eviction_buffer = eviction_buffer
+        # the buffered evictions indexed by their sorted unique global ids: the
+        # latest rows of each id and the number of the eviction they come from.
+        # The tensors are replaced rather than updated in place, so that they
+        # can be read without holding the lock of the buffer.
+        self._buffered_ids = torch.empty(0, dtype=torch.long)
+        self._buffered_rows: List[torch.Tensor] = []
+        self._buffered_evictions = torch.empty(0, dtype=torch.long)
+        self._buffered_bytes = 0
+        self._num_evictions = 0
+        # (global_ids, rows, number of evictions) being written by the flush
+        self._flushing: Optional[Tuple[torch.Tensor, List[torch.Tensor], int]] = None
+        if eviction_buffer is not None:
+            eviction_buffer._register(self)
+
+    def _local_rows(self, ids: torch.Tensor):
+        """
+        Yields the (mask, local row indices, local tensors) of the [global id,
+        cache id] `ids` in each local shard.
+        """
+        cache_ids = ids[:, 1]
+        for row_start, row_size, tensors in self._local_shards:
+            mask = (cache_ids >= row_start) & (cache_ids < row_start + row_size)
+            yield mask, cache_ids[mask] - row_start, tensors
+
+    @torch.no_grad()
     def evict(self, ids_to_evict: torch.Tensor):
         """
         Evict the `ids_to_evict` to PS.
         """
-        self._ps.evict(ids_to_evict)
+        if self._eviction_buffer is None:
+            self._ps.evict(ids_to_evict)
+            return
+        # make sure all previous fetches are done before reading the rows.
+        self._ps.sync_fetch()
+        global_ids, rows = [], []
+        for mask, local_rows, tensors in self._local_rows(ids_to_evict):
+            global_ids.append(ids_to_evict[mask, 0])
+            rows.append([tensor.data[local_rows].cpu() for tensor in tensors])
+        if not global_ids:
+            return
+        global_ids = torch.cat(global_ids)
+        if global_ids.numel() == 0:
+            return
+        rows = [torch.cat(os_rows) for os_rows in zip(*rows)]
+        self._eviction_buffer._add(self, global_ids, rows)
+
+    def _set_buffered(
+        self,
+        global_ids: torch.Tensor,
+        rows: List[torch.Tensor],
+        evictions: torch.Tensor,
+    ) -> int:
+        """
+        Replaces the buffered evictions. Returns the change of their bytes.
+        """
+        self._buffered_ids = global_ids
+        self._buffered_rows = rows
+        self._buffered_evictions = evictions
+        num_bytes = _num_bytes(global_ids, rows)
+        delta = num_bytes - self._buffered_bytes
+        self._buffered_bytes = num_bytes
+        return delta
+
+    def _buffer(self, global_ids: torch.Tensor, rows: List[torch.Tensor]) -> int:
+        """
+        Merges the evicted `rows` of `global_ids` into the buffered evictions,
+        the last eviction of an id wins. Returns the change of the buffered
+        bytes.
+        """
+        self._num_evictions += 1
+        global_ids, inverse = torch.unique(global_ids, return_inverse=True)
+        latest = torch.full_like(global_ids, -1).scatter_reduce(
+            0, inverse, torch.arange(inverse.numel()), reduce="amax"
+        )
+        rows = [row[latest] for row in rows]
+        evictions = torch.full_like(global_ids, self._num_evictions)
+        if self._buffered_ids.numel() == 0:
+            return self._set_buffered(global_ids, rows, evictions)
+
+        # positions of the buffered and of the evicted ids in the merged index
+        num_buffered = self._buffered_ids.numel()
+        positions = torch.searchsorted(self._buffered_ids, global_ids)
+        found = self._buffered_ids[positions.clamp(max=num_buffered - 1)] == global_ids
+        inserted = ~found
+        num_inserted = int(inserted.sum())
+        buffered_positions = torch.arange(num_buffered) + torch.searchsorted(
+            global_ids[inserted], self._buffered_ids
+        )
+        positions[found] = buffered_positions[positions[found]]
+        positions[inserted] += torch.arange(num_inserted)
+
+        def merge(buffered: torch.Tensor, evicted: torch.Tensor) -> torch.Tensor:
+            merged = buffered.new_empty(
+                (num_buffered + num_inserted,) + buffered.shape[1:]
+            )
+            merged[buffered_positions] = buffered
+            merged[positions] = evicted
+            return merged
+
+        return self._set_buffered(
+            merge(self._buffered_ids, global_ids),
+            [merge(b, r) for b, r in zip(self._buffered_rows, rows)],
+            merge(self._buffered_evictions, evictions),
+        )
+
+    def _start_flush(self):
+        """
+        Takes the buffered evictions to write by the flush.
+        """
+        self._flushing = (
+            self._buffered_ids,
+            self._buffered_rows,
+            self._num_evictions,
+        )
+
+    def _write_flushing(self):
+        """
+        Writes the rows being flushed to PS.
+        """
+        if self._flushing is None:
+            return
+        global_ids, rows, _ = self._flushing
+        if global_ids.numel() > 0:
+            self._ps.write(global_ids, TensorList(rows).tensor_list)
+
+    def _finish_flush(self, written: bool) -> int:
+        """
+        Drops the buffered evictions written by the flush, unless the ids were
+        evicted again since. Returns the bytes freed.
+        """
+        if self._flushing is None:
+            # registered after the flush started
+            return 0
+        _, _, num_evictions = self._flushing
+        self._flushing = None
+        if not written:
+            return 0
+        keep = self._buffered_evictions > num_evictions
+        if keep.all():
+            return 0
+        return -self._set_buffered(
+            self._buffered_ids[keep],
+            [row[keep] for row in self._buffered_rows],
+            self._buffered_evictions[keep],
+        )
+
+    def _fetch_from_buffer(self, ids_to_fetch: torch.Tensor) -> torch.Tensor:
+        """
+        Copies the rows of `ids_to_fetch` which are still buffered to the cache
+        and returns the other ids.
+        """
+        with self._eviction_buffer._cond:
+            buffered_ids, buffered_rows = self._buffered_ids, self._buffered_rows
+        if buffered_ids.numel() == 0:
+            return ids_to_fetch
+        hit = torch.isin(ids_to_fetch[:, 0], buffered_ids)
+        if not hit.any():
+            return ids_to_fetch
+        hit_ids = ids_to_fetch[hit]
+        positions = torch.searchsorted(buffered_ids, hit_ids[:, 0].contiguous())
+        with torch.no_grad():
+            for mask, local_rows, tensors in self._local_rows(hit_ids):
+                for tensor, rows in zip(tensors, buffered_rows):
+                    tensor.data[local_rows] = rows[positions[mask]].to(tensor.device)
+        return ids_to_fetch[~hit].contiguous()
 
     def fetch(
         self,
@@ -89,6 +358,8 @@ class PS:
         Fetch `ids_to_fetch` from tensor. If `reinit` is set to `True`, will
         reinitialize the embedding if the global id is not in PS.
         """
+        if self._eviction_buffer is not None:
+            ids_to_fetch = self._fetch_from_buffer(ids_to_fetch)
         return self._ps.fetch(
             ids_to_fetch, time, reinit, weight_init_max, weight_init_min
         )
@@ -111,25 +382,45 @@ class PSCollection:
             path: module path.
             plan: dict keyed by table name of ParameterSharding and tensor of the table.
             url: configuration for PS, e.g. redis://127.0.0.1:6379/?prefix=model.
-            ps_config: config of the PS, currently only support setting chunk size.
+            ps_config: config of the PS, supports setting the chunk size ("chunk_size"),
+                and the bound and flush threshold in bytes of an `EvictionWriteBuffer`
+                shared by the tables ("eviction_buffer_bytes", no buffer by default,
+                and "eviction_flush_bytes").
         """
         self._path = path
         self._ps_collection = {}
         chunk_size = DEFAULT_PS_CHUNK_SIZE
         if ps_config is not None and "chunk_size" in ps_config:
             chunk_size = ps_config["chunk_size"]
+        self._eviction_buffer = None
+        if ps_config is not None and ps_config.get("eviction_buffer_bytes"):
+            self._eviction_buffer = EvictionWriteBuffer(
+                ps_config["eviction_buffer_bytes"],
+                ps_config.get("eviction_flush_bytes"),
+            )
         for table_name, (param_plan, tensor) in plan.items():
             if isinstance(url, str):
                 table_config = url
             else:
                 table_config = url(table_name)
             self._ps_collection[table_name] = PS(
-                f"{path}.{table_name}", tensor, table_config, chunk_size
+                f"{path}.{table_name}",
+                tensor,
+                table_config,
+                chunk_size,
+                eviction_buffer=self._eviction_buffer,
             )
 
     def table_names(self):
         return self._ps_collection.keys()
 
+    def flush(self):
+        """
+        Write the rows buffered by the eviction write buffer, if any, to PS.
+        """
+        if self._eviction_buffer is not None:
+            self._eviction_buffer.flush()
+
     def __getitem__(self, table_name):
         return self._ps_collection[table_name]
 
@@ -143,7 +434,7 @@ class PSCollection:
             sharded_module: the sharded module.
             params_plan: the sharding plan of `sharded_module`.
             url: configuration for PS, e.g. redis://127.0.0.1:6379/?prefix=model.
-            ps_config: config of the PS, currently only support setting chunk size.
+            ps_config: config of the PS, see `PSCollection`.
 
         Return:
             PSCollection of the sharded module.
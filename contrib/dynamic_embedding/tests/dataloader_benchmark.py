@@ -0,0 +1,79 @@
+"""
+Throughput of the dynamic embedding DataLoader against a local PS stand-in,
+whose transforms take `--transform_ms` and whose fetches complete
+`--fetch_ms` after they are issued, for a training step of `--train_ms`:
+
+    python tests/dataloader_benchmark.py --num_lookahead 1,2,4
+
+`--num_lookahead 0` is the DataLoader waiting for the fetches of each batch
+when it is requested, with `--num_prefetch` batches transformed ahead.
+"""
+
+import argparse
+import threading
+import time
+
+from torchrec_dynamic_embedding.dataloader import DataLoader
+
+
+class LocalFetchHandle:
+    def __init__(self, fetch_seconds):
+        self._fetched = threading.Event()
+        threading.Timer(fetch_seconds, self._fetched.set).start()
+
+    def wait(self):
+        self._fetched.wait()
+
+
+class LocalIDTransformerGroup:
+    def __init__(self, transform_seconds, fetch_seconds):
+        self._transform_seconds = transform_seconds
+        self._fetch_seconds = fetch_seconds
+
+    def __contains__(self, path):
+        return path == "emb"
+
+    def set_before_evict(self, before_evict):
+        pass
+
+    def transform(self, kjt_dict):
+        time.sleep(self._transform_seconds)
+        return kjt_dict, [LocalFetchHandle(self._fetch_seconds)]
+
+
+def benchmark(args, num_lookahead):
+    group = LocalIDTransformerGroup(args.transform_ms / 1000, args.fetch_ms / 1000)
+    dataloader = DataLoader(
+        group,
+        [(i,) for i in range(args.num_batches)],
+        data_info={0: "emb"},
+        num_prefetch=args.num_prefetch,
+        num_lookahead=num_lookahead,
+    )
+    start = time.perf_counter()
+    it = iter(dataloader)
+    for _ in it:
+        time.sleep(args.train_ms / 1000)
+    elapsed = time.perf_counter() - start
+    late = f"late batches: {it.num_late_batches}" if num_lookahead > 0 else ""
+    print(
+        f"num_lookahead: {num_lookahead} | "
+        f"{args.num_batches / elapsed:8.1f} batches/s {late}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num_batches", type=int, default=200)
+    parser.add_argument("--transform_ms", type=float, default=2.0)
+    parser.add_argument("--fetch_ms", type=float, default=20.0)
+    parser.add_argument("--train_ms", type=float, default=10.0)
+    parser.add_argument("--num_prefetch", type=int, default=1)
+    parser.add_argument("--num_lookahead", type=str, default="0,1,2,4")
+    args = parser.parse_args()
+    for num_lookahead in args.num_lookahead.split(","):
+        benchmark(args, int(num_lookahead))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import threading
+import time
+import unittest
+
+from torchrec_dynamic_embedding.dataloader import DataLoader
+
+
+class FetchHandle:
+    def __init__(self, event):
+        self._event = event
+
+    def wait(self):
+        self._event.wait()
+
+
+class FakeIDTransformerGroup:
+    def __init__(self, fetched_events=None, evict_at=None):
+        self.transformed = []
+        self.fetched_events = fetched_events or {}
+        self.evict_at = evict_at
+        self.num_next_calls_at_evict = None
+        self.num_kept_at_evict = None
+        self.num_next_calls = 0
+        self._before_evict = None
+
+    def __contains__(self, path):
+        return path == "emb"
+
+    def set_before_evict(self, before_evict):
+        self._before_evict = before_evict
+
+    def transform(self, kjt_dict):
+        batch = kjt_dict["emb"]
+        if batch == self.evict_at:
+            self.num_kept_at_evict = self._before_evict()
+            self.num_next_calls_at_evict = self.num_next_calls
+        self.transformed.append(batch)
+        handles = []
+        if batch in self.fetched_events:
+            handles.append(FetchHandle(self.fetched_events[batch]))
+        return {"emb": batch * 10}, handles
+
+
+class TestLookaheadDataLoader(unittest.TestCase):
+    def testLookahead(self):
+        group = FakeIDTransformerGroup()
+        dataloader = DataLoader(
+            group, [(i,) for i in range(10)], data_info={0: "emb"}, num_lookahead=2
+        )
+        for i, data in enumerate(dataloader):
+            self.assertEqual(data, (i * 10,))
+            time.sleep(0.05)
+            # batch i is being trained
+            self.assertLessEqual(len(group.transformed), i + 3)
+        self.assertEqual(group.transformed, list(range(10)))
+
+    def testLateFetch(self):
+        fetched_events = {i: threading.Event() for i in range(4)}
+        for i in range(1, 4):
+            fetched_events[i].set()
+        group = FakeIDTransformerGroup(fetched_events=fetched_events)
+        dataloader = DataLoader(
+            group, [(i,) for i in range(4)], data_info={0: "emb"}, num_lookahead=3
+        )
+        it = iter(dataloader)
+        threading.Timer(0.1, fetched_events[0].set).start()
+        self.assertEqual(next(it), (0,))
+        time.sleep(0.05)
+        self.assertEqual(list(it), [(10,), (20,), (30,)])
+        self.assertEqual(it.num_late_batches, 1)
+        self.assertGreater(it.fetch_wait_seconds, 0)
+
+    def testEvictWaitsForInFlightBatches(self):
+        group = FakeIDTransformerGroup(evict_at=3)
+        dataloader = DataLoader(
+            group, [(i,) for i in range(6)], data_info={0: "emb"}, num_lookahead=2
+        )
+        it = iter(dataloader)
+        for _ in range(6):
+            group.num_next_calls += 1
+            next(it)
+            time.sleep(0.01)
+        # batches 0, 1 and 2 were trained, i.e. batch 3 was requested
+        self.assertEqual(group.num_next_calls_at_evict, 4)
+        self.assertEqual(group.num_kept_at_evict, 0)
+
+    def testEvictKeepsBatchesInTraining(self):
+        group = FakeIDTransformerGroup(evict_at=5)
+        dataloader = DataLoader(
+            group,
+            [(i,) for i in range(8)],
+            data_info={0: "emb"},
+            num_lookahead=2,
+            num_batches_in_training=3,
+        )
+        it = iter(dataloader)
+        # like TrainPipelineSparseDist, request batch i + 2 before training batch i
+        batches = [next(it), next(it)]
+        for i in range(6):
+            group.num_next_calls += 1
+            batches.append(next(it))
+            time.sleep(0.01)
+        # batches 0, 1 and 2 were trained when batch 5 was requested, batches 3
+        # and 4 are still in training, so their ids are kept
+        self.assertEqual(group.num_next_calls_at_evict, 4)
+        self.assertEqual(group.num_kept_at_evict, 2)
+        self.assertEqual(batches, [(i * 10,) for i in range(8)])
+        with self.assertRaises(StopIteration):
+            next(it)
+
+    def testClose(self):
+        group = FakeIDTransformerGroup()
+        dataloader = DataLoader(
+            group, [(i,) for i in range(10)], data_info={0: "emb"}, num_lookahead=2
+        )
+        it = iter(dataloader)
+        next(it)
+        it.close()
+        self.assertFalse(it._transform_thread.is_alive())
+        self.assertFalse(it._fetch_thread.is_alive())
+        self.assertIsNone(group._before_evict)
+        self.assertLess(len(group.transformed), 10)
+        with self.assertRaises(StopIteration):
+            next(it)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -92,6 +92,32 @@ class TestIDTransformer(unittest.TestCase):
         evicted_ids = sorted(evicted_tensor.tolist())
         self.assertEqual(evicted_ids, [[2, 1], [4, 3]])
 
+    def testEvictKeepSinceTime(self):
+        num_embedding = 9
+        transformer = IDTransformer(
+            num_embedding,
+            transform_config={
+                "type": "naive",
+            },
+        )
+        global_ids = torch.tensor([1, 2, 3, 4], dtype=torch.long)
+        cache_ids = torch.empty_like(global_ids)
+        result = transformer.transform(
+            TensorList([global_ids]), TensorList([cache_ids]), 0
+        )
+        self.assertTrue(result.success)
+
+        global_ids = torch.tensor([1, 3, 5, 7], dtype=torch.long)
+        result = transformer.transform(
+            TensorList([global_ids]), TensorList([cache_ids]), 1
+        )
+        self.assertTrue(result.success)
+
+        # the ids transformed at time 1 are kept
+        evicted_tensor = transformer.evict(4, keep_since_time=1)
+        evicted_ids = sorted(evicted_tensor.tolist())
+        self.assertEqual(evicted_ids, [[2, 1], [4, 3]])
+
     def testAll(self):
         num_embedding = 9
         transformer = IDTransformer(
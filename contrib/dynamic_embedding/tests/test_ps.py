@@ -1,7 +1,7 @@
 import unittest
 
 import torch
-from torchrec_dynamic_embedding.ps import PS
+from torchrec_dynamic_embedding.ps import EvictionWriteBuffer, PS
 from utils import register_memory_io
 
 
@@ -75,6 +75,41 @@ class TestPS(unittest.TestCase):
             )
         )
 
+    def testEvictionBuffer(self):
+        cache_ids = [0, 2, 4]
+        ids = torch.tensor([[100, 0], [101, 2], [102, 4]], dtype=torch.long)
+        tensor = torch.rand((10, 4))
+        optim = torch.rand((10, 4))
+        eviction_buffer = EvictionWriteBuffer(1024 * 1024)
+        ps = PS("buffered_table", [tensor, optim], "memory://", 1024, eviction_buffer)
+        ps.evict(ids)
+        # evicting an id again overwrites its buffered row
+        tensor[2] = 1
+        ps.evict(ids[1:2])
+        origin_tensor = tensor.clone()
+        origin_optim = optim.clone()
+        eviction_buffer.flush()
+        tensor[:, :] = 0
+        optim[:, :] = 0
+        ps.fetch(ids, 0).wait()
+        self.assertTrue(torch.allclose(tensor[cache_ids], origin_tensor[cache_ids]))
+        self.assertTrue(torch.allclose(optim[cache_ids], origin_optim[cache_ids]))
+
+    def testFetchFromEvictionBuffer(self):
+        cache_ids = [0, 2, 4]
+        ids = torch.tensor([[200, 0], [201, 2], [202, 4]], dtype=torch.long)
+        tensor = torch.rand((10, 4))
+        origin_tensor = tensor.clone()
+        # never flushed before the fetch
+        eviction_buffer = EvictionWriteBuffer(1024 * 1024, flush_bytes=1024 * 1024)
+        ps = PS("buffered_table", [tensor], "memory://", 1024, eviction_buffer)
+        ps.evict(ids)
+        tensor[:, :] = 0
+        new_cache_ids = [1, 3, 5]
+        fetch_ids = torch.tensor([[200, 1], [201, 3], [202, 5]], dtype=torch.long)
+        ps.fetch(fetch_ids, 0).wait()
+        self.assertTrue(torch.allclose(tensor[new_cache_ids], origin_tensor[cache_ids]))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,43 @@
+import tempfile
+import unittest
+
+import torch
+from torchrec_dynamic_embedding.ps import PS
+
+
+class TestPSFileIO(unittest.TestCase):
+    def testEvictFetch(self):
+        cache_ids = [0, 2, 4, 8]
+        ids = torch.tensor([[100, 0], [101, 2], [102, 4], [103, 8]], dtype=torch.long)
+        tensor = torch.rand((10, 4))
+        optim = torch.rand((10, 4))
+        origin_tensor = tensor.clone()
+        origin_optim = optim.clone()
+        with tempfile.TemporaryDirectory() as path:
+            ps = PS("table", [tensor, optim], f"file://{path}", 1024)
+            ps.evict(ids)
+            tensor[:, :] = 0
+            optim[:, :] = 0
+            ps.fetch(ids, 0).wait()
+            self.assertTrue(torch.allclose(tensor[cache_ids], origin_tensor[cache_ids]))
+            self.assertTrue(torch.allclose(optim[cache_ids], origin_optim[cache_ids]))
+            # release the files of the PS before the directory is removed
+            del ps
+
+    def testFetchNonExist(self):
+        evict_ids = torch.tensor([[100, 0], [101, 2]], dtype=torch.long)
+        tensor = torch.rand((10, 4))
+        origin_tensor = tensor.clone()
+        with tempfile.TemporaryDirectory() as path:
+            ps = PS("table", [tensor], f"file://{path}?chunk_size_mb=1", 1024)
+            ps.evict(evict_ids)
+            tensor[:, :] = 0
+            fetch_ids = torch.tensor([[100, 1], [104, 9]], dtype=torch.long)
+            ps.fetch(fetch_ids, 0).wait()
+            self.assertTrue(torch.allclose(tensor[1], origin_tensor[0]))
+            self.assertTrue(torch.allclose(tensor[9], torch.zeros_like(tensor[9])))
+            del ps
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-strict
+
+#!/usr/bin/env python3
+
+"""
+Microbenchmarks for the autograd-aware collectives in
+`torchrec.distributed.comm_ops`.
+
+Every (op, world size, num features, embedding dim, batch size, qcomms) point of
+the sweep is run in its own set of processes through `multi_process_benchmark`,
+once for the forward pass only and once for forward + backward. The default
+`gloo` backend on CPU allows catching regressions on machines without GPUs, e.g.
+
+    python -m torchrec.distributed.benchmark.benchmark_comm_ops \
+        --world_sizes 2,4 --num_features 8 --embedding_dims 64,128 \
+        --batch_sizes 512 --qcomms none,fp16
+"""
+
+import argparse
+import itertools
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import torch
+import torch.distributed as dist
+from torch import multiprocessing as mp
+from torchrec.distributed import comm_ops
+from torchrec.distributed.benchmark.benchmark_utils import (
+    benchmark_func,
+    BenchmarkResult,
+    MemoryStats,
+    multi_process_benchmark,
+)
+from torchrec.distributed.fbgemm_qcomm_codec import (
+    CommType,
+    get_qcomm_codecs,
+    QCommsConfig,
+)
+from torchrec.distributed.test_utils.multi_process import MultiProcessContext
+from torchrec.distributed.types import Awaitable, QuantizedCommCodecs
+
+
+logger: logging.Logger = logging.getLogger()
+
+
+BENCH_COMM_OPS: List[str] = [
+    "alltoall_pooled",
+    "variable_batch_alltoall_pooled",
+    "alltoall_sequence",
+    "reduce_scatter_base_pooled",
+    "reduce_scatter_v_pooled",
+    "all_gather_base_pooled",
+]
+
+
+@dataclass
+class CommOpBenchConfig:
+    """
+    A single point of the comm ops benchmark sweep. `num_features` is the number of
+    features owned by each rank and `batch_size` is the local batch size, so the
+    payload of each collective grows with the world size as it would for table-wise
+    sharding.
+    """
+
+    op: str
+    world_size: int
+    num_features: int
+    embedding_dim: int
+    batch_size: int
+    sequence_length: int = 1
+    qcomms: Optional[CommType] = None
+    backward: bool = False
+
+    @property
+    def name(self) -> str:
+        qcomms = str(self.qcomms) if self.qcomms is not None else "none"
+        mode = "fwd_bwd" if self.backward else "fwd"
+        return (
+            f"{self.op}-ws{self.world_size}-f{self.num_features}"
+            f"-d{self.embedding_dim}-b{self.batch_size}-{qcomms}-{mode}"
+        )
+
+    def input_shape(self) -> Tuple[int, int]:
+        W, F, D, B = (
+            self.world_size,
+            self.num_features,
+            self.embedding_dim,
+            self.batch_size,
+        )
+        if self.op == "alltoall_sequence":
+            return (W * B * F * self.sequence_length, D)
+        elif self.op == "all_gather_base_pooled":
+            return (B, F * D)
+        elif self.op == "reduce_scatter_v_pooled":
+            return (sum(self.reduce_scatter_v_splits()), F * D)
+        return (W * B, F * D)
+
+    def reduce_scatter_v_splits(self) -> List[int]:
+        # uneven splits, otherwise reduce_scatter_v falls back to reduce_scatter_base
+        return [self.batch_size + rank for rank in range(self.world_size)]
+
+    def payload_bytes(self) -> int:
+        """
+        Size in bytes of the unquantized tensor being exchanged, i.e. the input of
+        all-to-alls and reduce-scatters and the output of all-gathers.
+        """
+        rows, cols = self.input_shape()
+        if self.op == "all_gather_base_pooled":
+            rows *= self.world_size
+        # inputs are fp32
+        return rows * cols * 4
+
+
+def _comm_op_fn(
+    config: CommOpBenchConfig,
+    device: torch.device,
+    pg: dist.ProcessGroup,
+    codecs: Optional[QuantizedCommCodecs],
+) -> Callable[[torch.Tensor], Awaitable[torch.Tensor]]:
+    W, F, D, B = (
+        config.world_size,
+        config.num_features,
+        config.embedding_dim,
+        config.batch_size,
+    )
+    if config.op == "alltoall_pooled":
+        return lambda input: comm_ops.alltoall_pooled(
+            input,
+            batch_size_per_rank=[B] * W,
+            dim_sum_per_rank=[F * D] * W,
+            group=pg,
+            codecs=codecs,
+        )
+    elif config.op == "variable_batch_alltoall_pooled":
+        return lambda input: comm_ops.variable_batch_alltoall_pooled(
+            input,
+            batch_size_per_rank_per_feature=[[B] * F for _ in range(W)],
+            batch_size_per_feature_pre_a2a=[B] * (F * W),
+            emb_dim_per_rank_per_feature=[[D] * F for _ in range(W)],
+            group=pg,
+            codecs=codecs,
+        )
+    elif config.op == "alltoall_sequence":
+        L = config.sequence_length
+        forward_recat = torch.tensor(
+            [j + i * W for j in range(W) for i in range(F)],
+            dtype=torch.int,
+            device=device,
+        )
+        backward_recat = torch.tensor(
+            [i + j * F for i in range(F) for j in range(W)],
+            dtype=torch.int,
+            device=device,
+        )
+        lengths = torch.full((F, W * B), L, dtype=torch.int, device=device)
+        splits = [F * B * L] * W
+        return lambda input: comm_ops.alltoall_sequence(
+            input,
+            forward_recat_tensor=forward_recat,
+            backward_recat_tensor=backward_recat,
+            lengths_after_sparse_data_all2all=lengths,
+            input_splits=splits,
+            output_splits=splits,
+            group=pg,
+            codecs=codecs,
+        )
+    elif config.op == "reduce_scatter_base_pooled":
+        return lambda input: comm_ops.reduce_scatter_base_pooled(
+            input, group=pg, codecs=codecs
+        )
+    elif config.op == "reduce_scatter_v_pooled":
+        splits = config.reduce_scatter_v_splits()
+        return lambda input: comm_ops.reduce_scatter_v_pooled(
+            input, input_splits=splits, group=pg, codecs=codecs
+        )
+    elif config.op == "all_gather_base_pooled":
+        return lambda input: comm_ops.all_gather_base_pooled(
+            input, group=pg, codecs=codecs
+        )
+    raise ValueError(f"Unknown comm op {config.op}, expected one of {BENCH_COMM_OPS}")
+
+
+def _run_comm_op(
+    bench_inputs: List[Dict[str, Any]],
+    fn: Callable[[torch.Tensor], Awaitable[torch.Tensor]],
+    backward: bool,
+    iters: int,
+) -> None:
+    for _ in range(iters):
+        for bench_input in bench_inputs:
+            input = bench_input["input"]
+            output = fn(input).wait()
+            if backward:
+                input.grad = None
+                output.backward(torch.ones_like(output))
+
+
+def comm_op_benchmark_runner(
+    config: CommOpBenchConfig,
+    rank: int,
+    world_size: int,
+    backend: str,
+    device_type: str,
+    warmup_iters: int,
+    bench_iters: int,
+    num_benchmarks: int,
+    queue: Optional[mp.Queue] = None,
+) -> BenchmarkResult:
+    with MultiProcessContext(
+        rank, world_size, backend, use_deterministic_algorithms=False
+    ) as ctx:
+        device = (
+            ctx.device
+            if device_type == "cuda" and ctx.device.type == "cuda"
+            else torch.device("cpu")
+        )
+        pg = ctx.pg
+        assert pg is not None
+        codecs = (
+            get_qcomm_codecs(
+                QCommsConfig(
+                    forward_precision=config.qcomms,
+                    backward_precision=config.qcomms,
+                )
+            )
+            if config.qcomms is not None
+            else None
+        )
+        fn = _comm_op_fn(config, device, pg, codecs)
+        bench_inputs = [
+            {
+                "input": torch.rand(
+                    config.input_shape(),
+                    device=device,
+                    requires_grad=config.backward,
+                )
+            }
+        ]
+
+        _run_comm_op(bench_inputs, fn, config.backward, warmup_iters)
+        # make sure no rank starts timing while others are still warming up
+        dist.barrier(group=pg)
+
+        res = benchmark_func(
+            name=config.name,
+            bench_inputs=bench_inputs,
+            prof_inputs=bench_inputs,
+            world_size=world_size,
+            profile_dir="",
+            num_benchmarks=num_benchmarks,
+            num_profiles=0,
+            func_to_benchmark=_run_comm_op,
+            benchmark_func_kwargs={
+                "fn": fn,
+                "backward": config.backward,
+                "iters": bench_iters,
+            },
+            rank=rank,
+            device_type=device.type,
+        )
+        # elapsed time is reported per collective call
+        res.elapsed_time = res.elapsed_time / bench_iters
+        if not res.mem_stats:
+            # no memory stats on CPU, `multi_process_benchmark` expects one per rank
+            res.mem_stats = [MemoryStats(rank, 0, 0, 0)]
+
+        if queue is not None:
+            queue.put(res)
+
+            while not queue.empty():
+                time.sleep(1)
+
+    return res
+
+
+def benchmark_comm_op(
+    config: CommOpBenchConfig,
+    args: argparse.Namespace,
+) -> BenchmarkResult:
+    return multi_process_benchmark(
+        callable=comm_op_benchmark_runner,
+        config=config,
+        world_size=config.world_size,
+        backend=args.backend,
+        device_type=args.device_type,
+        warmup_iters=args.warmup_iters,
+        bench_iters=args.bench_iters,
+        num_benchmarks=args.num_benchmarks,
+    )
+
+
+def _parse_int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def _parse_qcomms_list(value: str) -> List[Optional[CommType]]:
+    return [None if v == "none" else CommType(v) for v in value.split(",") if v]
+
+
+def init_argparse_and_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--ops", type=str, default=",".join(BENCH_COMM_OPS))
+    parser.add_argument("--world_sizes", type=_parse_int_list, default=[2])
+    parser.add_argument("--num_features", type=_parse_int_list, default=[8])
+    parser.add_argument("--embedding_dims", type=_parse_int_list, default=[128])
+    parser.add_argument("--batch_sizes", type=_parse_int_list, default=[512])
+    parser.add_argument("--sequence_length", type=int, default=4)
+    # `none` disables quantized comms, others are `CommType` values
+    parser.add_argument("--qcomms", type=_parse_qcomms_list, default=[None])
+    parser.add_argument("--forward_only", action="store_true")
+    parser.add_argument("--backend", type=str, default="gloo")
+    parser.add_argument("--device_type", type=str, default="cpu")
+    parser.add_argument("--warmup_iters", type=int, default=5)
+    parser.add_argument("--bench_iters", type=int, default=20)
+    parser.add_argument("--num_benchmarks", type=int, default=5)
+    parser.add_argument("--output_dir", type=str, default="/var/tmp/torchrec-bench")
+
+    args = parser.parse_args()
+
+    return args
+
+
+def write_comm_ops_report(
+    results: List[Tuple[CommOpBenchConfig, BenchmarkResult]],
+    report_file: str,
+    report_str: str,
+) -> None:
+    for config, benchmark_res in results:
+        p50_ms = benchmark_res.runtime_percentile(50).item()
+        p90_ms = benchmark_res.runtime_percentile(90).item()
+        # algorithmic bandwidth of the unquantized payload
+        bw_gbps = config.payload_bytes() / (p50_ms * 1e-3) / 1e9 if p50_ms > 0 else 0.0
+        report_str += f"{config.name:70} Latency (P50/P90): {p50_ms:8.3f} / "
+        report_str += f"{p90_ms:8.3f} ms Bandwidth (P50): {bw_gbps:8.3f} GB/s\n"
+
+    with open(report_file, "w") as f:
+        f.write(report_str)
+
+    logger.info(f"Report written to {report_file}:\n{report_str}")
+
+
+def main() -> None:
+    args: argparse.Namespace = init_argparse_and_args()
+    datetime_sfx: str = time.strftime("%Y%m%dT%H%M%S")
+
+    output_dir = args.output_dir
+    if not os.path.exists(output_dir):
+        # Create output directory if not exist
+        os.mkdir(output_dir)
+
+    ops = [op for op in args.ops.split(",") if op]
+    for op in ops:
+        if op not in BENCH_COMM_OPS:
+            raise ValueError(f"Unknown comm op {op}, expected one of {BENCH_COMM_OPS}")
+    backward_modes = [False] if args.forward_only else [False, True]
+
+    results: List[Tuple[CommOpBenchConfig, BenchmarkResult]] = []
+    for (
+        op,
+        world_size,
+        num_features,
+        embedding_dim,
+        batch_size,
+        qcomms,
+        backward,
+    ) in itertools.product(
+        ops,
+        args.world_sizes,
+        args.num_features,
+        args.embedding_dims,
+        args.batch_sizes,
+        args.qcomms,
+        backward_modes,
+    ):
+        config = CommOpBenchConfig(
+            op=op,
+            world_size=world_size,
+            num_features=num_features,
+            embedding_dim=embedding_dim,
+            batch_size=batch_size,
+            sequence_length=args.sequence_length,
+            qcomms=qcomms,
+            backward=backward,
+        )
+        logger.info(f"Benchmarking {config.name}")
+        results.append((config, benchmark_comm_op(config, args)))
+
+    report: str = (
+        f"REPORT BENCHMARK COMM OPS {datetime_sfx} backend:{args.backend} "
+        f"device_type:{args.device_type} bench_iters:{args.bench_iters}\n\n"
+    )
+    write_comm_ops_report(
+        results,
+        report_file=f"{output_dir}/run_{datetime_sfx}_comm_ops.report",
+        report_str=report,
+    )
+
+
+if __name__ == "__main__":
+    main()
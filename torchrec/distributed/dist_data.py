@@ -9,7 +9,8 @@
 
 import itertools
 import logging
-from typing import Callable, Dict, List, Optional
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
 
 import torch
 import torch.distributed as dist
@@ -291,6 +292,116 @@ class SplitsAllToAllAwaitable(Awaitable[List[List[int]]]):
         return ret
 
 
+class KJTTensorsAllToAllFusion:
+    """
+    Issues the tensors AlltoAll of several KJTs sharing a process group as a single
+    AlltoAll per dtype instead of one AlltoAll per tensor per KJT.
+
+    For each dtype, the per-rank chunks of all tensors are packed rank-major into one
+    flat buffer, so the fused input/output splits are the per-rank sums of the
+    individual splits. After the collective completes, the output buffer is unpacked
+    back into one tensor per KJT tensor.
+
+    Args:
+        pg (dist.ProcessGroup): ProcessGroup for AlltoAll communication.
+        input_splits (List[List[List[int]]]): input splits per KJT per tensor.
+        output_splits (List[List[List[int]]]): output splits per KJT per tensor.
+        input_tensors (List[List[torch.Tensor]]): tensors per KJT to redistribute.
+        device (torch.device): device on which buffers will be allocated.
+    """
+
+    def __init__(
+        self,
+        pg: dist.ProcessGroup,
+        input_splits: List[List[List[int]]],
+        output_splits: List[List[List[int]]],
+        input_tensors: List[List[torch.Tensor]],
+        device: torch.device,
+    ) -> None:
+        self._pg = pg
+        self._world_size: int = pg.size()
+        self._output_splits = output_splits
+        # dtype -> [(kjt index, tensor index)]
+        self._groups: Dict[torch.dtype, List[Tuple[int, int]]] = defaultdict(list)
+        for i, tensors in enumerate(input_tensors):
+            for j, tensor in enumerate(tensors):
+                self._groups[tensor.dtype].append((i, j))
+
+        self._output_buffers: Dict[torch.dtype, torch.Tensor] = {}
+        self._awaitables: List[dist.Work] = []
+        self._outputs: Optional[List[List[torch.Tensor]]] = None
+        for dtype, members in self._groups.items():
+            chunks_per_tensor = [
+                input_tensors[i][j].split(input_splits[i][j]) for i, j in members
+            ]
+            fused_input = torch.cat(
+                [
+                    chunks[rank]
+                    for rank in range(self._world_size)
+                    for chunks in chunks_per_tensor
+                ]
+            )
+            fused_input_splits = [
+                sum(input_splits[i][j][rank] for i, j in members)
+                for rank in range(self._world_size)
+            ]
+            fused_output_splits = [
+                sum(output_splits[i][j][rank] for i, j in members)
+                for rank in range(self._world_size)
+            ]
+            output_buffer = torch.empty(
+                sum(fused_output_splits), device=device, dtype=dtype
+            )
+            with record_function(f"## all2all_data:kjt fused {dtype} ##"):
+                self._awaitables.append(
+                    dist.all_to_all_single(
+                        output=output_buffer,
+                        input=fused_input,
+                        output_split_sizes=fused_output_splits,
+                        input_split_sizes=fused_input_splits,
+                        group=pg,
+                        async_op=True,
+                    )
+                )
+            self._output_buffers[dtype] = output_buffer
+
+    @property
+    def num_collectives(self) -> int:
+        return len(self._awaitables)
+
+    def num_tensors_per_collective(self) -> Dict[torch.dtype, int]:
+        return {dtype: len(members) for dtype, members in self._groups.items()}
+
+    def wait(self) -> List[List[torch.Tensor]]:
+        """
+        Waits for the fused AlltoAlls (once) and returns the output tensors per KJT.
+        """
+        if self._outputs is not None:
+            return self._outputs
+
+        for awaitable in self._awaitables:
+            awaitable.wait()
+
+        outputs: List[List[torch.Tensor]] = [
+            [torch.empty(0)] * len(splits) for splits in self._output_splits
+        ]
+        for dtype, members in self._groups.items():
+            per_rank = self._output_buffers[dtype].split(
+                [
+                    sum(self._output_splits[i][j][rank] for i, j in members)
+                    for rank in range(self._world_size)
+                ]
+            )
+            chunks_per_rank = [
+                rank_chunk.split([self._output_splits[i][j][rank] for i, j in members])
+                for rank, rank_chunk in enumerate(per_rank)
+            ]
+            for k, (i, j) in enumerate(members):
+                outputs[i][j] = torch.cat([chunks[k] for chunks in chunks_per_rank])
+        self._outputs = outputs
+        return outputs
+
+
 class KJTAllToAllTensorsAwaitable(Awaitable[KeyedJaggedTensor]):
     """
     Awaitable for KJT tensors AlltoAll.
@@ -313,6 +424,8 @@ class KJTAllToAllTensorsAwaitable(Awaitable[KeyedJaggedTensor]):
         stagger (int): stagger value to apply to recat tensor.
         stride_per_rank (Optional[List[int]]): stride per rank in the non variable
             batch per feature case.
+        fusion (Optional[Tuple[KJTTensorsAllToAllFusion, int]]): fused AlltoAll that
+            already redistributes this KJT's tensors, and the index of this KJT in it.
     """
 
     def __init__(
@@ -328,6 +441,7 @@ class KJTAllToAllTensorsAwaitable(Awaitable[KeyedJaggedTensor]):
         device: torch.device,
         stagger: int,
         stride_per_rank: Optional[List[int]],
+        fusion: Optional[Tuple[KJTTensorsAllToAllFusion, int]] = None,
     ) -> None:
         super().__init__()
         self._workers: int = pg.size()
@@ -349,12 +463,15 @@ class KJTAllToAllTensorsAwaitable(Awaitable[KeyedJaggedTensor]):
             device=device,
             batch_size_per_rank=self._stride_per_rank,
         )
+        self._fusion = fusion
         if self._workers == 1:
             return
 
         self._output_tensors: List[torch.Tensor] = []
         self._awaitables: List[dist.Work] = []
         self._world_size: int = self._pg.size()
+        if fusion is not None:
+            return
         rank = dist.get_rank(self._pg)
 
         for input_split, output_split, input_tensor, label in zip(
@@ -419,7 +536,10 @@ class KJTAllToAllTensorsAwaitable(Awaitable[KeyedJaggedTensor]):
             self._input.sync()
             return self._input
 
-        if not is_torchdynamo_compiling():
+        if self._fusion is not None:
+            fusion, index = self._fusion
+            self._output_tensors = fusion.wait()[index]
+        elif not is_torchdynamo_compiling():
             for awaitable in self._awaitables:
                 awaitable.wait()
 
@@ -847,6 +967,192 @@ class PooledEmbeddingsAllToAll(nn.Module):
         return self._callbacks
 
 
+class _FusedPooledEmbeddingsAwaitable(Awaitable[List[torch.Tensor]]):
+    """
+    Waits on the fused AlltoAll once and unpacks the output into one tensor per group.
+    """
+
+    def __init__(
+        self,
+        tensor_awaitable: Awaitable[torch.Tensor],
+        unpack_indices: torch.Tensor,
+        dim_sum_per_group: List[int],
+    ) -> None:
+        super().__init__()
+        self._tensor_awaitable = tensor_awaitable
+        self._unpack_indices = unpack_indices
+        self._dim_sum_per_group = dim_sum_per_group
+        self._outputs: Optional[List[torch.Tensor]] = None
+
+    def _wait_impl(self) -> List[torch.Tensor]:
+        if self._outputs is None:
+            output = self._tensor_awaitable.wait()
+            # one gather regroups the rank-major columns, the splits are views
+            self._outputs = list(
+                output.index_select(1, self._unpack_indices).split(
+                    self._dim_sum_per_group, dim=1
+                )
+            )
+        return self._outputs
+
+
+class _FusedPooledEmbeddingsGroupAwaitable(Awaitable[torch.Tensor]):
+    def __init__(
+        self,
+        fused_awaitable: _FusedPooledEmbeddingsAwaitable,
+        group: int,
+    ) -> None:
+        super().__init__()
+        self._fused_awaitable = fused_awaitable
+        self._group = group
+
+    def _wait_impl(self) -> torch.Tensor:
+        return self._fused_awaitable.wait()[self._group]
+
+
+class FusedPooledEmbeddingsAllToAll(nn.Module):
+    """
+    Redistributes the pooled embeddings of several groups sharing a `ProcessGroup`
+    (e.g. the TW and CW sharding groups of a sharded `EmbeddingBagCollection`) with a
+    single `alltoall_pooled` instead of one per group.
+
+    The local embeddings of all groups are concatenated along the embedding dimension,
+    so the fused dimension sum of each rank is the sum over groups. The output is
+    unpacked into one tensor per group, identical to the output of a
+    `PooledEmbeddingsAllToAll` per group.
+
+    Args:
+        pg (dist.ProcessGroup): ProcessGroup for AlltoAll communication.
+        dim_sum_per_rank_per_group (List[List[int]]): `dim_sum_per_rank` of each group.
+        device (Optional[torch.device]): device on which buffers will be allocated.
+        callbacks_per_group (Optional[List[List[Callable[[torch.Tensor], torch.Tensor]]]]):
+            callback functions of each group.
+        codecs (Optional[QuantizedCommCodecs]): quantized communication codecs, shared
+            by all groups.
+
+    Example::
+
+        dim_sum_per_rank_per_group = [[2, 1], [1, 1]]
+        a2a = FusedPooledEmbeddingsAllToAll(pg, dim_sum_per_rank_per_group, device)
+
+        # rank 0
+        group_0_output, group_1_output = [
+            w.wait() for w in a2a([torch.rand((6, 2)), torch.rand((6, 1))])
+        ]
+        print(group_0_output.size(), group_1_output.size())
+            # torch.Size([3, 3]) torch.Size([3, 2])
+    """
+
+    def __init__(
+        self,
+        pg: dist.ProcessGroup,
+        dim_sum_per_rank_per_group: List[List[int]],
+        device: Optional[torch.device] = None,
+        callbacks_per_group: Optional[
+            List[List[Callable[[torch.Tensor], torch.Tensor]]]
+        ] = None,
+        codecs: Optional[QuantizedCommCodecs] = None,
+    ) -> None:
+        super().__init__()
+        self._pg = pg
+        self._codecs = codecs
+        self._callbacks_per_group: List[
+            List[Callable[[torch.Tensor], torch.Tensor]]
+        ] = (
+            callbacks_per_group
+            if callbacks_per_group is not None
+            else [[] for _ in dim_sum_per_rank_per_group]
+        )
+        world_size = pg.size()
+        self._dim_sum_per_group: List[int] = [
+            sum(dim_sum_per_rank) for dim_sum_per_rank in dim_sum_per_rank_per_group
+        ]
+        self._dim_sum_per_rank: List[int] = [
+            sum(
+                dim_sum_per_rank[rank]
+                for dim_sum_per_rank in dim_sum_per_rank_per_group
+            )
+            for rank in range(world_size)
+        ]
+
+        # output columns are ordered (source rank, group), unpack to (group, source rank)
+        rank_offsets = [0] + list(itertools.accumulate(self._dim_sum_per_rank))
+        unpack_indices: List[int] = []
+        for group, dim_sum_per_rank in enumerate(dim_sum_per_rank_per_group):
+            for rank in range(world_size):
+                start = rank_offsets[rank] + sum(
+                    dims[rank] for dims in dim_sum_per_rank_per_group[:group]
+                )
+                unpack_indices.extend(range(start, start + dim_sum_per_rank[rank]))
+
+        self.register_buffer(
+            "_dim_sum_per_rank_tensor",
+            torch.tensor(self._dim_sum_per_rank, device=device, dtype=torch.int),
+            persistent=False,
+        )
+        self.register_buffer(
+            "_cumsum_dim_sum_per_rank_tensor",
+            torch.tensor(rank_offsets[1:], device=device, dtype=torch.int),
+            persistent=False,
+        )
+        self.register_buffer(
+            "_unpack_indices",
+            torch.tensor(unpack_indices, device=device, dtype=torch.long),
+            persistent=False,
+        )
+
+    def forward(
+        self,
+        local_embs: List[torch.Tensor],
+        batch_size_per_rank: Optional[List[int]] = None,
+    ) -> List[PooledEmbeddingsAwaitable]:
+        """
+        Performs one AlltoAll pooled operation for the pooled embeddings of all groups.
+
+        Args:
+            local_embs (List[torch.Tensor]): tensor of values to distribute per group.
+            batch_size_per_rank (Optional[List[int]]): batch size per rank, to support
+                variable batch size.
+
+        Returns:
+            List[PooledEmbeddingsAwaitable]: awaitable of pooled embeddings per group.
+        """
+        if not batch_size_per_rank:
+            B_global = local_embs[0].size(0)
+            assert (
+                B_global % self._pg.size() == 0
+            ), f"num of ranks {self._pg.size()} doesn't divide global batch size {B_global}"
+            B_local = B_global // self._pg.size()
+            batch_size_per_rank = [B_local] * self._pg.size()
+
+        with record_function("## fused_pooled_embeddings_all_to_all ##"):
+            tensor_awaitable = alltoall_pooled(
+                a2a_pooled_embs_tensor=torch.cat(local_embs, dim=1),
+                batch_size_per_rank=batch_size_per_rank,
+                dim_sum_per_rank=self._dim_sum_per_rank,
+                dim_sum_per_rank_tensor=self._dim_sum_per_rank_tensor,
+                cumsum_dim_sum_per_rank_tensor=self._cumsum_dim_sum_per_rank_tensor,
+                group=self._pg,
+                codecs=self._codecs,
+            )
+        fused_awaitable = _FusedPooledEmbeddingsAwaitable(
+            tensor_awaitable=tensor_awaitable,
+            unpack_indices=self._unpack_indices,
+            dim_sum_per_group=self._dim_sum_per_group,
+        )
+
+        awaitables = []
+        for group, callbacks in enumerate(self._callbacks_per_group):
+            pooled_embedding_awaitable = PooledEmbeddingsAwaitable(
+                tensor_awaitable=_FusedPooledEmbeddingsGroupAwaitable(
+                    fused_awaitable, group
+                ),
+            )
+            pooled_embedding_awaitable.callbacks.extend(callbacks)
+            awaitables.append(pooled_embedding_awaitable)
+        return awaitables
+
+
 class VariableBatchPooledEmbeddingsAllToAll(nn.Module):
     """
     Shards batches and collects keys of tensor with a `ProcessGroup` according to
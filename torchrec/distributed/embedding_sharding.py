@@ -18,6 +18,7 @@ import torch
 from torch import distributed as dist, nn
 from torchrec.distributed.dist_data import (
     KJTAllToAllTensorsAwaitable,
+    KJTTensorsAllToAllFusion,
     SplitsAllToAllAwaitable,
 )
 from torchrec.distributed.embedding_dim_bucketer import (
@@ -44,6 +45,7 @@ from torchrec.distributed.types import (
 from torchrec.distributed.utils import maybe_annotate_embedding_event
 from torchrec.fx.utils import assert_fx_safe
 from torchrec.modules.embedding_configs import EmbeddingTableConfig
+from torchrec.pt2.checks import is_torchdynamo_compiling
 from torchrec.sparse.jagged_tensor import KeyedJaggedTensor
 from torchrec.streamable import Multistreamable
 
@@ -760,14 +762,31 @@ class KJTSplitsAllToAllMeta:
 
 
 class FusedKJTListSplitsAwaitable(Awaitable[List[KJTListAwaitable]]):
+    """
+    Fuses the splits AlltoAll of several `KJTListSplitsAwaitable`s sharing a process
+    group into a single AlltoAll.
+
+    Args:
+        requests (List[KJTListSplitsAwaitable[C]]): input dist splits requests.
+        contexts (List[C]): sharding contexts of the requests.
+        pg (Optional[dist.ProcessGroup]): process group shared by the requests.
+        fuse_tensors (bool): also issue the tensors AlltoAll of all requests as one
+            AlltoAll per dtype (see `KJTTensorsAllToAllFusion`) instead of one per
+            tensor per KJT.
+    """
+
     def __init__(
         self,
         requests: List[KJTListSplitsAwaitable[C]],
         contexts: List[C],
         pg: Optional[dist.ProcessGroup],
+        fuse_tensors: bool = False,
     ) -> None:
         super().__init__()
         self._contexts = contexts
+        self._pg = pg
+        self._fuse_tensors = fuse_tensors
+        self._fusion: Optional[KJTTensorsAllToAllFusion] = None
         self._awaitables: List[
             Union[KJTSplitsAllToAllMeta, Awaitable[Awaitable[KeyedJaggedTensor]]]
         ] = [awaitable for request in requests for awaitable in request.awaitables]
@@ -806,34 +825,62 @@ class FusedKJTListSplitsAwaitable(Awaitable[List[KJTListAwaitable]]):
             splits_per_awaitable = _split(splits_list, self._lengths)
         else:
             splits_per_awaitable = [[] for _ in range(len(self._lengths))]
-        tensors_awaitables = []
+
+        # (meta, output splits, stride per rank) of the tensors AlltoAlls to issue
+        metas: List[
+            Tuple[KJTSplitsAllToAllMeta, List[List[int]], Optional[List[int]]]
+        ] = []
         for splits, awaitable in zip(splits_per_awaitable, self._awaitables):
             if not splits:  # NoWait
-                assert isinstance(awaitable, Awaitable)
-                tensors_awaitables.append(awaitable.wait())
                 continue
             assert isinstance(awaitable, KJTSplitsAllToAllMeta)
             if awaitable._input.variable_stride_per_key():
-                output_splits = splits
-                stride_per_rank = None
+                metas.append((awaitable, splits, None))
             else:
-                output_splits = splits[:-1]
-                stride_per_rank = splits[-1]
+                metas.append((awaitable, splits[:-1], splits[-1]))
+
+        if (
+            self._fuse_tensors
+            and self._pg is not None
+            and self._pg.size() > 1
+            and len(metas) > 1
+            and not is_torchdynamo_compiling()
+        ):
+            self._fusion = KJTTensorsAllToAllFusion(
+                pg=self._pg,
+                input_splits=[meta.input_splits for meta, _, _ in metas],
+                output_splits=[output_splits for _, output_splits, _ in metas],
+                input_tensors=[meta.input_tensors for meta, _, _ in metas],
+                device=metas[0][0].device,
+            )
+
+        tensors_awaitables = []
+        meta_index = 0
+        for splits, awaitable in zip(splits_per_awaitable, self._awaitables):
+            if not splits:  # NoWait
+                assert isinstance(awaitable, Awaitable)
+                tensors_awaitables.append(awaitable.wait())
+                continue
+            meta, output_splits, stride_per_rank = metas[meta_index]
             tensors_awaitables.append(
                 KJTAllToAllTensorsAwaitable(
-                    pg=awaitable.pg,
-                    input=awaitable._input,
-                    splits=awaitable.splits,
-                    input_splits=awaitable.input_splits,
+                    pg=meta.pg,
+                    input=meta._input,
+                    splits=meta.splits,
+                    input_splits=meta.input_splits,
                     output_splits=output_splits,
-                    input_tensors=awaitable.input_tensors,
-                    labels=awaitable.labels,
-                    keys=awaitable.keys,
-                    device=awaitable.device,
-                    stagger=awaitable.stagger,
+                    input_tensors=meta.input_tensors,
+                    labels=meta.labels,
+                    keys=meta.keys,
+                    device=meta.device,
+                    stagger=meta.stagger,
                     stride_per_rank=stride_per_rank,
+                    fusion=(
+                        (self._fusion, meta_index) if self._fusion is not None else None
+                    ),
                 )
             )
+            meta_index += 1
         output = []
         awaitables_per_output = _split(tensors_awaitables, self._output_lengths)
         for awaitables, ctx in zip(awaitables_per_output, self._contexts):
@@ -841,6 +888,32 @@ class FusedKJTListSplitsAwaitable(Awaitable[List[KJTListAwaitable]]):
             output.append(KJTListAwaitable(awaitables, ctx))
         return output
 
+    @property
+    def pg(self) -> Optional[dist.ProcessGroup]:
+        return self._pg
+
+    @property
+    def fusion(self) -> Optional[KJTTensorsAllToAllFusion]:
+        """
+        Fused tensors AlltoAll, set after `wait()` if tensors were fused.
+        """
+        return self._fusion
+
+    @property
+    def num_splits_tensors(self) -> int:
+        return sum(self._lengths)
+
+    @property
+    def num_tensors(self) -> int:
+        """
+        Number of KJT tensors redistributed by the tensors AlltoAll.
+        """
+        return sum(
+            len(awaitable.input_tensors)
+            for awaitable in self._awaitables
+            if isinstance(awaitable, KJTSplitsAllToAllMeta)
+        )
+
 
 class ListOfKJTListAwaitable(Awaitable[ListOfKJTList]):
     """
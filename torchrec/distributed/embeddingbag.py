@@ -34,6 +34,7 @@ from torch.distributed._tensor import DTensor
 from torch.nn.modules.module import _IncompatibleKeys
 from torch.nn.parallel import DistributedDataParallel
 from torchrec.distributed.comm import get_local_size
+from torchrec.distributed.dist_data import FusedPooledEmbeddingsAllToAll
 from torchrec.distributed.embedding_sharding import (
     EmbeddingSharding,
     EmbeddingShardingContext,
@@ -47,11 +48,15 @@ from torchrec.distributed.embedding_types import (
     KJTList,
     ShardedEmbeddingModule,
 )
+from torchrec.distributed.global_settings import get_fuse_pooled_output_dist
 from torchrec.distributed.sharding.cw_sharding import CwPooledEmbeddingSharding
 from torchrec.distributed.sharding.dp_sharding import DpPooledEmbeddingSharding
 from torchrec.distributed.sharding.grid_sharding import GridPooledEmbeddingSharding
 from torchrec.distributed.sharding.rw_sharding import RwPooledEmbeddingSharding
-from torchrec.distributed.sharding.tw_sharding import TwPooledEmbeddingSharding
+from torchrec.distributed.sharding.tw_sharding import (
+    TwPooledEmbeddingDist,
+    TwPooledEmbeddingSharding,
+)
 from torchrec.distributed.sharding.twcw_sharding import TwCwPooledEmbeddingSharding
 from torchrec.distributed.sharding.twrw_sharding import TwRwPooledEmbeddingSharding
 from torchrec.distributed.shards_wrapper import LocalShardsWrapper
@@ -647,6 +652,10 @@ class ShardedEmbeddingBagCollection(
         self._lookups: List[nn.Module] = []
         self._create_lookups()
         self._output_dists: List[nn.Module] = []
+        # output dist indices fused into one AlltoAll, see `_create_fused_output_dists`
+        self._fused_output_dists: Optional[
+            List[Tuple[List[int], FusedPooledEmbeddingsAllToAll]]
+        ] = None
         self._embedding_names: List[str] = []
         self._embedding_dims: List[int] = []
         self._feature_splits: List[int] = []
@@ -1260,19 +1269,97 @@ class ShardedEmbeddingBagCollection(
     ) -> List[torch.Tensor]:
         return [lookup(features) for lookup, features in zip(self._lookups, dist_input)]
 
+    def _create_fused_output_dists(
+        self,
+    ) -> List[Tuple[List[int], FusedPooledEmbeddingsAllToAll]]:
+        """
+        Groups the AlltoAll output dists (TW, CW, TWCW) sharing a process group and
+        qcomm codecs, each group of at least two is replaced by a single AlltoAll.
+        """
+        # `QuantizedCommCodecs` is not hashable, the shardings share the codecs
+        # object of the sharder's qcomm codecs registry so group them by identity
+        indices_per_key: Dict[Tuple[dist.ProcessGroup, int], List[int]] = defaultdict(
+            list
+        )
+        for i, output_dist in enumerate(self._output_dists):
+            if isinstance(output_dist, TwPooledEmbeddingDist):
+                indices_per_key[(output_dist.pg, id(output_dist.codecs))].append(i)
+
+        fused_output_dists = []
+        for indices in indices_per_key.values():
+            if len(indices) < 2:
+                continue
+            tw_dists = [
+                cast(TwPooledEmbeddingDist, self._output_dists[i]) for i in indices
+            ]
+            fused_output_dists.append(
+                (
+                    indices,
+                    FusedPooledEmbeddingsAllToAll(
+                        pg=tw_dists[0].pg,
+                        dim_sum_per_rank_per_group=[
+                            tw_dist.dim_sum_per_rank for tw_dist in tw_dists
+                        ],
+                        device=self._device,
+                        callbacks_per_group=[tw_dist.callbacks for tw_dist in tw_dists],
+                        codecs=tw_dists[0].codecs,
+                    ),
+                )
+            )
+        return fused_output_dists
+
+    def _use_fused_output_dist(self, ctx: EmbeddingBagCollectionContext) -> bool:
+        if not get_fuse_pooled_output_dist() or ctx.variable_batch_per_feature:
+            return False
+        if self._fused_output_dists is None:
+            self._fused_output_dists = self._create_fused_output_dists()
+        return len(self._fused_output_dists) > 0
+
+    def _output_dist_awaitables(
+        self,
+        ctx: EmbeddingBagCollectionContext,
+        output: List[torch.Tensor],
+    ) -> List[Awaitable[torch.Tensor]]:
+        fused_awaitables: Dict[int, Awaitable[torch.Tensor]] = {}
+        if self._use_fused_output_dist(ctx):
+            for indices, fused_dist in none_throws(self._fused_output_dists):
+                sharding_context = ctx.sharding_contexts[indices[0]]
+                fused_awaitables.update(
+                    zip(
+                        indices,
+                        fused_dist(
+                            [output[i] for i in indices],
+                            batch_size_per_rank=(
+                                sharding_context.batch_size_per_rank
+                                if sharding_context
+                                else None
+                            ),
+                        ),
+                    )
+                )
+
+        awaitables = []
+        for i, (dist, sharding_context, embeddings) in enumerate(
+            zip(
+                self._output_dists,
+                ctx.sharding_contexts,
+                output,
+            )
+        ):
+            if i in fused_awaitables:
+                awaitables.append(fused_awaitables[i])
+            else:
+                awaitables.append(dist(embeddings, sharding_context))
+        return awaitables
+
     def output_dist(
         self,
         ctx: EmbeddingBagCollectionContext,
         output: List[torch.Tensor],
     ) -> LazyAwaitable[KeyedTensor]:
         batch_size_per_feature_pre_a2a = []
-        awaitables = []
-        for dist, sharding_context, embeddings in zip(
-            self._output_dists,
-            ctx.sharding_contexts,
-            output,
-        ):
-            awaitables.append(dist(embeddings, sharding_context))
+        awaitables = self._output_dist_awaitables(ctx, output)
+        for sharding_context in ctx.sharding_contexts:
             if sharding_context:
                 batch_size_per_feature_pre_a2a.extend(
                     sharding_context.batch_size_per_feature_pre_a2a
@@ -1310,6 +1397,10 @@ class ShardedEmbeddingBagCollection(
     def compute_and_output_dist(
         self, ctx: EmbeddingBagCollectionContext, input: KJTList
     ) -> LazyAwaitable[KeyedTensor]:
+        if self._use_fused_output_dist(ctx):
+            # the fused AlltoAll needs the embeddings of all sharding groups
+            return self.output_dist(ctx, self.compute(ctx, input))
+
         batch_size_per_feature_pre_a2a = []
         awaitables = []
 
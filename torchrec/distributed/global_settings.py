@@ -11,6 +11,8 @@ import os
 
 PROPOGATE_DEVICE: bool = False
 
+FUSE_POOLED_OUTPUT_DIST: bool = False
+
 TORCHREC_CONSTRUCT_SHARDED_TENSOR_FROM_METADATA_ENV = (
     "TORCHREC_CONSTRUCT_SHARDED_TENSOR_FROM_METADATA"
 )
@@ -26,6 +28,20 @@ def get_propogate_device() -> bool:
     return PROPOGATE_DEVICE
 
 
+def set_fuse_pooled_output_dist(val: bool) -> None:
+    """
+    Fuses the AlltoAll output dists (TW, CW, TWCW) of a sharded EmbeddingBagCollection
+    sharing a process group into a single AlltoAll.
+    """
+    global FUSE_POOLED_OUTPUT_DIST
+    FUSE_POOLED_OUTPUT_DIST = val
+
+
+def get_fuse_pooled_output_dist() -> bool:
+    global FUSE_POOLED_OUTPUT_DIST
+    return FUSE_POOLED_OUTPUT_DIST
+
+
 def construct_sharded_tensor_from_metadata_enabled() -> bool:
     return (
         os.environ.get(TORCHREC_CONSTRUCT_SHARDED_TENSOR_FROM_METADATA_ENV, "0") == "1"
@@ -81,6 +81,8 @@ class ShardedITEPEmbeddingBagCollection(
             lookups=self._embedding_bag_collection._lookups,
             pruning_interval=module._itep_module.pruning_interval,
             enable_pruning=module._itep_module.enable_pruning,
+            pruning_num_steps=module._itep_module.pruning_num_steps,
+            log_eviction_stats=module._itep_module.log_eviction_stats,
         )
 
     def prefetch(
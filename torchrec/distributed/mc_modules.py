@@ -19,7 +19,12 @@ import torch
 import torch.distributed as dist
 
 from torch import nn
-from torch.distributed._shard.sharded_tensor import Shard, ShardMetadata
+from torch.distributed._shard.sharded_tensor import (
+    Shard,
+    ShardedTensorMetadata,
+    ShardMetadata,
+    TensorProperties,
+)
 
 from torchrec.distributed.embedding_sharding import (
     EmbeddingSharding,
@@ -47,6 +52,11 @@ from torchrec.distributed.sharding.sequence_sharding import (
     InferSequenceShardingContext,
     SequenceShardingContext,
 )
+from torchrec.distributed.sharding.twrw_sharding import (
+    BaseTwRwEmbeddingSharding,
+    TwRwSequenceEmbeddingDist,
+    TwRwSparseFeaturesDist,
+)
 from torchrec.distributed.types import (
     Awaitable,
     LazyAwaitable,
@@ -207,11 +217,19 @@ class ShardedManagedCollisionCollection(
 
         self._embedding_names_per_sharding: List[List[str]] = []
         for sharding in self._embedding_shardings:
-            # TODO: support TWRW sharding
             assert isinstance(
-                sharding, BaseRwEmbeddingSharding
-            ), "Only ROW_WISE sharding is supported."
+                sharding, (BaseRwEmbeddingSharding, BaseTwRwEmbeddingSharding)
+            ), "Only ROW_WISE and TABLE_ROW_WISE sharding are supported."
             self._embedding_names_per_sharding.append(sharding.embedding_names())
+        # TABLE_ROW_WISE shardings route the raw ids of a table to the ranks of its
+        # node, which hold both its MC module shards and its embedding shards
+        self._has_twrw_sharding: bool = any(
+            isinstance(sharding, BaseTwRwEmbeddingSharding)
+            for sharding in self._embedding_shardings
+        )
+        assert not (
+            self._has_twrw_sharding and (self.need_preprocess or use_index_dedup)
+        ), "Preprocessing and index dedup are not supported with TABLE_ROW_WISE."
 
         self._feature_to_table: Dict[str, str] = module._feature_to_table
         self._table_to_features: Dict[str, List[str]] = module._table_to_features
@@ -246,6 +264,44 @@ class ShardedManagedCollisionCollection(
             global_sizes = list(tensor.shape)
             global_sizes[0] = global_size
 
+            if table_name in self._mc_module_name_shards_metadata:
+                # Only the ranks of the node of a TABLE_ROW_WISE table hold its
+                # buffers, build the global metadata without a collective
+                self._model_parallel_mc_buffer_name_to_sharded_tensor[fqn] = (
+                    ShardedTensor._init_from_local_shards_and_global_metadata(
+                        local_shards=[
+                            Shard(
+                                tensor=tensor,
+                                metadata=ShardMetadata(
+                                    shard_offsets=shard_offsets,
+                                    shard_sizes=sharded_sizes,
+                                    placement=(
+                                        f"rank:{self._env.rank}/{tensor.device}"
+                                    ),
+                                ),
+                            )
+                        ],
+                        sharded_tensor_metadata=ShardedTensorMetadata(
+                            shards_metadata=[
+                                ShardMetadata(
+                                    shard_offsets=[offset] + shard_offsets[1:],
+                                    shard_sizes=[size] + sharded_sizes[1:],
+                                    placement=placement,
+                                )
+                                for offset, size, placement in (
+                                    self._mc_module_name_shards_metadata[table_name]
+                                )
+                            ],
+                            size=torch.Size(global_sizes),
+                            tensor_properties=TensorProperties.create_from_tensor(
+                                tensor
+                            ),
+                        ),
+                        process_group=self._env.process_group,
+                    )
+                )
+                continue
+
             self._model_parallel_mc_buffer_name_to_sharded_tensor[fqn] = (
                 ShardedTensor._init_from_local_shards(
                     [
@@ -321,17 +377,39 @@ class ShardedManagedCollisionCollection(
         # table names of each sharding
         self._sharding_tables: List[List[str]] = []
         self._sharding_features: List[List[str]] = []
+        # (shard offset, shard size, placement) of all the shards of the
+        # TABLE_ROW_WISE tables of this rank. key: table_name
+        self._mc_module_name_shards_metadata: Dict[str, List[Tuple[int, int, str]]] = {}
+        # input sizes and buckets of the features routed by TABLE_ROW_WISE input
+        # dists, which include the features of the tables of other nodes
+        self._feature_to_input_size: Dict[str, int] = {}
+        self._feature_to_num_buckets: Dict[str, int] = {}
 
         for sharding in self._embedding_shardings:
-            assert isinstance(sharding, BaseRwEmbeddingSharding)
+            is_twrw = isinstance(sharding, BaseTwRwEmbeddingSharding)
             self._sharding_tables.append([])
             self._sharding_features.append([])
             self._sharding_per_table_feature_splits.append([])
             self._input_size_per_table_feature_splits.append([])
 
-            grouped_embedding_configs: List[GroupedEmbeddingConfig] = (
-                sharding._grouped_embedding_configs
-            )
+            grouped_embedding_configs: List[GroupedEmbeddingConfig]
+            if is_twrw:
+                # Only the tables of the node of this rank are local
+                grouped_embedding_configs = (
+                    sharding._grouped_embedding_configs_per_rank[sharding._rank]
+                )
+                for feature in sharding.feature_names():
+                    self._feature_to_input_size[feature] = (
+                        module._managed_collision_modules[
+                            self._feature_to_table[feature]
+                        ].input_size()
+                    )
+                    # one bucket per MC module shard, i.e. per rank of the node
+                    self._feature_to_num_buckets[feature] = sharding._local_size
+                self._feature_names.extend(sharding.feature_names())
+            else:
+                assert isinstance(sharding, BaseRwEmbeddingSharding)
+                grouped_embedding_configs = sharding._grouped_embedding_configs
             self._sharding_feature_splits.append(len(sharding.feature_names()))
 
             num_sharding_features = 0
@@ -350,7 +428,8 @@ class ShardedManagedCollisionCollection(
 
                     self._sharding_tables[-1].append(table.name)
                     self._sharding_features[-1].extend(table.feature_names)
-                    self._feature_names.extend(table.feature_names)
+                    if not is_twrw:
+                        self._feature_names.extend(table.feature_names)
                     self._managed_collision_modules[table.name] = (
                         mc_module.rebuild_with_output_id_range(
                             output_id_range=(
@@ -365,38 +444,57 @@ class ShardedManagedCollisionCollection(
                     input_size = self._managed_collision_modules[
                         table.name
                     ].input_size()
-                    zch_size_by_rank = [
-                        torch.zeros(1, dtype=torch.int64, device=self._device)
-                        for _ in range(self._env.world_size)
-                    ]
-                    if self.training and self._env.world_size > 1:
-                        dist.all_gather(
-                            zch_size_by_rank,
-                            torch.tensor(
-                                [zch_size], dtype=torch.int64, device=self._device
-                            ),
-                            group=self._env.process_group,
+                    if is_twrw:
+                        # The tables of other nodes have no MC module on this rank,
+                        # so the MC shards follow the embedding shards of the table
+                        # instead of gathering their sizes from all the ranks
+                        assert (
+                            zch_size == new_range_size
+                        ), f"MC module of {table.name} must output its shard range."
+                        self._mc_module_name_shards_metadata[table.name] = [
+                            (x.shard_offsets[0], x.shard_sizes[0], str(x.placement))
+                            # pyre-ignore [16]
+                            for x in table.global_metadata.shards_metadata
+                        ]
+                        # pyre-fixme[6]: For 2nd argument expected `int`
+                        self._mc_module_name_shard_metadata[table.name] = (
+                            new_min_output_id,
+                            zch_size,
+                            table.num_embeddings,
                         )
                     else:
-                        zch_size_by_rank[0] = torch.tensor(
-                            [zch_size], dtype=torch.int64, device=self._device
-                        )
+                        zch_size_by_rank = [
+                            torch.zeros(1, dtype=torch.int64, device=self._device)
+                            for _ in range(self._env.world_size)
+                        ]
+                        if self.training and self._env.world_size > 1:
+                            dist.all_gather(
+                                zch_size_by_rank,
+                                torch.tensor(
+                                    [zch_size], dtype=torch.int64, device=self._device
+                                ),
+                                group=self._env.process_group,
+                            )
+                        else:
+                            zch_size_by_rank[0] = torch.tensor(
+                                [zch_size], dtype=torch.int64, device=self._device
+                            )
 
-                    # Calculate the sum of all ZCH sizes from rank 0 to list
-                    # index. The last item is the sum of all elements in zch_size_by_rank
-                    zch_size_cumsum = torch.cumsum(
-                        torch.cat(zch_size_by_rank), dim=0
-                    ).tolist()
+                        # Calculate the sum of all ZCH sizes from rank 0 to list
+                        # index. The last item is the sum of all elements in zch_size_by_rank
+                        zch_size_cumsum = torch.cumsum(
+                            torch.cat(zch_size_by_rank), dim=0
+                        ).tolist()
 
-                    zch_size_sum_before_this_rank = (
-                        zch_size_cumsum[self._env.rank] - zch_size
-                    )
-                    # pyre-fixme[6]: For 2nd argument expected `int`
-                    self._mc_module_name_shard_metadata[table.name] = (
-                        zch_size_sum_before_this_rank,
-                        zch_size,
-                        zch_size_cumsum[-1],
-                    )
+                        zch_size_sum_before_this_rank = (
+                            zch_size_cumsum[self._env.rank] - zch_size
+                        )
+                        # pyre-fixme[6]: For 2nd argument expected `int`
+                        self._mc_module_name_shard_metadata[table.name] = (
+                            zch_size_sum_before_this_rank,
+                            zch_size,
+                            zch_size_cumsum[-1],
+                        )
                     self._table_to_offset[table.name] = new_min_output_id
 
                     self._table_feature_splits.append(len(table.feature_names))
@@ -408,6 +506,9 @@ class ShardedManagedCollisionCollection(
                     )
                     num_sharding_features += self._table_feature_splits[-1]
 
+            if is_twrw:
+                continue
+
             assert num_sharding_features == len(
                 sharding.feature_names()
             ), f"Shared feature is not supported. {num_sharding_features=}, {self._sharding_per_table_feature_splits[-1]=}"
@@ -434,6 +535,9 @@ class ShardedManagedCollisionCollection(
             self._embedding_shardings,
             self._sharding_features,
         ):
+            if isinstance(sharding, BaseTwRwEmbeddingSharding):
+                self._input_dists.append(self._create_twrw_input_dist(sharding))
+                continue
             assert isinstance(sharding, BaseRwEmbeddingSharding)
             feature_num_buckets: List[int] = [
                 self._managed_collision_modules[self._feature_to_table[f]].buckets()
@@ -488,10 +592,49 @@ class ShardedManagedCollisionCollection(
         if self._use_index_dedup:
             self._create_dedup_indices()
 
+    def _create_twrw_input_dist(
+        self,
+        sharding: BaseTwRwEmbeddingSharding,
+    ) -> TwRwSparseFeaturesDist:
+        """
+        Routes the raw ids of each feature to the rank of the node of its table
+        owning the id, which remaps it and looks it up without another input dist.
+        """
+        feature_names = sharding.feature_names()
+        assert sharding._pg is not None
+        return TwRwSparseFeaturesDist(
+            pg=sharding._pg,
+            local_size=sharding._local_size,
+            features_per_rank=sharding._features_per_rank(
+                sharding._grouped_embedding_configs_per_rank
+            ),
+            feature_hash_sizes=[self._feature_to_input_size[f] for f in feature_names],
+            feature_total_num_buckets=[
+                self._feature_to_num_buckets[f] for f in feature_names
+            ],
+            device=sharding._device,
+            has_feature_processor=sharding._has_feature_processor,
+            need_pos=False,
+            keep_original_indices=True,
+            is_sequence=True,
+        )
+
     def _create_output_dists(
         self,
     ) -> None:
         for sharding in self._embedding_shardings:
+            if isinstance(sharding, BaseTwRwEmbeddingSharding):
+                self._output_dists.append(
+                    TwRwSequenceEmbeddingDist(
+                        # pyre-ignore [6]
+                        sharding._pg,
+                        sharding._features_per_rank(
+                            sharding._grouped_embedding_configs_per_rank
+                        ),
+                        sharding._device,
+                    )
+                )
+                continue
             assert isinstance(sharding, BaseRwEmbeddingSharding)
             self._output_dists.append(
                 RwSequenceEmbeddingDist(
@@ -640,12 +783,17 @@ class ShardedManagedCollisionCollection(
             awaitables = []
             for feature_split, input_dist in zip(feature_splits, self._input_dists):
                 awaitables.append(input_dist(feature_split))
+                is_twrw = isinstance(input_dist, TwRwSparseFeaturesDist)
                 ctx.sharding_contexts.append(
                     SequenceShardingContext(
-                        features_before_input_dist=features,
+                        # the remapped ids of a TABLE_ROW_WISE sharding come back
+                        # for its own features only
+                        features_before_input_dist=(
+                            feature_split if is_twrw else features
+                        ),
                         unbucketize_permute_tensor=(
                             input_dist.unbucketize_permute_tensor
-                            if isinstance(input_dist, RwSparseFeaturesDist)
+                            if is_twrw or isinstance(input_dist, RwSparseFeaturesDist)
                             else None
                         ),
                     )
@@ -671,7 +819,9 @@ class ShardedManagedCollisionCollection(
                     vals.append(feature_split.values() + offset)
                 remapped_ids_ret.append(torch.cat(vals).view(-1, 1))
             else:
-                remapped_ids_ret.append(kjt.values() + self._table_to_offset[tables[0]])
+                remapped_ids_ret.append(
+                    (kjt.values() + self._table_to_offset[tables[0]]).view(-1, 1)
+                )
         return remapped_ids_ret
 
     def global_to_local_index(
@@ -872,6 +1022,7 @@ class ManagedCollisionCollectionSharder(
     def sharding_types(self, compute_device_type: str) -> List[str]:
         types = [
             ShardingType.ROW_WISE.value,
+            ShardingType.TABLE_ROW_WISE.value,
         ]
         return types
 
@@ -378,6 +378,22 @@ class TwPooledEmbeddingDist(
                 batch_size_per_rank=sharding_ctx.batch_size_per_rank,
             )
 
+    @property
+    def pg(self) -> dist.ProcessGroup:
+        return self._pg
+
+    @property
+    def dim_sum_per_rank(self) -> List[int]:
+        return self._dim_sum_per_rank
+
+    @property
+    def codecs(self) -> Optional[QuantizedCommCodecs]:
+        return self._codecs
+
+    @property
+    def callbacks(self) -> List[Callable[[torch.Tensor], torch.Tensor]]:
+        return self._callbacks if self._callbacks is not None else []
+
     def _create_output_dist_module(
         self, sharding_ctx: Optional[EmbeddingShardingContext] = None
     ) -> None:
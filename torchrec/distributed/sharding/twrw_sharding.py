@@ -24,6 +24,7 @@ from torchrec.distributed.dist_data import (
     KJTAllToAll,
     PooledEmbeddingsAllToAll,
     PooledEmbeddingsReduceScatter,
+    SequenceEmbeddingsAllToAll,
     VariableBatchPooledEmbeddingsAllToAll,
     VariableBatchPooledEmbeddingsReduceScatter,
 )
@@ -45,6 +46,7 @@ from torchrec.distributed.embedding_types import (
     GroupedEmbeddingConfig,
     ShardedEmbeddingTable,
 )
+from torchrec.distributed.sharding.sequence_sharding import SequenceShardingContext
 from torchrec.distributed.types import (
     Awaitable,
     CommOp,
@@ -295,6 +297,13 @@ class TwRwSparseFeaturesDist(BaseSparseFeaturesDist[KeyedJaggedTensor]):
         device (Optional[torch.device]): device on which buffers will be allocated.
         has_feature_processor (bool): existence of a feature processor (ie. position
             weighted features).
+        feature_total_num_buckets (Optional[List[int]]): total number of buckets, if
+            provided will be >= local size.
+        keep_original_indices (bool): keep the original indices instead of the
+            indices local to the bucket.
+        is_sequence (bool): if this is for a sequence embedding. Records the
+            permutation that restores the original value order after the bucketize
+            and staggered shuffle in `unbucketize_permute_tensor`.
 
     Example::
 
@@ -333,6 +342,9 @@ class TwRwSparseFeaturesDist(BaseSparseFeaturesDist[KeyedJaggedTensor]):
         device: Optional[torch.device] = None,
         has_feature_processor: bool = False,
         need_pos: bool = False,
+        feature_total_num_buckets: Optional[List[int]] = None,
+        keep_original_indices: bool = False,
+        is_sequence: bool = False,
     ) -> None:
         super().__init__()
         assert pg.size() % local_size == 0, "currently group granularity must be node"
@@ -340,9 +352,13 @@ class TwRwSparseFeaturesDist(BaseSparseFeaturesDist[KeyedJaggedTensor]):
         self._world_size: int = pg.size()
         self._local_size: int = local_size
         self._num_cross_nodes: int = self._world_size // self._local_size
-        feature_block_sizes = [
-            math.ceil(hash_size / self._local_size) for hash_size in feature_hash_sizes
-        ]
+        feature_block_sizes: List[int] = []
+        for i, hash_size in enumerate(feature_hash_sizes):
+            block_divisor = self._local_size
+            if feature_total_num_buckets is not None:
+                assert feature_total_num_buckets[i] % self._local_size == 0
+                block_divisor = feature_total_num_buckets[i]
+            feature_block_sizes.append(math.ceil(hash_size / block_divisor))
 
         self._sf_staggered_shuffle: List[int] = self._staggered_shuffle(
             features_per_rank
@@ -363,6 +379,19 @@ class TwRwSparseFeaturesDist(BaseSparseFeaturesDist[KeyedJaggedTensor]):
                 dtype=torch.int32,
             ),
         )
+        self._has_multiple_blocks_per_shard: bool = (
+            feature_total_num_buckets is not None
+        )
+        if self._has_multiple_blocks_per_shard:
+            self.register_buffer(
+                "_feature_total_num_blocks_tensor",
+                torch.tensor(
+                    [feature_total_num_buckets],
+                    device=device,
+                    dtype=torch.int64,
+                ),
+                persistent=False,
+            )
         self._dist = KJTAllToAll(
             pg=pg,
             splits=features_per_rank,
@@ -370,6 +399,9 @@ class TwRwSparseFeaturesDist(BaseSparseFeaturesDist[KeyedJaggedTensor]):
         )
         self._has_feature_processor = has_feature_processor
         self._need_pos = need_pos
+        self._keep_original_indices = keep_original_indices
+        self._is_sequence = is_sequence
+        self.unbucketize_permute_tensor: Optional[torch.Tensor] = None
 
     def forward(
         self,
@@ -388,22 +420,67 @@ class TwRwSparseFeaturesDist(BaseSparseFeaturesDist[KeyedJaggedTensor]):
             Awaitable[KeyedJaggedTensor]: awaitable of KeyedJaggedTensor.
         """
 
-        bucketized_features = bucketize_kjt_before_all2all(
+        (
+            bucketized_features,
+            unbucketize_permute_tensor,
+        ) = bucketize_kjt_before_all2all(
             sparse_features,
             num_buckets=self._local_size,
             block_sizes=self._feature_block_sizes_tensor,
-            output_permute=False,
+            total_num_blocks=(
+                self._feature_total_num_blocks_tensor
+                if self._has_multiple_blocks_per_shard
+                else None
+            ),
+            output_permute=self._is_sequence,
             bucketize_pos=(
                 self._has_feature_processor
                 if sparse_features.weights_or_none() is None
                 else self._need_pos
             ),
-        )[0].permute(
+            keep_original_indices=self._keep_original_indices,
+        )
+        shuffled_features = bucketized_features.permute(
             self._sf_staggered_shuffle,
             self._sf_staggered_shuffle_tensor,
         )
+        if unbucketize_permute_tensor is not None:
+            self.unbucketize_permute_tensor = self._compose_unbucketize_permute(
+                bucketized_features, unbucketize_permute_tensor
+            )
 
-        return self._dist(bucketized_features)
+        return self._dist(shuffled_features)
+
+    def _compose_unbucketize_permute(
+        self,
+        bucketized_features: KeyedJaggedTensor,
+        unbucketize_permute_tensor: torch.Tensor,
+    ) -> torch.Tensor:
+        """
+        Folds the staggered shuffle into the unbucketize permutation, so that it maps
+        each original value to its position in the shuffled features.
+        """
+
+        num_values = bucketized_features.values().numel()
+        positions = torch.arange(
+            num_values,
+            device=unbucketize_permute_tensor.device,
+            dtype=unbucketize_permute_tensor.dtype,
+        )
+        # shuffled position -> bucketized position
+        shuffled_to_bucketized = KeyedJaggedTensor(
+            keys=bucketized_features.keys(),
+            values=positions,
+            lengths=bucketized_features.lengths(),
+            stride=bucketized_features.stride(),
+        ).permute(
+            self._sf_staggered_shuffle,
+            self._sf_staggered_shuffle_tensor,
+        )
+        bucketized_to_shuffled = torch.empty_like(positions).scatter_(
+            0, shuffled_to_bucketized.values(), positions
+        )
+        return bucketized_to_shuffled[unbucketize_permute_tensor]
 
     def _staggered_shuffle(self, features_per_rank: List[int]) -> List[int]:
         """
@@ -642,6 +719,70 @@ class TwRwPooledEmbeddingDist(
             )
 
 
+class TwRwSequenceEmbeddingDist(
+    BaseEmbeddingDist[SequenceShardingContext, torch.Tensor, torch.Tensor]
+):
+    """
+    Redistributes sequence embedding tensor in TWRW fashion with an AlltoAll
+    operation. The input must come from a `TwRwSparseFeaturesDist` with
+    `is_sequence=True`, whose staggered shuffle is undone through the sharding
+    context.
+
+    Args:
+        pg (dist.ProcessGroup): ProcessGroup for AlltoAll communication.
+        features_per_rank (List[int]): number of features sent to each rank.
+        device (Optional[torch.device]): device on which buffers will be allocated.
+    """
+
+    def __init__(
+        self,
+        pg: dist.ProcessGroup,
+        features_per_rank: List[int],
+        device: Optional[torch.device] = None,
+        qcomm_codecs_registry: Optional[Dict[str, QuantizedCommCodecs]] = None,
+    ) -> None:
+        super().__init__()
+        self._dist = SequenceEmbeddingsAllToAll(
+            pg,
+            features_per_rank,
+            device,
+            codecs=(
+                qcomm_codecs_registry.get(
+                    CommOp.SEQUENCE_EMBEDDINGS_ALL_TO_ALL.name, None
+                )
+                if qcomm_codecs_registry
+                else None
+            ),
+        )
+
+    def forward(
+        self,
+        local_embs: torch.Tensor,
+        sharding_ctx: Optional[SequenceShardingContext] = None,
+    ) -> Awaitable[torch.Tensor]:
+        """
+        Performs AlltoAll operation on sequence embeddings tensor.
+
+        Args:
+            local_embs (torch.Tensor): tensor of values to distribute.
+            sharding_ctx (SequenceShardingContext): shared context from KJTAllToAll
+                operation.
+
+        Returns:
+            Awaitable[torch.Tensor]: awaitable of sequence embeddings.
+        """
+        assert sharding_ctx is not None
+        return self._dist(
+            local_embs,
+            lengths=sharding_ctx.lengths_after_input_dist,
+            input_splits=sharding_ctx.input_splits,
+            output_splits=sharding_ctx.output_splits,
+            batch_size_per_rank=sharding_ctx.batch_size_per_rank,
+            sparse_features_recat=sharding_ctx.sparse_features_recat,
+            unbucketize_permute_tensor=sharding_ctx.unbucketize_permute_tensor,
+        )
+
+
 class TwRwPooledEmbeddingSharding(
     BaseTwRwEmbeddingSharding[
         EmbeddingShardingContext, KeyedJaggedTensor, torch.Tensor, torch.Tensor
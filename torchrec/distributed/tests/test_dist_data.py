@@ -19,9 +19,11 @@ from hypothesis import given, settings
 
 from torchrec.distributed.dist_data import (
     _get_recat,
+    FusedPooledEmbeddingsAllToAll,
     JaggedTensorAllToAll,
     KJTAllToAll,
     KJTAllToAllSplitsAwaitable,
+    KJTTensorsAllToAllFusion,
     PooledEmbeddingsAllGather,
     PooledEmbeddingsAllToAll,
     PooledEmbeddingsReduceScatter,
@@ -595,6 +597,67 @@ class PooledEmbeddingsAllToAllTest(MultiProcessTestBase):
         )
 
 
+class FusedPooledEmbeddingsAllToAllTest(MultiProcessTestBase):
+    @staticmethod
+    def _test_fused_pooled_embeddings(
+        rank: int,
+        world_size: int,
+        dim_sum_per_rank_per_group: List[List[int]],
+        batch_size: int,
+    ) -> None:
+        with MultiProcessContext(rank, world_size, "nccl") as ctx:
+            pg = ctx.pg
+            assert pg is not None
+            device = ctx.device
+            local_embs = [
+                torch.rand(
+                    (batch_size * world_size, dim_sum_per_rank[rank]),
+                    device=device,
+                    requires_grad=True,
+                )
+                for dim_sum_per_rank in dim_sum_per_rank_per_group
+            ]
+            fused_local_embs = [
+                embs.detach().clone().requires_grad_(True) for embs in local_embs
+            ]
+
+            expected = [
+                PooledEmbeddingsAllToAll(
+                    pg=pg, dim_sum_per_rank=dim_sum_per_rank, device=device
+                )(embs).wait()
+                for embs, dim_sum_per_rank in zip(
+                    local_embs, dim_sum_per_rank_per_group
+                )
+            ]
+            fused_a2a = FusedPooledEmbeddingsAllToAll(
+                pg=pg,
+                dim_sum_per_rank_per_group=dim_sum_per_rank_per_group,
+                device=device,
+            )
+            outputs = [w.wait() for w in fused_a2a(fused_local_embs)]
+
+            for output, expected_output in zip(outputs, expected):
+                torch.testing.assert_close(output, expected_output)
+
+            torch.cat(expected, dim=1).sum().backward()
+            torch.cat(outputs, dim=1).sum().backward()
+            for embs, fused_embs in zip(local_embs, fused_local_embs):
+                torch.testing.assert_close(embs.grad, fused_embs.grad)
+
+    @unittest.skipIf(
+        torch.cuda.device_count() <= 1,
+        "Not enough GPUs, this test requires at least two GPUs",
+    )
+    def test_fused_pooled_embeddings(self) -> None:
+        self._run_multi_process_test(
+            callable=self._test_fused_pooled_embeddings,
+            world_size=2,
+            # TW group, CW group and a group without tables on rank 1
+            dim_sum_per_rank_per_group=[[16, 8], [32, 32], [8, 0]],
+            batch_size=3,
+        )
+
+
 class PooledEmbeddingsReduceScatterTest(MultiProcessTestBase):
     @classmethod
     def _run_test_dist(
@@ -1506,3 +1569,80 @@ class TestJaggedTensorAllToAll(MultiProcessTestBase):
         self._run_multi_process_test(
             callable=self._test_jt_all_to_all, world_size=world_size
         )
+
+
+class KJTTensorsAllToAllFusionTest(MultiProcessTestBase):
+    @staticmethod
+    def _test_fused_tensors_all_to_all(
+        rank: int,
+        world_size: int,
+    ) -> None:
+        with MultiProcessContext(rank, world_size, "gloo") as ctx:
+            pg = ctx.pg
+            assert pg is not None
+            generator = torch.Generator().manual_seed(rank)
+            # two "KJTs", with int32 lengths, int64 values and float weights
+            input_tensors = []
+            input_splits = []
+            for num_tensors in [2, 3]:
+                tensors = []
+                splits = []
+                for dtype in [torch.int32, torch.int64, torch.float][:num_tensors]:
+                    split = torch.randint(
+                        0, 5, (world_size,), generator=generator
+                    ).tolist()
+                    tensors.append(
+                        (torch.rand(sum(split), generator=generator) * 100).to(dtype)
+                    )
+                    splits.append(split)
+                input_tensors.append(tensors)
+                input_splits.append(splits)
+
+            # exchange splits to get output splits, as the splits AlltoAll would
+            output_splits = []
+            for splits in input_splits:
+                kjt_output_splits = []
+                for split in splits:
+                    output_split = torch.empty(world_size, dtype=torch.int64)
+                    dist.all_to_all_single(
+                        output_split, torch.tensor(split, dtype=torch.int64), group=pg
+                    )
+                    kjt_output_splits.append(output_split.tolist())
+                output_splits.append(kjt_output_splits)
+
+            expected = []
+            for tensors, splits, out_splits in zip(
+                input_tensors, input_splits, output_splits
+            ):
+                kjt_expected = []
+                for tensor, split, out_split in zip(tensors, splits, out_splits):
+                    output = torch.empty(sum(out_split), dtype=tensor.dtype)
+                    dist.all_to_all_single(
+                        output,
+                        tensor,
+                        output_split_sizes=out_split,
+                        input_split_sizes=split,
+                        group=pg,
+                    )
+                    kjt_expected.append(output)
+                expected.append(kjt_expected)
+
+            fusion = KJTTensorsAllToAllFusion(
+                pg=pg,
+                input_splits=input_splits,
+                output_splits=output_splits,
+                input_tensors=input_tensors,
+                device=torch.device("cpu"),
+            )
+            # one collective per dtype instead of one per tensor
+            assert fusion.num_collectives == 3
+            outputs = fusion.wait()
+            assert fusion.wait() is outputs
+            for kjt_outputs, kjt_expected in zip(outputs, expected):
+                for output, expected_output in zip(kjt_outputs, kjt_expected):
+                    torch.testing.assert_close(output, expected_output)
+
+    def test_fused_tensors_all_to_all(self) -> None:
+        self._run_multi_process_test(
+            callable=self._test_fused_tensors_all_to_all, world_size=2
+        )
@@ -22,13 +22,22 @@ from torchrec.distributed.mc_embeddingbag import (
 from torchrec.distributed.mc_modules import ShardedManagedCollisionCollection
 from torchrec.distributed.shard import _shard_modules
 
-from torchrec.distributed.sharding_plan import construct_module_sharding_plan, row_wise
+from torchrec.distributed.sharding_plan import (
+    construct_module_sharding_plan,
+    row_wise,
+    table_row_wise,
+)
 
 from torchrec.distributed.test_utils.multi_process import (
     MultiProcessContext,
     MultiProcessTestBase,
 )
-from torchrec.distributed.types import ModuleSharder, ShardingEnv, ShardingPlan
+from torchrec.distributed.types import (
+    ModuleSharder,
+    ShardedTensor,
+    ShardingEnv,
+    ShardingPlan,
+)
 from torchrec.modules.embedding_configs import EmbeddingBagConfig
 from torchrec.modules.embedding_modules import EmbeddingBagCollection
 from torchrec.modules.mc_embedding_modules import ManagedCollisionEmbeddingBagCollection
@@ -49,6 +58,7 @@ class SparseArch(nn.Module):
         tables: List[EmbeddingBagConfig],
         device: torch.device,
         return_remapped: bool = False,
+        need_preprocess: bool = True,
     ) -> None:
         super().__init__()
         self._return_remapped = return_remapped
@@ -79,6 +89,7 @@ class SparseArch(nn.Module):
                 ManagedCollisionCollection(
                     managed_collision_modules=mc_modules,
                     embedding_configs=tables,
+                    need_preprocess=need_preprocess,
                 ),
                 return_remapped_features=self._return_remapped,
             )
@@ -268,6 +279,99 @@ def _test_sharding_and_remapping(  # noqa C901
         # TODO: validate embedding rows, and eviction
 
 
+def _test_table_row_wise_sharding(
+    tables: List[EmbeddingBagConfig],
+    rank: int,
+    world_size: int,
+    kjt_input_per_rank: List[KeyedJaggedTensor],
+    sharder: ModuleSharder[nn.Module],
+    backend: str,
+    local_size: Optional[int] = None,
+) -> None:
+    with MultiProcessContext(rank, world_size, backend, local_size) as ctx:
+        assert local_size is not None
+        kjt_input = kjt_input_per_rank[rank].to(ctx.device)
+        sparse_arch = SparseArch(
+            tables,
+            torch.device("meta"),
+            return_remapped=True,
+            need_preprocess=False,
+        )
+
+        apply_optimizer_in_backward(
+            RowWiseAdagrad,
+            [
+                sparse_arch._mc_ebc._embedding_bag_collection.embedding_bags[
+                    "table_0"
+                ].weight,
+                sparse_arch._mc_ebc._embedding_bag_collection.embedding_bags[
+                    "table_1"
+                ].weight,
+            ],
+            {"lr": 0.01},
+        )
+        module_sharding_plan = construct_module_sharding_plan(
+            sparse_arch._mc_ebc,
+            per_param_sharding={
+                "table_0": table_row_wise(host_index=0),
+                "table_1": table_row_wise(host_index=1),
+            },
+            local_size=local_size,
+            world_size=world_size,
+            device_type="cuda" if torch.cuda.is_available() else "cpu",
+            sharder=sharder,
+        )
+
+        sharded_sparse_arch = _shard_modules(
+            module=copy.deepcopy(sparse_arch),
+            plan=ShardingPlan({"_mc_ebc": module_sharding_plan}),
+            # pyre-fixme[6]: For 1st argument expected `ProcessGroup` but got
+            #  `Optional[ProcessGroup]`.
+            env=ShardingEnv.from_process_group(ctx.pg),
+            sharders=[sharder],
+            device=ctx.device,
+        )
+
+        # pyre-fixme[16]: Item `Tensor` of `Tensor | Module` has no attribute
+        #  `_managed_collision_collection`.
+        mcc = sharded_sparse_arch._mc_ebc._managed_collision_collection
+        assert isinstance(mcc, ShardedManagedCollisionCollection)
+        # only the tables of the node of this rank have MC modules
+        local_table = "table_0" if rank < local_size else "table_1"
+        assert list(mcc._managed_collision_modules.keys()) == [local_table]
+
+        test_state_dict = sharded_sparse_arch.state_dict()
+        for fqn, value in test_state_dict.items():
+            if "_managed_collision_modules" in fqn and isinstance(value, ShardedTensor):
+                assert local_table in fqn
+                assert value.size(0) == tables[int(local_table[-1])].num_embeddings
+        sharded_sparse_arch.load_state_dict(test_state_dict)
+
+        remapped_ids = []
+        for _ in range(2):
+            loss, remapped_ids_out = sharded_sparse_arch(kjt_input)
+            loss.backward()
+            assert torch.isfinite(loss)
+            remapped_ids.append(remapped_ids_out)
+
+        for table in tables:
+            # the ids of each block of the input_hash_size (4000) of the MC modules
+            # are remapped by the MC module shard of the rank owning the block
+            shard_size = table.num_embeddings // local_size
+            for key in table.feature_names:
+                raw_ids = kjt_input[key].values()
+                for i, remapped_ids_out in enumerate(remapped_ids):
+                    values = remapped_ids_out[key].values()
+                    assert torch.equal(
+                        remapped_ids_out[key].lengths(), kjt_input[key].lengths()
+                    )
+                    assert torch.equal(
+                        values // shard_size, raw_ids // (4000 // local_size)
+                    ), f"feature {key} on {ctx.rank} iteration {i} got {values}"
+                # after the first eviction every id owns a slot
+                assert values.unique().numel() == values.numel()
+
+
 @skip_if_asan_class
 class ShardedMCEmbeddingBagCollectionParallelTest(MultiProcessTestBase):
     @unittest.skipIf(
@@ -445,3 +549,49 @@ class ShardedMCEmbeddingBagCollectionParallelTest(MultiProcessTestBase):
             sharder=ManagedCollisionEmbeddingBagCollectionSharder(),
             backend=backend,
         )
+
+    # pyre-ignore
+    @given(
+        backend=st.sampled_from(["nccl"] if torch.cuda.device_count() > 3 else ["gloo"])
+    )
+    @settings(deadline=None, max_examples=1)
+    def test_table_row_wise_sharding(self, backend: str) -> None:
+        WORLD_SIZE = 4
+        LOCAL_SIZE = 2
+
+        embedding_bag_config = [
+            EmbeddingBagConfig(
+                name="table_0",
+                feature_names=["feature_0"],
+                embedding_dim=8,
+                num_embeddings=16,
+            ),
+            EmbeddingBagConfig(
+                name="table_1",
+                feature_names=["feature_1"],
+                embedding_dim=8,
+                num_embeddings=32,
+            ),
+        ]
+
+        kjt_input_per_rank = [
+            KeyedJaggedTensor.from_lengths_sync(
+                keys=["feature_0", "feature_1"],
+                values=torch.LongTensor(
+                    [1000 + rank, 3000 + rank, 2000 + rank, 3900 + rank],
+                ),
+                lengths=torch.LongTensor([1, 1, 1, 1]),
+                weights=None,
+            )
+            for rank in range(WORLD_SIZE)
+        ]
+
+        self._run_multi_process_test(
+            callable=_test_table_row_wise_sharding,
+            world_size=WORLD_SIZE,
+            local_size=LOCAL_SIZE,
+            tables=embedding_bag_config,
+            kjt_input_per_rank=kjt_input_per_rank,
+            sharder=ManagedCollisionEmbeddingBagCollectionSharder(),
+            backend=backend,
+        )
@@ -25,6 +25,7 @@ from torchrec.distributed.fbgemm_qcomm_codec import (
     get_qcomm_codecs_registry,
     QCommsConfig,
 )
+from torchrec.distributed.global_settings import set_fuse_pooled_output_dist
 
 from torchrec.distributed.sharding_plan import (
     column_wise,
@@ -57,8 +58,10 @@ def _test_sharding(
     parameter_sharding_plan: Dict[str, ParameterSharding],
     sharder: ModuleSharder[nn.Module],
     local_size: Optional[int] = None,
+    fuse_pooled_output_dist: bool = False,
 ) -> None:
     trec_dist.comm_ops.set_gradient_division(False)
+    set_fuse_pooled_output_dist(fuse_pooled_output_dist)
     with MultiProcessContext(rank, world_size, backend, local_size) as ctx:
         kjt_input_per_rank = [kjt.to(ctx.device) for kjt in kjt_input_per_rank]
         initial_state_dict = {
@@ -274,3 +277,77 @@ class ConstructParameterShardingTest(MultiProcessTestBase):
             sharder=sharder,
             parameter_sharding_plan=parameter_sharding_plan,
         )
+
+    def test_fused_output_dist_ebc(self) -> None:
+        # the TW and CW output dists share the qcomm codecs and are fused
+        WORLD_SIZE = 2
+        EMBEDDING_DIM = 8
+        NUM_EMBEDDINGS = 4
+        per_param_sharding: Dict[str, ParameterShardingGenerator] = {
+            "0": table_wise(rank=0),
+            "1": table_wise(rank=1),
+            "2": column_wise(ranks=[0, 1]),
+        }
+        embedding_bag_config = [
+            EmbeddingBagConfig(
+                name=str(idx),
+                feature_names=[f"feature_{idx}"],
+                embedding_dim=EMBEDDING_DIM,
+                num_embeddings=NUM_EMBEDDINGS,
+            )
+            for idx in per_param_sharding
+        ]
+        kjt_input_per_rank = [
+            KeyedJaggedTensor.from_lengths_sync(
+                keys=["feature_0", "feature_1", "feature_2"],
+                values=torch.LongTensor([0, 1, 2, 2, 2, 3, 0, 1, 2, 3, 0, 2, 2, 3]),
+                lengths=torch.LongTensor([2, 0, 1, 1, 2, 0, 4, 2, 2]),
+            ),
+            KeyedJaggedTensor.from_lengths_sync(
+                keys=["feature_0", "feature_1", "feature_2"],
+                values=torch.LongTensor([3, 2, 1, 2, 0, 1, 2, 3, 2, 3, 2, 0, 1, 2]),
+                lengths=torch.LongTensor([2, 2, 4, 2, 0, 1, 2, 0, 1]),
+            ),
+        ]
+        sharder = EmbeddingBagCollectionSharder(
+            qcomm_codecs_registry=get_qcomm_codecs_registry(
+                QCommsConfig(
+                    forward_precision=CommType.FP16, backward_precision=CommType.FP16
+                )
+            )
+        )
+        ebc = EmbeddingBagCollection(tables=embedding_bag_config)
+        apply_optimizer_in_backward(
+            torch.optim.SGD,
+            ebc.parameters(),
+            {"lr": 1.0},
+        )
+        parameter_sharding_plan = construct_module_sharding_plan(
+            module=ebc,
+            per_param_sharding=per_param_sharding,
+            local_size=2,
+            world_size=2,
+            # pyre-ignore
+            sharder=sharder,
+        )
+
+        self._run_multi_process_test(
+            callable=_test_sharding,
+            world_size=WORLD_SIZE,
+            tables=embedding_bag_config,
+            initial_state_dict={
+                f"embedding_bags.{idx}.weight": torch.full(
+                    (NUM_EMBEDDINGS, EMBEDDING_DIM), float(int(idx) + 1)
+                )
+                for idx in per_param_sharding
+            },
+            kjt_input_per_rank=kjt_input_per_rank,
+            backend=(
+                "nccl"
+                if (torch.cuda.is_available() and torch.cuda.device_count() >= 2)
+                else "gloo"
+            ),
+            sharder=sharder,
+            parameter_sharding_plan=parameter_sharding_plan,
+            fuse_pooled_output_dist=True,
+        )
@@ -28,6 +28,8 @@ from torchrec.distributed.train_pipeline.utils import (  # noqa
     ArgInfo,  # noqa
     DataLoadingThread,  # noqa
     In,  # noqa
+    invalidate_model_rewrite_cache,  # noqa
+    ModelRewriteInfo,  # noqa
     Out,  # noqa
     SparseDataDistUtil,  # noqa
     StageOut,  # noqa
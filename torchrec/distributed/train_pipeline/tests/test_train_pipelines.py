@@ -14,7 +14,7 @@ from contextlib import ExitStack
 from dataclasses import dataclass
 from functools import partial
 from typing import cast, List, Optional, Tuple, Type, Union
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import torch
 from hypothesis import given, settings, strategies as st, Verbosity
@@ -800,6 +800,107 @@ class TrainPipelineSparseDistTest(TrainPipelineSparseDistTestBase):
         # Check pipeline exhausted
         self.assertRaises(StopIteration, pipeline.progress, dataloader)
 
+    def test_switch_mode(self) -> None:
+        """
+        Test the scenario in which:
+        1) Model training with pipeline.progress()
+        2) Mid-training, pipeline is switched to eval and runs an eval dataloader
+        3) Pipeline is switched back to train and resumes the in-flight train batches
+        4) No model rewrite happens in between
+        """
+        if not torch.cuda.is_available():
+            # runs on CPU with gloo as well
+            self.device = torch.device("cpu")
+        data = self._generate_data(
+            num_batches=7,
+            batch_size=32,
+        )
+        eval_data = self._generate_data(
+            num_batches=3,
+            batch_size=32,
+        )
+        dataloader = iter(data)
+
+        sharding_type = ShardingType.TABLE_WISE.value
+        kernel_type = EmbeddingComputeKernel.FUSED.value
+        fused_params = {}
+
+        model = self._setup_model()
+        sharded_model, optim = self._generate_sharded_model_and_optimizer(
+            model, sharding_type, kernel_type, fused_params
+        )
+
+        (
+            sharded_model_pipelined,
+            optim_pipelined,
+        ) = self._generate_sharded_model_and_optimizer(
+            model, sharding_type, kernel_type, fused_params
+        )
+        copy_state_dict(
+            sharded_model.state_dict(), sharded_model_pipelined.state_dict()
+        )
+
+        def model_fwd(
+            batch: Optional[ModelInput],
+        ) -> Tuple[Optional[torch.Tensor], torch.Tensor]:
+            # TestSparseNN only returns the predictions in eval mode
+            if sharded_model_pipelined.training:
+                return sharded_model_pipelined(batch)
+            return None, sharded_model_pipelined(batch)
+
+        pipeline = self.pipeline_class(
+            model=sharded_model_pipelined,
+            optimizer=optim_pipelined,
+            device=self.device,
+            execute_all_batches=True,
+            custom_model_fwd=model_fwd,
+        )
+
+        def _train(indices: range) -> None:
+            for i in indices:
+                batch = data[i].to(self.device)
+                optim.zero_grad()
+                loss, pred = sharded_model(batch)
+                loss.backward()
+                optim.step()
+
+                pred_pipelined = pipeline.progress(dataloader)
+                self.assertTrue(torch.equal(pred, pred_pipelined))
+
+        _train(range(3))
+
+        # pyre-fixme[16]: Item `Tensor` of `Tensor | Module` has no attribute
+        #  `sparse`.
+        ebc = sharded_model_pipelined.module.sparse.ebc
+        pipelined_forward = ebc.forward
+        self.assertIsInstance(pipelined_forward, PipelinedForward)
+
+        with patch(
+            "torchrec.distributed.train_pipeline.train_pipelines._rewrite_model"
+        ) as rewrite_model:
+            pipeline.switch_mode(training=False)
+            self.assertFalse(sharded_model_pipelined.training)
+            sharded_model.eval()
+            eval_dataloader = iter(eval_data)
+            with torch.no_grad():
+                for batch in eval_data:
+                    pred = sharded_model(batch.to(self.device))
+                    pred_pipelined = pipeline.progress(eval_dataloader)
+                    self.assertTrue(torch.equal(pred, pred_pipelined))
+                self.assertRaises(StopIteration, pipeline.progress, eval_dataloader)
+
+            pipeline.switch_mode(training=True)
+            self.assertTrue(sharded_model_pipelined.training)
+            sharded_model.train()
+            # the pipelined forwards are reused, the model is not rewritten again
+            self.assertIs(ebc.forward, pipelined_forward)
+            rewrite_model.assert_not_called()
+
+        _train(range(3, 7))
+
+        # Check pipeline exhausted
+        self.assertRaises(StopIteration, pipeline.progress, dataloader)
+
     # pyre-fixme[56]: Pyre was not able to infer the type of argument
     @unittest.skipIf(
         not torch.cuda.is_available(),
@@ -1702,6 +1803,16 @@ class PrefetchTrainPipelineSparseDistTest(TrainPipelineSparseDistTestBase):
             else:
                 torch.testing.assert_close(pred, pred_pipeline)
 
+    def test_switch_mode_not_supported(self) -> None:
+        pipeline = PrefetchTrainPipelineSparseDist(
+            model=MagicMock(),
+            optimizer=MagicMock(),
+            device=torch.device("cpu"),
+        )
+        self.assertFalse(hasattr(pipeline, "switch_mode"))
+        with self.assertRaisesRegex(AttributeError, "switch_mode"):
+            pipeline.switch_mode(training=False)
+
 
 class DataLoadingThreadTest(unittest.TestCase):
     def test_fetch_data(self) -> None:
@@ -2268,6 +2379,14 @@ class TrainPipelineSparseDistCompAutogradTest(TrainPipelineSparseDistTest):
         self.assertEqual(counters["compiled_autograd"]["captures"], 3)
         return super().tearDown()
 
+    # pyre-fixme[56]: Pyre was not able to infer the type of argument
+    @unittest.skipIf(
+        not torch.cuda.is_available(),
+        "Compiled autograd does not support the fbgemm CPU kernels",
+    )
+    def test_switch_mode(self) -> None:
+        super().test_switch_mode()
+
     @unittest.skip("Dynamo only supports FSDP with use_orig_params=True")
     # pyre-ignore[56]
     @given(execute_all_batches=st.booleans())
@@ -10,7 +10,7 @@
 import copy
 import enum
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import torch
 
@@ -21,10 +21,14 @@ from torchrec.distributed.train_pipeline.tests.test_train_pipelines_base import
     TrainPipelineSparseDistTestBase,
 )
 from torchrec.distributed.train_pipeline.utils import (
+    _apply_rewrite_info,
     _get_node_args,
     _rewrite_model,
+    invalidate_model_rewrite_cache,
+    ModelRewriteInfo,
     PipelinedForward,
     PipelinedPostproc,
+    Tracer,
     TrainPipelineContext,
 )
 from torchrec.distributed.types import ShardingType
@@ -126,6 +130,68 @@ class TrainPipelineUtilsTest(TrainPipelineSparseDistTestBase):
         self.assertEqual(missing_keys, [])
         self.assertEqual(unexpected_keys, [])
 
+    # pyre-fixme[56]: Pyre was not able to infer the type of argument
+    @unittest.skipIf(
+        not torch.cuda.is_available(),
+        "Not enough GPUs, this test requires at least one GPU",
+    )
+    def test_rewrite_model_cache(self) -> None:
+        model = self._setup_model()
+        sharded_model, _ = self._generate_sharded_model_and_optimizer(
+            model,
+            ShardingType.TABLE_WISE.value,
+            EmbeddingComputeKernel.FUSED.value,
+            {},
+        )
+        # pyre-fixme[16]: Item `Tensor` of `Tensor | Module` has no attribute `sparse`.
+        ebc = sharded_model.module.sparse.ebc
+        ebc_forward = ebc.forward
+
+        pipelined_modules, _, original_forwards, _, _ = _rewrite_model(
+            model=sharded_model,
+            batch=None,
+            context=TrainPipelineContext(),
+            dist_stream=None,
+            use_rewrite_cache=True,
+        )
+        self.assertIsInstance(ebc.forward, PipelinedForward)
+        args = ebc.forward.args
+        for module, original_fwd in zip(pipelined_modules, original_forwards):
+            module.forward = original_fwd
+
+        # second rewrite of the same model reuses the cached analysis
+        context = TrainPipelineContext()
+        with patch.object(Tracer, "trace") as mock_trace:
+            cached_pipelined_modules, _, _, _, _ = _rewrite_model(
+                model=sharded_model,
+                batch=None,
+                context=context,
+                dist_stream=None,
+                use_rewrite_cache=True,
+            )
+            mock_trace.assert_not_called()
+        self.assertEqual(cached_pipelined_modules, pipelined_modules)
+        self.assertIsInstance(ebc.forward, PipelinedForward)
+        self.assertIs(ebc.forward.args, args)
+        self.assertIs(ebc.forward.get_context(), context)
+
+        for module, original_fwd in zip(pipelined_modules, original_forwards):
+            module.forward = original_fwd
+        self.assertEqual(ebc.forward, ebc_forward)
+
+        # invalidating the cache forces re-tracing
+        invalidate_model_rewrite_cache(sharded_model)
+        _rewrite_model(
+            model=sharded_model,
+            batch=None,
+            context=TrainPipelineContext(),
+            dist_stream=None,
+            use_rewrite_cache=True,
+        )
+        self.assertIsInstance(ebc.forward, PipelinedForward)
+        self.assertIsNot(ebc.forward.args, args)
+        invalidate_model_rewrite_cache()
+
     def test_pipelined_postproc_state_dict(self) -> None:
         class TestModule(torch.nn.Module):
             def __init__(self):
@@ -255,6 +321,41 @@ class TrainPipelineUtilsTest(TrainPipelineSparseDistTestBase):
 
 
 class TestUtils(unittest.TestCase):
+    def test_apply_rewrite_info_rebinds_postprocs(self) -> None:
+        postproc = PipelinedPostproc(
+            postproc_module=torch.nn.Identity(),
+            fqn="postproc",
+            args=[],
+            context=TrainPipelineContext(),
+            default_stream=MagicMock(),
+            dist_stream=MagicMock(),
+        )
+        rewrite_info = ModelRewriteInfo(
+            arg_info_lists={},
+            pipelined_postprocs=[postproc],
+            non_pipelined_sharded_modules=[],
+            sharded_module_ids={},
+            batch_type=None,
+            pipeline_postproc=True,
+        )
+
+        # another pipeline reusing the cached rewrite
+        context = TrainPipelineContext()
+        default_stream, dist_stream = MagicMock(), MagicMock()
+        _, _, _, postprocs, _ = _apply_rewrite_info(
+            rewrite_info,
+            torch.nn.Identity(),
+            {},
+            context,
+            dist_stream,
+            default_stream,
+            PipelinedForward,
+        )
+        self.assertEqual(postprocs, [postproc])
+        self.assertIs(postproc.get_context(), context)
+        self.assertIs(postproc._default_stream, default_stream)
+        self.assertIs(postproc._dist_stream, dist_stream)
+
     def test_get_node_args_helper_call_module_kjt(self) -> None:
         graph = torch.fx.Graph()
         kjt_args = []
@@ -37,6 +37,7 @@ from torchrec.distributed.train_pipeline.utils import (
     _override_input_dist_forwards,
     _pipeline_detach_model,
     _prefetch_embeddings,
+    _record_input_dist_tensors_schedule,
     _rewrite_model,
     _start_data_dist,
     _start_embedding_lookup,
@@ -105,6 +106,28 @@ class TorchCompileConfig:
     compile_on_iter: int = 3
 
 
+@dataclass
+class PipelineModeState:
+    """
+    In-flight state of a `TrainPipelineSparseDist` for one mode (train or eval), kept
+    aside while the pipeline runs in the other mode.
+
+    batches (Deque[Optional[In]]): in-flight batches, already copied to device.
+    contexts (Deque[TrainPipelineContext]): contexts of the in-flight batches, with
+        their (possibly still pending) input dist requests.
+    dataloader_iter (Optional[Iterator[In]]): dataloader the batches came from.
+    dataloader_exhausted (bool): whether `dataloader_iter` is exhausted.
+    next_index (int): index of the next context, so that each mode keeps counting
+        its own batches (e.g. for the semi-sync start batch).
+    """
+
+    batches: Deque[Optional[Any]]
+    contexts: Deque[TrainPipelineContext]
+    dataloader_iter: Optional[Iterator[Any]] = None
+    dataloader_exhausted: bool = False
+    next_index: int = 0
+
+
 class TrainPipelineBase(TrainPipeline[In, Out]):
     """
     This class runs training iterations using a pipeline of two stages, each as a CUDA
@@ -309,6 +332,13 @@ class TrainPipelineSparseDist(TrainPipeline[In, Out]):
         execute_all_batches (bool): executes remaining batches in pipeline after
             exhausting dataloader iterator.
         apply_jit (bool): apply torch.jit.script to non-pipelined (unsharded) modules.
+        use_rewrite_cache (bool): cache the FX analysis of the model rewrite so that
+            other pipelines (e.g. an `EvalPipelineSparseDist`) pipelining the same
+            model can skip re-tracing it.
+        fuse_input_dist_tensors (bool): fuse the input dist tensors AlltoAlls of all
+            pipelined modules sharing a process group into one AlltoAll per dtype, in
+            addition to the fused splits AlltoAll. The chosen schedule is recorded in
+            `TrainPipelineContext.input_dist_schedule` and logged at debug level.
     """
 
     def __init__(
@@ -324,12 +354,16 @@ class TrainPipelineSparseDist(TrainPipeline[In, Out]):
         custom_model_fwd: Optional[
             Callable[[Optional[In]], Tuple[torch.Tensor, Out]]
         ] = None,
+        use_rewrite_cache: bool = False,
+        fuse_input_dist_tensors: bool = False,
     ) -> None:
         self._model = model
         self._optimizer = optimizer
         self._device = device
         self._execute_all_batches = execute_all_batches
         self._apply_jit = apply_jit
+        self._use_rewrite_cache = use_rewrite_cache
+        self._fuse_input_dist_tensors = fuse_input_dist_tensors
 
         if device.type == "cuda":
             # use two data streams to support two concurrent batches
@@ -364,10 +398,15 @@ class TrainPipelineSparseDist(TrainPipeline[In, Out]):
             Callable[[KeyedJaggedTensor], Awaitable[KJTAllToAllTensorsAwaitable]]
         ] = []
 
+        # pipelined forwards kept on detach, reinstalled by attach of the same model
+        self._detached_forwards: List[Callable[..., Any]] = []
+
         self._model_attached = True
         self._pipeline_postproc = pipeline_postproc
 
         self._next_index: int = 0
+        # in-flight state of the inactive mode, keyed by `model.training`
+        self._mode_states: Dict[bool, PipelineModeState] = {}
         self.contexts: Deque[TrainPipelineContext] = deque()
         self._pipelined_modules: List[ShardedModule] = []
         self._pipelined_postprocs: List[PipelinedPostproc] = []
@@ -395,7 +434,10 @@ class TrainPipelineSparseDist(TrainPipeline[In, Out]):
 
         Returns the original model.
         """
-        if self._pipelined_modules:
+        if self._pipelined_modules and self._model_attached:
+            self._detached_forwards = [
+                module.forward for module in self._pipelined_modules
+            ]
             _pipeline_detach_model(
                 pipelined_modules=self._pipelined_modules,
                 original_forwards=self._original_forwards,
@@ -406,11 +448,16 @@ class TrainPipelineSparseDist(TrainPipeline[In, Out]):
         return self._model
 
     def attach(self, model: Optional[torch.nn.Module] = None) -> None:
-        if model:
+        if model is not None and model is not self._model:
             self._model = model
+            self._detached_forwards = []
 
         self._model_attached = True
-        if self.contexts:
+        if self._detached_forwards and self.contexts:
+            # fast path: the same model is re-attached, so the pipelined forwards
+            # and input dists from before `detach` are still valid
+            self._reattach_forwards()
+        elif self.contexts:
             self._pipeline_model(
                 batch=self.batches[0],
                 context=self.contexts[0],
@@ -421,6 +468,71 @@ class TrainPipelineSparseDist(TrainPipeline[In, Out]):
             # model rewrite for SDD needs context but self.contexts is empty
             # reset _pipelined_modules so _fill_pipeline will rewrite model on progress()
             self._pipelined_modules = []
+            self._detached_forwards = []
+
+    def _reattach_forwards(self) -> None:
+        """
+        Reinstalls the pipelined forwards saved by `detach` without re-tracing the
+        model, then restarts the sparse data dist of the queued batch and overrides
+        the input dist forwards again, as `_pipeline_model` does after a rewrite.
+        """
+        self._original_forwards = []
+        for module, pipelined_forward in zip(
+            self._pipelined_modules, self._detached_forwards
+        ):
+            self._original_forwards.append(module.forward)
+            module.forward = pipelined_forward
+        self._detached_forwards = []
+        self._set_module_context(self.contexts[0])
+        self.start_sparse_data_dist(self.batches[0], self.contexts[0])
+        self._original_kjt_dist_forwards = _override_input_dist_forwards(
+            self._pipelined_modules
+        )
+
+    def switch_mode(self, training: bool) -> None:
+        """
+        Switches the pipeline (and the model) between training and evaluation in
+        place, e.g. for periodic mid-epoch evaluation.
+
+        Streams, rewritten forwards and input dist overrides are kept, so no model
+        rewrite happens. The in-flight batches of the current mode are not drained but
+        set aside together with their dataloader iterator, and are resumed when
+        switching back. The pipeline is filled from the dataloader passed to the next
+        `progress` call. In eval mode `progress` runs forward only, callers should wrap
+        it in `torch.no_grad()` as they would for the model itself.
+
+        The in-flight state of a mode is entirely held by its batches and contexts
+        (input dist requests, and the embedding lookups of `TrainPipelineSemiSync`),
+        so it is valid again once switched back. Not available on
+        `PrefetchTrainPipelineSparseDist`, whose in-flight batch is prefetched into
+        the embedding caches.
+
+        Args:
+            training (bool): True to switch to training, False to evaluation.
+        """
+        current = self._model.training
+        if training == current:
+            return
+
+        self._mode_states[current] = PipelineModeState(
+            batches=self.batches,
+            contexts=self.contexts,
+            dataloader_iter=self._dataloader_iter,
+            dataloader_exhausted=self._dataloader_exhausted,
+            next_index=self._next_index,
+        )
+        state = self._mode_states.pop(training, None)
+        if state is None:
+            state = PipelineModeState(batches=deque(), contexts=deque())
+        self.batches = state.batches
+        self.contexts = state.contexts
+        self._dataloader_iter = state.dataloader_iter
+        self._dataloader_exhausted = state.dataloader_exhausted
+        self._next_index = state.next_index
+
+        self._model.train(training)
+        if self.contexts and self._pipelined_modules:
+            self._set_module_context(self.contexts[0])
 
     def _set_module_context(self, context: TrainPipelineContext) -> None:
         for module in self._pipelined_modules:
@@ -540,6 +652,7 @@ class TrainPipelineSparseDist(TrainPipeline[In, Out]):
             apply_jit=self._apply_jit,
             pipelined_forward=pipelined_forward,
             pipeline_postproc=self._pipeline_postproc,
+            use_rewrite_cache=self._use_rewrite_cache,
         )
         # initializes input dist, so we can override input dist forwards
         self.start_sparse_data_dist(batch, context)
@@ -622,7 +735,12 @@ class TrainPipelineSparseDist(TrainPipeline[In, Out]):
                 for postproc_mod in self._pipelined_postprocs:
                     postproc_mod.set_context(context)
 
-                _start_data_dist(self._pipelined_modules, batch, context)
+                _start_data_dist(
+                    self._pipelined_modules,
+                    batch,
+                    context,
+                    fuse_tensors=self._fuse_input_dist_tensors,
+                )
 
                 # Restore context for model fwd
                 for module, context in zip(
@@ -640,8 +758,14 @@ class TrainPipelineSparseDist(TrainPipeline[In, Out]):
                 for names, awaitable in context.fused_splits_awaitables:
                     for name, request in zip(names, awaitable.wait()):
                         context.input_dist_tensors_requests[name] = request
+                    _record_input_dist_tensors_schedule(context, names, awaitable)
         context.input_dist_splits_requests.clear()
         context.fused_splits_awaitables.clear()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"input dist schedule for batch {context.index}: "
+                f"{context.input_dist_schedule}"
+            )
 
     def _copy_batch_to_gpu(self, dataloader_iter: Iterator[In]) -> Optional[In]:
         """
@@ -720,6 +844,8 @@ class TrainPipelineSemiSync(TrainPipelineSparseDist[In, Out]):
         start_batch (int): batch to begin semi-sync training.  Typically small period of synchronous training reduces early stage NEX.
         stash_gradients (bool): if True, will store gradients for each parameter to insure true "Semi-Sync"
             training.  If False, will update dense optimizer as soon as gradients available (naive "Semi-Sync)
+        use_rewrite_cache (bool): cache the FX analysis of the model rewrite for reuse
+            by other pipelines pipelining the same model.
     """
 
     def __init__(
@@ -735,6 +861,7 @@ class TrainPipelineSemiSync(TrainPipelineSparseDist[In, Out]):
         custom_model_fwd: Optional[
             Callable[[Optional[In]], Tuple[torch.Tensor, Out]]
         ] = None,
+        use_rewrite_cache: bool = False,
     ) -> None:
         super().__init__(
             model=model,
@@ -745,6 +872,7 @@ class TrainPipelineSemiSync(TrainPipelineSparseDist[In, Out]):
             context_type=EmbeddingTrainPipelineContext,
             pipeline_postproc=pipeline_postproc,
             custom_model_fwd=custom_model_fwd,
+            use_rewrite_cache=use_rewrite_cache,
         )
         self._start_batch = start_batch
         self._stash_gradients = stash_gradients
@@ -761,6 +889,11 @@ class TrainPipelineSemiSync(TrainPipelineSparseDist[In, Out]):
             param.grad = grad
 
     def _init_embedding_streams(self) -> None:
+        # the pipeline is refilled after a mode switch or a new dataloader, the
+        # streams of the in-flight batches of the other mode are reused
+        if len(self._embedding_streams) == len(self._pipelined_modules):
+            return
+        self._embedding_streams = []
         for _ in self._pipelined_modules:
             self._embedding_streams.append(
                 (torch.get_device_module(self._device).Stream(priority=0))
@@ -974,7 +1107,12 @@ class TrainPipelineSemiSync(TrainPipelineSparseDist[In, Out]):
             with self._stream_context(self._data_dist_stream):
                 _wait_for_events(batch, context, self._data_dist_stream)
                 model_input = self.extract_model_input_from_batch(batch)
-                _start_data_dist(self._pipelined_modules, model_input, context)
+                _start_data_dist(
+                    self._pipelined_modules,
+                    model_input,
+                    context,
+                    fuse_tensors=self._fuse_input_dist_tensors,
+                )
                 event = torch.get_device_module(self._device).Event()
                 event.record()
                 context.events.append(event)
@@ -1038,6 +1176,8 @@ class PrefetchTrainPipelineSparseDist(TrainPipelineSparseDist[In, Out]):
         execute_all_batches (bool): executes remaining batches in pipeline after
             exhausting dataloader iterator.
         apply_jit (bool): apply torch.jit.script to non-pipelined (unsharded) modules.
+        use_rewrite_cache (bool): cache the FX analysis of the model rewrite for reuse
+            by other pipelines pipelining the same model.
     """
 
     def __init__(
@@ -1051,6 +1191,7 @@ class PrefetchTrainPipelineSparseDist(TrainPipelineSparseDist[In, Out]):
         custom_model_fwd: Optional[
             Callable[[Optional[In]], Tuple[torch.Tensor, Out]]
         ] = None,
+        use_rewrite_cache: bool = False,
     ) -> None:
         super().__init__(
             model=model,
@@ -1061,6 +1202,7 @@ class PrefetchTrainPipelineSparseDist(TrainPipelineSparseDist[In, Out]):
             context_type=PrefetchTrainPipelineContext,
             pipeline_postproc=pipeline_postproc,
             custom_model_fwd=custom_model_fwd,
+            use_rewrite_cache=use_rewrite_cache,
         )
         self._context = PrefetchTrainPipelineContext(version=0)
         self._prefetch_stream: Optional[torch.Stream] = (
@@ -1075,6 +1217,15 @@ class PrefetchTrainPipelineSparseDist(TrainPipelineSparseDist[In, Out]):
         )
         self._batch_ip3: Optional[In] = None
 
+    @property
+    # pyre-ignore[15]: hides `TrainPipelineSparseDist.switch_mode`
+    def switch_mode(self) -> Callable[[bool], None]:
+        # the in-flight batch is already prefetched into the embedding caches and
+        # cannot be set aside, so `hasattr(pipeline, "switch_mode")` is False
+        raise AttributeError(
+            "PrefetchTrainPipelineSparseDist does not support switch_mode"
+        )
+
     def _fill_pipeline(self, dataloader_iter: Iterator[In]) -> None:
         # pipeline is already filled
         if self._batch_i and self._batch_ip1 and self._batch_ip2:
@@ -1192,6 +1343,8 @@ class EvalPipelineSparseDist(TrainPipelineSparseDist[In, Out]):
         device (torch.device): device where device transfer, sparse data dist, and
             forward/backward pass will happen.
         apply_jit (bool): apply torch.jit.script to non-pipelined (unsharded) modules.
+        use_rewrite_cache (bool): reuse the cached FX analysis of a train pipeline
+            pipelining the same model instead of re-tracing it.
     """
 
     def __init__(
@@ -1200,8 +1353,16 @@ class EvalPipelineSparseDist(TrainPipelineSparseDist[In, Out]):
         optimizer: torch.optim.Optimizer,
         device: torch.device,
         apply_jit: bool = False,
+        use_rewrite_cache: bool = False,
     ) -> None:
-        super().__init__(model, optimizer, device, True, apply_jit)
+        super().__init__(
+            model,
+            optimizer,
+            device,
+            True,
+            apply_jit,
+            use_rewrite_cache=use_rewrite_cache,
+        )
         self._batch_loader: Optional[DataLoadingThread[In]] = None
 
     def __del__(self) -> None:
@@ -10,6 +10,7 @@
 import copy
 import itertools
 import logging
+import weakref
 from collections import defaultdict, OrderedDict
 from contextlib import AbstractContextManager
 from dataclasses import dataclass, field
@@ -79,6 +80,28 @@ RunnableType = Callable[..., StageOut]
 StageOutputWithEvent = Tuple[Optional[StageOut], Optional[torch.Event]]
 
 
+@dataclass
+class ScheduledCollective:
+    """
+    Collectives issued for the input dist of one batch, recorded by the pipeline for
+    instrumentation of the input dist schedule.
+
+    Attributes:
+        stage (str): input dist stage, "splits" or "tensors".
+        module_names (List[str]): pipelined modules served by the collectives.
+        pg_size (Optional[int]): size of the process group, None if no collective
+            was needed (e.g. `NoWait` input dists).
+        num_collectives (int): number of collectives issued.
+        num_tensors (int): number of tensors redistributed by the collectives.
+    """
+
+    stage: str
+    module_names: List[str]
+    pg_size: Optional[int]
+    num_collectives: int
+    num_tensors: int
+
+
 @dataclass
 class TrainPipelineContext:
     """
@@ -101,6 +124,8 @@ class TrainPipelineContext:
         event: Optional[torch.cuda.Event]: Event to record the completion of this stage
         index: Optional[int]: Index of the current batch.
         version: int = 0; support for backward compatiblity
+        input_dist_schedule (List[ScheduledCollective]): collectives issued for the
+            input dist of this batch, in issue order.
     """
 
     # pyre-ignore [4]
@@ -120,6 +145,7 @@ class TrainPipelineContext:
     version: int = (
         0  # 1 is current version, 0 is deprecated but supported for backward compatibility
     )
+    input_dist_schedule: List[ScheduledCollective] = field(default_factory=list)
 
 
 @dataclass
@@ -304,8 +330,6 @@ class PipelinedPostproc(torch.nn.Module):
         self._fqn = fqn
         self._args = args
         self._context = context
-        self._default_stream = default_stream
-        self._dist_stream = dist_stream
         if not default_stream:
             logger.warning(
                 f"Postproc module {fqn} has no default stream. This may cause race conditions and NaNs during training!"
@@ -314,7 +338,19 @@ class PipelinedPostproc(torch.nn.Module):
             logger.warning(
                 f"Postproc module {fqn} has no dist stream. This may cause race conditions and NaNs during training!"
             )
+        self.set_streams(default_stream, dist_stream)
 
+    def set_streams(
+        self,
+        default_stream: Optional[torch.Stream],
+        dist_stream: Optional[torch.Stream],
+    ) -> None:
+        """
+        Sets the streams of the pipeline running the postproc module, e.g. when a
+        cached rewrite is reused by another pipeline.
+        """
+        self._default_stream = default_stream
+        self._dist_stream = dist_stream
         if self._dist_stream:
             device: torch.device = self._dist_stream.device
             # pyre-ignore
@@ -751,11 +787,22 @@ def _start_data_dist(
     pipelined_modules: List[ShardedModule],
     batch: Pipelineable,
     context: TrainPipelineContext,
+    fuse_tensors: bool = False,
 ) -> None:
+    """
+    Starts the input dists of all pipelined modules for `batch`.
+
+    The splits AlltoAlls of all modules sharing a process group are fused into one
+    collective. With `fuse_tensors`, the tensors AlltoAlls issued once the splits are
+    known are fused as well, into one collective per dtype per process group, so the
+    input dist of all modules takes two collective rounds regardless of the number of
+    sharded modules.
+    """
     if context.version == 0:
         context.input_dist_splits_requests.clear()
         context.module_contexts_next_batch.clear()
         context.fused_splits_awaitables.clear()
+    context.input_dist_schedule.clear()
 
     for module in pipelined_modules:
         forward = module.forward
@@ -781,7 +828,7 @@ def _start_data_dist(
         context.input_dist_splits_requests[forward.name] = module.input_dist(
             module_ctx, *args, **kwargs
         )
-    _fuse_input_dist_splits(context)
+    _fuse_input_dist_splits(context, fuse_tensors)
 
 
 def _start_embedding_lookup(
@@ -803,7 +850,9 @@ def _start_embedding_lookup(
     context.embedding_a2a_requests[module.forward.name] = a2a_awaitable
 
 
-def _fuse_input_dist_splits(context: TrainPipelineContext) -> None:
+def _fuse_input_dist_splits(
+    context: TrainPipelineContext, fuse_tensors: bool = False
+) -> None:
     names_per_pg = defaultdict(list)
     for name, request in context.input_dist_splits_requests.items():
         pg = None
@@ -815,28 +864,63 @@ def _fuse_input_dist_splits(context: TrainPipelineContext) -> None:
         names_per_pg[pg].append(name)
 
     for pg, names in names_per_pg.items():
-        context.fused_splits_awaitables.append(
-            (
-                names,
-                FusedKJTListSplitsAwaitable(
-                    # pyre-ignore[6]
-                    requests=[
-                        context.input_dist_splits_requests[name] for name in names
-                    ],
-                    contexts=[
-                        (
-                            context.module_contexts_next_batch[name]
-                            if context.version == 0
-                            else context.module_contexts[name]
-                        )
-                        for name in names
-                    ],
-                    pg=pg,
+        fused_awaitable = FusedKJTListSplitsAwaitable(
+            # pyre-ignore[6]
+            requests=[context.input_dist_splits_requests[name] for name in names],
+            contexts=[
+                (
+                    context.module_contexts_next_batch[name]
+                    if context.version == 0
+                    else context.module_contexts[name]
+                )
+                for name in names
+            ],
+            pg=pg,
+            fuse_tensors=fuse_tensors,
+        )
+        context.fused_splits_awaitables.append((names, fused_awaitable))
+        context.input_dist_schedule.append(
+            ScheduledCollective(
+                stage="splits",
+                module_names=names,
+                pg_size=pg.size() if pg is not None else None,
+                num_collectives=(
+                    1 if pg is not None and fused_awaitable.num_splits_tensors else 0
                 ),
+                num_tensors=fused_awaitable.num_splits_tensors,
             )
         )
 
 
+def _record_input_dist_tensors_schedule(
+    context: TrainPipelineContext,
+    names: List[str],
+    fused_awaitable: FusedKJTListSplitsAwaitable,
+) -> None:
+    """
+    Records the tensors AlltoAlls issued by waiting on `fused_awaitable`.
+    """
+    pg = fused_awaitable.pg
+    pg_size = pg.size() if pg is not None else None
+    fusion = fused_awaitable.fusion
+    num_tensors = fused_awaitable.num_tensors
+    if fusion is not None:
+        num_collectives = fusion.num_collectives
+    elif pg_size is not None and pg_size > 1:
+        num_collectives = num_tensors
+    else:
+        num_collectives = 0
+    context.input_dist_schedule.append(
+        ScheduledCollective(
+            stage="tensors",
+            module_names=names,
+            pg_size=pg_size,
+            num_collectives=num_collectives,
+            num_tensors=num_tensors,
+        )
+    )
+
+
 def _check_args_for_call_module(
     node: torch.fx.Node,
 ) -> bool:
@@ -1282,6 +1366,79 @@ def _pipeline_detach_model(
         kjt_dist.forward = original_kjt_dist_fwd
 
 
+@dataclass
+class ModelRewriteInfo:
+    """
+    Result of the FX analysis done by `_rewrite_model`. It only depends on the model
+    structure (and the batch type used for tracing), so it can be reused by any
+    pipeline instance pipelining the same model without re-tracing it.
+
+    Attributes:
+        arg_info_lists (Dict[str, List[ArgInfo]]): pipelined sharded module fqn to the
+            ArgInfo list of its forward call, in graph order.
+        pipelined_postprocs (List[PipelinedPostproc]): postproc modules swapped into
+            the model.
+        non_pipelined_sharded_modules (List[str]): fqns of sharded modules that could
+            not be pipelined.
+        sharded_module_ids (Dict[str, int]): ids of the sharded modules found during the
+            analysis, used to detect structural changes to the model.
+        batch_type (Optional[Type[Any]]): type of the batch used for tracing.
+        pipeline_postproc (bool): whether postproc modules were considered.
+    """
+
+    arg_info_lists: Dict[str, List[ArgInfo]]
+    pipelined_postprocs: List[PipelinedPostproc]
+    non_pipelined_sharded_modules: List[str]
+    sharded_module_ids: Dict[str, int]
+    batch_type: Optional[Type[Any]]
+    pipeline_postproc: bool
+
+
+# keyed by the underlying (non-DMP) model, entries go away with the model
+_MODEL_REWRITE_CACHE: "weakref.WeakKeyDictionary[torch.nn.Module, ModelRewriteInfo]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def invalidate_model_rewrite_cache(model: Optional[torch.nn.Module] = None) -> None:
+    """
+    Drops the cached rewrite analysis for `model`, or for all models if `model` is
+    None. Needs to be called if the model structure is modified in place (e.g. a
+    module swap) after it was pipelined with `use_rewrite_cache=True`.
+    """
+    if model is None:
+        _MODEL_REWRITE_CACHE.clear()
+        return
+    if isinstance(model, DistributedModelParallel):
+        model = model.module
+    _MODEL_REWRITE_CACHE.pop(model, None)
+
+
+def _get_cached_rewrite_info(
+    model: torch.nn.Module,
+    sharded_modules: Dict[str, ShardedModule],
+    batch: Optional[In],
+    pipeline_postproc: bool,
+) -> Optional[ModelRewriteInfo]:
+    rewrite_info = _MODEL_REWRITE_CACHE.get(model)
+    if rewrite_info is None:
+        return None
+    if (
+        rewrite_info.pipeline_postproc != pipeline_postproc
+        or rewrite_info.batch_type != (type(batch) if batch is not None else None)
+        or rewrite_info.sharded_module_ids
+        != {name: id(m) for name, m in sharded_modules.items()}
+        or any(
+            _find_postproc_module_recursive(model, postproc.fqn) is not postproc
+            for postproc in rewrite_info.pipelined_postprocs
+        )
+    ):
+        logger.info("Model structure changed since last rewrite, re-tracing model")
+        _MODEL_REWRITE_CACHE.pop(model, None)
+        return None
+    return rewrite_info
+
+
 # pyre-ignore[3]
 def _rewrite_model(  # noqa C901
     model: torch.nn.Module,
@@ -1292,6 +1449,7 @@ def _rewrite_model(  # noqa C901
     pipelined_forward: Type[BaseForward[TrainPipelineContext]] = PipelinedForward,
     pipeline_postproc: bool = False,
     default_stream: Optional[torch.Stream] = None,
+    use_rewrite_cache: bool = False,
 ) -> Tuple[
     List[ShardedModule],
     torch.nn.Module,
@@ -1299,6 +1457,15 @@ def _rewrite_model(  # noqa C901
     List[PipelinedPostproc],
     List[str],
 ]:
+    """
+    Traces the model and swaps the forwards of top-level sharded modules with
+    `pipelined_forward`.
+
+    If `use_rewrite_cache` is set, the analysis result (pipelined modules, their
+    ArgInfo lists and postproc modules) is cached per model and reused on subsequent
+    calls for the same model instead of re-tracing it. Caching is not used together
+    with `apply_jit`, as jit scripting replaces the traced model.
+    """
     input_model = model
     # Get underlying nn.Module
     if isinstance(model, DistributedModelParallel):
@@ -1310,6 +1477,22 @@ def _rewrite_model(  # noqa C901
         if isinstance(m, ShardedModule):
             sharded_modules[name] = m
 
+    use_rewrite_cache = use_rewrite_cache and not apply_jit
+    if use_rewrite_cache:
+        rewrite_info = _get_cached_rewrite_info(
+            model, sharded_modules, batch, pipeline_postproc
+        )
+        if rewrite_info is not None:
+            return _apply_rewrite_info(
+                rewrite_info,
+                input_model,
+                sharded_modules,
+                context,
+                dist_stream,
+                default_stream,
+                pipelined_forward,
+            )
+
     # Trace a model.
     concrete_args = {}
     if batch:
@@ -1386,6 +1569,20 @@ def _rewrite_model(  # noqa C901
             ", ".join(non_pipelined_sharded_modules),
         )
 
+    if use_rewrite_cache:
+        _MODEL_REWRITE_CACHE[model] = ModelRewriteInfo(
+            arg_info_lists={
+                # pyre-ignore[16]
+                pipelined.forward.name: pipelined.forward.args
+                for pipelined in pipelined_forwards
+            },
+            pipelined_postprocs=list(pipelined_postprocs),
+            non_pipelined_sharded_modules=non_pipelined_sharded_modules,
+            sharded_module_ids={name: id(m) for name, m in sharded_modules.items()},
+            batch_type=type(batch) if batch is not None else None,
+            pipeline_postproc=pipeline_postproc,
+        )
+
     return (
         pipelined_forwards,
         input_model,
@@ -1395,6 +1592,58 @@ def _rewrite_model(  # noqa C901
     )
 
 
+# pyre-ignore[3]
+def _apply_rewrite_info(
+    rewrite_info: ModelRewriteInfo,
+    input_model: torch.nn.Module,
+    sharded_modules: Dict[str, ShardedModule],
+    context: TForwardContext,
+    dist_stream: Optional[torch.Stream],
+    default_stream: Optional[torch.Stream],
+    pipelined_forward: Type[BaseForward[TrainPipelineContext]],
+) -> Tuple[
+    List[ShardedModule],
+    torch.nn.Module,
+    List[Callable[..., Any]],
+    List[PipelinedPostproc],
+    List[str],
+]:
+    """
+    Swaps forwards of the sharded modules based on a cached `ModelRewriteInfo`, the
+    equivalent of `_rewrite_model` without tracing the model.
+    """
+    pipelined_forwards = []
+    original_forwards = []
+    for fqn, arg_info_list in rewrite_info.arg_info_lists.items():
+        child = sharded_modules[fqn]
+        original_forwards.append(child.forward)
+        child.forward = pipelined_forward(
+            fqn,
+            arg_info_list,
+            child,
+            context,
+            dist_stream,
+        )
+        pipelined_forwards.append(child)
+
+    # the cached postprocs hold the context and streams of the pipeline that
+    # created them
+    for postproc in rewrite_info.pipelined_postprocs:
+        postproc.set_context(context)
+        postproc.set_streams(default_stream, dist_stream)
+
+    logger.info(
+        f"Reused cached model rewrite, pipelined modules: {list(rewrite_info.arg_info_lists)}"
+    )
+    return (
+        pipelined_forwards,
+        input_model,
+        original_forwards,
+        list(rewrite_info.pipelined_postprocs),
+        list(rewrite_info.non_pipelined_sharded_modules),
+    )
+
+
 def _override_input_dist_forwards(
     pipelined_modules: List[ShardedModule],
 ) -> List[Callable[[KeyedJaggedTensor], Awaitable[KJTAllToAllTensorsAwaitable]]]:
@@ -28,6 +28,8 @@ LABELS = "labels"
 WEIGHTS = "weights"
 GROUPING_KEYS = "grouping_keys"
 REQUIRED_INPUTS = "required_inputs"
+HISTOGRAM = "histogram"
+BIN_EDGES = "bin_edges"
 
 
 def _concat_if_needed(
@@ -99,6 +101,94 @@ def compute_auc(
     return torch.cat(aucs)
 
 
+def compute_segmented_auc(
+    predictions: torch.Tensor,
+    labels: torch.Tensor,
+    weights: torch.Tensor,
+    segment_ids: torch.Tensor,
+    num_segments: int,
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    Computes AUC of every segment of every task in a single pass: examples are
+    sorted by (task, segment, prediction), cumulative positive/negative weights are
+    computed with one cumsum and re-based per segment, and the trapezoids between
+    consecutive distinct predictions are summed per segment. Tied predictions are
+    collapsed into a single point of the ROC curve.
+
+    Args:
+        predictions (torch.Tensor): tensor of size (n_tasks, n_examples).
+        labels (torch.Tensor): tensor of size (n_tasks, n_examples).
+        weights (torch.Tensor): tensor of size (n_tasks, n_examples).
+        segment_ids (torch.Tensor): tensor of size (n_examples,) with values in
+            [0, num_segments).
+        num_segments (int): number of segments.
+
+    Returns:
+        Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]: AUC, positive
+        weight, negative weight and number of distinct predictions per segment, each
+        of size (n_tasks, num_segments). AUC is 0.5 for segments with one class.
+    """
+    n_tasks, n_examples = predictions.size()
+    device = predictions.device
+    num_keys = n_tasks * num_segments
+    keys = (
+        torch.arange(n_tasks, device=device).unsqueeze(-1) * num_segments
+        + segment_ids.to(device).view(1, -1)
+    ).view(-1)
+    flat_predictions = predictions.reshape(-1)
+
+    # two stable sorts give the (key, descending prediction) order
+    order = torch.argsort(flat_predictions, descending=True, stable=True)
+    order = order[torch.argsort(keys[order], stable=True)]
+    sorted_keys = keys[order]
+    sorted_predictions = flat_predictions[order]
+    weights = weights.reshape(-1).double()
+    labels = labels.reshape(-1).double()
+    pos = (weights * labels)[order]
+    neg = (weights * (1.0 - labels))[order]
+
+    segment_pos = torch.zeros(num_keys, dtype=torch.double, device=device)
+    segment_pos.index_add_(0, sorted_keys, pos)
+    segment_neg = torch.zeros(num_keys, dtype=torch.double, device=device)
+    segment_neg.index_add_(0, sorted_keys, neg)
+    # cumulative sums local to each segment
+    pos_offsets = torch.cumsum(segment_pos, dim=0) - segment_pos
+    neg_offsets = torch.cumsum(segment_neg, dim=0) - segment_neg
+    cum_tp = torch.cumsum(pos, dim=0) - pos_offsets[sorted_keys]
+    cum_fp = torch.cumsum(neg, dim=0) - neg_offsets[sorted_keys]
+
+    # only the last example of a run of tied predictions is a point of the curve
+    run_end = torch.ones(n_tasks * n_examples, dtype=torch.bool, device=device)
+    run_end[:-1] = (sorted_keys[1:] != sorted_keys[:-1]) | (
+        sorted_predictions[1:] != sorted_predictions[:-1]
+    )
+    end_keys = sorted_keys[run_end]
+    end_tp = cum_tp[run_end]
+    end_fp = cum_fp[run_end]
+    first_in_segment = torch.ones_like(end_keys, dtype=torch.bool)
+    first_in_segment[1:] = end_keys[1:] != end_keys[:-1]
+    prev_tp = torch.where(first_in_segment, 0.0, torch.roll(end_tp, 1))
+    prev_fp = torch.where(first_in_segment, 0.0, torch.roll(end_fp, 1))
+
+    area = torch.zeros(num_keys, dtype=torch.double, device=device)
+    area.index_add_(0, end_keys, (end_fp - prev_fp) * (end_tp + prev_tp) / 2)
+    num_runs = torch.zeros(num_keys, dtype=torch.long, device=device)
+    num_runs.index_add_(0, end_keys, torch.ones_like(end_keys))
+
+    num_pairs = segment_pos * segment_neg
+    auc = torch.where(
+        num_pairs == 0,
+        0.5,  # 0.5 is the no-signal default value for auc.
+        area / num_pairs.clamp(min=1e-12),
+    )
+    return (
+        auc.view(n_tasks, num_segments),
+        segment_pos.view(n_tasks, num_segments),
+        segment_neg.view(n_tasks, num_segments),
+        num_runs.view(n_tasks, num_segments),
+    )
+
+
 def compute_auc_per_group(
     n_tasks: int,
     predictions: List[torch.Tensor],
@@ -119,37 +209,104 @@ def compute_auc_per_group(
         torch.Tensor: tensor of size (n_tasks,), average of AUCs per group.
     """
     preds_t, labels_t, weights_t = _concat_if_needed(predictions, labels, weights)
-    aucs = []
     if grouping_keys.numel() != 0 and grouping_keys[0] == -1:
         # we added padding  as the first elements during init to avoid floating point exception in sync()
         # removing the paddings to avoid numerical errors.
         grouping_keys = grouping_keys[1:]
 
-    # get unique group indices
-    group_indices = torch.unique(grouping_keys)
+    # map grouping keys to contiguous segment ids
+    group_indices, segment_ids = torch.unique(grouping_keys, return_inverse=True)
+    if len(group_indices) == 0:
+        return torch.full((n_tasks,), 0.5, dtype=torch.float32, device=preds_t.device)
+
+    auc, _, _, _ = compute_segmented_auc(
+        preds_t.view(n_tasks, -1),
+        labels_t.view(n_tasks, -1),
+        weights_t.view(n_tasks, -1),
+        segment_ids,
+        len(group_indices),
+    )
+    return auc.mean(dim=-1).float()
 
-    for predictions_i, labels_i, weights_i in zip(preds_t, labels_t, weights_t):
-        # Loop over each group
-        auc_groups_sum = torch.tensor([0], dtype=torch.float32)
-        for group_idx in group_indices:
-            # get predictions, labels, and weights for this group
-            group_mask = grouping_keys == group_idx
-            grouped_predictions = predictions_i[group_mask]
-            grouped_labels = labels_i[group_mask]
-            grouped_weights = weights_i[group_mask]
-
-            auc = _compute_auc_helper(
-                grouped_predictions, grouped_labels, grouped_weights
-            )
-            auc_groups_sum = auc_groups_sum.to(auc.device)
-            auc_groups_sum += auc.view(1)
-        avg_auc = (
-            auc_groups_sum / len(group_indices)
-            if len(group_indices) > 0
-            else torch.tensor([0.5], dtype=torch.float32)
-        )
-        aucs.append(avg_auc)
-    return torch.cat(aucs)
+
+def compute_histogram(
+    predictions: torch.Tensor,
+    labels: torch.Tensor,
+    weights: torch.Tensor,
+    bin_edges: torch.Tensor,
+    apply_bin: bool = False,
+) -> torch.Tensor:
+    """
+    Accumulates the positive and negative weights of a batch into prediction bins.
+
+    Args:
+        predictions (torch.Tensor): tensor of size (n_tasks, n_examples).
+        labels (torch.Tensor): tensor of size (n_tasks, n_examples).
+        weights (torch.Tensor): tensor of size (n_tasks, n_examples).
+        bin_edges (torch.Tensor): sorted inner bin edges of size
+            (n_tasks, num_bins - 1).
+
+    Returns:
+        torch.Tensor: tensor of size (n_tasks, 2, num_bins) holding the positive
+        (index 0) and negative (index 1) weight of every bin.
+    """
+    if apply_bin:
+        labels = torch.ge(labels, 0.039).to(dtype=labels.dtype)
+    n_tasks, num_bins = bin_edges.size(0), bin_edges.size(1) + 1
+    bin_indices = torch.searchsorted(bin_edges, predictions.contiguous(), right=True)
+    histogram = torch.zeros(
+        (n_tasks, 2, num_bins), dtype=torch.double, device=predictions.device
+    )
+    histogram[:, 0].scatter_add_(1, bin_indices, (weights * labels).double())
+    histogram[:, 1].scatter_add_(1, bin_indices, (weights * (1.0 - labels)).double())
+    return histogram
+
+
+def compute_auc_from_histogram(histogram: torch.Tensor) -> torch.Tensor:
+    """
+    Computes AUC from per-bin positive and negative weights. Examples falling into
+    the same bin are treated as tied, i.e. each contributes half a pair.
+
+    Args:
+        histogram (torch.Tensor): tensor of size (n_tasks, 2, num_bins), see
+            `compute_histogram`.
+
+    Returns:
+        torch.Tensor: tensor of size (n_tasks,).
+    """
+    # walk the bins from the highest to the lowest prediction
+    histogram = torch.flip(histogram, dims=[-1])
+    cum_tp = torch.nn.functional.pad(torch.cumsum(histogram[:, 0], dim=-1), (1, 0))
+    cum_fp = torch.nn.functional.pad(torch.cumsum(histogram[:, 1], dim=-1), (1, 0))
+    total_tp, total_fp = cum_tp[:, -1], cum_fp[:, -1]
+    auc = torch.where(
+        total_fp * total_tp == 0,
+        0.5,  # 0.5 is the no-signal default value for auc.
+        torch.trapz(cum_tp, cum_fp, dim=-1) / total_fp / total_tp,
+    )
+    return auc.float()
+
+
+def compute_auc_histogram_error_bound(histogram: torch.Tensor) -> torch.Tensor:
+    """
+    Upper bound of the absolute difference between `compute_auc_from_histogram` and
+    the exact AUC of the binned examples. Only positive/negative pairs sharing a
+    bin can be misordered and each of them is credited with half a pair.
+
+    Args:
+        histogram (torch.Tensor): tensor of size (n_tasks, 2, num_bins).
+
+    Returns:
+        torch.Tensor: tensor of size (n_tasks,).
+    """
+    pos, neg = histogram[:, 0], histogram[:, 1]
+    num_pairs = pos.sum(dim=-1) * neg.sum(dim=-1)
+    bound = torch.where(
+        num_pairs == 0,
+        0.0,
+        (pos * neg).sum(dim=-1) / 2 / num_pairs.clamp(min=1e-12),
+    )
+    return bound.float()
 
 
 def _state_reduction(state: List[torch.Tensor], dim: int = 1) -> List[torch.Tensor]:
@@ -170,6 +327,16 @@ class AUCMetricComputation(RecMetricComputation):
         grouped_auc (bool): If True, computes AUC per group and returns average AUC across all groups.
             The `grouping_keys` is provided during state updates along with predictions, labels, weights.
             This feature is currently not enabled for `fused_update_limit`.
+        num_bins (int): If > 0, computes an approximate AUC from fixed-size
+            histograms of positive/negative weight over `num_bins` prediction bins
+            instead of keeping every example, so memory is O(num_bins) per task and
+            the states are synced with a sum reduction. Predictions are expected to
+            be in [0, 1]. Not compatible with `grouped_auc`.
+        adaptive_bins (bool): If True (and `num_bins` > 0), bin edges are the
+            quantiles of the updates seen before the first `compute()`, averaged
+            across the ranks that have seen data, instead of uniform over [0, 1].
+            This keeps the resolution where predictions are concentrated. The
+            updates are kept as is until the edges are agreed in `pre_compute()`.
     """
 
     def __init__(
@@ -178,6 +345,8 @@ class AUCMetricComputation(RecMetricComputation):
         grouped_auc: bool = False,
         apply_bin: bool = False,
         fused_update_limit: int = 0,
+        num_bins: int = 0,
+        adaptive_bins: bool = False,
         **kwargs: Any,
     ) -> None:
         super().__init__(*args, **kwargs)
@@ -185,10 +354,26 @@ class AUCMetricComputation(RecMetricComputation):
             raise RecMetricException(
                 "Grouped AUC and Fused Update Limit cannot be enabled together yet."
             )
+        if grouped_auc and num_bins > 0:
+            raise RecMetricException(
+                "Grouped AUC and histogram AUC (num_bins > 0) cannot be enabled together yet."
+            )
+        if num_bins == 1:
+            raise RecMetricException("Histogram AUC requires at least 2 bins.")
 
         self._grouped_auc: bool = grouped_auc
         self._apply_bin: bool = apply_bin
         self._num_samples: int = 0
+        self._num_bins: int = num_bins
+        self._adaptive_bins: bool = adaptive_bins
+        # updates received before the adaptive bin edges are agreed
+        self._pending_updates: List[Tuple[torch.Tensor, torch.Tensor, torch.Tensor]] = (
+            []
+        )
+        if self._num_bins > 0:
+            self._init_histogram_states()
+            return
+
         self._add_state(
             PREDICTIONS,
             [],
@@ -220,6 +405,85 @@ class AUCMetricComputation(RecMetricComputation):
             )
         self._init_states()
 
+    def _init_histogram_states(self) -> None:
+        self._add_state(
+            HISTOGRAM,
+            torch.zeros((self._n_tasks, 2, self._num_bins), dtype=torch.double),
+            add_window_state=True,
+            dist_reduce_fx="sum",
+            persistent=True,
+        )
+        # Inner bin edges, identical on all ranks. Kept as a buffer rather than a
+        # state so that reset() does not drop adaptive edges.
+        self.register_buffer(
+            BIN_EDGES,
+            torch.linspace(0.0, 1.0, self._num_bins + 1)[1:-1]
+            .repeat(self._n_tasks, 1)
+            .contiguous(),
+        )
+        self.register_buffer(
+            "bin_edges_initialized",
+            torch.tensor(not self._adaptive_bins),
+        )
+
+    def _init_adaptive_bin_edges(self) -> None:
+        # Runs on every rank at compute time rather than on the first update, so
+        # that ranks that have not seen any data still join the collective.
+        bin_edges = getattr(self, BIN_EDGES)
+        # inner edges summed over the ranks with data, followed by their count
+        edges_and_count = bin_edges.new_zeros((self._n_tasks, self._num_bins))
+        if self._pending_updates:
+            predictions = torch.cat(
+                [update[0] for update in self._pending_updates], dim=-1
+            )
+            quantiles = torch.linspace(
+                0.0, 1.0, self._num_bins + 1, device=predictions.device
+            )[1:-1]
+            edges_and_count[:, :-1] = torch.quantile(predictions, quantiles, dim=-1).t()
+            edges_and_count[:, -1] = 1.0
+        if (
+            dist.is_available()
+            and dist.is_initialized()
+            and dist.get_world_size(self.process_group) > 1
+        ):
+            dist.all_reduce(edges_and_count, group=self.process_group)
+        count = edges_and_count[0, -1].item()
+        if count == 0:
+            # no rank has seen data yet, agree on the edges at the next compute
+            return
+        # a mean of sorted edges is still sorted and keeps histograms summable
+        bin_edges.copy_(edges_and_count[:, :-1] / count)
+        getattr(self, "bin_edges_initialized").fill_(True)
+
+        pending_updates, self._pending_updates = self._pending_updates, []
+        for predictions, labels, weights in pending_updates:
+            self._update_histogram(predictions, labels, weights)
+
+    def _update_histogram(
+        self,
+        predictions: torch.Tensor,
+        labels: torch.Tensor,
+        weights: torch.Tensor,
+    ) -> None:
+        if not bool(getattr(self, "bin_edges_initialized")):
+            if predictions.numel() > 0:
+                self._pending_updates.append((predictions, labels, weights))
+            return
+        histogram = compute_histogram(
+            predictions,
+            labels,
+            weights,
+            getattr(self, BIN_EDGES),
+            self._apply_bin,
+        )
+        state = getattr(self, HISTOGRAM)
+        state += histogram
+        self._aggregate_window_state(HISTOGRAM, histogram, predictions.size(-1))
+
+    def pre_compute(self) -> None:
+        if self._num_bins > 0 and not bool(getattr(self, "bin_edges_initialized")):
+            self._init_adaptive_bin_edges()
+
     # The states values are set to empty lists in __init__() and reset(), and then we
     # add a size (self._n_tasks, 1) tensor to each of the list as the initial values
     # This is to bypass the limitation of state aggregation in TorchMetrics sync() when
@@ -229,7 +493,7 @@ class AUCMetricComputation(RecMetricComputation):
     # The reason for using non-empty tensors as the first elements is to avoid the
     # floating point exception thrown in sync() for aggregating empty tensors
     def _init_states(self) -> None:
-        if len(getattr(self, PREDICTIONS)) > 0:
+        if self._num_bins > 0 or len(getattr(self, PREDICTIONS)) > 0:
             return
         self._num_samples = 0
         getattr(self, PREDICTIONS).append(
@@ -268,6 +532,14 @@ class AUCMetricComputation(RecMetricComputation):
         predictions = predictions.float()
         labels = labels.float()
         weights = weights.float()
+        if self._num_bins > 0:
+            self._update_histogram(
+                predictions.view(self._n_tasks, -1),
+                labels.view(self._n_tasks, -1),
+                weights.view(self._n_tasks, -1),
+            )
+            return
+
         batch_size = predictions.size(-1)
         start_index = max(self._num_samples + batch_size - self._window_size, 0)
 
@@ -320,6 +592,15 @@ class AUCMetricComputation(RecMetricComputation):
             )
 
     def _compute(self) -> List[MetricComputationReport]:
+        if self._num_bins > 0:
+            return [
+                MetricComputationReport(
+                    name=MetricName.AUC,
+                    metric_prefix=MetricPrefix.WINDOW,
+                    value=compute_auc_from_histogram(self.get_window_state(HISTOGRAM)),
+                )
+            ]
+
         reports = []
         reports.append(
             MetricComputationReport(
@@ -361,6 +642,8 @@ class AUCMetricComputation(RecMetricComputation):
         right before the allgather collective is called. It directly changes the attributes/states, which
         is ok because end of function sets the attributes to reduced values
         """
+        # the adaptive bin edges must be agreed before histograms are summed
+        self.pre_compute()
         for attr in self._reductions:  # pragma: no cover
             val = getattr(self, attr)
             if isinstance(val, list) and len(val) > 1:
@@ -369,6 +652,7 @@ class AUCMetricComputation(RecMetricComputation):
 
     def reset(self) -> None:
         super().reset()
+        self._pending_updates = []
         self._init_states()
 
 
@@ -12,6 +12,7 @@ from typing import Any, cast, Dict, List, Optional, Type
 import torch
 
 from torch.autograd.profiler import record_function
+from torchrec.metrics.auc import compute_segmented_auc
 from torchrec.metrics.metrics_namespace import MetricName, MetricNamespace, MetricPrefix
 from torchrec.metrics.rec_metric import (
     MetricComputationReport,
@@ -100,6 +101,37 @@ def to_3d(
     return torch.ops.fbgemm.jagged_2d_to_dense(tensor_2d, offsets, max_length)
 
 
+def compute_gauc_jagged(
+    predictions: torch.Tensor,
+    labels: torch.Tensor,
+    num_candidates: torch.Tensor,
+) -> Dict[str, torch.Tensor]:
+    """
+    Same as `compute_gauc_3d` but on the jagged [n_task, n_sample] inputs, without
+    padding every session to the longest one. Sessions are segments of
+    `num_candidates` consecutive samples.
+    """
+
+    n_group = num_candidates.numel()
+    segment_ids = torch.repeat_interleave(
+        torch.arange(n_group, device=predictions.device),
+        num_candidates.to(predictions.device),
+    )
+    with record_function("## gauc_segmented_auc ##"):
+        auc, num_positive, num_negative, num_distinct = compute_segmented_auc(
+            predictions,
+            labels,
+            torch.ones_like(predictions),
+            segment_ids,
+            n_group,
+        )
+
+    # Skip identical prediction sessions and identical label(all 0s/1s) sessions.
+    auc_mask = (num_distinct > 1) * (num_positive > 0) * (num_negative > 0)
+    auc = auc * auc_mask
+    return {"auc_sum": auc.sum(-1), "num_samples": auc_mask.sum(-1)}
+
+
 def get_auc_states(
     labels: torch.Tensor,
     predictions: torch.Tensor,
@@ -108,19 +140,7 @@ def get_auc_states(
 ) -> Dict[str, torch.Tensor]:
 
     # predictions, labels: [n_task, n_sample]
-    max_length = int(num_candidates.max().item())
-    predictions_perm = predictions.permute(1, 0)
-    labels_perm = labels.permute(1, 0)
-    predictions_3d = to_3d(predictions_perm, num_candidates, max_length).permute(
-        2, 0, 1
-    )
-    labels_3d = to_3d(labels_perm, num_candidates, max_length).permute(2, 0, 1)
-
-    return compute_gauc_3d(
-        predictions_3d,
-        labels_3d,
-        num_candidates,
-    )
+    return compute_gauc_jagged(predictions, labels, num_candidates)
 
 
 @torch.fx.wrap
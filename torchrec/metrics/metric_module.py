@@ -10,8 +10,10 @@
 #!/usr/bin/env python3
 
 import abc
+import copy
 import logging
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from typing import Any, Dict, List, Optional, Type, Union
 
 import torch
@@ -29,6 +31,7 @@ from torchrec.metrics.calibration_with_recalibration import (
 from torchrec.metrics.ctr import CTRMetric
 from torchrec.metrics.hindsight_target_pr import HindsightTargetPRMetric
 from torchrec.metrics.mae import MAEMetric
+from torchrec.metrics.metric_sink import LocalFileMetricSink, MetricSink
 from torchrec.metrics.metrics_config import (
     BatchSizeStage,
     MetricsConfig,
@@ -54,7 +57,12 @@ from torchrec.metrics.output import OutputMetric
 from torchrec.metrics.precision import PrecisionMetric
 from torchrec.metrics.precision_session import PrecisionSessionMetric
 from torchrec.metrics.rauc import RAUCMetric
-from torchrec.metrics.rec_metric import RecMetric, RecMetricList
+from torchrec.metrics.rec_metric import (
+    RecMetric,
+    RecMetricComputation,
+    RecMetricList,
+    UpdateStagingBuffer,
+)
 from torchrec.metrics.recall import RecallMetric
 from torchrec.metrics.recall_session import RecallSessionMetric
 from torchrec.metrics.scalar import ScalarMetric
@@ -147,6 +155,10 @@ class RecMetricModule(nn.Module):
         state_metrics (Optional[Dict[str, StateMetric]]): the dict of StateMetrics.
         compute_interval_steps (int): the intervals between two compute calls in the unit of batch number
         memory_usage_limit_mb (float): the memory usage limit for OOM check
+        async_compute (bool): whether RecMetrics are synced and computed on a
+            background thread, see `enable_async_compute()`.
+        metric_sinks (Optional[List[MetricSink]]): sinks every `compute()` result
+            is written to, with `trained_batches` as the step.
 
     Call Args:
         Not supported.
@@ -182,6 +194,8 @@ class RecMetricModule(nn.Module):
     oom_count: int
     compute_count: int
     last_compute_time: float
+    async_compute: bool
+    metric_sinks: List[MetricSink]
 
     # TODO(chienchin): Reorganize the argument to directly accept a MetricsConfig.
     def __init__(
@@ -196,6 +210,8 @@ class RecMetricModule(nn.Module):
         min_compute_interval: float = 0.0,
         max_compute_interval: float = float("inf"),
         memory_usage_limit_mb: float = 512,
+        async_compute: bool = False,
+        metric_sinks: Optional[List[MetricSink]] = None,
     ) -> None:
         super().__init__()
         self.rec_tasks = rec_tasks if rec_tasks else []
@@ -209,6 +225,7 @@ class RecMetricModule(nn.Module):
         self.memory_usage_mb_avg = 0.0
         self.oom_count = 0
         self.compute_count = 0
+        self.metric_sinks = metric_sinks if metric_sinks else []
 
         self.compute_interval_steps = compute_interval_steps
         self.min_compute_interval = min_compute_interval
@@ -230,6 +247,134 @@ class RecMetricModule(nn.Module):
         )
         self.last_compute_time = -1.0
 
+        self.async_compute = False
+        self._async_process_group: Optional[dist.ProcessGroup] = None
+        self._async_executor: Optional[ThreadPoolExecutor] = None
+        self._async_future: Optional[Future[Dict[str, MetricValue]]] = None
+        self._async_snapshot: Optional[RecMetricList] = None
+        if async_compute:
+            self.enable_async_compute()
+
+    def enable_async_compute(
+        self, process_group: Optional[dist.ProcessGroup] = None
+    ) -> None:
+        r"""Moves the sync and compute of RecMetrics off the training critical path.
+
+        On every `compute()`, the RecMetric states are copied to CPU and the copy
+        is synced and computed on a single background thread, over a dedicated gloo
+        process group so these collectives never interleave with the training ones.
+        `compute()` then returns the RecMetrics results of the previous compute
+        (nothing for the first one) together with the current throughput and state
+        metrics. `compute_async()` gives access to the future of the current
+        results instead.
+
+        Args:
+            process_group (Optional[ProcessGroup]): the CPU process group used by
+                the background syncs. If not specified, a gloo group over all
+                ranks is created on the first compute. It must be specified if the
+                RecMetrics use a subset of the ranks.
+        """
+        self.async_compute = True
+        self._async_process_group = process_group
+
+    def _snapshot_rec_metrics(self) -> RecMetricList:
+        if (
+            self._async_process_group is None
+            and dist.is_initialized()
+            and dist.get_world_size() > 1
+        ):
+            self._async_process_group = dist.new_group(backend="gloo")
+
+        computations: List[RecMetricComputation] = []
+        for metric in self.rec_metrics.rec_metrics:
+            # flush the buffered updates before their states are copied
+            metric._check_fused_update(force=True)
+            computations.extend(metric._metrics_computations)
+        for computation in computations:
+            # may need the training process group, e.g. to agree on AUC bin edges
+            computation.pre_compute()
+
+        if self._async_snapshot is None:
+            # The copy of the RecMetricList is made once and only its states are
+            # refreshed on every compute, so share the states and the window
+            # buffers instead of copying them here. Process groups cannot be
+            # copied either.
+            memo: Dict[int, Any] = {}
+            for metric in self.rec_metrics.rec_metrics:
+                memo[id(metric._update_staging)] = UpdateStagingBuffer(1)
+            for computation in computations:
+                if computation.process_group is not None:
+                    memo[id(computation.process_group)] = computation.process_group
+                if computation._batch_window_buffers is not None:
+                    memo[id(computation._batch_window_buffers)] = {}
+                for attr in computation._defaults:
+                    memo[id(getattr(computation, attr))] = getattr(computation, attr)
+            self._async_snapshot = copy.deepcopy(self.rec_metrics, memo)
+            self._async_snapshot.to(torch.device("cpu"))
+
+        snapshot_computations = [
+            computation
+            for metric in self._async_snapshot.rec_metrics
+            for computation in metric._metrics_computations
+        ]
+        for computation, snapshot_computation in zip(
+            computations, snapshot_computations
+        ):
+            snapshot_computation.process_group = self._async_process_group
+            for attr in computation._defaults:
+                value = getattr(computation, attr)
+                if isinstance(value, list):
+                    value = [tensor.detach().to("cpu", copy=True) for tensor in value]
+                else:
+                    value = value.detach().to("cpu", copy=True)
+                setattr(snapshot_computation, attr, value)
+            for name, buffer in computation.named_buffers():
+                snapshot_computation.get_buffer(name).copy_(buffer)
+            # plain counters, e.g. torchmetrics' `_update_count`
+            for name, value in vars(computation).items():
+                if isinstance(value, (bool, int, float)):
+                    setattr(snapshot_computation, name, value)
+            snapshot_computation._computed = None
+        return self._async_snapshot
+
+    def compute_async(self) -> Future[Dict[str, MetricValue]]:
+        r"""Snapshots the RecMetric states and computes them on the background
+        thread. Must be called by all ranks in the same order. Waits for the
+        previous compute first, as the snapshot is reused.
+        """
+        if self._async_future is not None:
+            wait([self._async_future])
+        with record_function("## RecMetricModule:snapshot ##"):
+            snapshot = self._snapshot_rec_metrics()
+        if self._async_executor is None:
+            self._async_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="rec_metric_compute"
+            )
+        self._async_future = self._async_executor.submit(snapshot.compute)
+        return self._async_future
+
+    def wait_async_compute(self) -> Dict[str, MetricValue]:
+        r"""Blocks until the in-flight RecMetrics compute, if any, is done and
+        returns its results, e.g. to report the last interval at the end of
+        training.
+        """
+        if self._async_future is None:
+            return {}
+        return self._async_future.result()
+
+    def shutdown(self) -> None:
+        r"""Waits for the in-flight RecMetrics compute, if any, and stops the
+        background thread. A later compute starts a new one.
+        """
+        if self._async_executor is not None:
+            self._async_executor.shutdown(wait=True)
+            self._async_executor = None
+
+    def __del__(self) -> None:
+        executor = self.__dict__.get("_async_executor", None)
+        if executor is not None:
+            executor.shutdown(wait=False)
+
     def get_memory_usage(self) -> int:
         r"""Total memory of unique RecMetric tensors in bytes"""
         total = {}
@@ -358,7 +503,13 @@ class RecMetricModule(nn.Module):
             ret: Dict[str, MetricValue] = {}
             if self.rec_metrics:
                 self._adjust_compute_interval()
-                ret.update(self.rec_metrics.compute())
+                if self.async_compute:
+                    previous_future = self._async_future
+                    self.compute_async()
+                    if previous_future is not None:
+                        ret.update(previous_future.result())
+                else:
+                    ret.update(self.rec_metrics.compute())
             if self.throughput_metric:
                 ret.update(self.throughput_metric.compute())
             if self.state_metrics:
@@ -369,6 +520,8 @@ class RecMetricModule(nn.Module):
                             for metric_name, metric_value in component.get_metrics().items()
                         }
                     )
+        for sink in self.metric_sinks:
+            sink.write(self.trained_batches, ret)
         return ret
 
     def local_compute(self) -> Dict[str, MetricValue]:
@@ -392,6 +545,11 @@ class RecMetricModule(nn.Module):
     def get_required_inputs(self) -> Optional[List[str]]:
         return self.rec_metrics.get_required_inputs()
 
+    def close_metric_sinks(self) -> None:
+        r"""Writes the buffered metrics of the sinks and closes them."""
+        for sink in self.metric_sinks:
+            sink.close()
+
 
 def _generate_rec_metrics(
     metrics_config: MetricsConfig,
@@ -435,14 +593,18 @@ def _generate_rec_metrics(
                 tasks=rec_tasks,
                 compute_mode=metrics_config.rec_compute_mode,
                 window_size=metric_def.window_size,
-                fused_update_limit=metrics_config.fused_update_limit,
+                fused_update_limit=(
+                    metric_def.fused_update_limit
+                    if metric_def.fused_update_limit is not None
+                    else metrics_config.fused_update_limit
+                ),
                 compute_on_all_ranks=metrics_config.compute_on_all_ranks,
                 should_validate_update=metrics_config.should_validate_update,
                 process_group=process_group,
                 **kwargs,
             )
         )
-    return RecMetricList(rec_metrics)
+    return RecMetricList(rec_metrics, fused_state_sync=metrics_config.fused_state_sync)
 
 
 STATE_METRICS_NAMESPACE_MAPPING: Dict[StateMetricEnum, MetricNamespace] = {
@@ -488,19 +650,30 @@ def generate_metric_module(
     different training jobs have aligned mertics.
     TODO: update metrics other than ThroughputMetric if it has dependency on batch_size
     """
+    throughput_def = metrics_config.throughput_metric
+    if batch_size_stages is None and throughput_def:
+        batch_size_stages = throughput_def.batch_size_stages
     validate_batch_size_stages(batch_size_stages)
 
-    if metrics_config.throughput_metric:
+    if throughput_def:
         throughput_metric = ThroughputMetric(
             batch_size=batch_size,
             world_size=world_size,
-            window_seconds=metrics_config.throughput_metric.window_size,
-            warmup_steps=metrics_config.throughput_metric.warmup_steps,
+            window_seconds=throughput_def.window_size,
+            warmup_steps=throughput_def.warmup_steps,
             batch_size_stages=batch_size_stages,
+            per_rank_step_time=throughput_def.per_rank_step_time,
+            process_group=process_group,
         )
     else:
         throughput_metric = None
     state_metrics = _generate_state_metrics(metrics_config, state_metrics_mapping)
+    # only passed if configured, custom RecMetricModule subclasses may not take it
+    kwargs: Dict[str, Any] = {}
+    if metrics_config.metric_sink_dir:
+        kwargs["metric_sinks"] = [
+            LocalFileMetricSink(metrics_config.metric_sink_dir, rank=my_rank)
+        ]
     metrics = metric_class(
         batch_size=batch_size,
         world_size=world_size,
@@ -511,6 +684,9 @@ def generate_metric_module(
         compute_interval_steps=metrics_config.compute_interval_steps,
         min_compute_interval=metrics_config.min_compute_interval,
         max_compute_interval=metrics_config.max_compute_interval,
+        **kwargs,
     )
+    if metrics_config.async_compute:
+        metrics.enable_async_compute()
     metrics.to(device)
     return metrics
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-strict
+
+import abc
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import torch
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# One fixed-width record per metric value.
+RECORD_DTYPE: np.dtype = np.dtype(
+    [
+        ("step", "<i8"),
+        ("timestamp", "<f8"),
+        ("rank", "<i4"),
+        ("key", "<i4"),
+        ("value", "<f8"),
+    ]
+)
+_RECORDS_FILE_PATTERN: re.Pattern[str] = re.compile(r"^rank(\d+)\.(\d+)\.records$")
+_CLOSE = object()
+
+
+def _records_file_name(rank: int, index: int) -> str:
+    return f"rank{rank:05d}.{index:06d}.records"
+
+
+def _keys_file_name(rank: int) -> str:
+    return f"rank{rank:05d}.keys"
+
+
+def _list_records_files(directory: str, rank: Optional[int]) -> List[Tuple[int, int]]:
+    """
+    Returns the sorted (rank, index) of the records files in `directory`.
+    """
+    files = []
+    for name in os.listdir(directory):
+        match = _RECORDS_FILE_PATTERN.match(name)
+        if match is None:
+            continue
+        file_rank, index = int(match.group(1)), int(match.group(2))
+        if rank is None or file_rank == rank:
+            files.append((file_rank, index))
+    return sorted(files)
+
+
+def _read_keys(directory: str, rank: int) -> List[str]:
+    path = os.path.join(directory, _keys_file_name(rank))
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return f.read().splitlines()
+
+
+class MetricSink(abc.ABC):
+    r"""
+    Destination of the metric values computed by RecMetricModule. `write()` is
+    called on the training loop and should not block on I/O.
+    """
+
+    @abc.abstractmethod
+    def write(self, step: int, metrics: Dict[str, Union[torch.Tensor, float]]) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+
+class LocalFileMetricSink(MetricSink):
+    r"""
+    Appends the metric values to local files, one (step, timestamp, rank, key,
+    value) record of `RECORD_DTYPE` per value, from a background thread.
+
+    Each rank writes its own files in `directory`: a `rank{rank}.keys` file
+    listing the metric keys (a record stores the line number of its key) and
+    `rank{rank}.{index}.records` files rotated every `max_records_per_file`
+    records. Tensor values are copied to the host on the background thread;
+    values with more than one element are recorded as `key[i]`. Use
+    `read_metric_records()` to load them back.
+
+    Args:
+        directory (str): directory of the files, created if needed.
+        rank (int): rank of this trainer.
+        max_records_per_file (int): number of records after which a new file is
+            started.
+        max_files (Optional[int]): if set, the oldest records files of this rank
+            are deleted to keep at most this many.
+        buffer_records (int): number of records buffered before they are written.
+        flush_interval_seconds (float): buffered records are also written after
+            this many seconds without new metrics.
+
+    Example::
+
+        sink = LocalFileMetricSink("/tmp/metrics", rank=dist.get_rank())
+        sink.write(step, metric_module.compute())
+        ...
+        sink.close()
+        records = read_metric_records("/tmp/metrics")
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        rank: int = 0,
+        max_records_per_file: int = 1_000_000,
+        max_files: Optional[int] = None,
+        buffer_records: int = 4096,
+        flush_interval_seconds: float = 10.0,
+    ) -> None:
+        if max_records_per_file <= 0:
+            raise ValueError("max_records_per_file must be positive")
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._rank = rank
+        self._max_records_per_file = max_records_per_file
+        self._max_files = max_files
+        self._buffer_records = buffer_records
+        self._flush_interval_seconds = flush_interval_seconds
+
+        # Only accessed by the writer thread after construction.
+        self._keys: Dict[str, int] = {
+            key: i for i, key in enumerate(_read_keys(directory, rank))
+        }
+        self._new_keys: List[str] = []
+        self._records: List[Tuple[int, float, int, int, float]] = []
+        files = _list_records_files(directory, rank)
+        # Resume in a new file.
+        self._file_index: int = files[-1][1] + 1 if files else 0
+        self._file_records = 0
+
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        # pyre-ignore[4]
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="LocalFileMetricSink", daemon=True
+        )
+        self._thread.start()
+
+    def _check_error(self) -> None:
+        if self._error is not None:
+            raise RuntimeError("LocalFileMetricSink writer failed") from self._error
+
+    def write(self, step: int, metrics: Dict[str, Union[torch.Tensor, float]]) -> None:
+        self._check_error()
+        if self._closed:
+            raise RuntimeError("LocalFileMetricSink is closed")
+        if not metrics:
+            return
+        self._queue.put(
+            (
+                step,
+                time.time(),
+                {
+                    key: value.detach() if isinstance(value, torch.Tensor) else value
+                    for key, value in metrics.items()
+                },
+            )
+        )
+
+    def flush(self) -> None:
+        """
+        Blocks until all the metrics written so far are in the files.
+        """
+        if self._closed:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+        self._check_error()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        self._check_error()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=self._flush_interval_seconds)
+            except queue.Empty:
+                self._write_buffered()
+                continue
+            if item is _CLOSE:
+                self._write_buffered()
+                return
+            if isinstance(item, threading.Event):
+                self._write_buffered()
+                item.set()
+                continue
+            try:
+                self._add_records(*item)
+            except Exception as e:
+                logger.exception("Failed to convert metrics")
+                self._error = e
+            if len(self._records) >= self._buffer_records:
+                self._write_buffered()
+
+    def _key_id(self, key: str) -> int:
+        key_id = self._keys.get(key, None)
+        if key_id is None:
+            key_id = len(self._keys)
+            self._keys[key] = key_id
+            self._new_keys.append(key)
+        return key_id
+
+    def _add_records(
+        self,
+        step: int,
+        timestamp: float,
+        metrics: Dict[str, Union[torch.Tensor, float]],
+    ) -> None:
+        for key, value in metrics.items():
+            if isinstance(value, torch.Tensor):
+                values = value.flatten().tolist()
+            else:
+                values = [value]
+            if len(values) == 1:
+                self._records.append(
+                    (step, timestamp, self._rank, self._key_id(key), float(values[0]))
+                )
+            else:
+                for i, v in enumerate(values):
+                    self._records.append(
+                        (step, timestamp, self._rank, self._key_id(f"{key}[{i}]"), v)
+                    )
+
+    def _write_buffered(self) -> None:
+        if not self._records:
+            return
+        try:
+            if self._new_keys:
+                # Keys go first so that every written record can be resolved.
+                path = os.path.join(self._directory, _keys_file_name(self._rank))
+                with open(path, "a") as f:
+                    f.write("".join(f"{key}\n" for key in self._new_keys))
+                self._new_keys.clear()
+
+            records = np.array(self._records, dtype=RECORD_DTYPE)
+            self._records.clear()
+            while len(records) > 0:
+                if self._file_records == self._max_records_per_file:
+                    self._file_index += 1
+                    self._file_records = 0
+                    self._delete_old_files()
+                num_records = min(
+                    len(records), self._max_records_per_file - self._file_records
+                )
+                path = os.path.join(
+                    self._directory, _records_file_name(self._rank, self._file_index)
+                )
+                with open(path, "ab") as f:
+                    records[:num_records].tofile(f)
+                self._file_records += num_records
+                records = records[num_records:]
+        except Exception as e:
+            logger.exception("Failed to write metrics")
+            self._error = e
+
+    def _delete_old_files(self) -> None:
+        if self._max_files is None:
+            return
+        # The current file is not created yet.
+        files = _list_records_files(self._directory, self._rank)
+        for _, index in files[: max(len(files) - self._max_files + 1, 0)]:
+            os.remove(
+                os.path.join(self._directory, _records_file_name(self._rank, index))
+            )
+
+
+def read_metric_records(
+    directory: str, rank: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    r"""
+    Loads the records written by LocalFileMetricSink in `directory`, for all
+    ranks or only `rank`, as columns: "step", "timestamp", "rank", "key" (the
+    metric keys as strings) and "value". `pandas.DataFrame(columns)` gives a
+    table of them.
+    """
+    records = []
+    keys: Dict[int, np.ndarray] = {}
+    for file_rank, index in _list_records_files(directory, rank):
+        if file_rank not in keys:
+            keys[file_rank] = np.array(_read_keys(directory, file_rank), dtype=object)
+        records.append(
+            np.fromfile(
+                os.path.join(directory, _records_file_name(file_rank, index)),
+                dtype=RECORD_DTYPE,
+            )
+        )
+    all_records = (
+        np.concatenate(records) if records else np.empty(0, dtype=RECORD_DTYPE)
+    )
+
+    metric_keys = np.empty(len(all_records), dtype=object)
+    for file_rank, rank_keys in keys.items():
+        mask = all_records["rank"] == file_rank
+        metric_keys[mask] = rank_keys[all_records["key"][mask]]
+    return {
+        "step": all_records["step"],
+        "timestamp": all_records["timestamp"],
+        "rank": all_records["rank"],
+        "key": metric_keys,
+        "value": all_records["value"],
+    }
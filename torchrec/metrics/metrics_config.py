@@ -58,9 +58,13 @@ class SessionMetricDef:
     # session_var_name: name of session tensor in the model_out
     # top_threshold: predictiones ranked in top "top_threshold" are considered as positive
     # run_ranking_of_labels: if True, labels are also ranked as predictions
+    # sketch_num_slots: if set, sessions are tracked across updates in a
+    #   SessionTopKSketch of this many slots instead of being ranked within each
+    #   batch; not supported with run_ranking_of_labels
     session_var_name: str
     top_threshold: Optional[int] = None
     run_ranking_of_labels: bool = False
+    sketch_num_slots: Optional[int] = None
 
 
 @dataclass(unsafe_hash=True, eq=True)
@@ -109,12 +113,15 @@ class RecMetricDef:
             The local window size is window_size / world_size, and must be larger than batch size.
         arguments (Optional[Dict[str, Any]]): any propritary arguments to be used
             by this Metric.
+        fused_update_limit (Optional[int]): overrides
+            ``MetricsConfig.fused_update_limit`` for this metric.
     """
 
     rec_tasks: List[RecTaskInfo] = field(default_factory=list)
     rec_task_indices: List[int] = field(default_factory=list)
     window_size: int = _DEFAULT_WINDOW_SIZE
     arguments: Optional[Dict[str, Any]] = None
+    fused_update_limit: Optional[int] = None
 
 
 class StateMetricEnum(StrValueMixin, Enum):
@@ -122,10 +129,42 @@ class StateMetricEnum(StrValueMixin, Enum):
     MODEL_CONFIGURATOR = "model_configurator"
 
 
+@dataclass
+class BatchSizeStage:
+    """
+    BatchSizeStage class for defining the variable batch size stage.
+    For a List[BatchSizeStage], the max_iter should be in ascending order, and the last one should have max_iter=None
+    Attributes
+    ----------
+        batch_size(int): A multiple of base_batch_size
+        max_iter(int): The maximum number of iterations for the stage.
+                       When previous BatchSizeStage.max_iters < iter <= max_iters, the stage is effective.
+                       Max_iter is the absolute train iteration count, not the relative count within each stage
+    """
+
+    batch_size: int = 0
+    max_iters: Optional[int] = 0
+
+
 @dataclass
 class ThroughputDef:
+    """The configurations of the ThroughputMetric.
+
+    Args:
+        window_size (int): window of the window throughput in seconds.
+        warmup_steps (int): the number of batches excluded from the throughput,
+            the step times and the stage times.
+        batch_size_stages (Optional[List[BatchSizeStage]]): the variable batch
+            size schedule, used if `generate_metric_module()` is not given one.
+        per_rank_step_time (bool): whether the step times of all ranks are
+            gathered on compute to report the slowest rank, its throughput and
+            the straggler ratio (slowest / median step time).
+    """
+
     window_size: int = _DEFAULT_THROUGHPUT_WINDOW_SECONDS
     warmup_steps: int = _DEFAULT_THROUGHPUT_WARMUP_STEPS
+    batch_size_stages: Optional[List[BatchSizeStage]] = None
+    per_rank_step_time: bool = False
 
 
 @dataclass
@@ -165,6 +204,17 @@ class MetricsConfig:
             update if the inputs are invalid. Invalid inputs include the case where all
             examples have 0 weights for a batch.
         enable_pt2_compile (bool): whether to enable PT2 compilation for metrics.
+        async_compute (bool): whether RecMetrics are synced and computed on a
+            background thread from a snapshot of their states. `compute()` then
+            returns the RecMetrics results of the previous compute interval. See
+            `RecMetricModule.enable_async_compute()`.
+        fused_state_sync (bool): whether the states of all RecMetrics are synced
+            with a few fused collectives instead of one collective per state.
+            See `fused_sync_computations()`.
+        metric_sink_dir (Optional[str]): if set, every `compute()` result is also
+            appended to local files in this directory by a LocalFileMetricSink,
+            see `read_metric_records()`. Call `RecMetricModule.close_metric_sinks()`
+            at the end of training to write the buffered records.
     """
 
     rec_tasks: List[RecTaskInfo] = field(default_factory=list)
@@ -179,6 +229,9 @@ class MetricsConfig:
     compute_on_all_ranks: bool = False
     should_validate_update: bool = False
     enable_pt2_compile: bool = False
+    async_compute: bool = False
+    fused_state_sync: bool = False
+    metric_sink_dir: Optional[str] = None
 
 
 DefaultTaskInfo = RecTaskInfo(
@@ -210,23 +263,6 @@ EmptyMetricsConfig = MetricsConfig(
 )
 
 
-@dataclass
-class BatchSizeStage:
-    """
-    BatchSizeStage class for defining the variable batch size stage.
-    For a List[BatchSizeStage], the max_iter should be in ascending order, and the last one should have max_iter=None
-    Attributes
-    ----------
-        batch_size(int): A multiple of base_batch_size
-        max_iter(int): The maximum number of iterations for the stage.
-                       When previous BatchSizeStage.max_iters < iter <= max_iters, the stage is effective.
-                       Max_iter is the absolute train iteration count, not the relative count within each stage
-    """
-
-    batch_size: int = 0
-    max_iters: Optional[int] = 0
-
-
 def validate_batch_size_stages(
     batch_size_stages: Optional[List[BatchSizeStage]],
 ) -> None:
@@ -46,6 +46,11 @@ class MetricName(MetricNameBase):
     THROUGHPUT = "throughput"
     TOTAL_EXAMPLES = "total_examples"
     ATTEMPT_EXAMPLES = "attempt_examples"
+    STEP_TIME_MS = "step_time_ms"
+    STAGE_TIME_MS = "stage_time_ms"
+    SLOWEST_RANK = "slowest_rank"
+    SLOWEST_RANK_THROUGHPUT = "slowest_rank_throughput"
+    STRAGGLER_RATIO = "straggler_ratio"
     CTR = "ctr"
     CALIBRATION = "calibration"
     MSE = "mse"
@@ -19,6 +19,7 @@ from torchrec.metrics.rec_metric import (
     RecMetricComputation,
     RecMetricException,
 )
+from torchrec.metrics.session_sketch import SessionTopKSketch
 
 
 SUM_NDCG = "sum_ndcg"
@@ -278,6 +279,50 @@ def _get_ndcg_states(
     }
 
 
+def _get_sketch_ndcg(
+    *,
+    topk: torch.Tensor,
+    ideal_topk: torch.Tensor,
+    aggregates: torch.Tensor,
+    exponential_gain: bool,
+    report_ndcg_as_decreasing_curve: bool,
+    remove_single_length_sessions: bool,
+    scale_by_weights_tensor: bool,
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Per session NDCG @ K from the SessionTopKSketch rows of the sessions.
+
+    Args:
+        topk: [n_sessions, n_tasks, k, 2] (prediction, label) rows sorted by
+            prediction.
+        ideal_topk: [n_sessions, n_tasks, k, 1] labels sorted by label.
+        aggregates: [n_sessions, n_tasks, 2] session length and max weight.
+
+    Returns:
+        Tuple[torch.Tensor, torch.Tensor]: the reported NDCG and whether the
+        session is counted, both [n_sessions, n_tasks].
+    """
+    k = topk.size(-2)
+    discounts = torch.reciprocal(
+        torch.log2(torch.arange(k, device=topk.device, dtype=torch.double) + 2)
+    )
+
+    def dcg(labels: torch.Tensor, valid: torch.Tensor) -> torch.Tensor:
+        gains = torch.exp2(labels) - 1.0 if exponential_gain else labels
+        return torch.sum(torch.where(valid, gains, 0.0) * discounts, dim=-1)
+
+    observed_dcg = dcg(topk[..., 1], topk[..., 0] > float("-inf"))
+    ideal_dcg = dcg(ideal_topk[..., 0], ideal_topk[..., 0] > float("-inf"))
+    ideal_dcg = torch.where(ideal_dcg == 0, 1e-6, ideal_dcg)  # Avoid division by 0.
+    ndcg = observed_dcg / ideal_dcg
+    ndcg_report = (1 - ndcg) if report_ndcg_as_decreasing_curve else ndcg
+    if not scale_by_weights_tensor:
+        ndcg_report = ndcg_report * aggregates[..., 1]
+
+    counted = aggregates[..., 0] > (1 if remove_single_length_sessions else 0)
+    return torch.where(counted, ndcg_report, 0.0), counted.double()
+
+
 def _compute_ndcg(
     *, sum_ndcg: torch.Tensor, num_sessions: torch.Tensor
 ) -> torch.Tensor:
@@ -293,6 +338,11 @@ class NDCGComputation(RecMetricComputation):
     can capture a decreasing "loss" as opposed to an increasing "gain"
     to visualize similarly to normalized entropy (NE) / pointwise measures.
 
+    By default sessions are ranked within each update. If `sketch_num_slots` is
+    set, the top `k` items of each session are tracked across updates in a
+    SessionTopKSketch of that many slots instead (see its docstring for the
+    approximation error), which needs `k` > 0.
+
     The constructor arguments are defined in RecMetricComputation.
     See the docstring of RecMetricComputation for more detail.
     """
@@ -307,6 +357,7 @@ class NDCGComputation(RecMetricComputation):
         remove_single_length_sessions: bool = False,
         scale_by_weights_tensor: bool = False,
         is_negative_task_mask: Optional[List[bool]] = None,
+        sketch_num_slots: Optional[int] = None,
         **kwargs: Any,
     ) -> None:
         super().__init__(*args, **kwargs)
@@ -331,6 +382,77 @@ class NDCGComputation(RecMetricComputation):
             dist_reduce_fx="sum",
             persistent=True,
         )
+        self._session_sketch: Optional[SessionTopKSketch] = None
+        self._ideal_session_sketch: Optional[SessionTopKSketch] = None
+        if sketch_num_slots is not None:
+            if k <= 0:
+                raise RecMetricException(
+                    "Sketch NDCG needs a positive k to bound the items kept per session"
+                )
+            # (prediction, label) rows with session length and max weight.
+            self._session_sketch = SessionTopKSketch(
+                num_slots=sketch_num_slots,
+                k=k,
+                num_features=2,
+                aggregate_reductions=["sum", "amax"],
+                n_tasks=self._n_tasks,
+            )
+            # label rows for the ideal DCG.
+            self._ideal_session_sketch = SessionTopKSketch(
+                num_slots=sketch_num_slots,
+                k=k,
+                num_features=1,
+                aggregate_reductions=[],
+                n_tasks=self._n_tasks,
+            )
+
+    def _get_sketch_states(
+        self,
+        *,
+        labels: torch.Tensor,
+        predictions: torch.Tensor,
+        weights: torch.Tensor,
+        session_ids: torch.Tensor,
+    ) -> Dict[str, torch.Tensor]:
+        session_sketch = self._session_sketch
+        ideal_session_sketch = self._ideal_session_sketch
+        assert session_sketch is not None and ideal_session_sketch is not None
+        if self._scale_by_weights_tensor:
+            labels = weights * labels
+            predictions = weights * predictions
+
+        old_topk, new_topk, old_aggregates, new_aggregates = session_sketch.update(
+            session_ids[0],
+            torch.stack([predictions, labels], dim=-1),
+            torch.stack([torch.ones_like(weights), weights], dim=-1),
+        )
+        old_ideal_topk, new_ideal_topk, _, _ = ideal_session_sketch.update(
+            session_ids[0],
+            labels.unsqueeze(-1),
+            labels.new_empty((*labels.shape, 0)),
+        )
+        ndcg_kwargs = {
+            "exponential_gain": self._exponential_gain,
+            "report_ndcg_as_decreasing_curve": self._report_ndcg_as_decreasing_curve,
+            "remove_single_length_sessions": self._remove_single_length_sessions,
+            "scale_by_weights_tensor": self._scale_by_weights_tensor,
+        }
+        old_ndcg, old_counted = _get_sketch_ndcg(
+            topk=old_topk,
+            ideal_topk=old_ideal_topk,
+            aggregates=old_aggregates,
+            **ndcg_kwargs,
+        )
+        new_ndcg, new_counted = _get_sketch_ndcg(
+            topk=new_topk,
+            ideal_topk=new_ideal_topk,
+            aggregates=new_aggregates,
+            **ndcg_kwargs,
+        )
+        return {
+            SUM_NDCG: (new_ndcg - old_ndcg).sum(dim=0),
+            NUM_SESSIONS: (new_counted - old_counted).sum(dim=0),
+        }
 
     def update(
         self,
@@ -389,17 +511,25 @@ class NDCGComputation(RecMetricComputation):
         weights = weights.double()
 
         # Calculate NDCG loss at current iterations.
-        states = _get_ndcg_states(
-            labels=labels,
-            predictions=predictions,
-            weights=weights,
-            session_ids=session_ids,
-            exponential_gain=self._exponential_gain,
-            remove_single_length_sessions=self._remove_single_length_sessions,
-            report_ndcg_as_decreasing_curve=self._report_ndcg_as_decreasing_curve,
-            k=self._k,
-            scale_by_weights_tensor=self._scale_by_weights_tensor,
-        )
+        if self._session_sketch is not None:
+            states = self._get_sketch_states(
+                labels=labels,
+                predictions=predictions,
+                weights=weights,
+                session_ids=session_ids,
+            )
+        else:
+            states = _get_ndcg_states(
+                labels=labels,
+                predictions=predictions,
+                weights=weights,
+                session_ids=session_ids,
+                exponential_gain=self._exponential_gain,
+                remove_single_length_sessions=self._remove_single_length_sessions,
+                report_ndcg_as_decreasing_curve=self._report_ndcg_as_decreasing_curve,
+                k=self._k,
+                scale_by_weights_tensor=self._scale_by_weights_tensor,
+            )
 
         # Update based on the new states.
         for state_name, state_value in states.items():
@@ -407,6 +537,13 @@ class NDCGComputation(RecMetricComputation):
             state += state_value
             self._aggregate_window_state(state_name, state_value, predictions.shape[-1])
 
+    def reset(self) -> None:
+        super().reset()
+        if self._session_sketch is not None:
+            self._session_sketch.reset()
+        if self._ideal_session_sketch is not None:
+            self._ideal_session_sketch.reset()
+
     def _compute(self) -> List[MetricComputationReport]:
 
         return [
@@ -23,9 +23,12 @@ from torchrec.metrics.rec_metric import (
 )
 from torchrec.metrics.recall_session import (
     _calc_num_true_pos,
+    _create_session_sketch,
+    _get_sketch_confusion_states,
     _validate_model_outputs,
     ranking_within_session,
 )
+from torchrec.metrics.session_sketch import SessionTopKSketch
 
 logger: logging.Logger = logging.getLogger(__name__)
 
@@ -91,6 +94,9 @@ class PrecisionSessionMetricComputation(RecMetricComputation):
         self.top_threshold: Optional[int] = session_metric_def.top_threshold
         self.run_ranking_of_labels: bool = session_metric_def.run_ranking_of_labels
         self.session_var_name: Optional[str] = session_metric_def.session_var_name
+        self._session_sketch: Optional[SessionTopKSketch] = _create_session_sketch(
+            session_metric_def, self._n_tasks
+        )
 
     def update(
         self,
@@ -131,9 +137,16 @@ class PrecisionSessionMetricComputation(RecMetricComputation):
         weights = weights.double()
 
         num_samples = predictions.shape[-1]
-        for state_name, state_value in self.get_precision_states(
-            labels=labels, predictions=predictions, weights=weights, session=session
-        ).items():
+        if self._session_sketch is not None:
+            num_true_pos, _, num_false_pos = _get_sketch_confusion_states(
+                self._session_sketch, labels, predictions, weights, session
+            )
+            states = {NUM_TRUE_POS: num_true_pos, NUM_FALSE_POS: num_false_pos}
+        else:
+            states = self.get_precision_states(
+                labels=labels, predictions=predictions, weights=weights, session=session
+            )
+        for state_name, state_value in states.items():
             state = getattr(self, state_name)
             state += state_value
             self._aggregate_window_state(state_name, state_value, num_samples)
@@ -179,6 +192,11 @@ class PrecisionSessionMetricComputation(RecMetricComputation):
 
         return {NUM_TRUE_POS: num_true_pos, NUM_FALSE_POS: num_false_pos}
 
+    def reset(self) -> None:
+        super().reset()
+        if self._session_sketch is not None:
+            self._session_sketch.reset()
+
 
 class PrecisionSessionMetric(RecMetric):
     _namespace: MetricNamespace = MetricNamespace.PRECISION_SESSION_LEVEL
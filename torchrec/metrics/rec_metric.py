@@ -19,7 +19,6 @@ from typing import (
     Any,
     Callable,
     cast,
-    Deque,
     Dict,
     Iterator,
     List,
@@ -38,6 +37,7 @@ import torch.distributed as dist
 import torch.nn as nn
 from torch.profiler import record_function
 from torchmetrics import Metric
+from torchmetrics.utilities.data import dim_zero_sum
 from torchrec.distributed.types import get_tensor_size_bytes
 from torchrec.metrics.metrics_config import RecComputeMode, RecTaskInfo
 from torchrec.metrics.metrics_namespace import (
@@ -73,35 +73,161 @@ class RecMetricException(Exception):
 
 
 class WindowBuffer:
+    r"""Sliding window of per-update states backed by a ring buffer.
+
+    Each update's state is copied into one preallocated tensor of shape
+    `[capacity, *state_shape]` and the caller's window state is kept as the
+    running sum of the live slots. The capacity doubles on demand, but never
+    past the number of updates of the current size that the window holds, nor
+    past `max_buffer_count`. So a steady-state window does not allocate per
+    update and the storage does not outgrow the window.
+    """
+
     def __init__(self, max_size: int, max_buffer_count: int) -> None:
         self._max_size: int = max_size
         self._max_buffer_count: int = max_buffer_count
 
-        self._buffers: Deque[torch.Tensor] = deque(maxlen=max_buffer_count)
-        self._used_sizes: Deque[int] = deque(maxlen=max_buffer_count)
+        self._storage: Optional[torch.Tensor] = None
+        self._used_sizes: List[int] = []
+        self._head = 0
+        self._count = 0
         self._window_used_size = 0
 
+    def _capacity(self) -> int:
+        return 0 if self._storage is None else self._storage.size(0)
+
+    def _grow(self, curr_state: torch.Tensor, size: int) -> None:
+        # only called when full, so the live slots are the whole old storage
+        capacity = max(1, 2 * self._capacity())
+        if size > 0:
+            capacity = min(capacity, math.ceil(self._max_size / size))
+        capacity = min(max(capacity, self._count + 1), self._max_buffer_count)
+        storage = curr_state.new_empty((capacity, *curr_state.shape))
+        if self._storage is not None:
+            head = self._head
+            storage[: self._count].copy_(
+                torch.cat([self._storage[head:], self._storage[:head]])
+            )
+            self._used_sizes = self._used_sizes[head:] + self._used_sizes[:head]
+        self._used_sizes += [0] * (capacity - self._count)
+        self._storage = storage
+        self._head = 0
+
+    def _remove(self, window_state: torch.Tensor) -> None:
+        window_state -= cast(torch.Tensor, self._storage)[self._head]
+        self._window_used_size -= self._used_sizes[self._head]
+        self._head = (self._head + 1) % self._capacity()
+        self._count -= 1
+
     def aggregate_state(
         self, window_state: torch.Tensor, curr_state: torch.Tensor, size: int
     ) -> None:
-        def remove(window_state: torch.Tensor) -> None:
-            window_state -= self._buffers.popleft()
-            self._window_used_size -= self._used_sizes.popleft()
-
-        if len(self._buffers) == self._buffers.maxlen:
-            remove(window_state)
-
-        self._buffers.append(curr_state)
-        self._used_sizes.append(size)
+        # evict first, so that the storage never holds more than the window
+        while self._count > 0 and self._window_used_size + size > self._max_size:
+            self._remove(window_state)
+        if self._count == self._max_buffer_count:
+            self._remove(window_state)
+        elif self._count == self._capacity():
+            self._grow(curr_state, size)
+
+        tail = (self._head + self._count) % self._capacity()
+        cast(torch.Tensor, self._storage)[tail].copy_(curr_state)
+        self._used_sizes[tail] = size
+        self._count += 1
         window_state += curr_state
         self._window_used_size += size
 
         while self._window_used_size > self._max_size:
-            remove(window_state)
+            self._remove(window_state)
 
     @property
-    def buffers(self) -> Deque[torch.Tensor]:
-        return self._buffers
+    def buffers(self) -> List[torch.Tensor]:
+        """
+        The live per-update states, oldest first. These are views into the
+        ring buffer and are overwritten by later updates.
+        """
+        if self._storage is None:
+            return []
+        capacity = self._capacity()
+        return [self._storage[(self._head + i) % capacity] for i in range(self._count)]
+
+    @property
+    def storage(self) -> Optional[torch.Tensor]:
+        return self._storage
+
+
+class UpdateStagingBuffer:
+    r"""Stages the model outputs of deferred updates in preallocated tensors.
+
+    The first staged update of each output allocates room for `max_updates`
+    updates of its size; later updates are copied in place. `flush()` returns
+    the staged outputs concatenated along the first dimension, as a single
+    `RecMetric._update()` would take them.
+    """
+
+    def __init__(self, max_updates: int) -> None:
+        self._max_updates: int = max(max_updates, 1)
+        # (output name, task name or "") -> staging tensor
+        self._buffers: Dict[Tuple[str, str], torch.Tensor] = {}
+        self._offsets: Dict[Tuple[str, str], int] = {}
+        self._is_dict: Dict[str, bool] = {}
+        self._num_updates = 0
+
+    def __len__(self) -> int:
+        return self._num_updates
+
+    def _stage(self, leaf: Tuple[str, str], tensor: torch.Tensor) -> None:
+        offset = self._offsets.get(leaf, 0)
+        buffer = self._buffers.get(leaf, None)
+        rows = tensor.size(0)
+        if buffer is None or offset + rows > buffer.size(0):
+            capacity = max(self._max_updates * rows, offset + rows)
+            new_buffer = tensor.new_empty((capacity, *tensor.shape[1:]))
+            if buffer is not None and offset > 0:
+                new_buffer[:offset].copy_(buffer[:offset])
+            buffer = new_buffer
+            self._buffers[leaf] = buffer
+        buffer[offset : offset + rows].copy_(tensor)
+        self._offsets[leaf] = offset + rows
+
+    def append(self, outputs: Dict[str, Optional[RecModelOutput]]) -> None:
+        for key, output in outputs.items():
+            if output is None:
+                continue
+            if isinstance(output, torch.Tensor):
+                self._is_dict[key] = False
+                self._stage((key, ""), output)
+            else:
+                self._is_dict[key] = True
+                for task_name, tensor in output.items():
+                    self._stage((key, task_name), tensor)
+        self._num_updates += 1
+
+    def flush(self) -> Dict[str, RecModelOutput]:
+        ret: Dict[str, RecModelOutput] = {}
+        for leaf in list(self._buffers):
+            offset = self._offsets[leaf]
+            if offset == 0:
+                continue
+            buffer = self._buffers[leaf]
+            # Metrics may keep references to their inputs (e.g. AUC), so a full
+            # buffer is handed over and replaced on the next update, while a
+            # partially filled one is copied out and reused.
+            if offset == buffer.size(0):
+                staged = self._buffers.pop(leaf)
+            else:
+                staged = buffer[:offset].clone()
+            self._offsets[leaf] = 0
+
+            key, task_name = leaf
+            if self._is_dict[key]:
+                task_outputs = ret.setdefault(key, {})
+                assert isinstance(task_outputs, dict)
+                task_outputs[task_name] = staged
+            else:
+                ret[key] = staged
+        self._num_updates = 0
+        return ret
 
 
 class RecMetricComputation(Metric, abc.ABC):
@@ -286,7 +412,10 @@ class RecMetric(nn.Module, abc.ABC):
         tasks (List[RecTaskInfo]): the information of the model tasks.
         compute_mode (RecComputeMode): the computation mode. See RecComputeMode.
         window_size (int): the window size for the window metric.
-        fused_update_limit (int): the maximum number of updates to be fused.
+        fused_update_limit (int): the maximum number of updates to be fused. The
+            model outputs are staged in preallocated buffers and folded into the
+            states by a single update every ``fused_update_limit`` updates, or
+            before compute() and state_dict() if sooner.
         compute_on_all_ranks (bool): whether to compute metrics on all ranks. This
             is necessary if the non-leader rank wants to consume global metrics result.
         should_validate_update (bool): whether to check the inputs of `update()` and
@@ -312,7 +441,7 @@ class RecMetric(nn.Module, abc.ABC):
     _tasks: List[RecTaskInfo]
     _window_size: int
     _tasks_iter: Callable[[str], ComputeIterType]
-    _update_buffers: Dict[str, List[RecModelOutput]]
+    _update_staging: UpdateStagingBuffer
     _default_weights: Dict[Tuple[int, ...], torch.Tensor]
 
     _required_inputs: Set[str]
@@ -359,11 +488,7 @@ class RecMetric(nn.Module, abc.ABC):
         self._should_validate_update = should_validate_update
         self._default_weights = {}
         self._required_inputs = set()
-        self._update_buffers = {
-            self.PREDICTIONS: [],
-            self.LABELS: [],
-            self.WEIGHTS: [],
-        }
+        self._update_staging = UpdateStagingBuffer(fused_update_limit)
         # pyre-fixme[8]: Attribute has type `bool`; used as `Union[bool,
         #  Dict[str, Any]]`.
         self.enable_pt2_compile: bool = kwargs.get("enable_pt2_compile", False)
@@ -465,41 +590,14 @@ class RecMetric(nn.Module, abc.ABC):
                 )
                 yield task, metric_report.name, valid_metric_value, compute_scope + metric_report.metric_prefix.value, metric_report.description
 
-    def _fuse_update_buffers(self) -> Dict[str, RecModelOutput]:
-        def fuse(outputs: List[RecModelOutput]) -> RecModelOutput:
-            assert len(outputs) > 0
-            if isinstance(outputs[0], torch.Tensor):
-                return torch.cat(cast(List[torch.Tensor], outputs))
-            else:
-                task_outputs: Dict[str, List[torch.Tensor]] = defaultdict(list)
-                for output in outputs:
-                    assert isinstance(output, dict)
-                    for task_name, tensor in output.items():
-                        task_outputs[task_name].append(tensor)
-                return {
-                    name: torch.cat(tensors) for name, tensors in task_outputs.items()
-                }
-
-        ret: Dict[str, RecModelOutput] = {}
-        for key, output_list in self._update_buffers.items():
-            if len(output_list) > 0:
-                ret[key] = fuse(output_list)
-            else:
-                assert key == self.WEIGHTS
-            output_list.clear()
-        return ret
-
     def _check_fused_update(self, force: bool) -> None:
         if self._fused_update_limit <= 0:
             return
-        if len(self._update_buffers[self.PREDICTIONS]) == 0:
+        if len(self._update_staging) == 0:
             return
-        if (
-            not force
-            and len(self._update_buffers[self.PREDICTIONS]) < self._fused_update_limit
-        ):
+        if not force and len(self._update_staging) < self._fused_update_limit:
             return
-        fused_arguments = self._fuse_update_buffers()
+        fused_arguments = self._update_staging.flush()
         self._update(
             predictions=fused_arguments[self.PREDICTIONS],
             labels=fused_arguments[self.LABELS],
@@ -674,10 +772,13 @@ class RecMetric(nn.Module, abc.ABC):
     ) -> None:
         with record_function(f"## {self.__class__.__name__}:update ##"):
             if self._fused_update_limit > 0:
-                self._update_buffers[self.PREDICTIONS].append(predictions)
-                self._update_buffers[self.LABELS].append(labels)
-                if weights is not None:
-                    self._update_buffers[self.WEIGHTS].append(weights)
+                self._update_staging.append(
+                    {
+                        self.PREDICTIONS: predictions,
+                        self.LABELS: labels,
+                        self.WEIGHTS: weights,
+                    }
+                )
                 self._check_fused_update(force=False)
             else:
                 self._update(
@@ -735,7 +836,8 @@ class RecMetric(nn.Module, abc.ABC):
             if isinstance(attribute, torch.Tensor):
                 tensor_map[attribute] = get_tensor_size_bytes(attribute)
             elif isinstance(attribute, WindowBuffer):
-                attributes_q.extend(attribute.buffers)
+                if attribute.storage is not None:
+                    attributes_q.append(attribute.storage)
             elif isinstance(attribute, Mapping):
                 attributes_q.extend(attribute.values())
             elif isinstance(attribute, Sequence) and not isinstance(attribute, str):
@@ -766,6 +868,194 @@ class RecMetric(nn.Module, abc.ABC):
         return self._required_inputs
 
 
+def _fused_buffer_dtype(state: torch.Tensor) -> torch.dtype:
+    # float64 represents the float32 states exactly, int64 the integer ones
+    return torch.double if state.is_floating_point() else torch.long
+
+
+def _pack_by_dtype(
+    states: List[Tuple[RecMetricComputation, str]],
+) -> Dict[torch.dtype, List[Tuple[RecMetricComputation, str]]]:
+    packed: Dict[torch.dtype, List[Tuple[RecMetricComputation, str]]] = defaultdict(
+        list
+    )
+    for computation, attr in states:
+        packed[_fused_buffer_dtype(getattr(computation, attr))].append(
+            (computation, attr)
+        )
+    return packed
+
+
+def fused_sync_computations(
+    computations: List[RecMetricComputation],
+    process_group: Optional[dist.ProcessGroup] = None,
+) -> None:
+    r"""Syncs the states of all `computations` with a fixed number of collectives
+    instead of one all-gather per state and computation:
+
+    * states reduced with "sum" are packed into one float64 and one int64 buffer
+      and all-reduced once per buffer,
+    * the other tensor states (e.g. "mean", "max", custom reductions) are packed
+      the same way and all-gathered once per buffer, then reduced locally,
+    * list states (e.g. AUC predictions) are packed per dtype and all-gathered
+      once per dtype, then reduced locally.
+
+    The shapes of the gathered states are all-gathered first, once, and the
+    tensor states must have the same shape on every rank.
+
+    The reduced values are the same as the ones of `Metric.sync()`. Like the
+    latter, the local states are cached and the computations are marked as synced,
+    so `unsync()` restores them.
+    """
+    world_size = dist.get_world_size(process_group)
+    sum_states: List[Tuple[RecMetricComputation, str]] = []
+    gather_states: List[Tuple[RecMetricComputation, str]] = []
+    list_states: List[Tuple[RecMetricComputation, str]] = []
+    for computation in computations:
+        # same cache as `Metric.sync()`, list states are copied as they are
+        # modified in place by some updates
+        computation._cache = {
+            attr: (
+                list(getattr(computation, attr))
+                if isinstance(getattr(computation, attr), list)
+                else getattr(computation, attr)
+            )
+            for attr in computation._defaults
+        }
+        for attr, reduction_fn in computation._reductions.items():
+            if isinstance(getattr(computation, attr), list):
+                list_states.append((computation, attr))
+            elif reduction_fn is dim_zero_sum:
+                sum_states.append((computation, attr))
+            else:
+                gather_states.append((computation, attr))
+
+    metas: List[Any] = [None] * world_size
+    if gather_states or list_states:
+        local_meta = (
+            [
+                tuple(getattr(computation, attr).size())
+                for computation, attr in gather_states
+            ],
+            [
+                [
+                    (tuple(tensor.size()), tensor.dtype)
+                    for tensor in getattr(computation, attr)
+                ]
+                for computation, attr in list_states
+            ],
+        )
+        dist.all_gather_object(metas, local_meta, group=process_group)
+        for rank, (gather_shapes, _) in enumerate(metas):
+            if gather_shapes != local_meta[0]:
+                raise RecMetricException(
+                    f"Fused state sync requires the same state shapes on all ranks, "
+                    f"got {gather_shapes} on rank {rank} and {local_meta[0]} locally."
+                )
+
+    for dtype, states_of_dtype in _pack_by_dtype(sum_states).items():
+        states = [getattr(computation, attr) for computation, attr in states_of_dtype]
+        buffer = torch.cat([state.detach().to(dtype).view(-1) for state in states])
+        with record_function("## RecMetricList:fused_all_reduce ##"):
+            dist.all_reduce(buffer, group=process_group)
+        for (computation, attr), state, value in zip(
+            states_of_dtype, states, buffer.split([state.numel() for state in states])
+        ):
+            setattr(computation, attr, value.view_as(state).to(state.dtype))
+
+    for dtype, states_of_dtype in _pack_by_dtype(gather_states).items():
+        states = [getattr(computation, attr) for computation, attr in states_of_dtype]
+        buffer = torch.cat([state.detach().to(dtype).view(-1) for state in states])
+        # a flat output, gloo does not accept a stacked one
+        gathered = buffer.new_empty(world_size * buffer.numel())
+        with record_function("## RecMetricList:fused_all_gather ##"):
+            dist.all_gather_into_tensor(gathered, buffer, group=process_group)
+        gathered = gathered.view(world_size, -1)
+        for (computation, attr), state, value in zip(
+            states_of_dtype,
+            states,
+            gathered.split([state.numel() for state in states], dim=1),
+        ):
+            stacked = value.reshape(world_size, *state.size()).to(state.dtype)
+            reduction_fn = computation._reductions[attr]
+            setattr(
+                computation,
+                attr,
+                reduction_fn(stacked) if reduction_fn is not None else stacked,
+            )
+
+    if list_states:
+        _fused_sync_list_states(
+            list_states, [meta[1] for meta in metas], world_size, process_group
+        )
+
+    for computation in computations:
+        computation._is_synced = True
+
+
+def _fused_sync_list_states(
+    list_states: List[Tuple[RecMetricComputation, str]],
+    metas: List[List[List[Tuple[Tuple[int, ...], torch.dtype]]]],
+    world_size: int,
+    process_group: Optional[dist.ProcessGroup],
+) -> None:
+    local_tensors = [
+        cast(List[torch.Tensor], getattr(computation, attr))
+        for computation, attr in list_states
+    ]
+
+    device = list_states[0][0].device
+    # one padded all-gather per dtype, ranks send their tensors in state order
+    sizes_per_dtype: Dict[torch.dtype, List[int]] = defaultdict(
+        lambda: [0] * world_size
+    )
+    for rank, meta in enumerate(metas):
+        for state_meta in meta:
+            for size, dtype in state_meta:
+                sizes_per_dtype[dtype][rank] += math.prod(size)
+    gathered: Dict[torch.dtype, torch.Tensor] = {}
+    for dtype, sizes in sizes_per_dtype.items():
+        max_size = max(sizes)
+        local = [
+            tensor.detach().reshape(-1)
+            for tensors in local_tensors
+            for tensor in tensors
+            if tensor.dtype == dtype
+        ]
+        buffer = torch.zeros(max_size, dtype=dtype, device=device)
+        if local:
+            local_buffer = torch.cat(local)
+            buffer[: local_buffer.numel()] = local_buffer
+        output = buffer.new_empty(world_size * max_size)
+        with record_function("## RecMetricList:fused_all_gather_list ##"):
+            dist.all_gather_into_tensor(output, buffer, group=process_group)
+        gathered[dtype] = output.view(world_size, max_size)
+
+    # unpack rank-major, in the order every rank packed its tensors
+    values: List[List[torch.Tensor]] = [[] for _ in list_states]
+    for rank, meta in enumerate(metas):
+        offsets: Dict[torch.dtype, int] = defaultdict(int)
+        for i, state_meta in enumerate(meta):
+            for size, dtype in state_meta:
+                numel = math.prod(size)
+                offset = offsets[dtype]
+                values[i].append(
+                    gathered[dtype][rank, offset : offset + numel].view(size)
+                )
+                offsets[dtype] += numel
+
+    for (computation, attr), value in zip(list_states, values):
+        if len(value) == 0:
+            setattr(computation, attr, [])
+            continue
+        reduction_fn = computation._reductions[attr]
+        setattr(
+            computation,
+            attr,
+            reduction_fn(value) if reduction_fn is not None else value,
+        )
+
+
 class RecMetricList(nn.Module):
     """
     A list module to encapulate multiple RecMetric instances and provide the
@@ -773,6 +1063,9 @@ class RecMetricList(nn.Module):
 
     Args:
         rec_metrics (List[RecMetric]: the list of the input RecMetrics.
+        fused_state_sync (bool): whether `compute()` and `sync()` sync the states of
+            all RecMetrics at once with `fused_sync_computations()` instead of one
+            collective per state.
 
     Call Args:
         Not supported.
@@ -794,13 +1087,16 @@ class RecMetricList(nn.Module):
     rec_metrics: nn.ModuleList
     required_inputs: Optional[List[str]]
 
-    def __init__(self, rec_metrics: List[RecMetric]) -> None:
+    def __init__(
+        self, rec_metrics: List[RecMetric], fused_state_sync: bool = False
+    ) -> None:
         # TODO(stellaya): consider to inherit from TorchMetrics.MetricCollection.
         # The prequsite to use MetricCollection is that RecMetric inherits from
         # TorchMetrics.Metric or TorchMetrics.MetricCollection
 
         super().__init__()
         self.rec_metrics = nn.ModuleList(rec_metrics)
+        self._fused_state_sync = fused_state_sync
         self.required_inputs = (
             list(
                 set().union(
@@ -832,10 +1128,57 @@ class RecMetricList(nn.Module):
                 predictions=predictions, labels=labels, weights=weights, **kwargs
             )
 
-    def compute(self) -> Dict[str, torch.Tensor]:
-        ret = {}
+    def _fused_sync(self) -> bool:
+        r"""Syncs all the computations with `fused_sync_computations()`, one call per
+        process group. Returns False if the fused sync is disabled or not needed.
+        """
+        if not (
+            self._fused_state_sync and dist.is_available() and dist.is_initialized()
+        ):
+            return False
+        computations_per_pg: Dict[
+            Optional[dist.ProcessGroup], List[RecMetricComputation]
+        ] = defaultdict(list)
         for metric in self.rec_metrics:
-            ret.update(metric.compute())
+            # flush the buffered updates before the states are synced
+            metric._check_fused_update(force=True)
+            for computation in metric._metrics_computations:
+                # the fused sync bypasses the compute() that would call it
+                computation.pre_compute()
+                computations_per_pg[computation.process_group].append(computation)
+        if all(dist.get_world_size(pg) <= 1 for pg in computations_per_pg):
+            return False
+        with record_function("## RecMetricList:fused_sync ##"):
+            for pg, computations in computations_per_pg.items():
+                fused_sync_computations(computations, pg)
+        return True
+
+    def compute(self) -> Dict[str, torch.Tensor]:
+        if not self._fused_sync():
+            ret = {}
+            for metric in self.rec_metrics:
+                ret.update(metric.compute())
+            return ret
+
+        computations = [
+            computation
+            for metric in self.rec_metrics
+            for computation in metric._metrics_computations
+        ]
+        # the states are already synced, skip the sync of torchmetrics' compute
+        to_sync = [computation._to_sync for computation in computations]
+        for computation in computations:
+            computation._to_sync = False
+        try:
+            ret = {}
+            for metric in self.rec_metrics:
+                ret.update(metric.compute())
+        finally:
+            for computation, computation_to_sync in zip(computations, to_sync):
+                computation._to_sync = computation_to_sync
+                # compute() unsyncs unless its result was cached
+                if computation._is_synced:
+                    computation.unsync()
         return ret
 
     def local_compute(self) -> Dict[str, torch.Tensor]:
@@ -845,6 +1188,8 @@ class RecMetricList(nn.Module):
         return ret
 
     def sync(self) -> None:
+        if self._fused_sync():
+            return
         for metric in self.rec_metrics:
             metric.sync()
 
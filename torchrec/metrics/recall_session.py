@@ -8,7 +8,7 @@
 # pyre-strict
 
 import logging
-from typing import Any, cast, Dict, List, Optional, Set, Type, Union
+from typing import Any, cast, Dict, List, Optional, Set, Tuple, Type, Union
 
 import torch
 from torch import distributed as dist
@@ -21,6 +21,7 @@ from torchrec.metrics.rec_metric import (
     RecMetricComputation,
     RecMetricException,
 )
+from torchrec.metrics.session_sketch import SessionTopKSketch
 
 
 logger: logging.Logger = logging.getLogger(__name__)
@@ -95,6 +96,56 @@ def _calc_recall(
     return recall
 
 
+def _create_session_sketch(
+    session_metric_def: SessionMetricDef, n_tasks: int
+) -> Optional[SessionTopKSketch]:
+    if session_metric_def.sketch_num_slots is None:
+        return None
+    if session_metric_def.run_ranking_of_labels:
+        raise RecMetricException(
+            "run_ranking_of_labels is not supported by sketch session metrics"
+        )
+    return SessionTopKSketch(
+        num_slots=session_metric_def.sketch_num_slots,
+        # pyre-ignore[6]: top_threshold is validated by the metric
+        k=session_metric_def.top_threshold,
+        num_features=3,
+        aggregate_reductions=["sum"],
+        n_tasks=n_tasks,
+    )
+
+
+def _get_sketch_confusion_states(
+    sketch: SessionTopKSketch,
+    labels: torch.Tensor,
+    predictions: torch.Tensor,
+    weights: torch.Tensor,
+    session: torch.Tensor,
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    Returns the change of the weighted true positives, false negatives and false
+    positives, where the positive predictions are the top `top_threshold` items
+    of each session across all updates kept in `sketch`.
+    """
+    # items: (prediction, weighted positive, weighted negative)
+    items = torch.stack([predictions, weights * labels, weights * (1 - labels)], dim=-1)
+    old_topk, new_topk, old_aggregates, new_aggregates = sketch.update(
+        session[0], items, (weights * labels).unsqueeze(-1)
+    )
+    # per session true positives, [n_sessions, n_tasks]
+    old_true_pos = old_topk[..., 1].sum(dim=-1)
+    new_true_pos = new_topk[..., 1].sum(dim=-1)
+    num_true_pos = (new_true_pos - old_true_pos).sum(dim=0)
+    num_false_neg = (
+        (new_aggregates[..., 0] - new_true_pos)
+        - (old_aggregates[..., 0] - old_true_pos)
+    ).sum(dim=0)
+    num_false_pos = (new_topk[..., 2].sum(dim=-1) - old_topk[..., 2].sum(dim=-1)).sum(
+        dim=0
+    )
+    return num_true_pos, num_false_neg, num_false_pos
+
+
 class RecallSessionMetricComputation(RecMetricComputation):
     r"""
     This class implements the RecMetricComputation for Recall on session level.
@@ -128,6 +179,9 @@ class RecallSessionMetricComputation(RecMetricComputation):
         self.top_threshold: Optional[int] = session_metric_def.top_threshold
         self.run_ranking_of_labels: bool = session_metric_def.run_ranking_of_labels
         self.session_var_name: Optional[str] = session_metric_def.session_var_name
+        self._session_sketch: Optional[SessionTopKSketch] = _create_session_sketch(
+            session_metric_def, self._n_tasks
+        )
 
     def update(
         self,
@@ -168,9 +222,16 @@ class RecallSessionMetricComputation(RecMetricComputation):
         weights = weights.double()
 
         num_samples = predictions.shape[-1]
-        for state_name, state_value in self.get_recall_states(
-            labels=labels, predictions=predictions, weights=weights, session=session
-        ).items():
+        if self._session_sketch is not None:
+            num_true_pos, num_false_neg, _ = _get_sketch_confusion_states(
+                self._session_sketch, labels, predictions, weights, session
+            )
+            states = {NUM_TRUE_POS: num_true_pos, NUM_FALSE_NEGATIVE: num_false_neg}
+        else:
+            states = self.get_recall_states(
+                labels=labels, predictions=predictions, weights=weights, session=session
+            )
+        for state_name, state_value in states.items():
             state = getattr(self, state_name)
             state += state_value
             self._aggregate_window_state(state_name, state_value, num_samples)
@@ -218,6 +279,11 @@ class RecallSessionMetricComputation(RecMetricComputation):
 
         return {NUM_TRUE_POS: num_true_pos, NUM_FALSE_NEGATIVE: num_false_neg}
 
+    def reset(self) -> None:
+        super().reset()
+        if self._session_sketch is not None:
+            self._session_sketch.reset()
+
 
 class RecallSessionMetric(RecMetric):
     _namespace: MetricNamespace = MetricNamespace.RECALL_SESSION_LEVEL
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-strict
+
+from typing import List, Tuple
+
+import torch
+import torch.nn as nn
+
+# splitmix64 finalizer multipliers, as signed int64.
+_HASH_MULTIPLIERS = (-4658895280553007687, -7723592293110705685)
+_EMPTY_KEY = -1
+
+
+def hash_session_ids(session_ids: torch.Tensor, num_slots: int) -> torch.Tensor:
+    """
+    Maps int64 session ids to slots in [0, num_slots).
+    """
+    hashed = session_ids.long()
+    for shift, multiplier in zip((30, 27), _HASH_MULTIPLIERS):
+        hashed = (hashed ^ (hashed >> shift)) * multiplier
+    hashed = hashed ^ (hashed >> 31)
+    return torch.remainder(hashed, num_slots)
+
+
+def segment_topk(
+    keys: torch.Tensor, segments: torch.Tensor, num_segments: int, k: int
+) -> torch.Tensor:
+    """
+    Returns the indices of the `k` largest `keys` of each segment as a
+    [num_segments, k] tensor in descending key order, padded with -1. Ties keep
+    the input order.
+    """
+    order = torch.argsort(keys, descending=True, stable=True)
+    order = order[torch.argsort(segments[order], stable=True)]
+    sorted_segments = segments[order]
+    counts = torch.bincount(segments, minlength=num_segments)
+    starts = torch.cumsum(counts, dim=0) - counts
+    ranks = torch.arange(order.numel(), device=keys.device) - starts[sorted_segments]
+    keep = ranks < k
+    topk = torch.full((num_segments, k), -1, dtype=torch.long, device=keys.device)
+    topk[sorted_segments[keep], ranks[keep]] = order[keep]
+    return topk
+
+
+class SessionTopKSketch(nn.Module):
+    r"""
+    Fixed-memory table of the `k` top ranked items of each session, for session
+    metrics whose sessions span many updates.
+
+    Sessions are hashed into `num_slots` slots. A slot holds the id of its
+    session, the session's top `k` item rows sorted by their first column, and
+    per-session aggregates reduced with "sum" or "amax". An update merges the
+    new items of every session with its slot and returns each session's old and
+    new content, so that metrics can accumulate the difference of the
+    per-session values into regular summed states.
+
+    Approximation: when two sessions hash to the same slot, the latest one takes
+    the slot over (a session already in the slot is kept over new sessions of
+    the same update). The evicted session keeps its contribution, but if it
+    comes back it is counted as a new session and its earlier items no longer
+    take part in its ranking. Results are exact as long as no slot is reused
+    while its session is still receiving items, i.e. `num_slots` should be a
+    few times the number of sessions active at the same time: with `A` active
+    sessions, a session loses its slot between two of its updates with
+    probability of roughly `1 - exp(-A / num_slots)`. Ties are broken by
+    arrival order instead of being kept together.
+
+    Memory: `num_slots * (8 + n_tasks * (k * num_features + num_aggregates) * 8)`
+    bytes, independent of the number of sessions.
+
+    Args:
+        num_slots (int): number of session slots.
+        k (int): number of top items kept per session.
+        num_features (int): number of columns of an item row; the first one is
+            the ranking key.
+        aggregate_reductions (List[str]): reduction ("sum" or "amax") of each
+            per-session aggregate.
+        n_tasks (int): number of tasks sharing the session ids.
+    """
+
+    def __init__(
+        self,
+        num_slots: int,
+        k: int,
+        num_features: int,
+        aggregate_reductions: List[str],
+        n_tasks: int = 1,
+    ) -> None:
+        super().__init__()
+        if num_slots <= 0 or k <= 0:
+            raise ValueError(
+                f"num_slots ({num_slots}) and k ({k}) of the session sketch must be positive"
+            )
+        for reduction in aggregate_reductions:
+            if reduction not in ("sum", "amax"):
+                raise ValueError(f"Unsupported session aggregate {reduction}")
+        self._num_slots = num_slots
+        self._k = k
+        self._num_features = num_features
+        self._aggregate_reductions: List[str] = aggregate_reductions
+        self._n_tasks = n_tasks
+        self.register_buffer(
+            "slot_keys", torch.full((num_slots,), _EMPTY_KEY, dtype=torch.long)
+        )
+        self.register_buffer("slot_topk", self._empty_topk(num_slots))
+        self.register_buffer("slot_aggregates", self._empty_aggregates(num_slots))
+
+    def _empty_topk(self, num_sessions: int) -> torch.Tensor:
+        topk = torch.zeros(
+            (num_sessions, self._n_tasks, self._k, self._num_features),
+            dtype=torch.double,
+        )
+        topk[..., 0] = float("-inf")
+        return topk
+
+    def _empty_aggregates(self, num_sessions: int) -> torch.Tensor:
+        aggregates = torch.zeros(
+            (num_sessions, self._n_tasks, len(self._aggregate_reductions)),
+            dtype=torch.double,
+        )
+        for i, reduction in enumerate(self._aggregate_reductions):
+            if reduction == "amax":
+                aggregates[..., i] = float("-inf")
+        return aggregates
+
+    def reset(self) -> None:
+        self.slot_keys.fill_(_EMPTY_KEY)
+        self.slot_topk.copy_(self._empty_topk(self._num_slots))
+        self.slot_aggregates.copy_(self._empty_aggregates(self._num_slots))
+
+    @torch.no_grad()
+    def update(
+        self,
+        session_ids: torch.Tensor,
+        items: torch.Tensor,
+        aggregates: torch.Tensor,
+    ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
+        """
+        Args:
+            session_ids (torch.Tensor): [n_examples] session id of each example.
+            items (torch.Tensor): [n_tasks, n_examples, num_features] item rows.
+            aggregates (torch.Tensor): [n_tasks, n_examples, num_aggregates]
+                values reduced into the per-session aggregates.
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]: the old
+            and new top `k` rows ([n_sessions, n_tasks, k, num_features], rows
+            past the end of a session have -inf keys) and the old and new
+            aggregates ([n_sessions, n_tasks, num_aggregates]) of the sessions
+            of this update.
+        """
+        device = items.device
+        unique_ids, inverse = session_ids.long().unique(return_inverse=True)
+        num_sessions = unique_ids.numel()
+        slots = hash_session_ids(unique_ids, self._num_slots)
+        resident = self.slot_keys[slots] == unique_ids
+
+        # One owner per slot: the resident session if any, else the last one.
+        priority = resident.long() * num_sessions + torch.arange(
+            num_sessions, device=device
+        )
+        winner = torch.full(
+            (self._num_slots,), -1, dtype=torch.long, device=device
+        ).scatter_reduce(0, slots, priority, reduce="amax")
+        owner = winner[slots] == priority
+
+        old_topk = torch.where(
+            resident.view(-1, 1, 1, 1),
+            self.slot_topk[slots],
+            self._empty_topk(num_sessions).to(device),
+        )
+        old_aggregates = torch.where(
+            resident.view(-1, 1, 1),
+            self.slot_aggregates[slots],
+            self._empty_aggregates(num_sessions).to(device),
+        )
+
+        # Merge the kept rows with the new items, per (task, session) segment.
+        candidates = torch.cat(
+            [
+                old_topk.transpose(0, 1).reshape(
+                    self._n_tasks, num_sessions * self._k, self._num_features
+                ),
+                items.double(),
+            ],
+            dim=1,
+        )
+        segments = torch.cat(
+            [
+                torch.arange(num_sessions, device=device).repeat_interleave(self._k),
+                inverse,
+            ]
+        )
+        segments = (
+            torch.arange(self._n_tasks, device=device).view(-1, 1) * num_sessions
+            + segments
+        ).flatten()
+        candidates = candidates.reshape(-1, self._num_features)
+        valid = candidates[:, 0] > float("-inf")
+        valid_candidates = candidates[valid]
+        topk_index = segment_topk(
+            valid_candidates[:, 0],
+            segments[valid],
+            self._n_tasks * num_sessions,
+            self._k,
+        )
+        new_topk = torch.where(
+            (topk_index >= 0).unsqueeze(-1),
+            valid_candidates[topk_index.clamp(min=0)],
+            self._empty_topk(1)[0, 0].to(device),
+        )
+        new_topk = new_topk.view(
+            self._n_tasks, num_sessions, self._k, self._num_features
+        ).transpose(0, 1)
+
+        new_aggregates = old_aggregates.clone()
+        for i, reduction in enumerate(self._aggregate_reductions):
+            new_aggregates[..., i] = (
+                new_aggregates[..., i]
+                .transpose(0, 1)
+                .scatter_reduce(
+                    1,
+                    inverse.expand(self._n_tasks, -1),
+                    aggregates[..., i].double(),
+                    reduce=reduction,
+                )
+                .transpose(0, 1)
+            )
+
+        owner_slots = slots[owner]
+        self.slot_keys[owner_slots] = unique_ids[owner]
+        self.slot_topk[owner_slots] = new_topk[owner]
+        self.slot_aggregates[owner_slots] = new_aggregates[owner]
+        return old_topk, new_topk, old_aggregates, new_aggregates
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-strict
+
+"""
+Measures the cost of each RecMetric built from a MetricsConfig: update latency,
+compute latency (including the state sync), bytes moved by the sync
+collectives and the memory held by the metric states, e.g.
+
+    python -m torchrec.metrics.tests.metric_benchmark --world_size 2 \
+        --metrics ne,auc,calibration --n_tasks 4 --batch_size 1024 \
+        --compute_modes fused,unfused --window_size 100000
+
+Every metric is benchmarked on its own RecMetricModule so that the numbers can
+be summed to budget a production config.
+"""
+
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager, ExitStack
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generator, List
+from unittest.mock import patch
+
+import click
+import torch
+import torch.distributed as dist
+from torch import multiprocessing as mp
+from torchrec.metrics.metric_module import generate_metric_module, RecMetricModule
+from torchrec.metrics.metrics_config import (
+    MetricsConfig,
+    RecComputeMode,
+    RecMetricDef,
+    RecMetricEnum,
+    RecTaskInfo,
+)
+from torchrec.metrics.test_utils import gen_test_batch
+from torchrec.test_utils import get_free_port
+
+COLLECTIVES: List[str] = [
+    "all_reduce",
+    "all_gather",
+    "all_gather_into_tensor",
+    "all_gather_object",
+]
+
+COMPUTE_MODES: Dict[str, RecComputeMode] = {
+    "fused": RecComputeMode.FUSED_TASKS_COMPUTATION,
+    "unfused": RecComputeMode.UNFUSED_TASKS_COMPUTATION,
+}
+
+
+@dataclass
+class MetricBenchmarkResult:
+    metric: str
+    compute_mode: str
+    update_p50_ms: float
+    update_p90_ms: float
+    compute_p50_ms: float
+    compute_p90_ms: float
+    # per compute() call
+    sync_collectives: float
+    sync_bytes: float
+    state_bytes: int
+
+    def __str__(self) -> str:
+        return (
+            f"{self.metric:<24} {self.compute_mode:<8} "
+            f"update P50: {self.update_p50_ms:8.3f} ms P90: {self.update_p90_ms:8.3f} ms | "
+            f"compute P50: {self.compute_p50_ms:8.3f} ms P90: {self.compute_p90_ms:8.3f} ms | "
+            f"sync: {self.sync_collectives:5.1f} collectives {self.sync_bytes / 1024:10.2f} KB | "
+            f"state memory: {self.state_bytes / 1024:10.2f} KB"
+        )
+
+
+def _tensor_bytes(arg: object) -> int:
+    if isinstance(arg, torch.Tensor):
+        return arg.numel() * arg.element_size()
+    if isinstance(arg, (list, tuple)):
+        return sum(_tensor_bytes(a) for a in arg)
+    return 0
+
+
+@contextmanager
+def count_collectives(
+    ops: "Counter[str]", num_bytes: "Counter[str]"
+) -> Generator[None, None, None]:
+    """
+    Counts the calls of the torch.distributed gather/reduce collectives and the
+    bytes of their output tensors (the first argument). all_gather_object only
+    counts calls as its payload is pickled.
+    """
+
+    def counting(name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        # pyre-ignore
+        def wrapped(*args, **kwargs) -> Any:
+            ops[name] += 1
+            if args:
+                num_bytes[name] += _tensor_bytes(args[0])
+            return fn(*args, **kwargs)
+
+        return wrapped
+
+    with ExitStack() as stack:
+        for name in COLLECTIVES:
+            stack.enter_context(
+                patch(f"torch.distributed.{name}", counting(name, getattr(dist, name)))
+            )
+        yield
+
+
+def _percentile_ms(latencies: List[float], q: float) -> float:
+    return 1000 * torch.tensor(latencies, dtype=torch.double).quantile(q).item()
+
+
+def _sync(device: torch.device) -> None:
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+
+
+def benchmark_metric(
+    metric: RecMetricEnum,
+    compute_mode: str,
+    rank: int,
+    world_size: int,
+    n_tasks: int,
+    batch_size: int,
+    window_size: int,
+    fused_state_sync: bool,
+    num_updates: int,
+    num_computes: int,
+    device: torch.device,
+) -> MetricBenchmarkResult:
+    tasks = [
+        RecTaskInfo(
+            name=f"Task{i}",
+            label_name="label",
+            prediction_name="prediction",
+            weight_name="weight",
+        )
+        for i in range(n_tasks)
+    ]
+    config = MetricsConfig(
+        rec_tasks=tasks,
+        rec_metrics={metric: RecMetricDef(rec_tasks=tasks, window_size=window_size)},
+        rec_compute_mode=COMPUTE_MODES[compute_mode],
+        compute_on_all_ranks=True,
+        fused_state_sync=fused_state_sync,
+    )
+    metric_module = generate_metric_module(
+        RecMetricModule,
+        metrics_config=config,
+        batch_size=batch_size,
+        world_size=world_size,
+        my_rank=rank,
+        state_metrics_mapping={},
+        device=device,
+    )
+    batches = [
+        {
+            k: v.to(device)
+            for k, v in gen_test_batch(batch_size, seed=rank * num_updates + i).items()
+        }
+        for i in range(num_updates)
+    ]
+
+    update_latencies = []
+    compute_latencies = []
+    ops: "Counter[str]" = Counter()
+    num_bytes: "Counter[str]" = Counter()
+    for _ in range(num_computes):
+        for batch in batches:
+            _sync(device)
+            start = time.perf_counter()
+            metric_module.update(batch)
+            _sync(device)
+            update_latencies.append(time.perf_counter() - start)
+
+        if world_size > 1:
+            dist.barrier()
+        with count_collectives(ops, num_bytes):
+            start = time.perf_counter()
+            metric_module.compute()
+            _sync(device)
+            compute_latencies.append(time.perf_counter() - start)
+
+    return MetricBenchmarkResult(
+        metric=metric.value,
+        compute_mode=compute_mode,
+        update_p50_ms=_percentile_ms(update_latencies, 0.5),
+        update_p90_ms=_percentile_ms(update_latencies, 0.9),
+        compute_p50_ms=_percentile_ms(compute_latencies, 0.5),
+        compute_p90_ms=_percentile_ms(compute_latencies, 0.9),
+        sync_collectives=sum(ops.values()) / num_computes,
+        sync_bytes=sum(num_bytes.values()) / num_computes,
+        state_bytes=metric_module.get_memory_usage(),
+    )
+
+
+def _run_worker(
+    rank: int,
+    world_size: int,
+    metrics: List[str],
+    compute_modes: List[str],
+    n_tasks: int,
+    batch_size: int,
+    window_size: int,
+    fused_state_sync: bool,
+    num_updates: int,
+    num_computes: int,
+    device_type: str,
+) -> None:
+    if device_type == "cuda":
+        torch.cuda.set_device(rank)
+        device = torch.device("cuda", rank)
+    else:
+        device = torch.device("cpu")
+    if world_size > 1:
+        dist.init_process_group(
+            backend="nccl" if device_type == "cuda" else "gloo",
+            rank=rank,
+            world_size=world_size,
+        )
+
+    for metric in metrics:
+        for compute_mode in compute_modes:
+            result = benchmark_metric(
+                RecMetricEnum(metric),
+                compute_mode,
+                rank=rank,
+                world_size=world_size,
+                n_tasks=n_tasks,
+                batch_size=batch_size,
+                window_size=window_size,
+                fused_state_sync=fused_state_sync,
+                num_updates=num_updates,
+                num_computes=num_computes,
+                device=device,
+            )
+            if rank == 0:
+                print(result)
+
+    if world_size > 1:
+        dist.destroy_process_group()
+
+
+@click.command()
+@click.option("--world_size", type=int, default=1, help="Number of processes.")
+@click.option(
+    "--metrics",
+    type=str,
+    default="ne,calibration,ctr,mse,auc",
+    help="Comma separated RecMetricEnum values.",
+)
+@click.option(
+    "--compute_modes",
+    type=str,
+    default="fused,unfused",
+    help="Comma separated RecComputeModes: fused, unfused.",
+)
+@click.option("--n_tasks", type=int, default=4, help="Number of tasks.")
+@click.option("--batch_size", type=int, default=512, help="Local batch size.")
+@click.option("--window_size", type=int, default=100_000, help="Global window size.")
+@click.option(
+    "--fused_state_sync", type=bool, default=False, help="Fuse the state sync."
+)
+@click.option(
+    "--num_updates", type=int, default=10, help="Number of updates per compute."
+)
+@click.option("--num_computes", type=int, default=10, help="Number of computes.")
+@click.option("--device_type", type=str, default="cpu", help="cpu or cuda.")
+def main(
+    world_size: int,
+    metrics: str,
+    compute_modes: str,
+    n_tasks: int,
+    batch_size: int,
+    window_size: int,
+    fused_state_sync: bool,
+    num_updates: int,
+    num_computes: int,
+    device_type: str,
+) -> None:
+    os.environ["MASTER_ADDR"] = "localhost"
+    os.environ["MASTER_PORT"] = str(get_free_port())
+    mp.spawn(
+        _run_worker,
+        args=(
+            world_size,
+            metrics.split(","),
+            compute_modes.split(","),
+            n_tasks,
+            batch_size,
+            window_size,
+            fused_state_sync,
+            num_updates,
+            num_computes,
+            device_type,
+        ),
+        nprocs=world_size,
+    )
+
+
+if __name__ == "__main__":
+    main()
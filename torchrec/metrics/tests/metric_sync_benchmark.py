@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-strict
+
+"""
+Compares the collective count and latency of RecMetricModule.compute() with and
+without fused state sync, on gloo:
+
+    python -m torchrec.metrics.tests.metric_sync_benchmark --world_size 4 \
+        --n_tasks 10 --metrics ne,calibration,ctr,mse,weighted_avg
+"""
+
+import os
+import time
+from collections import Counter
+from typing import List
+
+import click
+import torch
+import torch.distributed as dist
+from torch import multiprocessing as mp
+from torchrec.metrics.metric_module import generate_metric_module, RecMetricModule
+from torchrec.metrics.metrics_config import (
+    MetricsConfig,
+    RecComputeMode,
+    RecMetricDef,
+    RecMetricEnum,
+    RecTaskInfo,
+)
+from torchrec.metrics.test_utils import gen_test_batch
+from torchrec.metrics.tests.metric_benchmark import count_collectives
+from torchrec.test_utils import get_free_port
+
+
+def _run_worker(
+    rank: int,
+    world_size: int,
+    n_tasks: int,
+    metrics: List[str],
+    batch_size: int,
+    fused_tasks_computation: bool,
+    num_computes: int,
+) -> None:
+    dist.init_process_group(backend="gloo", rank=rank, world_size=world_size)
+    tasks = [
+        RecTaskInfo(
+            name=f"Task{i}",
+            label_name="label",
+            prediction_name="prediction",
+            weight_name="weight",
+        )
+        for i in range(n_tasks)
+    ]
+
+    for fused_state_sync in [False, True]:
+        config = MetricsConfig(
+            rec_tasks=tasks,
+            rec_metrics={
+                RecMetricEnum(metric): RecMetricDef(rec_tasks=tasks)
+                for metric in metrics
+            },
+            rec_compute_mode=(
+                RecComputeMode.FUSED_TASKS_COMPUTATION
+                if fused_tasks_computation
+                else RecComputeMode.UNFUSED_TASKS_COMPUTATION
+            ),
+            fused_state_sync=fused_state_sync,
+        )
+        metric_module = generate_metric_module(
+            RecMetricModule,
+            metrics_config=config,
+            batch_size=batch_size,
+            world_size=world_size,
+            my_rank=rank,
+            state_metrics_mapping={},
+            device=torch.device("cpu"),
+        )
+        batch = gen_test_batch(batch_size, seed=rank)
+        counter: "Counter[str]" = Counter()
+        num_bytes: "Counter[str]" = Counter()
+        latencies = []
+        for _ in range(num_computes):
+            metric_module.update(batch)
+            dist.barrier()
+            with count_collectives(counter, num_bytes):
+                start = time.perf_counter()
+                metric_module.compute()
+                latencies.append(time.perf_counter() - start)
+
+        if rank == 0:
+            collectives = {
+                name: count / num_computes for name, count in counter.items()
+            }
+            print(
+                f"fused_state_sync={fused_state_sync!s:5} "
+                f"collectives per compute: {sum(collectives.values()):6.1f} "
+                f"{collectives} "
+                f"bytes per compute: {sum(num_bytes.values()) / num_computes:.0f} "
+                f"compute latency (avg): {1000 * sum(latencies) / num_computes:.2f} ms"
+            )
+    dist.destroy_process_group()
+
+
+@click.command()
+@click.option("--world_size", type=int, default=2, help="Number of processes.")
+@click.option("--n_tasks", type=int, default=10, help="Number of tasks.")
+@click.option(
+    "--metrics",
+    type=str,
+    default="ne,calibration,ctr,mse,weighted_avg",
+    help="Comma separated RecMetricEnum values.",
+)
+@click.option("--batch_size", type=int, default=512, help="Batch size.")
+@click.option(
+    "--fused_tasks_computation",
+    type=bool,
+    default=False,
+    help="Use RecComputeMode.FUSED_TASKS_COMPUTATION.",
+)
+@click.option("--num_computes", type=int, default=20, help="Number of computes.")
+def main(
+    world_size: int,
+    n_tasks: int,
+    metrics: str,
+    batch_size: int,
+    fused_tasks_computation: bool,
+    num_computes: int,
+) -> None:
+    os.environ["MASTER_ADDR"] = "localhost"
+    os.environ["MASTER_PORT"] = str(get_free_port())
+    mp.spawn(
+        _run_worker,
+        args=(
+            world_size,
+            n_tasks,
+            metrics.split(","),
+            batch_size,
+            fused_tasks_computation,
+            num_computes,
+        ),
+        nprocs=world_size,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,12 @@ from typing import Dict, Iterable, List, Optional, Type, Union
 
 import torch
 from torch import no_grad
-from torchrec.metrics.auc import AUCMetric
+from torchrec.metrics.auc import (
+    AUCMetric,
+    compute_auc_histogram_error_bound,
+    compute_auc_per_group,
+    compute_histogram,
+)
 from torchrec.metrics.metrics_config import DefaultTaskInfo
 from torchrec.metrics.rec_metric import (
     RecComputeMode,
@@ -442,6 +447,58 @@ class GroupedAUCValueTest(unittest.TestCase):
                 },
             )
 
+    def test_vectorized_grouped_auc(self) -> None:
+        torch.manual_seed(0)
+        n_tasks, n_examples = 2, 2000
+        # coarse predictions to exercise ties
+        predictions = torch.randint(0, 20, (n_tasks, n_examples)).float() / 20
+        labels = (torch.rand(n_tasks, n_examples) > 0.5).float()
+        weights = torch.rand(n_tasks, n_examples)
+        grouping_keys = torch.randint(0, 100, (n_examples,)) * 3
+
+        expected_auc = []
+        for task in range(n_tasks):
+            group_aucs = []
+            for group in torch.unique(grouping_keys):
+                mask = grouping_keys == group
+                group_predictions = predictions[task][mask]
+                group_labels = labels[task][mask]
+                group_weights = weights[task][mask]
+                # pairwise definition of AUC, ties count as half a pair
+                pos = group_weights * group_labels
+                neg = group_weights * (1 - group_labels)
+                diff = group_predictions[:, None] - group_predictions[None, :]
+                credit = (diff > 0).float() + 0.5 * (diff == 0).float()
+                num_pairs = pos.sum() * neg.sum()
+                group_aucs.append(
+                    (pos[:, None] * neg[None, :] * credit).sum().view(1) / num_pairs
+                    if num_pairs > 0
+                    else torch.tensor([0.5])
+                )
+            expected_auc.append(torch.cat(group_aucs).mean())
+
+        actual_auc = compute_auc_per_group(
+            n_tasks, [predictions], [labels], [weights], grouping_keys
+        )
+        torch.testing.assert_close(
+            actual_auc, torch.stack(expected_auc), atol=1e-4, rtol=1e-4
+        )
+
+    def test_vectorized_grouped_auc_many_groups(self) -> None:
+        torch.manual_seed(0)
+        n_examples, n_groups = 1_000_000, 100_000
+        predictions = torch.rand(1, n_examples)
+        labels = (torch.rand(1, n_examples) < predictions).float()
+        weights = torch.ones(1, n_examples)
+        grouping_keys = torch.randint(0, n_groups, (n_examples,))
+
+        actual_auc = compute_auc_per_group(
+            1, [predictions], [labels], [weights], grouping_keys
+        )
+        self.assertEqual(actual_auc.size(), (1,))
+        self.assertGreater(actual_auc.item(), 0.5)
+        self.assertLess(actual_auc.item(), 1.0)
+
     def test_required_input_for_grouped_auc(self) -> None:
         auc = AUCMetric(
             world_size=1,
@@ -460,3 +517,127 @@ class GroupedAUCValueTest(unittest.TestCase):
         )
 
         self.assertIn("grouping_keys", auc.get_required_inputs())
+
+
+class HistogramAUCValueTest(unittest.TestCase):
+    r"""This set of tests verify that the histogram based AUC stays within its
+    error bound of the exact AUC and that its memory does not grow with the
+    number of examples.
+    """
+
+    def _get_auc(
+        self, window_size: int = 100000, **kwargs: Union[int, bool]
+    ) -> AUCMetric:
+        return AUCMetric(
+            world_size=1,
+            my_rank=0,
+            batch_size=1000,
+            window_size=window_size,
+            tasks=[DefaultTaskInfo],
+            # pyre-ignore
+            **kwargs,
+        )
+
+    def _get_histogram(self, auc: AUCMetric) -> torch.Tensor:
+        # pyre-ignore[29]
+        return auc._metrics_computations[0].get_window_state("histogram")
+
+    def _update(
+        self, auc: AUCMetric, num_batches: int, scale: float = 1.0
+    ) -> List[torch.Tensor]:
+        predictions, labels, weights = [], [], []
+        for _ in range(num_batches):
+            # skewed predictions, correlated with labels
+            prediction = torch.rand(1000) ** 3 * scale
+            label = (torch.rand(1000) < prediction / scale).float()
+            weight = torch.rand(1000)
+            auc.update(
+                predictions={"DefaultTask": prediction},
+                labels={"DefaultTask": label},
+                weights={"DefaultTask": weight},
+            )
+            predictions.append(prediction)
+            labels.append(label)
+            weights.append(weight)
+        return [torch.cat(predictions), torch.cat(labels), torch.cat(weights)]
+
+    def test_histogram_auc_error_bound(self) -> None:
+        torch.manual_seed(0)
+        for adaptive_bins in [False, True]:
+            auc = self._get_auc(num_bins=1000, adaptive_bins=adaptive_bins)
+            predictions, labels, weights = self._update(auc, num_batches=20)
+
+            expected_auc = compute_auc(predictions, labels, weights)
+            actual_auc = auc.compute()["auc-DefaultTask|window_auc"]
+            histogram = self._get_histogram(auc)
+            error_bound = compute_auc_histogram_error_bound(histogram)
+
+            self.assertLessEqual(
+                (actual_auc - expected_auc).abs().item(), error_bound.item() + 1e-6
+            )
+            torch.testing.assert_close(
+                actual_auc, expected_auc.view(1), atol=1e-3, rtol=0, check_dtype=False
+            )
+
+    def test_histogram_auc_adaptive_bins_tighter(self) -> None:
+        torch.manual_seed(0)
+        bounds = []
+        for adaptive_bins in [False, True]:
+            auc = self._get_auc(num_bins=50, adaptive_bins=adaptive_bins)
+            # predictions concentrated in the first two uniform bins
+            self._update(auc, num_batches=5, scale=0.04)
+            auc.compute()
+            histogram = self._get_histogram(auc)
+            bounds.append(compute_auc_histogram_error_bound(histogram).item())
+        self.assertLess(bounds[1], 0.2 * bounds[0])
+
+    def test_histogram_auc_adaptive_bins_deferred(self) -> None:
+        torch.manual_seed(0)
+        auc = self._get_auc(num_bins=50, adaptive_bins=True)
+        predictions, labels, weights = self._update(auc, num_batches=2)
+        # the edges are agreed at compute time, not on the first update
+        computation = auc._metrics_computations[0]
+        self.assertFalse(bool(computation.bin_edges_initialized))
+        self.assertEqual(self._get_histogram(auc).sum().item(), 0)
+
+        actual_auc = auc.compute()["auc-DefaultTask|window_auc"]
+        self.assertTrue(bool(computation.bin_edges_initialized))
+        torch.testing.assert_close(
+            self._get_histogram(auc).sum(dim=-1),
+            torch.stack(
+                [(labels * weights).sum(), ((1 - labels) * weights).sum()]
+            ).view(1, 2),
+            check_dtype=False,
+        )
+        torch.testing.assert_close(
+            actual_auc,
+            compute_auc(predictions, labels, weights).view(1),
+            atol=1e-2,
+            rtol=0,
+            check_dtype=False,
+        )
+
+    def test_histogram_auc_memory(self) -> None:
+        torch.manual_seed(0)
+        # window of a single batch, so the window buffer holds a single histogram
+        auc = self._get_auc(window_size=1000, num_bins=100)
+        self._update(auc, num_batches=1)
+        memory_usage = sum(auc.get_memory_usage().values())
+        self._update(auc, num_batches=10)
+        self.assertEqual(sum(auc.get_memory_usage().values()), memory_usage)
+
+    def test_compute_histogram(self) -> None:
+        histogram = compute_histogram(
+            predictions=torch.tensor([[0.1, 0.4, 0.6, 0.9]]),
+            labels=torch.tensor([[0.0, 1.0, 0.0, 1.0]]),
+            weights=torch.tensor([[1.0, 2.0, 3.0, 4.0]]),
+            bin_edges=torch.tensor([[0.5]]),
+        )
+        torch.testing.assert_close(
+            histogram,
+            torch.tensor([[[2.0, 4.0], [1.0, 3.0]]], dtype=torch.double),
+        )
+
+    def test_misconfigured_histogram_auc(self) -> None:
+        with self.assertRaises(RecMetricException):
+            self._get_auc(num_bins=100, grouped_auc=True)
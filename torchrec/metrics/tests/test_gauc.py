@@ -12,7 +12,12 @@ import unittest
 from typing import Dict
 
 import torch
-from torchrec.metrics.gauc import compute_gauc_3d, compute_window_auc, GAUCMetric
+from torchrec.metrics.gauc import (
+    compute_gauc_3d,
+    compute_gauc_jagged,
+    compute_window_auc,
+    GAUCMetric,
+)
 from torchrec.metrics.metrics_config import DefaultTaskInfo
 from torchrec.metrics.test_utils import TestMetric
 
@@ -225,3 +230,22 @@ class GAUCMetricValueTest(unittest.TestCase):
                     actual_gauc, expected_gauc
                 )
             )
+
+    def test_gauc_jagged_matches_3d(self) -> None:
+        torch.manual_seed(0)
+        n_task, n_group, n_sample = 2, 1000, 8
+        # distinct non-zero predictions, 3d version treats zeros as padding
+        predictions = torch.rand(n_task, n_group, n_sample) + 0.01
+        labels = (torch.rand(n_task, n_group, n_sample) > 0.5).float()
+        num_candidates = torch.full((n_group,), n_sample)
+
+        expected = compute_gauc_3d(predictions, labels, num_candidates)
+        actual = compute_gauc_jagged(
+            predictions.view(n_task, -1), labels.view(n_task, -1), num_candidates
+        )
+        torch.testing.assert_close(
+            actual["auc_sum"], expected["auc_sum"], check_dtype=False
+        )
+        torch.testing.assert_close(
+            actual["num_samples"], expected["num_samples"], check_dtype=False
+        )
@@ -36,9 +36,14 @@ from torchrec.metrics.metrics_config import (
     RecMetricEnum,
 )
 from torchrec.metrics.model_utils import parse_task_model_outputs
-from torchrec.metrics.rec_metric import RecMetricList, RecTaskInfo
+from torchrec.metrics.rec_metric import (
+    fused_sync_computations,
+    RecMetricList,
+    RecTaskInfo,
+)
 from torchrec.metrics.test_utils import gen_test_batch, get_launch_config
 from torchrec.metrics.throughput import ThroughputMetric
+from torchrec.metrics.tower_qps import TowerQPSMetricComputation
 
 METRIC_MODULE_PATH = "torchrec.metrics.metric_module"
 
@@ -506,6 +511,59 @@ class MetricModuleTest(unittest.TestCase):
         metric_module.trained_batches = metric_module.compute_interval_steps
         self.assertTrue(metric_module.should_compute())
 
+    def test_async_compute(self) -> None:
+        config = dataclasses.replace(
+            DefaultMetricsConfig, throughput_metric=None, async_compute=True
+        )
+        metric_module = generate_metric_module(
+            TestMetricModule,
+            metrics_config=config,
+            batch_size=128,
+            world_size=1,
+            my_rank=0,
+            state_metrics_mapping={},
+            device=torch.device("cpu"),
+        )
+        sync_metric_module = generate_metric_module(
+            TestMetricModule,
+            metrics_config=dataclasses.replace(config, async_compute=False),
+            batch_size=128,
+            world_size=1,
+            my_rank=0,
+            state_metrics_mapping={},
+            device=torch.device("cpu"),
+        )
+        self.assertTrue(metric_module.async_compute)
+        self.assertFalse(sync_metric_module.async_compute)
+
+        batches = [gen_test_batch(128, seed=seed) for seed in range(2)]
+        metric_module.update(batches[0])
+        sync_metric_module.update(batches[0])
+        # nothing has been computed in the background yet
+        self.assertEqual(metric_module.compute(), {})
+        expected = sync_metric_module.compute()
+
+        # updates after the snapshot do not leak into the previous interval
+        metric_module.update(batches[1])
+        sync_metric_module.update(batches[1])
+        actual = metric_module.compute()
+        self.assertEqual(actual.keys(), expected.keys())
+        for key, value in expected.items():
+            torch.testing.assert_close(actual[key], value)
+
+        expected = sync_metric_module.compute()
+        actual = metric_module.wait_async_compute()
+        self.assertEqual(actual.keys(), expected.keys())
+        for key, value in expected.items():
+            torch.testing.assert_close(actual[key], value)
+
+        # the copy of the RecMetrics is reused, only its states are refreshed
+        snapshot = metric_module._async_snapshot
+        metric_module.compute()
+        self.assertIs(metric_module._async_snapshot, snapshot)
+        metric_module.shutdown()
+        self.assertIsNone(metric_module._async_executor)
+
     @staticmethod
     @patch("torchrec.metrics.metric_module.RecMetricList")
     @patch("torchrec.metrics.metric_module.time")
@@ -672,3 +730,97 @@ class MetricModuleTest(unittest.TestCase):
             min_interval=1.0,
             max_interval=30.0,
         )
+
+    @staticmethod
+    def _run_trainer_fused_state_sync() -> None:
+        world_size = int(os.environ["WORLD_SIZE"])
+        rank = int(os.environ["RANK"])
+        dist.init_process_group(
+            backend="gloo",
+            world_size=world_size,
+            rank=rank,
+        )
+
+        config = dataclasses.replace(
+            DefaultMetricsConfig,
+            rec_metrics={
+                metric: RecMetricDef(
+                    rec_tasks=[DefaultTaskInfo], window_size=_DEFAULT_WINDOW_SIZE
+                )
+                for metric in [
+                    RecMetricEnum.NE,
+                    RecMetricEnum.CALIBRATION,
+                    RecMetricEnum.CTR,
+                    RecMetricEnum.MSE,
+                    RecMetricEnum.AUC,
+                ]
+            },
+            throughput_metric=None,
+            compute_on_all_ranks=True,
+            should_validate_update=True,
+        )
+        metric_modules = [
+            generate_metric_module(
+                TestMetricModule,
+                metrics_config=dataclasses.replace(
+                    config, fused_state_sync=fused_state_sync
+                ),
+                batch_size=128,
+                world_size=world_size,
+                my_rank=rank,
+                state_metrics_mapping={},
+                device=torch.device("cpu"),
+            )
+            for fused_state_sync in [False, True]
+        ]
+        for step in range(3):
+            batch = gen_test_batch(128, seed=rank * 10 + step)
+            for metric_module in metric_modules:
+                metric_module.update(batch)
+
+        expected = metric_modules[0].compute()
+        with patch(
+            "torch.distributed.all_gather", wraps=dist.all_gather
+        ) as all_gather, patch(
+            "torch.distributed.all_reduce", wraps=dist.all_reduce
+        ) as all_reduce:
+            actual = metric_modules[1].compute()
+        tc = unittest.TestCase()
+        # per-state all-gathers are replaced by the fused collectives
+        tc.assertEqual(all_gather.call_count, 0)
+        tc.assertEqual(all_reduce.call_count, 1)
+        tc.assertEqual(actual.keys(), expected.keys())
+        for key, value in expected.items():
+            torch.testing.assert_close(actual[key], value, check_dtype=False)
+
+        # int64 states are not rounded through float64
+        computation = TowerQPSMetricComputation(
+            my_rank=rank,
+            batch_size=128,
+            n_tasks=1,
+            window_size=_DEFAULT_WINDOW_SIZE,
+            warmup_steps=0,
+        )
+        computation.num_examples.fill_(2**53 + 1)
+        fused_sync_computations([computation])
+        tc.assertEqual(computation.num_examples.item(), (2**53 + 1) * world_size)
+        computation.unsync()
+        tc.assertEqual(computation.num_examples.item(), 2**53 + 1)
+
+        # the local states are restored after compute
+        for metrics in zip(*(m.rec_metrics.rec_metrics for m in metric_modules)):
+            for computations in zip(*(m._metrics_computations for m in metrics)):
+                tc.assertFalse(computations[1]._is_synced)
+                for attr in computations[0]._reductions:
+                    torch.testing.assert_close(
+                        getattr(computations[1], attr),
+                        getattr(computations[0], attr),
+                    )
+        dist.destroy_process_group()
+
+    def test_fused_state_sync(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            lc = get_launch_config(
+                world_size=2, rdzv_endpoint=os.path.join(tmpdir, "rdzv")
+            )
+            pet.elastic_launch(lc, entrypoint=self._run_trainer_fused_state_sync)()
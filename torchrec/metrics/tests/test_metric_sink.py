@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-strict
+
+import os
+import tempfile
+import unittest
+from typing import Dict
+
+import torch
+from torchrec.metrics.metric_module import MetricValue, RecMetricModule, StateMetric
+from torchrec.metrics.metric_sink import LocalFileMetricSink, read_metric_records
+
+
+class MockStateMetric(StateMetric):
+    def get_metrics(self) -> Dict[str, MetricValue]:
+        return {"lr": 0.125}
+
+
+class LocalFileMetricSinkTest(unittest.TestCase):
+    def test_write_and_read(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            sink = LocalFileMetricSink(directory, rank=1, max_records_per_file=3)
+            sink.write(10, {"ne": torch.tensor(0.5), "qps": 100.0})
+            sink.write(
+                20, {"ne": torch.tensor([0.25]), "auc": torch.tensor([0.7, 0.8])}
+            )
+            sink.flush()
+            sink.write(30, {"qps": 200.0})
+            sink.close()
+
+            # 6 records rotated every 3
+            self.assertEqual(len(os.listdir(directory)), 3)
+            records = read_metric_records(directory)
+            self.assertEqual(records["step"].tolist(), [10, 10, 20, 20, 20, 30])
+            self.assertEqual(
+                records["key"].tolist(), ["ne", "qps", "ne", "auc[0]", "auc[1]", "qps"]
+            )
+            # float32 tensor values are not exactly 0.7 and 0.8
+            torch.testing.assert_close(
+                torch.from_numpy(records["value"]),
+                torch.tensor([0.5, 100.0, 0.25, 0.7, 0.8, 200.0]),
+                check_dtype=False,
+            )
+            self.assertTrue((records["rank"] == 1).all())
+            timestamps = records["timestamp"]
+            self.assertTrue((timestamps[1:] >= timestamps[:-1]).all())
+            self.assertEqual(len(read_metric_records(directory, rank=0)["step"]), 0)
+
+    def test_resume_and_max_files(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            sink = LocalFileMetricSink(directory, max_records_per_file=2)
+            sink.write(1, {"a": 1.0, "b": 2.0})
+            sink.close()
+
+            # A new sink keeps the key ids and starts a new file.
+            sink = LocalFileMetricSink(directory, max_records_per_file=2, max_files=2)
+            for step in range(2, 5):
+                sink.write(step, {"b": float(step), "c": -float(step)})
+            sink.close()
+
+            records = read_metric_records(directory)
+            self.assertEqual(records["step"].tolist(), [3, 3, 4, 4])
+            self.assertEqual(records["key"].tolist(), ["b", "c", "b", "c"])
+            self.assertEqual(records["value"].tolist(), [3.0, -3.0, 4.0, -4.0])
+
+    def test_metric_module(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            sink = LocalFileMetricSink(directory)
+            metric_module = RecMetricModule(
+                batch_size=2,
+                world_size=1,
+                state_metrics={"optimizers": MockStateMetric()},
+                metric_sinks=[sink],
+            )
+            metric_module.trained_batches = 7
+            metric_module.compute()
+            metric_module.close_metric_sinks()
+
+            records = read_metric_records(directory)
+            self.assertEqual(records["step"].tolist(), [7])
+            self.assertEqual(records["key"].tolist(), ["optimizers|lr"])
+            self.assertEqual(records["value"].tolist(), [0.125])
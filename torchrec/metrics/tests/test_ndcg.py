@@ -565,3 +565,53 @@ class NDCGMetricValueTest(unittest.TestCase):
             equal_nan=True,
             msg=f"Actual: {actual_metric}, Expected: {expected_metric}",
         )
+
+    def test_sketch_ndcg_across_updates(self) -> None:
+        """
+        The sketch NDCG @ K of sessions spread over several updates matches NDCG
+        @ K of a single update holding all of their examples.
+        """
+        num_examples, num_updates = 200, 4
+        torch.manual_seed(0)
+        predictions = torch.randperm(num_examples).double() / num_examples
+        labels = torch.randint(0, 3, (num_examples,)).double()
+        weights = torch.rand(num_examples, dtype=torch.double)
+        session_ids = torch.randint(0, 20, (num_examples,))
+
+        for exponential_gain in [False, True]:
+            exact_metric = self.generate_metric(
+                world_size=1,
+                my_rank=0,
+                batch_size=num_examples,
+                exponential_gain=exponential_gain,
+                k=3,
+                window_size=1000,
+            )
+            exact_metric.update(
+                predictions={DefaultTaskInfo.name: predictions},
+                labels={DefaultTaskInfo.name: labels},
+                weights={DefaultTaskInfo.name: weights},
+                required_inputs={SESSION_KEY: session_ids},
+            )
+            # 20 session ids do not collide in 1024 slots.
+            sketch_metric = self.generate_metric(
+                world_size=1,
+                my_rank=0,
+                batch_size=num_examples // num_updates,
+                exponential_gain=exponential_gain,
+                k=3,
+                window_size=1000,
+                sketch_num_slots=1024,
+            )
+            for chunk in torch.arange(num_examples).chunk(num_updates):
+                sketch_metric.update(
+                    predictions={DefaultTaskInfo.name: predictions[chunk]},
+                    labels={DefaultTaskInfo.name: labels[chunk]},
+                    weights={DefaultTaskInfo.name: weights[chunk]},
+                    required_inputs={SESSION_KEY: session_ids[chunk]},
+                )
+
+            key = f"ndcg-{DefaultTaskInfo.name}|lifetime_ndcg"
+            torch.testing.assert_close(
+                sketch_metric.compute()[key], exact_metric.compute()[key]
+            )
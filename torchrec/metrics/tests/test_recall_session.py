@@ -301,3 +301,78 @@ class RecallSessionValueTest(unittest.TestCase):
         self.assertTrue(
             recall_metric._metrics_computations[1].run_ranking_of_labels is False
         )
+
+    @no_grad()
+    def test_sketch_recall_session_across_updates(self) -> None:
+        num_examples, num_updates = 200, 4
+        torch.manual_seed(0)
+        predictions = (torch.randperm(num_examples).double() / num_examples).view(1, -1)
+        labels = torch.randint(0, 2, (1, num_examples)).double()
+        weights = torch.rand(1, num_examples, dtype=torch.double)
+        session = torch.randint(0, 20, (1, num_examples))
+
+        def task_info(sketch_num_slots: Optional[int]) -> RecTaskInfo:
+            return RecTaskInfo(
+                name="Task",
+                session_metric_def=SessionMetricDef(
+                    session_var_name="session",
+                    top_threshold=3,
+                    sketch_num_slots=sketch_num_slots,
+                ),
+            )
+
+        # Sessions ranked within a single batch holding all of their examples.
+        exact_metric = RecallSessionMetric(
+            world_size=1,
+            my_rank=0,
+            batch_size=num_examples,
+            tasks=[task_info(None)],
+            window_size=1000,
+        )
+        exact_metric.update(
+            predictions={"Task": predictions[0]},
+            labels={"Task": labels[0]},
+            weights={"Task": weights[0]},
+            required_inputs={"session": session},
+        )
+
+        # The sketch tracks the sessions across updates; 20 session ids do not
+        # collide in 1024 slots.
+        sketch_metric = RecallSessionMetric(
+            world_size=1,
+            my_rank=0,
+            batch_size=num_examples // num_updates,
+            tasks=[task_info(1024)],
+            window_size=1000,
+        )
+        for chunk in torch.arange(num_examples).chunk(num_updates):
+            sketch_metric.update(
+                predictions={"Task": predictions[0, chunk]},
+                labels={"Task": labels[0, chunk]},
+                weights={"Task": weights[0, chunk]},
+                required_inputs={"session": session[:, chunk]},
+            )
+
+        key = "recall_session_level-Task|lifetime_recall_session_level"
+        torch.testing.assert_close(
+            sketch_metric.compute()[key], exact_metric.compute()[key]
+        )
+
+        with self.assertRaisesRegex(RecMetricException, "run_ranking_of_labels"):
+            RecallSessionMetric(
+                world_size=1,
+                my_rank=0,
+                batch_size=num_examples,
+                tasks=[
+                    RecTaskInfo(
+                        name="Task",
+                        session_metric_def=SessionMetricDef(
+                            session_var_name="session",
+                            top_threshold=3,
+                            run_ranking_of_labels=True,
+                            sketch_num_slots=1024,
+                        ),
+                    )
+                ],
+                window_size=1000,
+            )
@@ -8,13 +8,16 @@
 # pyre-strict
 
 import unittest
+from collections import deque
 
 import torch
+from torchrec.metrics.auc import AUCMetric
+from torchrec.metrics.calibration import CalibrationMetric
 from torchrec.metrics.metrics_config import DefaultTaskInfo, RecTaskInfo
 from torchrec.metrics.model_utils import parse_task_model_outputs
 from torchrec.metrics.mse import MSEMetric
 from torchrec.metrics.ne import NEMetric
-from torchrec.metrics.rec_metric import RecComputeMode, RecMetric
+from torchrec.metrics.rec_metric import RecComputeMode, RecMetric, WindowBuffer
 from torchrec.metrics.test_utils import gen_test_batch, gen_test_tasks
 
 
@@ -268,6 +271,84 @@ class RecMetricTest(unittest.TestCase):
         window_buffer = ne._batch_window_buffers["window_cross_entropy_sum"].buffers
         self.assertEqual(len(window_buffer), 0)
 
+    def test_fused_update_matches_eager(self) -> None:
+        batches = [
+            parse_task_model_outputs(
+                [DefaultTaskInfo], gen_test_batch(batch_size, seed=i)
+            )[:3]
+            for i, batch_size in enumerate([128, 128, 64, 128, 128, 128, 128])
+        ]
+        for metric_class in [NEMetric, AUCMetric, CalibrationMetric]:
+            metrics = [
+                metric_class(
+                    world_size=1,
+                    my_rank=0,
+                    batch_size=128,
+                    tasks=[DefaultTaskInfo],
+                    compute_mode=RecComputeMode.UNFUSED_TASKS_COMPUTATION,
+                    window_size=10000,
+                    fused_update_limit=fused_update_limit,
+                )
+                for fused_update_limit in [0, 3]
+            ]
+            # compute() folds the partially staged updates in.
+            for updates in [batches[:4], batches[4:]]:
+                for labels, predictions, weights in updates:
+                    for metric in metrics:
+                        metric.update(
+                            predictions=predictions, labels=labels, weights=weights
+                        )
+                eager, deferred = (metric.compute() for metric in metrics)
+                self.assertEqual(eager.keys(), deferred.keys())
+                for key, value in eager.items():
+                    torch.testing.assert_close(deferred[key], value)
+
+    def test_window_buffer(self) -> None:
+        max_size, max_buffer_count = 100, 8
+        window_buffer = WindowBuffer(max_size, max_buffer_count)
+        window_state = torch.zeros(2, 3, dtype=torch.double)
+        # reference: sum of the newest states fitting in max_size and
+        # max_buffer_count
+        reference = deque()
+        storage = None
+        max_entries = 0
+        generator = torch.Generator().manual_seed(0)
+        for step in range(200):
+            size = int(torch.randint(1, 20, (1,), generator=generator))
+            state = torch.rand(2, 3, dtype=torch.double, generator=generator)
+            window_buffer.aggregate_state(window_state, state, size)
+
+            reference.append((state, size))
+            while len(reference) > max_buffer_count or (
+                sum(s for _, s in reference) > max_size
+            ):
+                reference.popleft()
+
+            max_entries = max(max_entries, len(reference))
+
+            expected = torch.stack([t for t, _ in reference]).sum(dim=0)
+            torch.testing.assert_close(window_state, expected)
+            self.assertEqual(len(window_buffer.buffers), len(reference))
+            for buffer, (t, _) in zip(window_buffer.buffers, reference):
+                torch.testing.assert_close(buffer, t)
+
+            # capacity is bounded and no reallocation happens once it is reached
+            buffer_storage = window_buffer.storage
+            assert buffer_storage is not None
+            self.assertLessEqual(buffer_storage.size(0), 2 * max_entries)
+            self.assertLessEqual(buffer_storage.size(0), max_buffer_count)
+            if step > 100:
+                self.assertEqual(buffer_storage.data_ptr(), storage)
+            storage = buffer_storage.data_ptr()
+
+        # the oldest update is evicted before the storage grows
+        window_buffer = WindowBuffer(max_size, max_buffer_count)
+        for _ in range(3):
+            window_buffer.aggregate_state(window_state, state, max_size)
+        buffer_storage = window_buffer.storage
+        assert buffer_storage is not None
+        self.assertEqual(buffer_storage.size(0), 1)
+
     @unittest.skipIf(_CUDA_UNAVAILABLE, "Test needs to run on GPU")
     def test_parse_task_model_outputs_ndcg(self) -> None:
         _, _, _, required_inputs = parse_task_model_outputs(
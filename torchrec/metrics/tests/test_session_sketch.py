@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-strict
+
+import unittest
+
+import torch
+from torchrec.metrics.session_sketch import (
+    hash_session_ids,
+    segment_topk,
+    SessionTopKSketch,
+)
+
+
+class SessionSketchTest(unittest.TestCase):
+    def test_segment_topk(self) -> None:
+        torch.manual_seed(0)
+        num_segments, k = 7, 3
+        keys = torch.randperm(100).double()
+        segments = torch.randint(0, num_segments, (100,))
+        # segment 6 is empty
+        segments[segments == 6] = 5
+
+        topk = segment_topk(keys, segments, num_segments, k)
+
+        for segment in range(num_segments):
+            index = torch.nonzero(segments == segment).flatten()
+            expected = index[keys[index].argsort(descending=True)][:k]
+            expected = torch.cat(
+                [expected, torch.full((k - expected.numel(),), -1)]
+            ).long()
+            torch.testing.assert_close(topk[segment], expected)
+
+    def test_hash_session_ids(self) -> None:
+        slots = hash_session_ids(torch.arange(-1000, 1000), 64)
+        self.assertTrue(((slots >= 0) & (slots < 64)).all())
+        # all slots are used
+        self.assertEqual(slots.unique().numel(), 64)
+
+    def test_update(self) -> None:
+        sketch = SessionTopKSketch(
+            num_slots=1024, k=2, num_features=1, aggregate_reductions=["sum", "amax"]
+        )
+        session_ids = torch.tensor([3, 5, 3, 3])
+        items = torch.tensor([[[0.1], [0.2], [0.3], [0.4]]])
+        aggregates = torch.tensor([[[1.0, 0.1], [1.0, 0.2], [1.0, 0.3], [1.0, 0.4]]])
+        old_topk, new_topk, old_aggregates, new_aggregates = sketch.update(
+            session_ids, items, aggregates
+        )
+        inf = float("inf")
+        torch.testing.assert_close(
+            old_topk, torch.full((2, 1, 2, 1), -inf, dtype=torch.double)
+        )
+        torch.testing.assert_close(
+            new_topk,
+            torch.tensor([[[[0.4], [0.3]]], [[[0.2], [-inf]]]], dtype=torch.double),
+        )
+        torch.testing.assert_close(
+            new_aggregates,
+            torch.tensor([[[3.0, 0.4]], [[1.0, 0.2]]], dtype=torch.double),
+        )
+
+        # Session 3 continues: its old items compete with the new ones.
+        old_topk, new_topk, old_aggregates, new_aggregates = sketch.update(
+            torch.tensor([3, 3]),
+            torch.tensor([[[0.35], [0.05]]]),
+            torch.tensor([[[1.0, 0.0], [1.0, 0.0]]]),
+        )
+        torch.testing.assert_close(
+            old_topk, torch.tensor([[[[0.4], [0.3]]]], dtype=torch.double)
+        )
+        torch.testing.assert_close(
+            new_topk, torch.tensor([[[[0.4], [0.35]]]], dtype=torch.double)
+        )
+        torch.testing.assert_close(
+            new_aggregates, torch.tensor([[[5.0, 0.4]]], dtype=torch.double)
+        )
+
+        sketch.reset()
+        self.assertTrue((sketch.slot_keys == -1).all())
+
+    def test_slot_collision(self) -> None:
+        # With a single slot, the resident session keeps it and a new session
+        # only takes it over once the resident session is absent.
+        sketch = SessionTopKSketch(
+            num_slots=1, k=2, num_features=1, aggregate_reductions=[]
+        )
+        no_aggregates = torch.zeros(1, 2, 0)
+        sketch.update(
+            torch.tensor([5, 5]), torch.tensor([[[0.1], [0.2]]]), no_aggregates
+        )
+        _, new_topk, _, _ = sketch.update(
+            torch.tensor([5, 7]), torch.tensor([[[0.3], [0.4]]]), no_aggregates
+        )
+        self.assertEqual(sketch.slot_keys.tolist(), [5])
+        torch.testing.assert_close(
+            new_topk,
+            torch.tensor(
+                [[[[0.3], [0.2]]], [[[0.4], [float("-inf")]]]], dtype=torch.double
+            ),
+        )
+
+        old_topk, _, _, _ = sketch.update(
+            torch.tensor([7]), torch.tensor([[[0.5]]]), torch.zeros(1, 1, 0)
+        )
+        # Session 7 lost its first item when it was not resident.
+        self.assertTrue((old_topk == float("-inf")).all())
+        self.assertEqual(sketch.slot_keys.tolist(), [7])
@@ -10,6 +10,7 @@
 # pyre-ignore-all-errors[56]
 
 import unittest
+from typing import List, Optional
 from unittest.mock import Mock, patch
 
 import torch
@@ -211,3 +212,69 @@ class ThroughputMetricTest(unittest.TestCase):
                 "throughput-throughput|attempt_examples": total_examples,
             },
         )
+
+    @patch(THROUGHPUT_PATH + ".time.monotonic")
+    def test_stage_and_step_times(self, time_mock: Mock) -> None:
+        throughput_metric = ThroughputMetric(
+            batch_size=self.batch_size,
+            world_size=self.world_size,
+            window_seconds=100,
+            warmup_steps=2,
+        )
+        # The stage times of the warmup batches are ignored.
+        for ts in [1, 2]:
+            throughput_metric.record_stage_time("forward", 100.0)
+            time_mock.return_value = ts
+            throughput_metric.update()
+        for ts, forward in [(4, 0.5), (8, 1.5)]:
+            throughput_metric.record_stage_time("forward", forward)
+            time_mock.return_value = ts
+            throughput_metric.update()
+
+        ret = throughput_metric.compute()
+        self.assertEqual(ret["throughput-throughput|step_time_ms"], 3000.0)
+        self.assertEqual(ret["throughput-throughput|stage_time_ms_forward"], 1000.0)
+        self.assertNotIn("throughput-throughput|straggler_ratio", ret)
+
+        # Step and stage times are reset on compute.
+        ret = throughput_metric.compute()
+        self.assertNotIn("throughput-throughput|step_time_ms", ret)
+        self.assertNotIn("throughput-throughput|stage_time_ms_forward", ret)
+
+    @patch(THROUGHPUT_PATH + ".dist")
+    @patch(THROUGHPUT_PATH + ".time.monotonic")
+    def test_per_rank_step_time(self, time_mock: Mock, dist_mock: Mock) -> None:
+        other_ranks_step_times = [2.0, 8.0, float("nan")]
+
+        def all_gather(
+            step_times: List[torch.Tensor],
+            local_step_time: torch.Tensor,
+            group: Optional[object],
+        ) -> None:
+            step_times[0].copy_(local_step_time)
+            for step_time, other in zip(step_times[1:], other_ranks_step_times):
+                step_time.fill_(other)
+
+        dist_mock.is_initialized.return_value = True
+        dist_mock.get_world_size.return_value = 4
+        dist_mock.all_gather.side_effect = all_gather
+        throughput_metric = ThroughputMetric(
+            batch_size=self.batch_size,
+            world_size=4,
+            window_seconds=100,
+            warmup_steps=1,
+            per_rank_step_time=True,
+        )
+        for ts in [0, 4, 8]:
+            time_mock.return_value = ts
+            throughput_metric.update()
+
+        ret = throughput_metric.compute()
+        self.assertEqual(ret["throughput-throughput|step_time_ms"], 4000.0)
+        self.assertEqual(ret["throughput-throughput|slowest_rank"], 2)
+        self.assertEqual(
+            ret["throughput-throughput|slowest_rank_throughput"],
+            self.batch_size * 4 / 8.0,
+        )
+        # median of [4, 2, 8], the rank without steps is ignored
+        self.assertEqual(ret["throughput-throughput|straggler_ratio"], 2.0)
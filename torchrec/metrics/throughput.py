@@ -14,9 +14,11 @@ import logging
 import math
 import time
 from collections import deque
-from typing import Deque, Dict, List, Optional
+from contextlib import contextmanager
+from typing import Deque, Dict, Generator, List, Optional
 
 import torch
+import torch.distributed as dist
 import torch.nn as nn
 from torchrec.distributed.utils import none_throws
 from torchrec.metrics.metrics_config import BatchSizeStage
@@ -45,6 +47,19 @@ class ThroughputMetric(nn.Module):
                               argument specify the window size in seconds.
         warmup_steps (int): the number of warmup batches. No Throughput will be calculated
                             before the warmup batches count reached.
+        batch_size_stages (Optional[List[BatchSizeStage]]): the variable batch size
+                            schedule, in local batch sizes.
+        per_rank_step_time (bool): whether compute() gathers the mean step time of
+                            every rank since the previous compute() to report the
+                            slowest rank, the throughput at its pace and the straggler
+                            ratio (slowest / median step time). compute() must then be
+                            called by all ranks of `process_group`.
+        process_group (Optional[ProcessGroup]): the process group of the step time
+                            gather, the default one if not specified.
+
+    Pipeline stages can report their duration with `record_stage_time()` or
+    `stage_timer()`; compute() returns the mean duration of each stage since the
+    previous compute(), warmup batches excluded.
 
     Call Args:
         Not supported.
@@ -75,6 +90,10 @@ class ThroughputMetric(nn.Module):
     _total_examples_key: str
     _attempt_examples_key: str
     _steps: int
+    _interval_time_lapse: float
+    _interval_steps: int
+    _stage_time_lapse: Dict[str, float]
+    _stage_counts: Dict[str, int]
 
     def __init__(
         self,
@@ -84,6 +103,8 @@ class ThroughputMetric(nn.Module):
         window_seconds: int,
         warmup_steps: int = 100,
         batch_size_stages: Optional[List[BatchSizeStage]] = None,
+        per_rank_step_time: bool = False,
+        process_group: Optional[dist.ProcessGroup] = None,
     ) -> None:
         super().__init__()
         if window_seconds < 1:
@@ -110,6 +131,8 @@ class ThroughputMetric(nn.Module):
         self._batch_size_stages: Optional[List[BatchSizeStage]] = copy.deepcopy(
             batch_size_stages
         )
+        self._per_rank_step_time = per_rank_step_time
+        self._process_group = process_group
 
         self.register_buffer("total_examples", torch.tensor(0, dtype=torch.long))
         self.register_buffer("warmup_examples", torch.tensor(0, dtype=torch.long))
@@ -167,7 +190,32 @@ class ThroughputMetric(nn.Module):
             str(self._namespace),
             MetricName.ATTEMPT_EXAMPLES,
         )
+        self._step_time_key = compose_metric_key(
+            self._namespace,
+            str(self._namespace),
+            MetricName.STEP_TIME_MS,
+        )
+        self._slowest_rank_key = compose_metric_key(
+            self._namespace,
+            str(self._namespace),
+            MetricName.SLOWEST_RANK,
+        )
+        self._slowest_rank_throughput_key = compose_metric_key(
+            self._namespace,
+            str(self._namespace),
+            MetricName.SLOWEST_RANK_THROUGHPUT,
+        )
+        self._straggler_ratio_key = compose_metric_key(
+            self._namespace,
+            str(self._namespace),
+            MetricName.STRAGGLER_RATIO,
+        )
         self._steps = 0
+        # Since the previous compute(), after warmup.
+        self._interval_time_lapse = 0.0
+        self._interval_steps = 0
+        self._stage_time_lapse = {}
+        self._stage_counts = {}
 
     def _get_batch_size(self) -> int:
         # No batch size stages, use the default batch size
@@ -220,6 +268,86 @@ class ThroughputMetric(nn.Module):
             self._window_time_lapse_buffer.append(time_lapse)
             self._check_window()
             self._previous_ts = ts
+            self._interval_time_lapse += time_lapse
+            self._interval_steps += 1
+
+    def record_stage_time(self, stage: str, seconds: float) -> None:
+        """
+        Records the duration of a pipeline stage (e.g. "data_loading", "forward")
+        of the current batch, i.e. the one of the next update() call.
+        """
+        if self._steps < self._warmup_steps:
+            return
+        self._stage_time_lapse[stage] = self._stage_time_lapse.get(stage, 0.0) + seconds
+        self._stage_counts[stage] = self._stage_counts.get(stage, 0) + 1
+
+    @contextmanager
+    def stage_timer(self, stage: str) -> Generator[None, None, None]:
+        """
+        Records the duration of the body as a `stage` time, see
+        `record_stage_time()`. Asynchronous device work is not waited for.
+        """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record_stage_time(stage, time.monotonic() - start)
+
+    def _gather_step_times(self, step_time: float) -> torch.Tensor:
+        local_step_time = torch.tensor(
+            [step_time], dtype=torch.double, device=self.total_examples.device
+        )
+        if not dist.is_initialized():
+            return local_step_time
+        world_size = dist.get_world_size(self._process_group)
+        if world_size == 1:
+            return local_step_time
+        step_times = [torch.empty_like(local_step_time) for _ in range(world_size)]
+        dist.all_gather(step_times, local_step_time, group=self._process_group)
+        return torch.cat(step_times)
+
+    def _compute_stragglers(self, step_time: float) -> Dict[str, torch.Tensor]:
+        # NaN marks the ranks without steps since the previous compute().
+        step_times = self._gather_step_times(step_time).cpu()
+        reported = ~torch.isnan(step_times)
+        if not reported.any():
+            return {}
+        max_step_time, slowest_rank = torch.where(reported, step_times, -1.0).max(dim=0)
+        median_step_time = step_times[reported].median()
+        if math.isclose(max_step_time.item(), 0):
+            return {}
+        return {
+            self._slowest_rank_key: slowest_rank,
+            self._slowest_rank_throughput_key: self._batch_examples() / max_step_time,
+            self._straggler_ratio_key: max_step_time / median_step_time,
+        }
+
+    def _compute_interval(self) -> Dict[str, torch.Tensor]:
+        ret = {
+            compose_metric_key(
+                self._namespace,
+                str(self._namespace),
+                MetricName.STAGE_TIME_MS,
+                description="_" + stage,
+            ): torch.tensor(
+                1000 * time_lapse / self._stage_counts[stage], dtype=torch.double
+            )
+            for stage, time_lapse in self._stage_time_lapse.items()
+        }
+        step_time = float("nan")
+        if self._interval_steps > 0:
+            step_time = self._interval_time_lapse / self._interval_steps
+            ret[self._step_time_key] = torch.tensor(
+                1000 * step_time, dtype=torch.double
+            )
+        if self._per_rank_step_time:
+            ret.update(self._compute_stragglers(step_time))
+
+        self._interval_time_lapse = 0.0
+        self._interval_steps = 0
+        self._stage_time_lapse.clear()
+        self._stage_counts.clear()
+        return ret
 
     def compute(self) -> Dict[str, torch.Tensor]:
         ret = {
@@ -258,4 +386,5 @@ class ThroughputMetric(nn.Module):
                         self._attempt_throughput_key: attempt_throughput.clone().detach(),
                     }
                 )
+        ret.update(self._compute_interval())
         return ret
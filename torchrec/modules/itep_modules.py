@@ -7,6 +7,7 @@
 
 # pyre-strict
 
+import bisect
 import logging
 from typing import Dict, List, Optional, Tuple
 
@@ -41,6 +42,15 @@ class GenericITEPModule(nn.Module):
             `None`.
         enable_pruning (Optional[bool]): Enable pruning or not. Defaults to `True`.
         pruning_interval (Optional[int]): Pruning interval. Defaults to `1001`.
+        pruning_num_steps (int): Number of training steps a pruning round is spread
+            over. The tables are split into this many groups of contiguous buffers of
+            similar size, and one group is pruned per step so that no single step
+            stalls on pruning all the tables. A round starting before the previous
+            one completed is skipped. Defaults to `1`.
+        log_eviction_stats (bool): Log the eviction ratio of each table after each
+            pruning step, which synchronizes with the device. The number of pruned
+            rows of each table is always counted on device, see
+            `get_itep_eviction_stats`. Defaults to `True`.
 
     NOTE:
         The `lookups` argument is optional and is used in the sharded case. If not
@@ -63,6 +73,8 @@ class GenericITEPModule(nn.Module):
         lookups: Optional[List[nn.Module]] = None,
         enable_pruning: bool = True,
         pruning_interval: int = 1001,  # Default pruning interval 1001 iterations
+        pruning_num_steps: int = 1,
+        log_eviction_stats: bool = True,
     ) -> None:
 
         super(GenericITEPModule, self).__init__()
@@ -70,6 +82,8 @@ class GenericITEPModule(nn.Module):
         # Construct in-training embedding pruning args
         self.enable_pruning: bool = enable_pruning
         self.pruning_interval: int = pruning_interval
+        self.pruning_num_steps: int = pruning_num_steps
+        self.log_eviction_stats: bool = log_eviction_stats
         self.lookups: Optional[List[nn.Module]] = lookups
         self.table_name_to_unpruned_hash_sizes: Dict[str, int] = (
             table_name_to_unpruned_hash_sizes
@@ -82,6 +96,19 @@ class GenericITEPModule(nn.Module):
         self.idx_to_table_name: Dict[int, str] = {}
         # Prevent multi-pruning, after moving iteration counter to outside.
         self.last_pruned_iter = -1
+        # [start, end) buffer indices of the tables pruned at each step of a round
+        self.pruning_groups: List[Tuple[int, int]] = []
+        # Next group to prune of the current round, and iteration it was last pruned
+        self._next_pruning_group: int = 0
+        self._last_pruning_step_iter: int = -1
+        # Number of rows pruned from each buffer, counted on device
+        self.pruned_rows_per_table: torch.Tensor = torch.zeros(0, dtype=torch.int64)
+        # (emb module, logical table ids, buffer ids) of the pruned tables
+        self._reset_plan: Optional[List[Tuple[nn.Module, List[int], List[int]]]] = None
+        # Buffer indices and positions of the pruned features, keyed by KJT keys
+        self._remap_info_cache: Dict[
+            Tuple[str, ...], Tuple[torch.Tensor, List[int]]
+        ] = {}
 
         if self.lookups is not None:
             self.init_itep_state()
@@ -98,18 +125,17 @@ class GenericITEPModule(nn.Module):
     ) -> None:
         table_name_to_eviction_ratio = {}
 
-        num_buffers = len(self.buffer_offsets_list) - 1
-        for buffer_idx in range(num_buffers):
-            pruned_start = pruned_indices_offsets[buffer_idx]
-            pruned_end = pruned_indices_offsets[buffer_idx + 1]
-            pruned_length = pruned_end - pruned_start
-
+        # Single device to host copy of the pruned lengths of all the buffers
+        pruned_lengths = (
+            (pruned_indices_offsets[1:] - pruned_indices_offsets[:-1]).cpu().tolist()
+        )
+        for buffer_idx, pruned_length in enumerate(pruned_lengths):
             if pruned_length > 0:
                 start = self.buffer_offsets_list[buffer_idx]
                 end = self.buffer_offsets_list[buffer_idx + 1]
                 buffer_length = end - start
                 assert buffer_length > 0
-                eviction_ratio = pruned_length.item() / buffer_length
+                eviction_ratio = pruned_length / buffer_length
                 table_name_to_eviction_ratio[self.idx_to_table_name[buffer_idx]] = (
                     eviction_ratio
                 )
@@ -135,6 +161,18 @@ class GenericITEPModule(nn.Module):
             f"Performed ITEP in iter {cur_iter}, evicted {pruned_indices_total_length} ({pruned_indices_ratio:%}) indices."
         )
 
+    def get_itep_eviction_stats(self) -> Dict[str, int]:
+        """
+        Returns the number of rows pruned from each table since the module was
+        created. Synchronizes with the device.
+        """
+        return {
+            self.idx_to_table_name[buffer_idx]: num_pruned_rows
+            for buffer_idx, num_pruned_rows in enumerate(
+                self.pruned_rows_per_table.tolist()
+            )
+        }
+
     def get_table_hash_sizes(self, table: ShardedEmbeddingTable) -> Tuple[int, int]:
         unpruned_hash_size = table.num_embeddings
 
@@ -264,6 +302,10 @@ class GenericITEPModule(nn.Module):
             self.current_device = torch.device("cuda")
 
         self.buffer_offsets_list = buffer_offsets
+        self.pruning_groups = self.get_pruning_groups(buffer_offsets)
+        self.pruned_rows_per_table = torch.zeros(
+            len(table_names), dtype=torch.int64, device=self.current_device
+        )
 
         # Create buffers for address_lookup and row_util
         self.create_itep_buffers(
@@ -284,12 +326,29 @@ class GenericITEPModule(nn.Module):
             self.emb_sizes,
         )
 
-    def reset_weight_momentum(
-        self,
-        pruned_indices: torch.Tensor,
-        pruned_indices_offsets: torch.Tensor,
-    ) -> None:
-        if self.lookups is not None:
+    def get_pruning_groups(self, buffer_offsets: List[int]) -> List[Tuple[int, int]]:
+        """
+        Splits the buffers into `pruning_num_steps` groups of contiguous buffers of
+        similar total size, returned as [start, end) buffer indices.
+        """
+        num_buffers = len(buffer_offsets) - 1
+        num_groups = max(1, min(self.pruning_num_steps, num_buffers))
+        bounds = [0]
+        for k in range(1, num_groups):
+            target = buffer_offsets[-1] * k / num_groups
+            # Each group takes at least one buffer and leaves one to the next ones
+            bound = bisect.bisect_left(buffer_offsets, target, lo=bounds[-1] + 1)
+            bounds.append(min(bound, num_buffers - (num_groups - k)))
+        bounds.append(num_buffers)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def get_reset_plan(self) -> List[Tuple[nn.Module, List[int], List[int]]]:
+        """
+        Returns the logical table ids and buffer ids of the pruned tables of each
+        emb module, computed once from the lookups.
+        """
+        if self._reset_plan is None:
+            reset_plan = []
             # pyre-ignore
             for lookup in self.lookups:
                 while isinstance(lookup, DistributedDataParallel):
@@ -305,28 +364,49 @@ class GenericITEPModule(nn.Module):
                     for table in emb_tables:
                         name = table.name
                         if name in self.table_name_to_idx:
-                            buffer_idx = self.table_name_to_idx[name]
-                            start = pruned_indices_offsets[buffer_idx]
-                            end = pruned_indices_offsets[buffer_idx + 1]
-                            length = end - start
-                            if length > 0:
-                                logical_table_ids.append(logical_idx)
-                                buffer_ids.append(buffer_idx)
+                            logical_table_ids.append(logical_idx)
+                            buffer_ids.append(self.table_name_to_idx[name])
                         logical_idx += table.num_features()
-
                     if len(logical_table_ids) > 0:
-                        emb.emb_module.reset_embedding_weight_momentum(
-                            pruned_indices,
-                            pruned_indices_offsets,
-                            torch.tensor(
-                                logical_table_ids,
-                                dtype=torch.int32,
-                                requires_grad=False,
-                            ),
-                            torch.tensor(
-                                buffer_ids, dtype=torch.int32, requires_grad=False
-                            ),
-                        )
+                        reset_plan.append((emb, logical_table_ids, buffer_ids))
+            self._reset_plan = reset_plan
+        return self._reset_plan
+
+    def reset_weight_momentum(
+        self,
+        pruned_indices: torch.Tensor,
+        pruned_indices_offsets: torch.Tensor,
+    ) -> None:
+        if self.lookups is not None:
+            # Single device to host copy of the pruned lengths of all the buffers
+            pruned_lengths = (
+                (pruned_indices_offsets[1:] - pruned_indices_offsets[:-1])
+                .cpu()
+                .tolist()
+            )
+            for emb, all_logical_table_ids, all_buffer_ids in self.get_reset_plan():
+                logical_table_ids = []
+                buffer_ids = []
+                for logical_idx, buffer_idx in zip(
+                    all_logical_table_ids, all_buffer_ids
+                ):
+                    if pruned_lengths[buffer_idx] > 0:
+                        logical_table_ids.append(logical_idx)
+                        buffer_ids.append(buffer_idx)
+
+                if len(logical_table_ids) > 0:
+                    emb.emb_module.reset_embedding_weight_momentum(
+                        pruned_indices,
+                        pruned_indices_offsets,
+                        torch.tensor(
+                            logical_table_ids,
+                            dtype=torch.int32,
+                            requires_grad=False,
+                        ),
+                        torch.tensor(
+                            buffer_ids, dtype=torch.int32, requires_grad=False
+                        ),
+                    )
 
     # Flush UVM cache after ITEP eviction to remove stale states
     def flush_uvm_cache(self) -> None:
@@ -340,23 +420,31 @@ class GenericITEPModule(nn.Module):
                     emb.emb_module.reset_cache_states()
 
     def get_remap_info(self, features: KeyedJaggedTensor) -> List[torch.Tensor]:
-        keys = features.keys()
+        keys = tuple(features.keys())
         length_per_key = features.length_per_key()
         offset_per_key = features.offset_per_key()
 
-        buffer_idx = []
-        feature_lengths = []
-        feature_offsets = []
-        for i in range(len(keys)):
-            key = keys[i]
-            if key not in self.feature_table_map:
-                continue
-            buffer_idx.append(self.feature_table_map[key])
-            feature_lengths.append(length_per_key[i])
-            feature_offsets.append(offset_per_key[i])
+        # The keys of the features rarely change, map them to buffers once
+        cached = self._remap_info_cache.get(keys)
+        if cached is None:
+            positions = [
+                i for i, key in enumerate(keys) if key in self.feature_table_map
+            ]
+            cached = (
+                torch.tensor(
+                    [self.feature_table_map[keys[i]] for i in positions],
+                    dtype=torch.int32,
+                    device=torch.device("cpu"),
+                ),
+                positions,
+            )
+            self._remap_info_cache[keys] = cached
+        buffer_idx, positions = cached
+        feature_lengths = [length_per_key[i] for i in positions]
+        feature_offsets = [offset_per_key[i] for i in positions]
 
         return [
-            torch.tensor(buffer_idx, dtype=torch.int32, device=torch.device("cpu")),
+            buffer_idx,
             torch.tensor(
                 feature_lengths, dtype=torch.int64, device=torch.device("cpu")
             ),
@@ -394,6 +482,55 @@ class GenericITEPModule(nn.Module):
         full_lpk = torch.sum(full_lengths.view(-1, batch_size), dim=1).tolist()
         return list(torch.split(full_values, full_lpk))
 
+    def prune_tables(self, start: int, end: int, cur_iter: int) -> None:
+        """
+        Prunes the buffers [start, end) and resets the weight and momentum of their
+        pruned rows.
+        """
+        num_buffers = self.buffer_offsets.size(dim=0) - 1
+        buffer_start = self.buffer_offsets_list[start]
+        buffer_end = self.buffer_offsets_list[end]
+        # Pruning function outputs the indices that need weight/momentum reset
+        # The indices order is by physical buffer
+        (
+            pruned_indices,
+            pruned_indices_offsets,
+            pruned_indices_total_length,
+        ) = torch.ops.fbgemm.prune_embedding_tables(
+            cur_iter,
+            self.pruning_interval,
+            self.address_lookup[buffer_start:buffer_end],
+            self.row_util[buffer_start:buffer_end],
+            self.buffer_offsets[start : end + 1] - buffer_start,
+            self.emb_sizes[start:end],
+        )
+        if start > 0 or end < num_buffers:
+            # Offsets of all the buffers, the buffers not in the group are empty
+            pruned_indices_offsets = torch.cat(
+                [
+                    pruned_indices_offsets.new_zeros(start),
+                    pruned_indices_offsets,
+                    pruned_indices_offsets[-1:].expand(num_buffers - end),
+                ]
+            )
+        self.pruned_rows_per_table += (
+            pruned_indices_offsets[1:] - pruned_indices_offsets[:-1]
+        ).to(self.pruned_rows_per_table)
+
+        # After pruning, reset weight and momentum of pruned indices
+        if pruned_indices_total_length > 0 and cur_iter > self.pruning_interval:
+            self.reset_weight_momentum(pruned_indices, pruned_indices_offsets)
+
+        if pruned_indices_total_length > 0:
+            # Flush UVM cache after every ITEP eviction (every pruning_interval iterations)
+            self.flush_uvm_cache()
+            logger.info(f"ITEP: trying to flush UVM after ITEP eviction, {cur_iter=}")
+
+        if self.log_eviction_stats:
+            self.print_itep_eviction_stats(
+                pruned_indices_offsets, pruned_indices_total_length, cur_iter
+            )
+
     def forward(
         self,
         sparse_features: KeyedJaggedTensor,
@@ -426,37 +563,22 @@ class GenericITEPModule(nn.Module):
             or ((cur_iter + 1) % self.pruning_interval == 0)
         )
         if start_pruning and self.training and self.last_pruned_iter != cur_iter:
-            # Pruning function outputs the indices that need weight/momentum reset
-            # The indices order is by physical buffer
-            (
-                pruned_indices,
-                pruned_indices_offsets,
-                pruned_indices_total_length,
-            ) = torch.ops.fbgemm.prune_embedding_tables(
-                cur_iter,
-                self.pruning_interval,
-                self.address_lookup,
-                self.row_util,
-                self.buffer_offsets,
-                self.emb_sizes,
-            )
-            # After pruning, reset weight and momentum of pruned indices
-            if pruned_indices_total_length > 0 and cur_iter > self.pruning_interval:
-                self.reset_weight_momentum(pruned_indices, pruned_indices_offsets)
-
-            if pruned_indices_total_length > 0:
-                # Flush UVM cache after every ITEP eviction (every pruning_interval iterations)
-                self.flush_uvm_cache()
-                logger.info(
-                    f"ITEP: trying to flush UVM after ITEP eviction, {cur_iter=}"
-                )
-
+            if self._next_pruning_group == 0:
+                self._next_pruning_group = len(self.pruning_groups)
             self.last_pruned_iter = cur_iter
 
-            # Print eviction stats
-            self.print_itep_eviction_stats(
-                pruned_indices_offsets, pruned_indices_total_length, cur_iter
-            )
+        if (
+            self._next_pruning_group > 0
+            and self.training
+            and self._last_pruning_step_iter != cur_iter
+        ):
+            # Prune one group of tables per step, from the first group
+            self._next_pruning_group -= 1
+            start, end = self.pruning_groups[
+                len(self.pruning_groups) - 1 - self._next_pruning_group
+            ]
+            self.prune_tables(start, end, cur_iter)
+            self._last_pruning_step_iter = cur_iter
 
         (
             buffer_idx,
@@ -10,8 +10,21 @@
 #!/usr/bin/env python3
 
 import abc
+import atexit
+import copy
+from concurrent.futures import Future, ThreadPoolExecutor
 from logging import getLogger, Logger
-from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 import torch
 
@@ -443,6 +456,16 @@ class MCHEvictionPolicy(abc.ABC):
     def metadata_info(self) -> List[MCHEvictionPolicyMetadataInfo]:
         pass
 
+    @property
+    def eviction_rank_metadata(self) -> Optional[str]:
+        """
+        Name of the mch metadata that orders the eviction scores of the mch ids,
+        if the scores of the ids that are not seen again never decrease relative
+        to each other. Policies with such a metadata support eviction candidates,
+        see HashMCHManagedCollisionModule.
+        """
+        return None
+
     @abc.abstractmethod
     def record_history_metadata(
         self,
@@ -494,10 +517,13 @@ class MCHEvictionPolicy(abc.ABC):
         coalesced_history_mch_matching_indices: torch.Tensor,
         mch_metadata: Dict[str, torch.Tensor],
         coalesced_history_metadata: Dict[str, torch.Tensor],
+        eviction_candidates: Optional[torch.Tensor] = None,
     ) -> Tuple[torch.Tensor, torch.Tensor]:
         """
         Args:
-
+        eviction_candidates (Optional[torch.Tensor]): if set, only these mch
+            indices are scored and can be evicted. The caller guarantees that the
+            other ids would not be evicted.
 
         Returns Tuple of (evicted_indices, selected_new_indices) where:
             evicted_indices are indices in the mch map to be evicted, and
@@ -529,6 +555,20 @@ class MCHEvictionPolicy(abc.ABC):
 
         return evicted_indices, selected_new_indices
 
+    def _candidates_metadata(
+        self, mch_metadata: torch.Tensor, eviction_candidates: Optional[torch.Tensor]
+    ) -> torch.Tensor:
+        if eviction_candidates is None:
+            return mch_metadata
+        return mch_metadata[eviction_candidates]
+
+    def _candidates_indices(
+        self, evicted_indices: torch.Tensor, eviction_candidates: Optional[torch.Tensor]
+    ) -> torch.Tensor:
+        if eviction_candidates is None:
+            return evicted_indices
+        return eviction_candidates[evicted_indices]
+
 
 class LFU_EvictionPolicy(MCHEvictionPolicy):
     def __init__(
@@ -552,6 +592,10 @@ class LFU_EvictionPolicy(MCHEvictionPolicy):
     def metadata_info(self) -> List[MCHEvictionPolicyMetadataInfo]:
         return self._metadata_info
 
+    @property
+    def eviction_rank_metadata(self) -> Optional[str]:
+        return "counts"
+
     def record_history_metadata(
         self,
         current_iter: int,
@@ -583,6 +627,7 @@ class LFU_EvictionPolicy(MCHEvictionPolicy):
         coalesced_history_mch_matching_indices: torch.Tensor,
         mch_metadata: Dict[str, torch.Tensor],
         coalesced_history_metadata: Dict[str, torch.Tensor],
+        eviction_candidates: Optional[torch.Tensor] = None,
     ) -> Tuple[torch.Tensor, torch.Tensor]:
         mch_counts = mch_metadata["counts"]
         # update metadata for matching ids
@@ -601,9 +646,10 @@ class LFU_EvictionPolicy(MCHEvictionPolicy):
 
         mch_counts[mch_size - 1] = torch.iinfo(torch.int64).max
 
+        candidates_counts = self._candidates_metadata(mch_counts, eviction_candidates)
         merged_counts = torch.cat(
             [
-                mch_counts,
+                candidates_counts,
                 new_sorted_uniq_ids_counts,
             ]
         )
@@ -612,9 +658,10 @@ class LFU_EvictionPolicy(MCHEvictionPolicy):
             evicted_indices,
             selected_new_indices,
         ) = self._compute_selected_eviction_and_replacement_indices(
-            mch_size,
+            candidates_counts.numel(),
             merged_counts,
         )
+        evicted_indices = self._candidates_indices(evicted_indices, eviction_candidates)
 
         # update metadata for evicted ids
         mch_counts[evicted_indices] = new_sorted_uniq_ids_counts[selected_new_indices]
@@ -646,6 +693,10 @@ class LRU_EvictionPolicy(MCHEvictionPolicy):
     def metadata_info(self) -> List[MCHEvictionPolicyMetadataInfo]:
         return self._metadata_info
 
+    @property
+    def eviction_rank_metadata(self) -> Optional[str]:
+        return "last_access_iter"
+
     def record_history_metadata(
         self,
         current_iter: int,
@@ -699,6 +750,7 @@ class LRU_EvictionPolicy(MCHEvictionPolicy):
         coalesced_history_mch_matching_indices: torch.Tensor,
         mch_metadata: Dict[str, torch.Tensor],
         coalesced_history_metadata: Dict[str, torch.Tensor],
+        eviction_candidates: Optional[torch.Tensor] = None,
     ) -> Tuple[torch.Tensor, torch.Tensor]:
         mch_last_access_iter = mch_metadata["last_access_iter"]
 
@@ -728,9 +780,12 @@ class LRU_EvictionPolicy(MCHEvictionPolicy):
 
         # TODO: find cleaner way to avoid last element of zch
         mch_last_access_iter[mch_size - 1] = current_iter
+        candidates_last_access_iter = self._candidates_metadata(
+            mch_last_access_iter, eviction_candidates
+        )
         merged_access_iter = torch.cat(
             [
-                mch_last_access_iter,
+                candidates_last_access_iter,
                 new_sorted_uniq_ids_last_access,
             ]
         )
@@ -747,9 +802,10 @@ class LRU_EvictionPolicy(MCHEvictionPolicy):
             evicted_indices,
             selected_new_indices,
         ) = self._compute_selected_eviction_and_replacement_indices(
-            mch_size,
+            candidates_last_access_iter.numel(),
             merged_eviction_scores,
         )
+        evicted_indices = self._candidates_indices(evicted_indices, eviction_candidates)
 
         mch_last_access_iter[evicted_indices] = new_sorted_uniq_ids_last_access[
             selected_new_indices
@@ -839,6 +895,7 @@ class DistanceLFU_EvictionPolicy(MCHEvictionPolicy):
         coalesced_history_mch_matching_indices: torch.Tensor,
         mch_metadata: Dict[str, torch.Tensor],
         coalesced_history_metadata: Dict[str, torch.Tensor],
+        eviction_candidates: Optional[torch.Tensor] = None,
     ) -> Tuple[torch.Tensor, torch.Tensor]:
         mch_counts = mch_metadata["counts"]
         mch_last_access_iter = mch_metadata["last_access_iter"]
@@ -879,15 +936,16 @@ class DistanceLFU_EvictionPolicy(MCHEvictionPolicy):
         mch_counts[mch_size - 1] = torch.iinfo(torch.int64).max
         mch_last_access_iter[mch_size - 1] = current_iter
 
+        candidates_counts = self._candidates_metadata(mch_counts, eviction_candidates)
         merged_counts = torch.cat(
             [
-                mch_counts,
+                candidates_counts,
                 new_sorted_uniq_ids_counts,
             ]
         )
         merged_access_iter = torch.cat(
             [
-                mch_last_access_iter,
+                self._candidates_metadata(mch_last_access_iter, eviction_candidates),
                 new_sorted_uniq_ids_last_access,
             ]
         )
@@ -905,9 +963,10 @@ class DistanceLFU_EvictionPolicy(MCHEvictionPolicy):
             evicted_indices,
             selected_new_indices,
         ) = self._compute_selected_eviction_and_replacement_indices(
-            mch_size,
+            candidates_counts.numel(),
             merged_eviction_scores,
         )
+        evicted_indices = self._candidates_indices(evicted_indices, eviction_candidates)
 
         # update metadata for evicted ids
         mch_counts[evicted_indices] = new_sorted_uniq_ids_counts[selected_new_indices]
@@ -919,6 +978,31 @@ class DistanceLFU_EvictionPolicy(MCHEvictionPolicy):
         return evicted_indices, selected_new_indices
 
 
+_async_eviction_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_async_eviction_executor() -> ThreadPoolExecutor:
+    # shared by all the modules: an executor cannot be deep copied with them
+    global _async_eviction_executor
+    if _async_eviction_executor is None:
+        _async_eviction_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="mch_eviction"
+        )
+    return _async_eviction_executor
+
+
+@atexit.register
+def shutdown_async_eviction() -> None:
+    """
+    Waits for the async eviction rounds in flight and stops their background
+    thread. A later async eviction round starts a new one.
+    """
+    global _async_eviction_executor
+    if _async_eviction_executor is not None:
+        _async_eviction_executor.shutdown(wait=True)
+        _async_eviction_executor = None
+
+
 @torch.fx.wrap
 def _mch_remap(
     features: Dict[str, JaggedTensor],
@@ -953,6 +1037,42 @@ def _mch_remap(
     return remapped_features
 
 
+_COMPACT_STATE_VERSION: int = 1
+
+
+def _narrowest_int_dtype(values: torch.Tensor) -> torch.dtype:
+    """
+    Returns the narrowest integer dtype holding the non negative `values`.
+    """
+    max_value = int(values.max()) if values.numel() > 0 else 0
+    for dtype in [torch.int16, torch.int32]:
+        if max_value <= torch.iinfo(dtype).max:
+            return dtype
+    return torch.int64
+
+
+def _splitmix64(ids: torch.Tensor) -> torch.Tensor:
+    # splitmix64 finalizer
+    hashed = ids
+    hashed = (hashed ^ (hashed >> 30)) * -4658895280553007687
+    hashed = (hashed ^ (hashed >> 27)) * -7723592293110705685
+    return hashed ^ (hashed >> 31)
+
+
+@torch.no_grad()
+def _admission_sketch_columns(
+    ids: torch.Tensor, width: int, depth: int
+) -> torch.Tensor:
+    """
+    Returns the [ids.numel(), depth] counters of `ids` in each row of a count-min
+    sketch of `width` counters per row (stored transposed, one row per counter).
+    """
+    seeds = torch.arange(depth, dtype=torch.int64, device=ids.device) * (
+        -7046029254386353131
+    )
+    return torch.remainder(_splitmix64(ids.unsqueeze(1) ^ seeds), width)
+
+
 class MCHManagedCollisionModule(ManagedCollisionModule):
     """
     ZCH managed collision module
@@ -967,6 +1087,20 @@ class MCHManagedCollisionModule(ManagedCollisionModule):
         mch_size (Optional[int]): DEPRECIATED - size of residual output (ie. legacy MCH), experimental feature.  Ids are internally shifted by output_size_offset + zch_output_range
         mch_hash_func (Optional[Callable]): DEPRECIATED - function used to generate hashes for residual feature. will hash down to mch_size.
         output_global_offset (int): offset of the output id for output range, typically only used in sharding applications.
+        async_eviction (bool): whether history coalescing and eviction run on a background thread (CPU). The history is
+            double buffered and the eviction round updates copies of the mapping and eviction metadata, so the module
+            keeps remapping with its own. The first profile() after the round completes copies them in, along with
+            its evicted slots for evict(). At most one eviction round is in flight; the next one waits for it.
+        admission_threshold (Optional[int]): if set, ids not in the table are only added once their count across
+            eviction intervals, estimated by a count-min sketch, reaches this threshold. The sketch has zch_size
+            counters per hash function, kept in the `_admission_sketch` buffer so that it is checkpointed and sharded
+            with the table. Applied after the eviction policy's threshold_filtering_func.
+        admission_sketch_depth (int): number of hash functions of the admission sketch.
+        admission_sketch_decay (float): factor applied to the admission sketch counters at every eviction interval,
+            so that ids which stopped occurring are forgotten.
+
+    Besides `state_dict()`, the state can be checkpointed in a compact format with `compact_state_dict()` and
+    restored, possibly into a different output id range, with `load_compact_state_dict()`.
     """
 
     def __init__(
@@ -983,6 +1117,10 @@ class MCHManagedCollisionModule(ManagedCollisionModule):
         output_global_offset: int = 0,  # typically not provided by user
         output_segments: Optional[List[int]] = None,  # typically not provided by user
         buckets: int = 1,
+        async_eviction: bool = False,
+        admission_threshold: Optional[int] = None,
+        admission_sketch_depth: int = 4,
+        admission_sketch_decay: float = 1.0,
     ) -> None:
         if output_segments is None:
             output_segments = [output_global_offset, output_global_offset + zch_size]
@@ -1011,6 +1149,20 @@ class MCHManagedCollisionModule(ManagedCollisionModule):
         self._buckets = buckets
         self._init_buffers()
 
+        ## ------ admission ------
+        self._admission_threshold = admission_threshold
+        self._admission_sketch_depth = admission_sketch_depth
+        self._admission_sketch_decay = admission_sketch_decay
+        if admission_threshold is not None:
+            self.register_buffer(
+                "_admission_sketch",
+                torch.zeros(
+                    (self._zch_size, admission_sketch_depth),
+                    dtype=torch.float,
+                    device=self.device,
+                ),
+            )
+
         ## ------ history info ------
         self._mch_metadata: Dict[str, torch.Tensor] = {}
         self._history_metadata: Dict[str, torch.Tensor] = {}
@@ -1020,6 +1172,14 @@ class MCHManagedCollisionModule(ManagedCollisionModule):
         self._evicted: bool = False
         self._last_eviction_iter: int = -1
 
+        ## ------ async eviction ------
+        self._async_eviction = async_eviction
+        self._async_eviction_future: Optional[Future[None]] = None
+        # shallow copy of the module running the eviction round in flight
+        self._async_eviction_worker: Optional["MCHManagedCollisionModule"] = None
+        self._back_history_accumulator: Optional[torch.Tensor] = None
+        self._back_history_metadata: Dict[str, torch.Tensor] = {}
+
     def _init_buffers(self) -> None:
         self.register_buffer(
             "_mch_sorted_raw_ids",
@@ -1160,6 +1320,7 @@ class MCHManagedCollisionModule(ManagedCollisionModule):
         uniq_ids: torch.Tensor,
         uniq_ids_counts: torch.Tensor,
         uniq_ids_metadata: Dict[str, torch.Tensor],
+        current_iter: int,
     ) -> None:
         argsorted_uniq_ids_counts = torch.argsort(
             uniq_ids_counts, descending=True, stable=True
@@ -1183,7 +1344,7 @@ class MCHManagedCollisionModule(ManagedCollisionModule):
             evicted_indices,
             selected_new_indices,
         ) = self._eviction_policy.update_metadata_and_generate_eviction_scores(
-            self._current_iter,
+            current_iter,
             self._zch_size,
             argsorted_uniq_ids_counts,
             frequency_sorted_uniq_ids_counts,
@@ -1220,10 +1381,25 @@ class MCHManagedCollisionModule(ManagedCollisionModule):
 
     @torch.no_grad()
     def _coalesce_history(self) -> None:
-        # pyre-fixme[29]: `Union[(self: TensorBase, indices: Union[None, _NestedSeque...
-        current_history_accumulator = self._history_accumulator[
-            : self._current_history_buffer_offset
-        ]
+        self._coalesce_history_buffers(
+            self._current_iter,
+            # pyre-fixme[29]: `Union[(self: TensorBase, indices: Union[None, _NestedS...
+            self._history_accumulator[: self._current_history_buffer_offset],
+            {
+                metadata_name: metadata_buffer[: self._current_history_buffer_offset]
+                for metadata_name, metadata_buffer in self._history_metadata.items()
+            },
+        )
+        # reset buffer offset
+        self._current_history_buffer_offset = 0
+
+    @torch.no_grad()
+    def _coalesce_history_buffers(
+        self,
+        current_iter: int,
+        current_history_accumulator: torch.Tensor,
+        current_history_metadata: Dict[str, torch.Tensor],
+    ) -> None:
         uniq_ids, uniq_inverse_mapping, uniq_ids_counts = torch.unique(
             current_history_accumulator,
             return_inverse=True,
@@ -1235,16 +1411,16 @@ class MCHManagedCollisionModule(ManagedCollisionModule):
             )
         else:
             threshold_mask = None
+        if self._admission_threshold is not None:
+            admission_mask = self._admit(uniq_ids, uniq_ids_counts)
+            if threshold_mask is not None:
+                admission_mask &= threshold_mask
+            threshold_mask = admission_mask
 
         coalesced_eviction_history_metadata = (
             self._eviction_policy.coalesce_history_metadata(
-                self._current_iter,
-                {
-                    metadata_name: metadata_buffer[
-                        : self._current_history_buffer_offset
-                    ]
-                    for metadata_name, metadata_buffer in self._history_metadata.items()
-                },
+                current_iter,
+                current_history_metadata,
                 uniq_ids_counts,
                 uniq_inverse_mapping,
                 threshold_mask=threshold_mask,
@@ -1254,15 +1430,376 @@ class MCHManagedCollisionModule(ManagedCollisionModule):
             uniq_ids = uniq_ids[threshold_mask]
             uniq_ids_counts = uniq_ids_counts[threshold_mask]
         self._update_and_evict(
-            uniq_ids, uniq_ids_counts, coalesced_eviction_history_metadata
+            uniq_ids, uniq_ids_counts, coalesced_eviction_history_metadata, current_iter
         )
-        # reset buffer offset
+
+    @torch.no_grad()
+    def _admit(
+        self, uniq_ids: torch.Tensor, uniq_ids_counts: torch.Tensor
+    ) -> torch.Tensor:
+        """
+        Adds the counts of this interval to the admission sketch and returns the
+        mask of the ids in the table or whose estimated count reaches the
+        admission threshold.
+        """
+        # pyre-fixme[9]: sketch has type `Tensor`; used as `Union[Module, Tensor]`.
+        sketch: torch.Tensor = self._admission_sketch
+        if self._admission_sketch_decay != 1.0:
+            sketch.mul_(self._admission_sketch_decay)
+        columns = _admission_sketch_columns(
+            uniq_ids, self._zch_size, self._admission_sketch_depth
+        )
+        rows = torch.arange(self._admission_sketch_depth, device=uniq_ids.device)
+        sketch.index_put_(
+            (columns, rows.expand_as(columns)),
+            uniq_ids_counts.to(sketch.dtype).unsqueeze(1).expand_as(columns),
+            accumulate=True,
+        )
+        estimated_counts = sketch[columns, rows].amin(dim=1)
+        # pyre-fixme[58]: `>=` is not supported for operand types `Tensor` and
+        #  `Optional[int]`.
+        return self._ids_in_table(uniq_ids) | (
+            estimated_counts >= self._admission_threshold
+        )
+
+    def _ids_in_table(self, ids: torch.Tensor) -> torch.Tensor:
+        # pyre-fixme[9]: sorted_raw_ids has type `Tensor`; used as `Union[Module,
+        #  Tensor]`.
+        sorted_raw_ids: torch.Tensor = self._mch_sorted_raw_ids
+        positions = torch.searchsorted(sorted_raw_ids, ids).clamp(
+            max=self._zch_size - 1
+        )
+        return sorted_raw_ids[positions] == ids
+
+    def _id_buffer_names(self) -> List[str]:
+        return ["_mch_sorted_raw_ids", "_mch_remapped_ids_mapping"]
+
+    def _eviction_buffer_names(self) -> List[str]:
+        """
+        Names of the buffers updated by an eviction round.
+        """
+        names = self._id_buffer_names()
+        names.extend("_mch_" + name for name in self._mch_metadata)
+        if self._admission_threshold is not None:
+            names.append("_admission_sketch")
+        return names
+
+    def _eviction_attr_names(self) -> List[str]:
+        """
+        Names of the plain attributes, other than the evicted slots, updated by
+        an eviction round.
+        """
+        return []
+
+    def _eviction_worker(self) -> "MCHManagedCollisionModule":
+        """
+        Returns a shallow copy of the module with its own copy of the eviction
+        buffers, for an eviction round to run in the background.
+        """
+        worker = copy.copy(self)
+        worker.__dict__["_buffers"] = dict(self._buffers)
+        for name in self._eviction_buffer_names():
+            worker._buffers[name] = self._buffers[name].clone()
+        worker._mch_metadata = {
+            name: worker._buffers["_mch_" + name] for name in self._mch_metadata
+        }
+        worker._evicted = False
+        return worker
+
+    def _swap_history_buffers(self) -> None:
+        if self._back_history_accumulator is None:
+            self._back_history_accumulator = torch.empty_like(self._history_accumulator)
+            self._back_history_metadata = {
+                metadata_name: torch.empty_like(metadata_buffer)
+                for metadata_name, metadata_buffer in self._history_metadata.items()
+            }
+        self._history_accumulator, self._back_history_accumulator = (
+            self._back_history_accumulator,
+            self._history_accumulator,
+        )
+        for metadata_name, metadata_buffer in self._history_metadata.items():
+            back_metadata_buffer = self._back_history_metadata[metadata_name]
+            setattr(self, "_history_" + metadata_name, back_metadata_buffer)
+            self._history_metadata[metadata_name] = back_metadata_buffer
+            self._back_history_metadata[metadata_name] = metadata_buffer
+
+    @torch.no_grad()
+    def _coalesce_history_async(self) -> None:
+        # one eviction round in flight at most
+        self._finalize_async_eviction(wait=True)
+
+        offset = self._current_history_buffer_offset
+        # pyre-fixme[29]: `Union[(self: TensorBase, indices: Union[None, _NestedSeque...
+        current_history_accumulator = self._history_accumulator[:offset]
+        current_history_metadata = {
+            metadata_name: metadata_buffer[:offset]
+            for metadata_name, metadata_buffer in self._history_metadata.items()
+        }
+        self._swap_history_buffers()
         self._current_history_buffer_offset = 0
 
+        # the round only updates the worker, this module keeps its own state
+        worker = self._eviction_worker()
+        self._async_eviction_worker = worker
+        self._async_eviction_future = _get_async_eviction_executor().submit(
+            worker._coalesce_history_buffers,
+            self._current_iter,
+            current_history_accumulator,
+            current_history_metadata,
+        )
+
+    @torch.no_grad()
+    def _finalize_async_eviction(self, wait: bool) -> None:
+        """
+        Copies in the state of the eviction round in flight if it completed, or
+        after waiting for it if `wait`. Only called from the training thread.
+        """
+        future = self._async_eviction_future
+        if future is None or (not wait and not future.done()):
+            return
+        worker = self._async_eviction_worker
+        self._async_eviction_future = None
+        self._async_eviction_worker = None
+        future.result()
+        assert worker is not None
+        for name in self._eviction_buffer_names():
+            self._buffers[name].copy_(worker._buffers[name])
+        for name in self._eviction_attr_names():
+            setattr(self, name, getattr(worker, name))
+        if worker._evicted:
+            if self._evicted:
+                self._evicted_emb_indices = torch.unique(
+                    torch.cat([self._evicted_emb_indices, worker._evicted_emb_indices])
+                )
+            else:
+                self._evicted_emb_indices = worker._evicted_emb_indices
+            self._evicted = True
+
+    # pyre-ignore
+    def _save_to_state_dict(self, destination, prefix, keep_vars) -> None:
+        self._finalize_async_eviction(wait=True)
+        super()._save_to_state_dict(destination, prefix, keep_vars)
+
+    # pyre-ignore
+    def _load_from_state_dict(self, *args, **kwargs) -> None:
+        self._finalize_async_eviction(wait=True)
+        super()._load_from_state_dict(*args, **kwargs)
+
+    @torch.no_grad()
+    def _occupied_slots(
+        self,
+    ) -> Tuple[torch.Tensor, torch.Tensor, Dict[str, torch.Tensor]]:
+        """
+        Returns the sorted raw ids of the occupied slots, their slots and metadata.
+        """
+        num_ids = int(
+            # pyre-fixme[6]: For 1st argument expected `Tensor` but got
+            #  `Union[Module, Tensor]`.
+            torch.searchsorted(self._mch_sorted_raw_ids, self._delimiter)
+        )
+        return (
+            # pyre-fixme[29]: `Union[(self: TensorBase, indices: Union[None, _NestedS...
+            self._mch_sorted_raw_ids[:num_ids],
+            # pyre-fixme[29]: `Union[(self: TensorBase, indices: Union[None, _NestedS...
+            self._mch_remapped_ids_mapping[:num_ids] - self._output_global_offset,
+            {name: metadata[:num_ids] for name, metadata in self._mch_metadata.items()},
+        )
+
+    @torch.no_grad()
+    def compact_state_dict(self) -> Dict[str, torch.Tensor]:
+        """
+        Returns the state of the module in a compact format, to be restored with
+        `load_compact_state_dict()`:
+
+        - only the occupied slots are kept,
+        - their raw ids are sorted and delta encoded (`first_raw_id` and
+          `raw_id_deltas`), in the narrowest integer type holding the deltas,
+        - their slots (relative to `output_range[0]`) are int32 when they fit,
+        - the eviction metadata (`metadata.<name>`) is int32, saturating.
+
+        The admission sketch, if any, is kept as is.
+        """
+        self._finalize_async_eviction(wait=True)
+        raw_ids, slots, metadata = self._occupied_slots()
+        raw_id_deltas = torch.diff(raw_ids, prepend=raw_ids[:1])
+        int32_info = torch.iinfo(torch.int32)
+        state = {
+            "version": torch.tensor([_COMPACT_STATE_VERSION], dtype=torch.int64),
+            "output_range": torch.tensor(
+                [
+                    self._output_global_offset,
+                    self._output_global_offset + self._zch_size,
+                ],
+                dtype=torch.int64,
+            ),
+            "current_iter": self._current_iter_tensor.detach().cpu().clone(),
+            "first_raw_id": raw_ids[:1].cpu().clone(),
+            "raw_id_deltas": raw_id_deltas.to(
+                _narrowest_int_dtype(raw_id_deltas)
+            ).cpu(),
+            "slots": slots.to(
+                torch.int32 if self._zch_size <= int32_info.max else torch.int64
+            ).cpu(),
+        }
+        for name, values in metadata.items():
+            state[f"metadata.{name}"] = (
+                values.clamp(int32_info.min, int32_info.max).to(torch.int32).cpu()
+            )
+        if self._admission_threshold is not None:
+            # pyre-fixme[29]: `Union[(self: TensorBase) -> Tensor, Module, Tensor]`
+            #  is not a function.
+            state["admission_sketch"] = self._admission_sketch.detach().cpu().clone()
+        return state
+
+    def _reset_compact_load(self) -> None:
+        self._compact_load_occupied: torch.Tensor = torch.zeros(
+            self._zch_size, dtype=torch.bool, device=self.device
+        )
+
+    def _load_compact_chunk(
+        self,
+        position: int,
+        raw_ids: torch.Tensor,
+        slots: torch.Tensor,
+        metadata: Dict[str, torch.Tensor],
+    ) -> None:
+        """
+        Loads the `raw_ids` of the local `slots` and their metadata, the
+        `position`-th to the `position + len(raw_ids)`-th ids loaded.
+        """
+        end = position + raw_ids.numel()
+        # pyre-fixme[29]: `Union[(self: TensorBase, indices: Union[None, _NestedS...
+        self._mch_sorted_raw_ids[position:end] = raw_ids
+        # pyre-fixme[29]: `Union[(self: TensorBase, indices: Union[None, _NestedS...
+        self._mch_remapped_ids_mapping[position:end] = (
+            slots + self._output_global_offset
+        )
+        for name, values in metadata.items():
+            self._mch_metadata[name][position:end] = values
+        self._compact_load_occupied[slots] = True
+
+    def _finish_compact_load(self, num_ids: int, is_sorted: bool) -> None:
+        # the free slots follow the loaded ids, in slot order
+        free_slots = torch.nonzero(~self._compact_load_occupied).flatten()
+        del self._compact_load_occupied
+        # pyre-fixme[29]: `Union[(self: TensorBase, indices: Union[None, _NestedS...
+        self._mch_sorted_raw_ids[num_ids:] = torch.iinfo(torch.int64).max
+        # pyre-fixme[29]: `Union[(self: TensorBase, indices: Union[None, _NestedS...
+        self._mch_remapped_ids_mapping[num_ids:] = (
+            free_slots + self._output_global_offset
+        )
+        for values in self._mch_metadata.values():
+            values[num_ids:] = 0
+        if num_ids == self._zch_size:
+            # the new output id range is full, the id of the last slot gives it up
+            # to the ids that are not in the table
+            reserved = self._mch_remapped_ids_mapping == (
+                self._output_global_offset + self._zch_size - 1
+            )
+            # pyre-fixme[29]: `Union[(self: TensorBase, indices: Union[None, _NestedS...
+            self._mch_sorted_raw_ids[reserved] = torch.iinfo(torch.int64).max
+            for values in self._mch_metadata.values():
+                values[reserved] = 0
+            is_sorted = False
+        if not is_sorted:
+            self._sort_mch_buffers()
+
+    @torch.no_grad()
+    def load_compact_state_dict(
+        self,
+        compact_states: Iterable[Dict[str, torch.Tensor]],
+        chunk_size: int = 1 << 20,
+    ) -> None:
+        """
+        Restores the state from `compact_state_dict()` outputs.
+
+        The states may come from modules with other output id ranges, e.g. the
+        shards of a table with another sharding: only the slots within the output
+        id range of this module are loaded, so the modules built by
+        `rebuild_with_output_id_range` for a new sharding can load the states of
+        the previous one. The states are consumed one at a time and decoded in
+        chunks of `chunk_size` ids straight into the buffers, so `compact_states`
+        can be a generator reading them from storage.
+
+        Args:
+            compact_states (Iterable[Dict[str, torch.Tensor]]): states from
+                `compact_state_dict()`.
+            chunk_size (int): number of ids decoded at once.
+        """
+        self._finalize_async_eviction(wait=True)
+        start = self._output_global_offset
+        end = start + self._zch_size
+        num_ids = 0
+        is_sorted = True
+        last_raw_id: Optional[int] = None
+        current_iter = 0
+        self._reset_compact_load()
+        for state in compact_states:
+            assert (
+                int(state["version"][0]) == _COMPACT_STATE_VERSION
+            ), f"Unsupported compact state version {int(state['version'][0])}"
+            current_iter = max(current_iter, int(state["current_iter"][0]))
+            state_start, state_end = state["output_range"].tolist()
+            if state_end <= start or state_start >= end:
+                continue
+            if "admission_sketch" in state and self._admission_threshold is not None:
+                if (state_start, state_end) == (start, end):
+                    # pyre-fixme[29]: `Union[(self: TensorBase, src: Tensor,
+                    #  non_blocking: bool = ...) -> Tensor, Module, Tensor]` is not a
+                    #  function.
+                    self._admission_sketch.copy_(state["admission_sketch"])
+                else:
+                    logger.warning(
+                        "Admission sketch not restored, the output id range changed"
+                    )
+
+            raw_id_deltas = state["raw_id_deltas"]
+            carry = state["first_raw_id"].to(self.device)
+            for chunk_start in range(0, raw_id_deltas.numel(), chunk_size):
+                chunk = slice(chunk_start, chunk_start + chunk_size)
+                raw_ids = carry + torch.cumsum(
+                    raw_id_deltas[chunk].to(self.device, torch.int64), dim=0
+                )
+                carry = raw_ids[-1:]
+                slots = state["slots"][chunk].to(self.device, torch.int64) + (
+                    state_start - start
+                )
+                in_range = (slots >= 0) & (slots < self._zch_size)
+                raw_ids = raw_ids[in_range]
+                if raw_ids.numel() == 0:
+                    continue
+                if last_raw_id is not None and int(raw_ids[0]) < last_raw_id:
+                    is_sorted = False
+                last_raw_id = int(raw_ids[-1])
+                self._load_compact_chunk(
+                    num_ids,
+                    raw_ids,
+                    slots[in_range],
+                    {
+                        name: state[f"metadata.{name}"][chunk].to(
+                            self.device, torch.int64
+                        )[in_range]
+                        for name in self._mch_metadata
+                    },
+                )
+                num_ids += raw_ids.numel()
+        assert (
+            num_ids <= self._zch_size
+        ), f"{num_ids} ids loaded in {self._zch_size} slots"
+        self._finish_compact_load(num_ids, is_sorted)
+
+        self._current_iter_tensor.fill_(current_iter)
+        self._current_iter = -1
+        self._evicted = False
+
     def profile(
         self,
         features: Dict[str, JaggedTensor],
     ) -> Dict[str, JaggedTensor]:
+        # step boundary: swap in the mapping of a completed async eviction round
+        if self._async_eviction_future is not None:
+            self._finalize_async_eviction(wait=False)
+
         if not self.training:
             return features
 
@@ -1302,7 +1839,10 @@ class MCHManagedCollisionModule(ManagedCollisionModule):
 
         # coalesce history / evict
         if self._current_iter - self._last_eviction_iter == self._eviction_interval:
-            self._coalesce_history()
+            if self._async_eviction:
+                self._coalesce_history_async()
+            else:
+                self._coalesce_history()
             self._last_eviction_iter = self._current_iter
 
         return features
@@ -1355,6 +1895,8 @@ class MCHManagedCollisionModule(ManagedCollisionModule):
 
     @torch.no_grad()
     def evict(self) -> Optional[torch.Tensor]:
+        # the slots evicted by the round in flight are returned once its mapping
+        # is copied in
         if self._evicted:
             self._evicted = False
             return self._evicted_emb_indices
@@ -1378,11 +1920,16 @@ class MCHManagedCollisionModule(ManagedCollisionModule):
         output_id_range: Tuple[int, int],
         output_segments: List[int],
         device: Optional[torch.device] = None,
+        compact_states: Optional[Iterable[Dict[str, torch.Tensor]]] = None,
     ) -> "MCHManagedCollisionModule":
+        """
+        Also loads the `compact_states` of the previous sharding into the new
+        module if provided, see `load_compact_state_dict`.
+        """
 
         new_zch_size = output_id_range[1] - output_id_range[0]
 
-        return type(self)(
+        module = type(self)(
             name=self._name,
             zch_size=new_zch_size,
             device=device or self.device,
@@ -1393,4 +1940,444 @@ class MCHManagedCollisionModule(ManagedCollisionModule):
             output_global_offset=output_id_range[0],
             output_segments=output_segments,
             buckets=len(output_segments) - 1,
+            async_eviction=self._async_eviction,
+            admission_threshold=self._admission_threshold,
+            admission_sketch_depth=self._admission_sketch_depth,
+            admission_sketch_decay=self._admission_sketch_decay,
+        )
+        if compact_states is not None:
+            module.load_compact_state_dict(compact_states)
+        return module
+
+
+_HASH_TABLE_EMPTY_KEY: int = torch.iinfo(torch.int64).max
+_HASH_TABLE_DELETED_KEY: int = torch.iinfo(torch.int64).min
+
+
+def _hash_table_probes(ids: torch.Tensor, capacity: int) -> torch.Tensor:
+    # capacity is a power of 2
+    return _splitmix64(ids) & (capacity - 1)
+
+
+def _hash_table_lookup(
+    hash_table_keys: torch.Tensor, ids: torch.Tensor
+) -> torch.Tensor:
+    """
+    Returns the positions of `ids` in the linear probing table `hash_table_keys`,
+    -1 for missing ids. All the ids are probed together, one table slot per loop.
+    """
+    capacity = hash_table_keys.numel()
+    positions = torch.full_like(ids, -1)
+    probes = _hash_table_probes(ids, capacity)
+    active = torch.arange(ids.numel(), device=ids.device)
+    while active.numel() > 0:
+        keys = hash_table_keys[probes]
+        found = keys == ids[active]
+        positions[active[found]] = probes[found]
+        # `_HASH_TABLE_EMPTY_KEY`, TorchScript cannot read module globals
+        pending = ~found & (keys != 9223372036854775807)
+        active = active[pending]
+        probes = (probes[pending] + 1) & (capacity - 1)
+    return positions
+
+
+@torch.no_grad()
+def _hash_table_insert(
+    hash_table_keys: torch.Tensor,
+    hash_table_values: torch.Tensor,
+    ids: torch.Tensor,
+    values: torch.Tensor,
+) -> None:
+    """
+    Inserts unique `ids`, not in the table yet, with their `values`. Ids probing
+    the same free slot in a loop are resolved by letting the first one take it.
+    """
+    capacity = hash_table_keys.numel()
+    probes = _hash_table_probes(ids, capacity)
+    active = torch.arange(ids.numel(), device=ids.device)
+    while active.numel() > 0:
+        keys = hash_table_keys[probes]
+        free = (keys == _HASH_TABLE_EMPTY_KEY) | (keys == _HASH_TABLE_DELETED_KEY)
+        candidates = active[free]
+        free_probes, inverse = torch.unique(probes[free], return_inverse=True)
+        winners = torch.full_like(free_probes, ids.numel()).scatter_reduce(
+            0, inverse, candidates, reduce="amin"
+        )
+        hash_table_keys[free_probes] = ids[winners]
+        hash_table_values[free_probes] = values[winners]
+
+        pending = torch.ones_like(active, dtype=torch.bool)
+        pending[free] = candidates != winners[inverse]
+        active = active[pending]
+        probes = (probes[pending] + 1) & (capacity - 1)
+
+
+@torch.fx.wrap
+def _hash_mch_remap(
+    features: Dict[str, JaggedTensor],
+    hash_table_keys: torch.Tensor,
+    hash_table_slots: torch.Tensor,
+    output_global_offset: int,
+    zch_index: int,
+) -> Dict[str, JaggedTensor]:
+    remapped_features: Dict[str, JaggedTensor] = {}
+    for name, feature in features.items():
+        values = feature.values()
+        positions = _hash_table_lookup(hash_table_keys, values)
+        remapped_ids = torch.where(
+            positions >= 0,
+            hash_table_slots[positions.clamp(min=0)] + output_global_offset,
+            torch.full_like(values, zch_index),
+        )
+        remapped_features[name] = JaggedTensor(
+            values=remapped_ids,
+            lengths=feature.lengths(),
+            offsets=feature.offsets(),
+            weights=feature.weights_or_none(),
+        )
+    return remapped_features
+
+
+class HashMCHManagedCollisionModule(MCHManagedCollisionModule):
+    """
+    ZCH managed collision module with the same eviction policies and outputs as
+    MCHManagedCollisionModule, that finds the ids with an open addressing hash
+    table instead of a sorted array.
+
+    The ids and the eviction metadata stay at their slot, the remapped id of a
+    slot being `output_global_offset + slot`, so an eviction round only updates
+    the evicted slots and the hash table entries of the changed ids instead of
+    re-sorting every buffer. The hash table (linear probing, at least twice the
+    size of zch_size) is rebuilt from the ids when loading a checkpoint or when
+    too many entries are deleted. Probing is vectorized over the ids, with one
+    loop per probe distance, and is meant for CPU.
+
+    With `eviction_candidate_pool_size`, the eviction policy only scores a pool
+    of the lowest ranked slots (by the policy `eviction_rank_metadata`) instead
+    of the whole table. The pool is refilled with a `torch.topk` over the table
+    when fewer of its slots than new ids are left untouched, so an eviction
+    round costs O(pool size + touched ids) and the full scans are amortized over
+    about `pool size / new ids per round` rounds. The evicted ids are the same
+    as with a full scan, except for ties with the slots outside of the pool.
+    Only LFU_EvictionPolicy and LRU_EvictionPolicy support it.
+
+    Args: see MCHManagedCollisionModule.
+        eviction_candidate_pool_size (Optional[int]): size of the eviction
+            candidate pool, no pool if None.
+    """
+
+    _mch_raw_ids: torch.Tensor
+    _hash_table_keys: torch.Tensor
+    _hash_table_slots: torch.Tensor
+
+    def __init__(
+        self,
+        zch_size: int,
+        device: torch.device,
+        eviction_policy: MCHEvictionPolicy,
+        eviction_interval: int,
+        input_hash_size: int = (2**63) - 1,
+        input_hash_func: Optional[Callable[[torch.Tensor, int], torch.Tensor]] = None,
+        mch_size: Optional[int] = None,
+        mch_hash_func: Optional[Callable[[torch.Tensor, int], torch.Tensor]] = None,
+        name: Optional[str] = None,
+        output_global_offset: int = 0,  # typically not provided by user
+        output_segments: Optional[List[int]] = None,  # typically not provided by user
+        buckets: int = 1,
+        async_eviction: bool = False,
+        admission_threshold: Optional[int] = None,
+        admission_sketch_depth: int = 4,
+        admission_sketch_decay: float = 1.0,
+        eviction_candidate_pool_size: Optional[int] = None,
+    ) -> None:
+        super().__init__(
+            zch_size=zch_size,
+            device=device,
+            eviction_policy=eviction_policy,
+            eviction_interval=eviction_interval,
+            input_hash_size=input_hash_size,
+            input_hash_func=input_hash_func,
+            mch_size=mch_size,
+            mch_hash_func=mch_hash_func,
+            name=name,
+            output_global_offset=output_global_offset,
+            output_segments=output_segments,
+            buckets=buckets,
+            async_eviction=async_eviction,
+            admission_threshold=admission_threshold,
+            admission_sketch_depth=admission_sketch_depth,
+            admission_sketch_decay=admission_sketch_decay,
+        )
+        if (
+            eviction_candidate_pool_size is not None
+            and eviction_policy.eviction_rank_metadata is None
+        ):
+            raise ValueError(
+                f"{type(eviction_policy).__name__} does not support eviction candidates"
+            )
+        self._eviction_candidate_pool_size = eviction_candidate_pool_size
+        self._eviction_rank_metadata: str = eviction_policy.eviction_rank_metadata or ""
+        # Every slot outside of the pool ranks at or above the threshold.
+        self._eviction_candidates: Optional[torch.Tensor] = None
+        self._eviction_candidates_threshold: int = 0
+
+    def _init_buffers(self) -> None:
+        self.register_buffer(
+            "_mch_raw_ids",
+            torch.full(
+                (self._zch_size,),
+                _HASH_TABLE_EMPTY_KEY,
+                dtype=torch.int64,
+                device=self.device,
+            ),
+        )
+        capacity = 1 << (2 * self._zch_size - 1).bit_length()
+        self.register_buffer(
+            "_hash_table_keys",
+            torch.full(
+                (capacity,),
+                _HASH_TABLE_EMPTY_KEY,
+                dtype=torch.int64,
+                device=self.device,
+            ),
+            persistent=False,
+        )
+        self.register_buffer(
+            "_hash_table_slots",
+            torch.zeros((capacity,), dtype=torch.int64, device=self.device),
+            persistent=False,
+        )
+        self._num_deleted_keys: int = 0
+        self._evicted_emb_indices: torch.Tensor = torch.empty((1,), device=self.device)
+
+    @torch.no_grad()
+    def _rebuild_hash_table(self) -> None:
+        self._hash_table_keys.fill_(_HASH_TABLE_EMPTY_KEY)
+        slots = torch.nonzero(self._mch_raw_ids != _HASH_TABLE_EMPTY_KEY).flatten()
+        _hash_table_insert(
+            self._hash_table_keys,
+            self._hash_table_slots,
+            self._mch_raw_ids[slots],
+            slots,
+        )
+        self._num_deleted_keys = 0
+
+    @torch.no_grad()
+    def _match_slots(self, ids: torch.Tensor) -> torch.Tensor:
+        positions = _hash_table_lookup(self._hash_table_keys, ids)
+        return torch.where(
+            positions >= 0,
+            self._hash_table_slots[positions.clamp(min=0)],
+            -1,
+        )
+
+    @torch.no_grad()
+    def _update_and_evict(
+        self,
+        uniq_ids: torch.Tensor,
+        uniq_ids_counts: torch.Tensor,
+        uniq_ids_metadata: Dict[str, torch.Tensor],
+        current_iter: int,
+    ) -> None:
+        argsorted_uniq_ids_counts = torch.argsort(
+            uniq_ids_counts, descending=True, stable=True
+        )
+        frequency_sorted_uniq_ids = uniq_ids[argsorted_uniq_ids_counts]
+        frequency_sorted_uniq_ids_counts = uniq_ids_counts[argsorted_uniq_ids_counts]
+
+        matched_slots = self._match_slots(frequency_sorted_uniq_ids)
+        matching_eles = matched_slots >= 0
+        matched_indices = matched_slots[matching_eles]
+        new_frequency_sorted_uniq_ids = frequency_sorted_uniq_ids[~matching_eles]
+
+        eviction_candidates = None
+        if self._eviction_candidate_pool_size is not None:
+            eviction_candidates = self._get_eviction_candidates(
+                matched_indices, new_frequency_sorted_uniq_ids.numel()
+            )
+        (
+            evicted_indices,
+            selected_new_indices,
+        ) = self._eviction_policy.update_metadata_and_generate_eviction_scores(
+            current_iter,
+            self._zch_size,
+            argsorted_uniq_ids_counts,
+            frequency_sorted_uniq_ids_counts,
+            matching_eles,
+            matched_indices,
+            self._mch_metadata,
+            uniq_ids_metadata,
+            eviction_candidates=eviction_candidates,
+        )
+        if eviction_candidates is not None:
+            # keep the candidates still ranked at or below the threshold, the
+            # others ranked up with their metadata update or replacement id
+            rank = self._mch_metadata[self._eviction_rank_metadata]
+            self._eviction_candidates = eviction_candidates[
+                rank[eviction_candidates] <= self._eviction_candidates_threshold
+            ]
+        else:
+            # a full scan may have replaced ids outside of the pool
+            self._eviction_candidates = None
+
+        # only the hash table entries of the replaced ids change
+        evicted_ids = self._mch_raw_ids[evicted_indices]
+        evicted_ids = evicted_ids[evicted_ids != _HASH_TABLE_EMPTY_KEY]
+        evicted_positions = _hash_table_lookup(self._hash_table_keys, evicted_ids)
+        self._hash_table_keys[evicted_positions] = _HASH_TABLE_DELETED_KEY
+        self._num_deleted_keys += evicted_ids.numel()
+
+        added_ids = new_frequency_sorted_uniq_ids[selected_new_indices]
+        self._mch_raw_ids[evicted_indices] = added_ids
+        if 4 * self._num_deleted_keys > self._hash_table_keys.numel():
+            self._rebuild_hash_table()
+        else:
+            _hash_table_insert(
+                self._hash_table_keys,
+                self._hash_table_slots,
+                added_ids,
+                evicted_indices,
+            )
+
+        # NOTE evicted ids for emb reset
+        evicted_emb_indices = evicted_indices + self._output_global_offset
+        if self._evicted:
+            self._evicted_emb_indices = torch.unique(
+                torch.cat([self._evicted_emb_indices, evicted_emb_indices])
+            )
+        else:
+            self._evicted_emb_indices = evicted_emb_indices
+        self._evicted = True
+
+    @torch.no_grad()
+    def _get_eviction_candidates(
+        self, matched_indices: torch.Tensor, num_new_ids: int
+    ) -> Optional[torch.Tensor]:
+        """
+        Returns the pool of eviction candidates if at least `num_new_ids` of them
+        are not matched this round, which makes sure that the lowest ranked slots
+        are in the pool. Refills the pool if needed, returns None for a full scan.
+        """
+        candidates = self._eviction_candidates
+        if candidates is not None and (
+            int((~torch.isin(candidates, matched_indices)).sum()) >= num_new_ids
+        ):
+            return candidates
+
+        pool_size = self._eviction_candidate_pool_size
+        assert pool_size is not None
+        rank = self._mch_metadata[self._eviction_rank_metadata][:-1]
+        pool_size = min(max(pool_size, 2 * num_new_ids), rank.numel())
+        if pool_size == rank.numel():
+            return None
+        values, candidates = torch.topk(rank, pool_size, largest=False, sorted=False)
+        # in slot order, like a full scan for ties
+        candidates = candidates.sort().values
+        self._eviction_candidates = candidates
+        self._eviction_candidates_threshold = int(values.max())
+        if int((~torch.isin(candidates, matched_indices)).sum()) >= num_new_ids:
+            return candidates
+        return None
+
+    def _ids_in_table(self, ids: torch.Tensor) -> torch.Tensor:
+        return _hash_table_lookup(self._hash_table_keys, ids) >= 0
+
+    @torch.no_grad()
+    def _occupied_slots(
+        self,
+    ) -> Tuple[torch.Tensor, torch.Tensor, Dict[str, torch.Tensor]]:
+        slots = torch.nonzero(self._mch_raw_ids != _HASH_TABLE_EMPTY_KEY).flatten()
+        raw_ids, order = self._mch_raw_ids[slots].sort()
+        slots = slots[order]
+        return (
+            raw_ids,
+            slots,
+            {name: metadata[slots] for name, metadata in self._mch_metadata.items()},
+        )
+
+    def _reset_compact_load(self) -> None:
+        self._mch_raw_ids.fill_(_HASH_TABLE_EMPTY_KEY)
+        for values in self._mch_metadata.values():
+            values.zero_()
+
+    def _load_compact_chunk(
+        self,
+        position: int,
+        raw_ids: torch.Tensor,
+        slots: torch.Tensor,
+        metadata: Dict[str, torch.Tensor],
+    ) -> None:
+        # the ids stay at their slot, but for the one reserved for the ids that
+        # are not in the table
+        keep = slots < self._zch_size - 1
+        slots = slots[keep]
+        self._mch_raw_ids[slots] = raw_ids[keep]
+        for name, values in metadata.items():
+            self._mch_metadata[name][slots] = values[keep]
+
+    def _finish_compact_load(self, num_ids: int, is_sorted: bool) -> None:
+        self._rebuild_hash_table()
+        self._eviction_candidates = None
+
+    def _id_buffer_names(self) -> List[str]:
+        return ["_mch_raw_ids", "_hash_table_keys", "_hash_table_slots"]
+
+    def _eviction_attr_names(self) -> List[str]:
+        return [
+            "_num_deleted_keys",
+            "_eviction_candidates",
+            "_eviction_candidates_threshold",
+        ]
+
+    def remap(self, features: Dict[str, JaggedTensor]) -> Dict[str, JaggedTensor]:
+        return _hash_mch_remap(
+            features,
+            self._hash_table_keys,
+            self._hash_table_slots,
+            self._output_global_offset,
+            self._output_global_offset + self._zch_size - 1,
+        )
+
+    def open_slots(self) -> torch.Tensor:
+        # the last slot is reserved for the ids that are not in the table
+        return (self._mch_raw_ids[:-1] == _HASH_TABLE_EMPTY_KEY).sum().view(1)
+
+    def validate_state(self) -> None:
+        start = self._output_global_offset
+        end = start + self._zch_size
+        assert (
+            start in self._output_segments_tensor
+            and end in self._output_segments_tensor
+        ), f"shard within range [{start}, {end}] cannot be built out of segements {self._output_segments_tensor}"
+
+        self._output_segments_tensor = self._init_output_segments_tensor
+        self._rebuild_hash_table()
+        self._eviction_candidates = None
+
+    def rebuild_with_output_id_range(
+        self,
+        output_id_range: Tuple[int, int],
+        output_segments: List[int],
+        device: Optional[torch.device] = None,
+        compact_states: Optional[Iterable[Dict[str, torch.Tensor]]] = None,
+    ) -> "HashMCHManagedCollisionModule":
+        module = type(self)(
+            name=self._name,
+            zch_size=output_id_range[1] - output_id_range[0],
+            device=device or self.device,
+            eviction_policy=self._eviction_policy,
+            eviction_interval=self._eviction_interval,
+            input_hash_size=self._input_hash_size,
+            input_hash_func=self._input_hash_func,
+            output_global_offset=output_id_range[0],
+            output_segments=output_segments,
+            buckets=len(output_segments) - 1,
+            async_eviction=self._async_eviction,
+            admission_threshold=self._admission_threshold,
+            admission_sketch_depth=self._admission_sketch_depth,
+            admission_sketch_decay=self._admission_sketch_decay,
+            eviction_candidate_pool_size=self._eviction_candidate_pool_size,
         )
+        if compact_states is not None:
+            module.load_compact_state_dict(compact_states)
+        return module
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the BSD-style license found in the
+# LICENSE file in the root directory of this source tree.
+
+# pyre-strict
+
+"""
+Measures the time of an eviction round (profile() with eviction_interval=1) of
+the MCH managed collision modules on CPU, e.g.
+
+    python -m torchrec.modules.tests.mc_eviction_benchmark \
+        --zch_size 100000000 --ids_per_round 100000 --eviction_policy lfu
+
+for the sorted MCHManagedCollisionModule (--modules sorted, slow at this size),
+HashMCHManagedCollisionModule with a full scan of the eviction scores (hash)
+and with an eviction candidate pool (hash_pool).
+"""
+
+import time
+from typing import Any, Callable, Dict, List
+
+import click
+import torch
+from torchrec.modules.mc_modules import (
+    HashMCHManagedCollisionModule,
+    LFU_EvictionPolicy,
+    LRU_EvictionPolicy,
+    MCHEvictionPolicy,
+    MCHManagedCollisionModule,
+)
+from torchrec.sparse.jagged_tensor import JaggedTensor
+
+EVICTION_POLICIES: Dict[str, Callable[[], MCHEvictionPolicy]] = {
+    "lfu": LFU_EvictionPolicy,
+    "lru": LRU_EvictionPolicy,
+}
+
+
+def benchmark_module(
+    mc_module: MCHManagedCollisionModule,
+    ids_per_round: int,
+    id_range: int,
+    num_rounds: int,
+    num_warmup_rounds: int,
+) -> List[float]:
+    generator = torch.Generator().manual_seed(0)
+    latencies = []
+    for i in range(num_warmup_rounds + num_rounds):
+        # zipf-like ids: frequent ids come back, rare ones are new
+        ids = (torch.rand(ids_per_round, generator=generator).pow(4) * id_range).long()
+        features = {
+            "f": JaggedTensor(values=ids, lengths=torch.tensor([ids_per_round]))
+        }
+        start = time.perf_counter()
+        mc_module.profile(features)
+        if i >= num_warmup_rounds:
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+@click.command()
+@click.option("--zch_size", type=int, default=100_000_000, help="Number of slots.")
+@click.option(
+    "--ids_per_round", type=int, default=100_000, help="Ids per eviction round."
+)
+@click.option("--id_range", type=int, default=2**40, help="Range of the ids.")
+@click.option("--num_rounds", type=int, default=10, help="Timed rounds.")
+@click.option("--num_warmup_rounds", type=int, default=2, help="Untimed rounds.")
+@click.option("--eviction_policy", type=str, default="lfu", help="lfu or lru.")
+@click.option(
+    "--modules",
+    type=str,
+    default="hash,hash_pool",
+    help="Comma separated modules: sorted, hash, hash_pool.",
+)
+@click.option(
+    "--eviction_candidate_pool_size",
+    type=int,
+    default=1_000_000,
+    help="Pool size of hash_pool.",
+)
+def main(
+    zch_size: int,
+    ids_per_round: int,
+    id_range: int,
+    num_rounds: int,
+    num_warmup_rounds: int,
+    eviction_policy: str,
+    modules: str,
+    eviction_candidate_pool_size: int,
+) -> None:
+    for module in modules.split(","):
+        kwargs: Dict[str, Any] = {
+            "zch_size": zch_size,
+            "device": torch.device("cpu"),
+            "eviction_policy": EVICTION_POLICIES[eviction_policy](),
+            "eviction_interval": 1,
+        }
+        if module == "sorted":
+            mc_module = MCHManagedCollisionModule(**kwargs)
+        elif module == "hash":
+            mc_module = HashMCHManagedCollisionModule(**kwargs)
+        elif module == "hash_pool":
+            mc_module = HashMCHManagedCollisionModule(
+                eviction_candidate_pool_size=eviction_candidate_pool_size, **kwargs
+            )
+        else:
+            raise ValueError(f"Unknown module {module}")
+
+        latencies = torch.tensor(
+            benchmark_module(
+                mc_module, ids_per_round, id_range, num_rounds, num_warmup_rounds
+            ),
+            dtype=torch.double,
+        )
+        print(
+            f"{module:<10} {eviction_policy} zch_size: {zch_size} "
+            f"ids/round: {ids_per_round} | eviction round "
+            f"P50: {1000 * latencies.quantile(0.5).item():10.2f} ms "
+            f"P90: {1000 * latencies.quantile(0.9).item():10.2f} ms"
+        )
+        del mc_module
+
+
+if __name__ == "__main__":
+    main()
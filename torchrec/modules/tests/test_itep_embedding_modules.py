@@ -326,6 +326,65 @@ class TestITEPEmbeddingBagCollection(unittest.TestCase):
         # Check that reset_weight_momentum is called
         self.assertEqual(mock_reset_weight_momentum.call_count, 5)
 
+    # pyre-ignores
+    @unittest.skipIf(
+        torch.cuda.device_count() <= 1,
+        "Skip when not enough GPUs available",
+    )
+    def test_pruning_groups(self) -> None:
+        itep_module = GenericITEPModule(
+            table_name_to_unpruned_hash_sizes={},
+            pruning_num_steps=3,
+        )
+        self.assertEqual(
+            itep_module.get_pruning_groups([0, 100, 110, 120, 300]),
+            [(0, 1), (1, 3), (3, 4)],
+        )
+        # Never more groups than buffers, and every group is non empty
+        self.assertEqual(
+            itep_module.get_pruning_groups([0, 10, 300]),
+            [(0, 1), (1, 2)],
+        )
+        self.assertEqual(itep_module.get_pruning_groups([0, 300]), [(0, 1)])
+
+    # pyre-ignores
+    @unittest.skipIf(
+        torch.cuda.device_count() <= 1,
+        "Skip when not enough GPUs available",
+    )
+    # Mock out prune_tables to record the pruning steps
+    @patch(f"{MOCK_NS}.GenericITEPModule.prune_tables")
+    def test_staged_pruning_schedule(
+        self,
+        mock_prune_tables: MagicMock,
+    ) -> None:
+        itep_module = GenericITEPModule(
+            table_name_to_unpruned_hash_sizes=self._table_name_to_unpruned_hash_sizes,
+            lookups=self._mock_lookups,
+            enable_pruning=True,
+            pruning_interval=500,
+            pruning_num_steps=2,
+        )
+        self.assertEqual(itep_module.pruning_groups, [(0, 1), (1, 2)])
+
+        itep_ebc = ITEPEmbeddingBagCollection(
+            embedding_bag_collection=self._embedding_bag_collection,
+            itep_module=itep_module,
+        )
+
+        for _ in range(1001):
+            input_kjt = self.generate_input_kjt_cuda(
+                self._feature_name_to_unpruned_hash_sizes
+            )
+            _ = itep_ebc(input_kjt)
+
+        # Each of the 11 pruning rounds prunes one table per step
+        self.assertEqual(mock_prune_tables.call_count, 22)
+        self.assertEqual(
+            [call.args for call in mock_prune_tables.call_args_list[:4]],
+            [(0, 1, 2), (1, 2, 3), (0, 1, 5), (1, 2, 6)],
+        )
+
     # pyre-ignores
     @unittest.skipIf(
         torch.cuda.device_count() <= 1,
@@ -8,17 +8,20 @@
 # pyre-strict
 
 import unittest
-from typing import Dict
+from typing import Dict, Optional, Type
 
 import torch
+from torchrec.modules import mc_modules
 from torchrec.modules.mc_modules import (
     average_threshold_filter,
     DistanceLFU_EvictionPolicy,
     dynamic_threshold_filter,
+    HashMCHManagedCollisionModule,
     LFU_EvictionPolicy,
     LRU_EvictionPolicy,
     MCHManagedCollisionModule,
     probabilistic_threshold_filter,
+    shutdown_async_eviction,
 )
 from torchrec.sparse.jagged_tensor import JaggedTensor
 
@@ -427,3 +430,482 @@ class TestEvictionPolicy(unittest.TestCase):
         model.train(False)
         gm = torch.fx.symbolic_trace(model)
         torch.jit.script(gm)
+
+    def test_async_eviction(self) -> None:
+        for module_type in [MCHManagedCollisionModule, HashMCHManagedCollisionModule]:
+            self._test_async_eviction(module_type)
+        shutdown_async_eviction()
+        self.assertIsNone(mc_modules._async_eviction_executor)
+
+    def _test_async_eviction(
+        self, module_type: Type[MCHManagedCollisionModule]
+    ) -> None:
+        def make_module(async_eviction: bool) -> MCHManagedCollisionModule:
+            return module_type(
+                zch_size=5,
+                device=torch.device("cpu"),
+                eviction_policy=LFU_EvictionPolicy(),
+                eviction_interval=1,
+                input_hash_size=100,
+                async_eviction=async_eviction,
+            )
+
+        sync_module = make_module(async_eviction=False)
+        async_module = make_module(async_eviction=True)
+        steps = [[3, 4, 4, 5], [6, 6, 6, 7, 7, 4], [8, 8, 8, 8, 9, 9, 9], [3, 4, 8]]
+        previous_sync_evicted: Optional[torch.Tensor] = None
+        for ids in steps:
+            features: Dict[str, JaggedTensor] = {
+                "f1": JaggedTensor(
+                    values=torch.tensor(ids, dtype=torch.int64),
+                    lengths=torch.tensor([1] * len(ids), dtype=torch.int64),
+                )
+            }
+            # async lags one eviction round behind: its mapping is the one from
+            # before this step's round
+            expected_remapped = sync_module.remap(features)["f1"].values().tolist()
+            sync_module.profile(features)
+            sync_evicted = sync_module.evict()
+
+            async_module.profile(features)
+            self.assertEqual(
+                async_module.remap(features)["f1"].values().tolist(),
+                expected_remapped,
+            )
+            # the round in flight does not update the module
+            buffers = {
+                name: async_module.get_buffer(name).clone()
+                for name in async_module._eviction_buffer_names()
+            }
+            future = async_module._async_eviction_future
+            self.assertIsNotNone(future)
+            future.result()
+            for name, buffer in buffers.items():
+                self.assertTrue(torch.equal(async_module.get_buffer(name), buffer))
+            async_evicted = async_module.evict()
+            if previous_sync_evicted is None:
+                self.assertIsNone(async_evicted)
+            else:
+                self.assertIsNotNone(async_evicted)
+                self.assertEqual(
+                    sorted(async_evicted.tolist()),
+                    sorted(previous_sync_evicted.tolist()),
+                )
+            previous_sync_evicted = sync_evicted
+
+        # state_dict waits for the round in flight
+        sync_state = sync_module.state_dict()
+        async_state = async_module.state_dict()
+        self.assertIsNone(async_module._async_eviction_future)
+        for name, tensor in sync_state.items():
+            self.assertTrue(torch.equal(async_state[name], tensor), name)
+
+    def test_admission_sketch(self) -> None:
+        for module_type in [MCHManagedCollisionModule, HashMCHManagedCollisionModule]:
+            mc_module = module_type(
+                zch_size=100,
+                device=torch.device("cpu"),
+                eviction_policy=LFU_EvictionPolicy(),
+                eviction_interval=1,
+                input_hash_size=100,
+                admission_threshold=3,
+            )
+            ids = torch.tensor([1, 2])
+            # id 1 reaches 3 occurrences in the second interval, id 2 in the third
+            for step_ids, expected in [
+                ([1, 1, 2], [False, False]),
+                ([1, 2], [True, False]),
+                ([2], [True, True]),
+            ]:
+                mc_module.profile(
+                    {
+                        "f1": JaggedTensor(
+                            values=torch.tensor(step_ids, dtype=torch.int64),
+                            lengths=torch.tensor([len(step_ids)], dtype=torch.int64),
+                        )
+                    }
+                )
+                self.assertEqual(mc_module._ids_in_table(ids).tolist(), expected)
+
+            # the sketch is checkpointed with the table
+            state_dict = mc_module.state_dict()
+            self.assertIn("_admission_sketch", state_dict)
+            self.assertEqual(state_dict["_admission_sketch"].shape, (100, 4))
+            self.assertEqual(state_dict["_admission_sketch"].sum().item(), 6 * 4)
+
+    def test_compact_state_dict(self) -> None:
+        mc_module = MCHManagedCollisionModule(
+            zch_size=20,
+            device=torch.device("cpu"),
+            eviction_policy=LFU_EvictionPolicy(),
+            eviction_interval=1,
+            input_hash_size=1000,
+        )
+        ids = [900, 3, 3, 17, 250, 17, 17, 42]
+        mc_module.profile(
+            {
+                "f1": JaggedTensor(
+                    values=torch.tensor(ids, dtype=torch.int64),
+                    lengths=torch.tensor([len(ids)], dtype=torch.int64),
+                )
+            }
+        )
+        compact_state = mc_module.compact_state_dict()
+        # only the 5 occupied slots, with the deltas of the sorted ids
+        self.assertEqual(compact_state["first_raw_id"].tolist(), [3])
+        self.assertEqual(compact_state["raw_id_deltas"].tolist(), [0, 14, 25, 208, 650])
+        self.assertEqual(compact_state["raw_id_deltas"].dtype, torch.int16)
+        self.assertEqual(compact_state["slots"].dtype, torch.int32)
+        self.assertEqual(compact_state["metadata.counts"].tolist(), [2, 3, 1, 1, 1])
+
+        reloaded = MCHManagedCollisionModule(
+            zch_size=20,
+            device=torch.device("cpu"),
+            eviction_policy=LFU_EvictionPolicy(),
+            eviction_interval=1,
+            input_hash_size=1000,
+        )
+        reloaded.load_compact_state_dict([compact_state], chunk_size=2)
+        reloaded_state = reloaded.compact_state_dict()
+        for key, value in compact_state.items():
+            self.assertTrue(torch.equal(reloaded_state[key], value), key)
+        self.assertEqual(reloaded.open_slots().item(), 14)
+        remapped = reloaded.remap(
+            {
+                "f1": JaggedTensor(
+                    values=torch.tensor(ids, dtype=torch.int64),
+                    lengths=torch.tensor([len(ids)], dtype=torch.int64),
+                )
+            }
+        )
+        self.assertEqual(
+            remapped["f1"].values().tolist(),
+            mc_module.remap(
+                {
+                    "f1": JaggedTensor(
+                        values=torch.tensor(ids, dtype=torch.int64),
+                        lengths=torch.tensor([len(ids)], dtype=torch.int64),
+                    )
+                }
+            )["f1"]
+            .values()
+            .tolist(),
+        )
+
+    def test_compact_state_dict_reshard(self) -> None:
+        mc_module = MCHManagedCollisionModule(
+            zch_size=20,
+            device=torch.device("cpu"),
+            eviction_policy=LFU_EvictionPolicy(),
+            eviction_interval=1,
+            input_hash_size=1000,
+        )
+        # few enough ids for any shard to keep all of its ids
+        ids = list(range(100, 900, 100))
+        features = {
+            "f1": JaggedTensor(
+                values=torch.tensor(ids, dtype=torch.int64),
+                lengths=torch.tensor([len(ids)], dtype=torch.int64),
+            )
+        }
+        mc_module.profile(features)
+        expected = mc_module.remap(features)["f1"].values()
+        compact_states = [mc_module.compact_state_dict()]
+
+        # the shards of a 2 way sharding only keep their output id range
+        shards = [
+            mc_module.rebuild_with_output_id_range(
+                output_id_range=output_id_range,
+                output_segments=[0, 10, 20],
+                device=torch.device("cpu"),
+                compact_states=compact_states,
+            )
+            for output_id_range in [(0, 10), (10, 20)]
+        ]
+        for shard, (start, end) in zip(shards, [(0, 10), (10, 20)]):
+            in_shard = (expected >= start) & (expected < end)
+            remapped = shard.remap(
+                {
+                    "f1": JaggedTensor(
+                        values=torch.tensor(ids, dtype=torch.int64)[in_shard],
+                        lengths=torch.tensor([int(in_shard.sum())], dtype=torch.int64),
+                    )
+                }
+            )
+            self.assertEqual(
+                remapped["f1"].values().tolist(), expected[in_shard].tolist()
+            )
+
+        # and back to a single shard
+        merged = shards[0].rebuild_with_output_id_range(
+            output_id_range=(0, 20),
+            output_segments=[0, 20],
+            device=torch.device("cpu"),
+            compact_states=(shard.compact_state_dict() for shard in shards),
+        )
+        self.assertEqual(
+            merged.remap(features)["f1"].values().tolist(), expected.tolist()
+        )
+
+    def test_load_compact_state_dict_full(self) -> None:
+        mc_module = MCHManagedCollisionModule(
+            zch_size=4,
+            device=torch.device("cpu"),
+            eviction_policy=LFU_EvictionPolicy(),
+            eviction_interval=1,
+            input_hash_size=1000,
+        )
+        # as many ids as slots, e.g. from a larger output id range
+        mc_module.load_compact_state_dict(
+            [
+                {
+                    "version": torch.tensor([1]),
+                    "output_range": torch.tensor([0, 4]),
+                    "current_iter": torch.tensor([1]),
+                    "first_raw_id": torch.tensor([10]),
+                    "raw_id_deltas": torch.tensor([0, 10, 10, 10]),
+                    "slots": torch.tensor([3, 0, 1, 2], dtype=torch.int32),
+                    "metadata.counts": torch.tensor([4, 3, 2, 1], dtype=torch.int32),
+                }
+            ]
+        )
+        # the id of the last slot gives it up to the ids that are not in the table
+        self.assertEqual(mc_module._mch_remapped_ids_mapping.tolist(), [0, 1, 2, 3])
+        self.assertEqual(
+            mc_module._mch_sorted_raw_ids.tolist(),
+            [20, 30, 40, torch.iinfo(torch.int64).max],
+        )
+        self.assertEqual(mc_module.compact_state_dict()["slots"].tolist(), [0, 1, 2])
+        self.assertEqual(mc_module.open_slots().item(), 0)
+        remapped = mc_module.remap(
+            {
+                "f1": JaggedTensor(
+                    values=torch.tensor([10, 20, 30, 40, 50]),
+                    lengths=torch.tensor([5]),
+                )
+            }
+        )
+        self.assertEqual(remapped["f1"].values().tolist(), [3, 0, 1, 2, 3])
+
+
+class TestHashMCHManagedCollisionModule(unittest.TestCase):
+    def test_lfu_eviction(self) -> None:
+        mc_module = HashMCHManagedCollisionModule(
+            zch_size=5,
+            device=torch.device("cpu"),
+            eviction_policy=LFU_EvictionPolicy(),
+            eviction_interval=1,
+            input_hash_size=100,
+        )
+        self.assertEqual(mc_module.open_slots().item(), 4)
+
+        # we have 10 counts of 4 and 1 count of 5
+        mc_module._mch_raw_ids[0:2] = torch.tensor([4, 5])
+        # pyre-fixme[29]: `Union[(self: TensorBase, indices: Union[None, _NestedSeque...
+        mc_module._mch_counts[0:2] = torch.tensor([10, 1])
+        mc_module._rebuild_hash_table()
+
+        ids = [3, 4, 5, 6, 6, 6, 7, 7, 7, 8, 8, 8, 9, 10]
+        features: Dict[str, JaggedTensor] = {
+            "f1": JaggedTensor(
+                values=torch.tensor(ids, dtype=torch.int64),
+                lengths=torch.tensor([1] * len(ids), dtype=torch.int64),
+            )
+        }
+        mc_module.profile(features)
+
+        # 5, empty, empty are replaced in place by 6, 7, 8
+        self.assertEqual(
+            mc_module._mch_raw_ids.tolist(),
+            [4, 6, 7, 8, torch.iinfo(torch.int64).max],
+        )
+        self.assertEqual(
+            # pyre-fixme[29]: `Union[(self: TensorBase) -> list[Any], Tensor,
+            #  Module]` is not a function.
+            mc_module._mch_counts.tolist(),
+            [11, 3, 3, 3, torch.iinfo(torch.int64).max],
+        )
+        # pyre-fixme[16]: `Optional` has no attribute `tolist`.
+        self.assertEqual(mc_module.evict().tolist(), [1, 2, 3])
+        self.assertEqual(mc_module.open_slots().item(), 0)
+
+        remapped = mc_module.remap(
+            {
+                "f1": JaggedTensor(
+                    values=torch.tensor([8, 4, 5, 6]),
+                    lengths=torch.tensor([4]),
+                )
+            }
+        )
+        self.assertEqual(remapped["f1"].values().tolist(), [3, 0, 4, 1])
+
+    def test_matches_hash_table(self) -> None:
+        zch_size = 64
+        output_global_offset = 1000
+        mc_module = HashMCHManagedCollisionModule(
+            zch_size=zch_size,
+            device=torch.device("cpu"),
+            eviction_policy=DistanceLFU_EvictionPolicy(),
+            eviction_interval=1,
+            input_hash_size=1000,
+            output_global_offset=output_global_offset,
+            output_segments=[output_global_offset, output_global_offset + zch_size],
+        )
+        generator = torch.Generator().manual_seed(0)
+        for _ in range(200):
+            ids = torch.randint(0, 300, (50,), generator=generator)
+            features = {"f1": JaggedTensor(values=ids, lengths=torch.tensor([50]))}
+            remapped = mc_module(features)["f1"].values()
+            evicted = mc_module.evict()
+
+            raw_ids = mc_module._mch_raw_ids.tolist()
+            slots = {
+                raw_id: slot
+                for slot, raw_id in enumerate(raw_ids[:-1])
+                if raw_id != torch.iinfo(torch.int64).max
+            }
+            self.assertEqual(
+                remapped.tolist(),
+                [
+                    output_global_offset + slots.get(i, zch_size - 1)
+                    for i in ids.tolist()
+                ],
+            )
+            if evicted is not None:
+                self.assertTrue(
+                    all(
+                        raw_ids[i - output_global_offset]
+                        != torch.iinfo(torch.int64).max
+                        for i in evicted.tolist()
+                    )
+                )
+            # the hash table only holds the ids of the slots
+            keys = mc_module._hash_table_keys
+            live = (keys != torch.iinfo(torch.int64).max) & (
+                keys != torch.iinfo(torch.int64).min
+            )
+            self.assertEqual(sorted(keys[live].tolist()), sorted(slots))
+
+        # the hash table is rebuilt on load
+        loaded = HashMCHManagedCollisionModule(
+            zch_size=zch_size,
+            device=torch.device("cpu"),
+            eviction_policy=DistanceLFU_EvictionPolicy(),
+            eviction_interval=1,
+            input_hash_size=1000,
+            output_global_offset=output_global_offset,
+            output_segments=[output_global_offset, output_global_offset + zch_size],
+        )
+        loaded.load_state_dict(mc_module.state_dict())
+        loaded.eval()
+        mc_module.eval()
+        ids = torch.arange(300)
+        features = {"f1": JaggedTensor(values=ids, lengths=torch.tensor([300]))}
+        self.assertEqual(
+            loaded(features)["f1"].values().tolist(),
+            mc_module(features)["f1"].values().tolist(),
+        )
+
+    def test_eviction_candidate_pool(self) -> None:
+        def make_module(
+            eviction_candidate_pool_size: Optional[int],
+        ) -> HashMCHManagedCollisionModule:
+            return HashMCHManagedCollisionModule(
+                zch_size=9,
+                device=torch.device("cpu"),
+                eviction_policy=LFU_EvictionPolicy(),
+                eviction_interval=1,
+                input_hash_size=100,
+                eviction_candidate_pool_size=eviction_candidate_pool_size,
+            )
+
+        full_scan = make_module(None)
+        pooled = make_module(2)
+        rounds = [
+            # id i seen i times, all inserted
+            [i for i in range(1, 9) for _ in range(i)],
+            # 20 and 21 replace the 2 least frequent ids 1 and 2
+            [20] * 20 + [21] * 30,
+            # 3 and 4 are in the pool, 3 is seen again so 4 is evicted for 30
+            [3, 3] + [30] * 6,
+        ]
+        expected_ids = [
+            set(range(1, 9)),
+            set(range(3, 9)) | {20, 21},
+            {3, 5, 6, 7, 8, 20, 21, 30},
+        ]
+        for i, (ids, expected) in enumerate(zip(rounds, expected_ids)):
+            features = {
+                "f1": JaggedTensor(
+                    values=torch.tensor(ids), lengths=torch.tensor([len(ids)])
+                )
+            }
+            for mc_module in [full_scan, pooled]:
+                mc_module.profile(features)
+                self.assertEqual(
+                    set(mc_module._mch_raw_ids[:-1].tolist()),
+                    expected,
+                )
+            if i > 0:
+                # the pool was used, without a full scan
+                self.assertIsNotNone(pooled._eviction_candidates)
+
+        with self.assertRaises(ValueError):
+            HashMCHManagedCollisionModule(
+                zch_size=9,
+                device=torch.device("cpu"),
+                eviction_policy=DistanceLFU_EvictionPolicy(),
+                eviction_interval=1,
+                eviction_candidate_pool_size=2,
+            )
+
+    def test_compact_state_dict(self) -> None:
+        mc_module = HashMCHManagedCollisionModule(
+            zch_size=16,
+            device=torch.device("cpu"),
+            eviction_policy=LRU_EvictionPolicy(),
+            eviction_interval=1,
+            input_hash_size=1000,
+        )
+        ids = [900, 3, 3, 17, 250, 17, 42]
+        features: Dict[str, JaggedTensor] = {
+            "f1": JaggedTensor(
+                values=torch.tensor(ids, dtype=torch.int64),
+                lengths=torch.tensor([len(ids)], dtype=torch.int64),
+            )
+        }
+        mc_module.profile(features)
+        compact_state = mc_module.compact_state_dict()
+        self.assertEqual(compact_state["first_raw_id"].tolist(), [3])
+        self.assertEqual(compact_state["raw_id_deltas"].numel(), 5)
+
+        reloaded = HashMCHManagedCollisionModule(
+            zch_size=16,
+            device=torch.device("cpu"),
+            eviction_policy=LRU_EvictionPolicy(),
+            eviction_interval=1,
+            input_hash_size=1000,
+        )
+        reloaded.load_compact_state_dict([compact_state])
+        # the ids are restored at their slot
+        self.assertEqual(
+            reloaded._mch_raw_ids.tolist(),
+            mc_module._mch_raw_ids.tolist(),
+        )
+        self.assertEqual(
+            reloaded.remap(features)["f1"].values().tolist(),
+            mc_module.remap(features)["f1"].values().tolist(),
+        )
+
+    def test_fx_jit_script_not_training(self) -> None:
+        model = HashMCHManagedCollisionModule(
+            zch_size=5,
+            device=torch.device("cpu"),
+            eviction_policy=LFU_EvictionPolicy(),
+            eviction_interval=1,
+            input_hash_size=100,
+        )
+
+        model.train(False)
+        gm = torch.fx.symbolic_trace(model)
+        torch.jit.script(gm)